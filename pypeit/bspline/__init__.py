@@ -1,3 +1,3 @@
 
-from pypeit.bspline.bspline import bspline
+from pypeit.bspline.bspline import bspline, BsplineWorkspace, set_num_threads, get_num_threads
 
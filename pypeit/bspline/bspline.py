@@ -21,12 +21,14 @@ from pypeit import msgs
 
 try:
     from pypeit.bspline.utilc import cholesky_band, cholesky_solve, solution_arrays, intrv, \
-                                     bspline_model
+                                     bspline_model, update_solution_arrays, \
+                                     set_num_threads, get_num_threads
 except:
     warnings.warn('Unable to load bspline C extension.  Try rebuilding pypeit.  In the '
                   'meantime, falling back to pure python code.')
     from pypeit.bspline.utilpy import cholesky_band, cholesky_solve, solution_arrays, intrv, \
-                                        bspline_model
+                                        bspline_model, update_solution_arrays, \
+                                        set_num_threads, get_num_threads
 
 # TODO: Used for testing.  Keep around for now.
 #from pypeit.bspline.utilpy import bspline_model
@@ -597,7 +599,7 @@ class bspline(datamodel.DataContainer):
             return -2
         return -2
 
-    def workit(self, xdata, ydata, invvar, action, lower, upper):
+    def workit(self, xdata, ydata, invvar, action, lower, upper, workspace=None):
         """An internal routine for bspline_extract and bspline_radial which solve a general
         banded correlation matrix which is represented by the variable "action".  This routine
         only solves the linear system once, and stores the coefficients in sset. A non-zero return value
@@ -618,6 +620,11 @@ class bspline(datamodel.DataContainer):
             A list of pixel positions, each corresponding to the first occurence of position greater than breakpoint indx
         upper  : :class:`numpy.ndarray`
             Same as lower, but denotes the upper pixel positions
+        workspace : :class:`BsplineWorkspace`, optional
+            Workspace used to construct the arrays for the Cholesky
+            decomposition, which are reused by subsequent calls that
+            only change ``invvar``.  If None, the arrays are
+            constructed from scratch.
 
         Returns
         -------
@@ -636,8 +643,8 @@ class bspline(datamodel.DataContainer):
             # KBW: Why is the dtype set to 'f' = np.float32?
             return -2, np.zeros(ydata.shape, dtype=float)
 
-        alpha, beta = solution_arrays(nn, self.npoly, self.nord, ydata, action, invvar, upper,
-                                      lower)
+        alpha, beta = (solution_arrays if workspace is None else workspace.solution_arrays)(
+                            nn, self.npoly, self.nord, ydata, action, invvar, upper, lower)
         nfull = nn * self.npoly
 
         # Right now we are not returning the covariance, although it may arise that we should
@@ -662,6 +669,124 @@ class bspline(datamodel.DataContainer):
         return 0, self.value(xdata, x2=xdata, action=action, upper=upper, lower=lower)[0]
 
 
+class BsplineWorkspace:
+    """
+    Reusable workspace for the iterative fit of a bspline.
+
+    The rejection iterations of a fit (see
+    :func:`pypeit.utils.bspline_profile`) only change the breakpoint
+    mask when breakpoints are dropped, and otherwise only change the
+    weights of the data.  This class caches the action matrix, the
+    breakpoint interval of each datum, and the arrays for the Cholesky
+    decomposition, such that the action matrix is only rebuilt when
+    the breakpoint mask changes, and the arrays for the Cholesky
+    decomposition are updated only for the data whose weights changed.
+
+    The data provided to the workspace must not be modified in place
+    between calls.
+
+    Args:
+        max_update (:obj:`float`, optional):
+            Maximum fraction of the data that can be updated before
+            the arrays for the Cholesky decomposition are rebuilt from
+            scratch, which limits the accumulation of round-off errors
+            and the cost of the updates.  Set to 0 to always rebuild
+            the arrays.
+    """
+    def __init__(self, max_update=0.25):
+        self.max_update = max_update
+        # Action matrix
+        self.bkmask = None
+        self.action = None
+        self.lower = None
+        self.upper = None
+        # Solution arrays
+        self.key = None
+        self.interval = None
+        self.invvar = None
+        self.alpha = None
+        self.beta = None
+        self.nupdate = 0
+
+    def profile_action(self, sset, xdata, profile_basis):
+        """
+        Construct the action matrix for a bspline fit of a set of
+        profile basis functions.
+
+        The matrix is only rebuilt if the breakpoint mask of the
+        bspline changed since the last call.
+
+        Args:
+            sset (:class:`bspline`):
+                Bspline to fit.
+            xdata (`numpy.ndarray`_):
+                Independent variable; must be sorted.
+            profile_basis (`numpy.ndarray`_):
+                Model profiles; see
+                :func:`pypeit.utils.bspline_profile`.
+
+        Returns:
+            :obj:`tuple`: The action matrix and the ``lower`` and
+            ``upper`` vectors; see :func:`bspline.action`.
+        """
+        if self.action is not None and np.array_equal(sset.mask, self.bkmask):
+            return self.action, self.lower, self.upper
+        nx = xdata.size
+        bf1, self.lower, self.upper = sset.action(xdata)
+        if np.any(bf1 == -2) or bf1.size != nx*sset.nord:
+            msgs.error("BSPLINE_ACTION failed!")
+        npoly = profile_basis.size // nx
+        basis = profile_basis.flatten('F').reshape(nx, npoly, order='F')
+        self.action = np.empty((nx, npoly*sset.nord), dtype=float, order='F')
+        for ipoly in range(npoly):
+            self.action[:, np.arange(sset.nord)*npoly + ipoly] = bf1 * basis[:,ipoly,None]
+        self.bkmask = sset.mask.copy()
+        return self.action, self.lower, self.upper
+
+    def solution_arrays(self, nn, npoly, nord, ydata, action, invvar, upper, lower):
+        """
+        Construct the arrays for Cholesky decomposition.
+
+        If the input is the same as for the last call except for
+        ``invvar``, the last arrays are updated for the data with a
+        different inverse variance; otherwise, they are constructed
+        from scratch.  See
+        :func:`pypeit.bspline.utilc.solution_arrays` for the
+        arguments.
+
+        Returns:
+            :obj:`tuple`: The matrix :math:`A` and vector :math:`b`
+            used in the solution to the equation :math:`Ax=b`.  The
+            arrays are held by the workspace and must not be modified.
+        """
+        key = (nn, npoly, nord, ydata, action, upper, lower)
+        if self.key is not None and key[:3] == self.key[:3] \
+                and all([a is b for a, b in zip(key[3:], self.key[3:])]):
+            pts = np.flatnonzero(invvar != self.invvar)
+            self.nupdate += pts.size
+            if self.nupdate <= self.max_update*invvar.size:
+                intv = self.interval[pts]
+                indx = intv > -1
+                update_solution_arrays(npoly, nord, ydata, action, pts[indx], intv[indx],
+                                       (invvar - self.invvar)[pts[indx]], self.alpha, self.beta)
+                self.invvar = invvar.copy()
+                return self.alpha, self.beta
+
+        self.alpha, self.beta = solution_arrays(nn, npoly, nord, ydata, action, invvar, upper,
+                                                lower)
+        # Breakpoint interval of each datum; -1 for data outside all
+        # intervals
+        nonzero = upper >= lower
+        counts = (upper - lower + 1)[nonzero]
+        self.interval = np.full(ydata.size, -1, dtype=int)
+        self.interval[np.repeat(lower[nonzero] - np.cumsum(counts) + counts, counts)
+                      + np.arange(np.sum(counts))] = np.repeat(np.flatnonzero(nonzero), counts)
+        self.key = key
+        self.invvar = invvar.copy()
+        self.nupdate = 0
+        return self.alpha, self.beta
+
+
 # TODO: Move this somewhere for more common access?
 # Faster than previous version but not as fast as if we could switch to
 # np.unique.
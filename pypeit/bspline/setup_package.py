@@ -1,6 +1,7 @@
 import os
 import sys
 from distutils.extension import Extension
+from extension_helpers import add_openmp_flags_if_available
 
 C_BSPLINE_PKGDIR = os.path.relpath(os.path.dirname(__file__))
 
@@ -12,6 +13,9 @@ if not sys.platform.startswith('win'):
     extra_compile_args.append('-fPIC')
 
 def get_extensions():
-    return [Extension(name='pypeit.bspline._bspline', sources=SRC_FILES,
-                      extra_compile_args=extra_compile_args, language='c')]
+    extension = Extension(name='pypeit.bspline._bspline', sources=SRC_FILES,
+                          extra_compile_args=extra_compile_args, language='c')
+    # The kernels are serial if OpenMP is not available
+    add_openmp_flags_if_available(extension)
+    return [extension]
 
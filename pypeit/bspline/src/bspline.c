@@ -7,9 +7,45 @@ Support algorithms for bspline.
 #include <stdbool.h>
 #include <math.h>
 
+#ifdef _OPENMP
+#include <omp.h>
+#endif
+
 #include "bspline.h"
 
 
+// Number of threads used by the kernels that support OpenMP.
+static int bspline_nthreads = 1;
+
+
+void set_num_threads(int n) {
+    /*
+    Set the number of threads used by the kernels.
+
+    The kernels are serial if n is 1 or the library was compiled
+    without OpenMP support.
+
+    Args:
+        n:
+            Number of threads. Values less than 1 are set to 1.
+    */
+    bspline_nthreads = n < 1 ? 1 : n;
+}
+
+
+int get_num_threads(void) {
+    /*
+    Return the number of threads used by the kernels; always 1 if the
+    library was compiled without OpenMP support.
+    */
+#ifdef _OPENMP
+    return bspline_nthreads;
+#else
+    return 1;
+#endif
+}
+
+
 int column_to_row_major_index(int k, int nr, int nc) {
     /*
     Convert a flattened index in a column-major stored array into the
@@ -123,6 +159,10 @@ void bspline_model(double *action, long *lower, long *upper, double *coeff, int
     int nn = npoly*nord;    // This is the same as the number of columns in action
     int mm = n - nord+1;
     int i, j, k;
+    // Each datum is in a single interval, so the intervals can be
+    // computed in parallel
+    #pragma omp parallel for private(j, k) schedule(static) \
+                if(bspline_nthreads > 1) num_threads(bspline_nthreads)
     for (i = 0; i < mm; ++i) {
         if (!(upper[i]+1 > lower[i]))
             continue;
@@ -163,6 +203,89 @@ void intrv(int nord, double *breakpoints, int nb, double *x, int nx, long *indx)
 }
 
 
+#ifdef _OPENMP
+void solution_arrays_omp(int nn, int npoly, int nord, int nd, double *ydata, double *ivar,
+                         double *action, long *upper, long *lower, double *alpha, int ar,
+                         double *beta, int bn) {
+    /*
+    Multithreaded version of solution_arrays; see that function for
+    the arguments.
+
+    The sums over the data in each breakpoint interval are computed in
+    parallel and then added to alpha and beta in the order of the
+    intervals. The result is therefore independent of the number of
+    threads, but can differ from solution_arrays at the level of the
+    numerical precision.
+    */
+    // Get the upper triangle indices
+    int bw = npoly * nord;      // This is the length of the second axis of action
+    int nbi = bw*(bw+1)/2;
+    int *bi = upper_triangle(bw, false);
+    int *bo = upper_triangle(bw, true);
+    int nk = nn-nord+1;
+
+    int i, j, k;
+    int itop;
+
+    // Indices of each element of the upper triangle in a2
+    int *ai = (int*) malloc (nbi * sizeof(int));
+    int *aj = (int*) malloc (nbi * sizeof(int));
+    for (i = 0; i < nbi; ++i)
+        flat_row_major_indices(bi[i], nd, bw, &ai[i], &aj[i]);
+
+    // Convenience data
+    double *ierr = (double*) malloc (nd * sizeof(double));
+    double *a2 = (double*) malloc (nd*bw * sizeof(double));
+    #pragma omp parallel for private(j) schedule(static) num_threads(bspline_nthreads)
+    for (i = 0; i < nd; ++i) {
+        ierr[i] = sqrt(ivar[i]);
+        for (j = 0; j < bw; ++j)
+            a2[i*bw + j] = action[j*nd + i] * ierr[i];
+    }
+
+    // Sums over the data in each interval
+    double *asum = (double*) calloc (nk*nbi, sizeof(double));
+    double *bsum = (double*) calloc (nk*bw, sizeof(double));
+    #pragma omp parallel for private(i, j) schedule(dynamic, 16) num_threads(bspline_nthreads)
+    for (k = 0; k < nk; ++k) {
+        if (!(upper[k]+1 > lower[k]))
+            continue;
+        for (i = 0; i < nbi; ++i)
+            for (j = lower[k]; j <= upper[k]; ++j)
+                asum[k*nbi+i] += a2[j*bw+ai[i]] * a2[j*bw+aj[i]];
+        for (i = 0; i < bw; ++i)
+            for (j = lower[k]; j <= upper[k]; ++j)
+                bsum[k*bw+i] += ydata[j] * ierr[j] * a2[j*bw + i];
+    }
+
+    // Zero input arrays
+    for (i = 0; i < ar*bn; ++i)
+        alpha[i] = 0;
+    for (i = 0; i < bn; ++i)
+        beta[i] = 0;
+
+    // Construct alpha and beta
+    for (k = 0; k < nk; ++k) {
+        itop = k*npoly;
+        for (i = 0; i < nbi; ++i)
+            alpha[column_to_row_major_index(bo[i]+itop*bw, ar, bn)] += asum[k*nbi+i];
+        for (i = 0; i < bw; ++i)
+            beta[itop+i] += bsum[k*bw+i];
+    }
+
+    // Free memory
+    free(bsum);
+    free(asum);
+    free(a2);
+    free(ierr);
+    free(aj);
+    free(ai);
+    free(bo);
+    free(bi);
+}
+#endif
+
+
 void solution_arrays(int nn, int npoly, int nord, int nd, double *ydata, double *ivar,
                      double *action, long *upper, long *lower, double *alpha, int ar,
                      double *beta, int bn) {
@@ -217,6 +340,14 @@ void solution_arrays(int nn, int npoly, int nord, int nd, double *ydata, double
             Number of elements in beta. Same as the number of columns
             in alpha.
     */
+#ifdef _OPENMP
+    if (bspline_nthreads > 1) {
+        solution_arrays_omp(nn, npoly, nord, nd, ydata, ivar, action, upper, lower, alpha, ar,
+                            beta, bn);
+        return;
+    }
+#endif
+
     // Get the upper triangle indices
     int bw = npoly * nord;      // This is the length of the second axis of action
     int nbi = bw*(bw+1)/2;
@@ -269,6 +400,83 @@ void solution_arrays(int nn, int npoly, int nord, int nd, double *ydata, double
 }
 
 
+void update_solution_arrays(int npoly, int nord, int nd, double *ydata, double *action,
+                            int nu, long *pts, long *intv, double *dw, double *alpha, int ar,
+                            double *beta, int bn) {
+    /*
+    Update the arrays for Cholesky decomposition constructed by
+    solution_arrays for a change in the weights of a subset of the
+    data.
+
+    The update adds the terms of each selected datum weighted by the
+    change in its inverse variance; i.e., the result is the same as
+    calling solution_arrays with the new inverse variances, to within
+    numerical precision.
+
+    Array size requirements are the same as for solution_arrays.
+
+    Args:
+        npoly:
+            Polynomial per fit order.
+        nord:
+            Fit order.
+        nd:
+            Total number of data points.
+        ydata:
+            Data to fit
+        action:
+            Action matrix. See pypeit.bspline.bspline.bspline.action.
+            The shape of the array is expected to be ``nd`` by
+            ``npoly*nord``.
+        nu:
+            Number of data points to update.
+        pts:
+            Indices of the data points to update.
+        intv:
+            Index of the breakpoint interval (the index along upper
+            and lower in solution_arrays) of each updated data point.
+        dw:
+            Change in the inverse variance of each updated data
+            point.
+        alpha:
+            Solution matrix for Cholesky decomposition to update.
+        ar:
+            Number of rows (first axis) in alpha.
+        beta:
+            Solution vector for Cholesky decomposition to update.
+        bn:
+            Number of elements in beta. Same as the number of columns
+            in alpha.
+    */
+    // Get the upper triangle indices
+    int bw = npoly * nord;      // This is the length of the second axis of action
+    int nbi = bw*(bw+1)/2;
+    int *bi = upper_triangle(bw, false);
+    int *bo = upper_triangle(bw, true);
+
+    int i, u;
+    int ii, jj, kk;
+    int itop;
+    long j;
+    double wy;
+
+    for (u = 0; u < nu; ++u) {
+        j = pts[u];
+        itop = intv[u]*npoly;
+        for (i = 0; i < nbi; ++i) {
+            kk = column_to_row_major_index(bo[i]+itop*bw, ar, bn);
+            flat_row_major_indices(bi[i], nd, bw, &ii, &jj);
+            alpha[kk] += dw[u] * action[ii*nd + j] * action[jj*nd + j];
+        }
+        wy = dw[u] * ydata[j];
+        for (i = 0; i < bw; ++i)
+            beta[itop+i] += wy * action[i*nd + j];
+    }
+    // Free memory
+    free(bo);
+    free(bi);
+}
+
 int cholesky_band(double *lower, int lr, int lc) {
     /*
        Compute the Cholesky decomposition of banded matrix.
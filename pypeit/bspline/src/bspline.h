@@ -4,6 +4,8 @@
 
 #include <stdbool.h>
 
+void set_num_threads(int n);
+int get_num_threads(void);
 int column_to_row_major_index(int k, int nr, int nc);
 void flat_row_major_indices(int k, int nr, int nc, int *i, int *j);
 int* upper_triangle(int kn, bool upper_left);
@@ -13,6 +15,14 @@ void intrv(int nord, double *breakpoints, int nb, double *x, int nx, long *indx)
 void solution_arrays(int nn, int npoly, int nord, int nd, double *ydata, double *ivar,
                      double *action, long *upper, long *lower, double *alpha, int ar,
                      double *beta, int bn);
+void update_solution_arrays(int npoly, int nord, int nd, double *ydata, double *action,
+                            int nu, long *pts, long *intv, double *dw, double *alpha, int ar,
+                            double *beta, int bn);
+#ifdef _OPENMP
+void solution_arrays_omp(int nn, int npoly, int nord, int nd, double *ydata, double *ivar,
+                         double *action, long *upper, long *lower, double *alpha, int ar,
+                         double *beta, int bn);
+#endif
 void cholesky_solve(double *a, int ar, int ac, double *b, int bn);
 int cholesky_band(double *lower, int lr, int lc);
 
@@ -21,6 +21,50 @@ try:
 except Exception:
     raise ImportError('Unable to load bspline C extension.  Try rebuilding pypeit.')
 
+#-----------------------------------------------------------------------
+set_num_threads_c = _bspline.set_num_threads
+set_num_threads_c.restype = None
+set_num_threads_c.argtypes = [ctypes.c_int]
+
+get_num_threads_c = _bspline.get_num_threads
+get_num_threads_c.restype = ctypes.c_int
+get_num_threads_c.argtypes = []
+
+def set_num_threads(n):
+    """
+    Set the number of threads used by the C functions.
+
+    The model evaluation (:func:`bspline_model`) and the construction
+    of the arrays for Cholesky decomposition
+    (:func:`solution_arrays`) are multithreaded if ``n > 1`` and the C
+    extension was compiled with OpenMP support; otherwise, they are
+    serial.  The multithreaded version of :func:`solution_arrays` sums
+    the data in a different order, such that its results can differ
+    from the serial version at the level of the numerical precision.
+    The default number of threads is set by the
+    ``PYPEIT_BSPLINE_THREADS`` environment variable, and is 1 if the
+    variable is not defined.
+
+    Args:
+        n (:obj:`int`):
+            Number of threads.
+    """
+    set_num_threads_c(int(n))
+
+def get_num_threads():
+    """
+    Return the number of threads used by the C functions.
+
+    Returns:
+        :obj:`int`: Number of threads; always 1 if the C extension was
+        compiled without OpenMP support.
+    """
+    return get_num_threads_c()
+
+set_num_threads(os.getenv('PYPEIT_BSPLINE_THREADS', 1))
+#-----------------------------------------------------------------------
+
+
 #-----------------------------------------------------------------------
 bspline_model_c = _bspline.bspline_model
 bspline_model_c.restype = None
@@ -175,6 +219,62 @@ def solution_arrays(nn, npoly, nord, ydata, action, ivar, upper, lower):
 #-----------------------------------------------------------------------
 
 
+#-----------------------------------------------------------------------
+update_solution_arrays_c = _bspline.update_solution_arrays
+update_solution_arrays_c.restype = None
+update_solution_arrays_c.argtypes = [ctypes.c_int, ctypes.c_int, ctypes.c_int,
+                                     np.ctypeslib.ndpointer(ctypes.c_double, flags="C_CONTIGUOUS"),
+                                     np.ctypeslib.ndpointer(ctypes.c_double, flags="F_CONTIGUOUS"),
+                                     ctypes.c_int,
+                                     np.ctypeslib.ndpointer(ctypes.c_long, flags="C_CONTIGUOUS"),
+                                     np.ctypeslib.ndpointer(ctypes.c_long, flags="C_CONTIGUOUS"),
+                                     np.ctypeslib.ndpointer(ctypes.c_double, flags="C_CONTIGUOUS"),
+                                     np.ctypeslib.ndpointer(ctypes.c_double, flags="C_CONTIGUOUS"),
+                                     ctypes.c_int,
+                                     np.ctypeslib.ndpointer(ctypes.c_double, flags="C_CONTIGUOUS"),
+                                     ctypes.c_int]
+
+def update_solution_arrays(npoly, nord, ydata, action, pts, intv, dw, alpha, beta):
+    """
+    Update the arrays for Cholesky decomposition constructed by
+    :func:`solution_arrays` for a change in the inverse variance of a
+    subset of the data.
+
+    This method wraps a C function.
+
+    Args:
+        npoly (:obj:`int`):
+            Polynomial per fit order.
+        nord (:obj:`int`):
+            Fit order.
+        ydata (`numpy.ndarray`_):
+            Data to fit.
+        action (`numpy.ndarray`_):
+            Action matrix. See
+            :func:`pypeit.bspline.bspline.bspline.action`. The shape
+            of the array is expected to be ``nd`` by ``npoly*nord``.
+        pts (`numpy.ndarray`_):
+            Indices of the data to update.
+        intv (`numpy.ndarray`_):
+            Index of the breakpoint interval (i.e., the index in the
+            ``upper`` and ``lower`` vectors of :func:`solution_arrays`)
+            that contains each datum to update.
+        dw (`numpy.ndarray`_):
+            Change in the inverse variance of each datum to update.
+        alpha (`numpy.ndarray`_):
+            Matrix :math:`A` returned by :func:`solution_arrays`;
+            modified in place.
+        beta (`numpy.ndarray`_):
+            Vector :math:`b` returned by :func:`solution_arrays`;
+            modified in place.
+    """
+    # NOTE: Beware of the integer types for pts and intv. They must
+    # match the argtypes above and in bspline.c explicitly!!
+    update_solution_arrays_c(npoly, nord, ydata.size, ydata, action, pts.size, pts, intv, dw,
+                             alpha, alpha.shape[0], beta, beta.size)
+#-----------------------------------------------------------------------
+
+
 #-----------------------------------------------------------------------
 cholesky_band_c = _bspline.cholesky_band
 cholesky_band_c.restype = int
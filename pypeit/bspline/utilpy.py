@@ -14,6 +14,33 @@ from IPython import embed
 import numpy as np
 
 
+def set_num_threads(n):
+    """
+    Set the number of threads used by the bspline functions.
+
+    This function is pure python; the python functions are always
+    serial, so this does nothing.
+
+    Args:
+        n (:obj:`int`):
+            Number of threads.
+    """
+    pass
+
+
+def get_num_threads():
+    """
+    Return the number of threads used by the bspline functions.
+
+    This function is pure python; the python functions are always
+    serial.
+
+    Returns:
+        :obj:`int`: Always 1.
+    """
+    return 1
+
+
 def bspline_model(x, action, lower, upper, coeff, n, nord, npoly):
     """
     Calculate the bspline model.
@@ -155,6 +182,51 @@ def solution_arrays(nn, npoly, nord, ydata, action, ivar, upper, lower):
     return alpha, beta
 
 
+def update_solution_arrays(npoly, nord, ydata, action, pts, intv, dw, alpha, beta):
+    """
+    Update the arrays for Cholesky decomposition constructed by
+    :func:`solution_arrays` for a change in the inverse variance of a
+    subset of the data.
+
+    This function is pure python.
+
+    Args:
+        npoly (:obj:`int`):
+            Polynomial per fit order.
+        nord (:obj:`int`):
+            Fit order.
+        ydata (`numpy.ndarray`_):
+            Data to fit.
+        action (`numpy.ndarray`_):
+            Action matrix. See
+            :func:`pypeit.bspline.bspline.bspline.action`. The shape
+            of the array is expected to be ``nd`` by ``npoly*nord``.
+        pts (`numpy.ndarray`_):
+            Indices of the data to update.
+        intv (`numpy.ndarray`_):
+            Index of the breakpoint interval (i.e., the index in the
+            ``upper`` and ``lower`` vectors of :func:`solution_arrays`)
+            that contains each datum to update.
+        dw (`numpy.ndarray`_):
+            Change in the inverse variance of each datum to update.
+        alpha (`numpy.ndarray`_):
+            Matrix :math:`A` returned by :func:`solution_arrays`;
+            modified in place.
+        beta (`numpy.ndarray`_):
+            Vector :math:`b` returned by :func:`solution_arrays`;
+            modified in place.
+    """
+    bw = npoly * nord
+    bi = np.concatenate([np.arange(i)+(bw-i)*(bw+1) for i in range(bw,0,-1)])
+    bo = np.concatenate([np.arange(i)+(bw-i)*bw for i in range(bw,0,-1)])
+    for k in np.unique(intv):
+        indx = intv == k
+        a = action[pts[indx],:]
+        itop = k*npoly
+        alpha.T.flat[bo+itop*bw] += np.dot(a.T * dw[indx], a).flat[bi]
+        beta[itop:itop+bw] += np.dot(ydata[pts[indx]] * dw[indx], a)
+
+
 def cholesky_band(l, mininf=0.0):
     """
     Compute Cholesky decomposition of banded matrix.
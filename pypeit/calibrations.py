@@ -58,6 +58,9 @@ class Calibrations(object):
         show (:obj:`bool`, optional):
             Show plots of PypeIt's results as the code progesses.
             Requires interaction from the users.
+        proc_cache (:class:`pypeit.images.proccache.ProcImageCache`, optional):
+            Cache of processed raw images used when building the
+            calibration frames.
 
     .. todo: Fix these
 
@@ -94,7 +97,7 @@ class Calibrations(object):
 
     @classmethod
     def get_instance(cls, fitstbl, par, spectrograph, caldir, qadir=None,
-                     reuse_masters=False, show=False, slitspat_num=None):
+                     reuse_masters=False, show=False, slitspat_num=None, proc_cache=None):
         """
         """
         pypeline = spectrograph.pypeline
@@ -103,10 +106,11 @@ class Calibrations(object):
         return next(c for c in cls.__subclasses__()
                     if c.__name__ == (pypeline + 'Calibrations'))(
             fitstbl, par, spectrograph, caldir, qadir=qadir,
-                     reuse_masters=reuse_masters, show=show, slitspat_num=slitspat_num)
+                     reuse_masters=reuse_masters, show=show, slitspat_num=slitspat_num,
+                     proc_cache=proc_cache)
 
     def __init__(self, fitstbl, par, spectrograph, caldir, qadir=None,
-                 reuse_masters=False, show=False, slitspat_num=None):
+                 reuse_masters=False, show=False, slitspat_num=None, proc_cache=None):
 
         # Check the types
         # TODO -- Remove this None option once we have data models for all the Calibrations
@@ -130,6 +134,9 @@ class Calibrations(object):
         # Restrict on slits?
         self.slitspat_num = slitspat_num
 
+        # Cache of processed raw images
+        self.proc_cache = proc_cache
+
         # QA
         self.qa_path = qadir
         self.write_qa = qadir is not None
@@ -240,7 +247,7 @@ class Calibrations(object):
 
         # Reuse master frame?
         if os.path.isfile(masterframe_name) and self.reuse_masters:
-            self.msarc = buildimage.ArcImage.from_file(masterframe_name)
+            self.msarc = masterframe.load_master(buildimage.ArcImage, masterframe_name)
         elif len(arc_files) == 0:
             msgs.warn("No frametype=arc files to build arc")
             return
@@ -248,7 +255,8 @@ class Calibrations(object):
             msgs.info("Preparing a master {0:s} frame".format(buildimage.ArcImage.master_type))
             self.msarc = buildimage.buildimage_fromlist(self.spectrograph, self.det,
                                                         self.par['arcframe'], arc_files,
-                                                        bias=self.msbias, bpm=self.msbpm)
+                                                        bias=self.msbias, bpm=self.msbpm,
+                                                        proc_cache=self.proc_cache)
             # Save
             self.msarc.to_master_file(masterframe_name)
 
@@ -278,7 +286,7 @@ class Calibrations(object):
 
         # Reuse master frame?
         if os.path.isfile(masterframe_name) and self.reuse_masters:
-            self.mstilt = buildimage.TiltImage.from_file(masterframe_name)
+            self.mstilt = masterframe.load_master(buildimage.TiltImage, masterframe_name)
         elif len(tilt_files) == 0:
             msgs.warn("No frametype=tilt files to build tiltimg")
             return
@@ -287,7 +295,8 @@ class Calibrations(object):
             self.mstilt = buildimage.buildimage_fromlist(self.spectrograph, self.det,
                                                 self.par['tiltframe'],
                                                 tilt_files, bias=self.msbias, bpm=self.msbpm,
-                                                         slits=self.slits)  # For flexure
+                                                         slits=self.slits,  # For flexure
+                                                         proc_cache=self.proc_cache)
 
             # Save to Masters
             self.mstilt.to_master_file(masterframe_name)
@@ -324,12 +333,14 @@ class Calibrations(object):
 
         # Reuse master frame?
         if os.path.isfile(masterframe_filename) and self.reuse_masters:
-            self.alignments = alignframe.Alignments.from_file(masterframe_filename)
+            self.alignments = masterframe.load_master(alignframe.Alignments,
+                                                      masterframe_filename)
             self.alignments.is_synced(self.slits)
             return self.alignments
 
         msalign = buildimage.buildimage_fromlist(self.spectrograph, self.det, self.par['alignframe'], align_files,
-                                                 bias=self.msbias, bpm=self.msbpm)
+                                                 bias=self.msbias, bpm=self.msbpm,
+                                                 proc_cache=self.proc_cache)
 
         # Extract some header info needed by the algorithm
         binning = self.spectrograph.get_meta_value(align_files[0], 'binning')
@@ -371,13 +382,14 @@ class Calibrations(object):
 
         # Try to load?
         if os.path.isfile(masterframe_name) and self.reuse_masters:
-            self.msbias = buildimage.BiasImage.from_file(masterframe_name)
+            self.msbias = masterframe.load_master(buildimage.BiasImage, masterframe_name)
         elif len(bias_files) == 0:
             self.msbias = None
         else:
             # Build it
             self.msbias = buildimage.buildimage_fromlist(self.spectrograph, self.det,
-                                                         self.par['biasframe'], bias_files)
+                                                         self.par['biasframe'], bias_files,
+                                                         proc_cache=self.proc_cache)
             # Save it?
             self.msbias.to_master_file(masterframe_name)
 
@@ -408,13 +420,14 @@ class Calibrations(object):
 
         # Try to load?
         if os.path.isfile(masterframe_name) and self.reuse_masters:
-            self.msdark = buildimage.DarkImage.from_file(masterframe_name)
+            self.msdark = masterframe.load_master(buildimage.DarkImage, masterframe_name)
         elif len(dark_files) == 0:
             self.msdark = None
         else:
             # Build it
             self.msdark = buildimage.buildimage_fromlist(self.spectrograph, self.det,
-                                                    self.par['darkframe'], dark_files)
+                                                    self.par['darkframe'], dark_files,
+                                                    proc_cache=self.proc_cache)
             # Save it?
             self.msdark.to_master_file(masterframe_name)
 
@@ -500,7 +513,7 @@ class Calibrations(object):
 
         # Load MasterFrame?
         if os.path.isfile(masterframe_filename) and self.reuse_masters:
-            flatimages = flatfield.FlatImages.from_file(masterframe_filename)
+            flatimages = masterframe.load_master(flatfield.FlatImages, masterframe_filename)
             flatimages.is_synced(self.slits)
             # Load user defined files
             if self.par['flatfield']['pixelflat_file'] is not None:
@@ -522,7 +535,8 @@ class Calibrations(object):
             pixel_flat = buildimage.buildimage_fromlist(self.spectrograph, self.det,
                                                         self.par['pixelflatframe'],
                                                         pixflat_image_files, dark=self.msdark,
-                                                        bias=self.msbias, bpm=self.msbpm)
+                                                        bias=self.msbias, bpm=self.msbpm,
+                                                        proc_cache=self.proc_cache)
             # Initialise the pixel flat
             pixelFlatField = flatfield.FlatField(pixel_flat, self.spectrograph,
                                                  self.par['flatfield'], self.slits, self.wavetilts, self.wv_calib)
@@ -534,7 +548,8 @@ class Calibrations(object):
             illum_flat = buildimage.buildimage_fromlist(self.spectrograph, self.det,
                                                         self.par['illumflatframe'],
                                                         illum_image_files, dark=self.msdark,
-                                                        bias=self.msbias, bpm=self.msbpm)
+                                                        bias=self.msbias, bpm=self.msbpm,
+                                                        proc_cache=self.proc_cache)
             # Initialise the pixel flat
             illumFlatField = flatfield.FlatField(illum_flat, self.spectrograph,
                                                  self.par['flatfield'], self.slits, self.wavetilts,
@@ -601,7 +616,7 @@ class Calibrations(object):
                                                            self.master_key_dict['trace'],
                                                            master_dir=self.master_dir)
         if os.path.isfile(slit_masterframe_name) and self.reuse_masters:
-            self.slits = slittrace.SlitTraceSet.from_file(slit_masterframe_name)
+            self.slits = masterframe.load_master(slittrace.SlitTraceSet, slit_masterframe_name)
             # Reset the bitmask
             self.slits.mask = self.slits.mask_init.copy()
         else:
@@ -611,7 +626,8 @@ class Calibrations(object):
                                                                master_dir=self.master_dir)
             # Reuse master frame?
             if os.path.isfile(edge_masterframe_name) and self.reuse_masters:
-                self.edges = edgetrace.EdgeTraceSet.from_file(edge_masterframe_name)
+                self.edges = masterframe.load_master(edgetrace.EdgeTraceSet,
+                                                     edge_masterframe_name)
             elif len(trace_image_files) == 0:
                 msgs.warn("No frametype=trace files to build slits")
                 return
@@ -620,7 +636,7 @@ class Calibrations(object):
                 self.traceImage = buildimage.buildimage_fromlist(self.spectrograph, self.det,
                                                         self.par['traceframe'], trace_image_files,
                                                         bias=self.msbias, bpm=self.msbpm,
-                                                        dark=self.msdark)
+                                                        dark=self.msdark, proc_cache=self.proc_cache)
                 self.edges = edgetrace.EdgeTraceSet(self.traceImage, self.spectrograph,
                                                     self.par['slitedges'], bpm=self.msbpm,
                                                     det=self.det, auto=True,
@@ -685,7 +701,9 @@ class Calibrations(object):
                                                            master_dir=self.master_dir)
         if os.path.isfile(masterframe_name) and self.reuse_masters:
             # Load from disk
-            self.wv_calib = self.waveCalib.load(masterframe_name)
+            self.wv_calib = masterframe.load_master(wavecalib.WaveCalib, masterframe_name,
+                                                    reader=self.waveCalib.load)
+            self.waveCalib.wv_calib = self.wv_calib
             self.slits.mask_wvcalib(self.wv_calib)
         else:
             self.wv_calib = self.waveCalib.run(skip_QA=(not self.write_qa))
@@ -722,7 +740,7 @@ class Calibrations(object):
         masterframe_name = masterframe.construct_file_name(wavetilts.WaveTilts, self.master_key_dict['tilt'],
                                                            master_dir=self.master_dir)
         if os.path.isfile(masterframe_name) and self.reuse_masters:
-            self.wavetilts = wavetilts.WaveTilts.from_file(masterframe_name)
+            self.wavetilts = masterframe.load_master(wavetilts.WaveTilts, masterframe_name)
             self.wavetilts.is_synced(self.slits)
             self.slits.mask_wavetilts(self.wavetilts)
         else: # Build
@@ -6,6 +6,8 @@ Module for performing two-dimensional coaddition of spectra.
 """
 import os
 import copy
+import mmap
+from collections import OrderedDict
 
 from IPython import embed
 
@@ -22,9 +24,10 @@ from pypeit import specobjs
 from pypeit import slittrace
 from pypeit import reduce
 from pypeit.images import pypeitimage
+from pypeit.images import combineimage
+from pypeit.images import detector_container
 from pypeit.core import extract
 from pypeit.core import coadd, pixels
-from pypeit.core import parse
 from pypeit.spectrographs import util
 from pypeit.tests import tstutils
 from pypeit import calibrations
@@ -226,7 +229,10 @@ class CoAdd2D(object):
             msgs.info('Performing 2d coadd for slit: {:d}/{:d}'.format(slit_idx, self.nslits - 1))
             ref_trace_stack = self.reference_trace_stack(slit_idx, offsets=self.offsets,
                                                          objid=self.objid_bri)
-            thismask_stack = self.stack_dict['slitmask_stack'] == self.stack_dict['slits_list'][0].spat_id[slit_idx]
+            spat_id = self.stack_dict['slits_list'][0].spat_id[slit_idx]
+            # Only read the columns of the images spanned by this slit
+            cutout = self.stack_dict['stack'].cutout(spat_id)
+            thismask_stack = cutout['slitmask_stack'] == spat_id
             # TODO Can we get rid of this one line simply making the weights returned by parse_weights an
             # (nslit, nexp) array?
             # This one line deals with the different weighting strategies between MultiSlit echelle. Otherwise, we
@@ -236,14 +242,16 @@ class CoAdd2D(object):
             else:
                 weights = self.use_weights
             # Perform the 2d coadd
-            coadd_dict = coadd.compute_coadd2d(ref_trace_stack, self.stack_dict['sciimg_stack'],
-                                           self.stack_dict['sciivar_stack'],
-                                           self.stack_dict['skymodel_stack'],
-                                           self.stack_dict['mask_stack'] == 0,
-                                           self.stack_dict['tilts_stack'],
+            coadd_dict = coadd.compute_coadd2d(ref_trace_stack, cutout['sciimg_stack'],
+                                           cutout['sciivar_stack'],
+                                           cutout['skymodel_stack'],
+                                           cutout['mask_stack'] == 0,
+                                           cutout['tilts_stack'],
                                                thismask_stack,
-                                           self.stack_dict['waveimg_stack'],
-                                           self.wave_grid, weights=weights)
+                                           cutout['waveimg_stack'],
+                                           self.wave_grid, weights=weights,
+                                           spat_offset=cutout['spat'].start,
+                                           n_workers=self.par['coadd2d']['n_workers'])
             coadd_list.append(coadd_dict)
 
         return coadd_list
@@ -528,6 +536,8 @@ class CoAdd2D(object):
         """
         Routine to read in required images for 2d coadds given a list of spec2d files.
 
+        The images are not read into memory; see :class:`Spec2DStack`.
+
         Args:
             spec2d_files: list
                List of spec2d filenames
@@ -539,59 +549,26 @@ class CoAdd2D(object):
             for perfomring 2d coadds.
         """
 
-        # Get the detector string
-        sdet = parse.get_dnum(self.det, prefix=False)
-
         # Get the master dir
 
         redux_path = os.getcwd()
 
         # Grab the files
-        #head2d_list = []
+        stack = Spec2DStack(spec2d_files, self.det)
         specobjs_list = []
-        slits_list = []
-        nfiles =len(spec2d_files)
-        detectors_list = []
-        for ifile, f in enumerate(spec2d_files):
-            # Spec2d
-            spec2DObj = spec2dobj.Spec2DObj.from_file(f, self.det)
-            # TODO the code should run without a spec1d file, but we need to implement that
-            slits_list.append(spec2DObj.slits)
-            detectors_list.append(spec2DObj.detector)
-            if ifile == 0:
-                sciimg_stack = np.zeros((nfiles,) + spec2DObj.sciimg.shape, dtype=float)
-                waveimg_stack = np.zeros_like(sciimg_stack, dtype=float)
-                tilts_stack = np.zeros_like(sciimg_stack, dtype=float)
-                skymodel_stack = np.zeros_like(sciimg_stack, dtype=float)
-                sciivar_stack = np.zeros_like(sciimg_stack, dtype=float)
-                mask_stack = np.zeros_like(sciimg_stack, dtype=float)
-                slitmask_stack = np.zeros_like(sciimg_stack, dtype=float)
-
-            sciimg_stack[ifile, :, :] = spec2DObj.sciimg
-            waveimg_stack[ifile, :, :] = spec2DObj.waveimg
-            skymodel_stack[ifile, :, :] = spec2DObj.skymodel
-            sciivar_stack[ifile, :, :] = spec2DObj.ivarmodel
-            mask_stack[ifile, :, :] = spec2DObj.bpmmask
-            # TODO -- Set back after done testing
-            slitmask_stack[ifile, :, :] = spec2DObj.slits.slit_img(flexure=spec2DObj.sci_spat_flexure)
-            #slitmask_stack[ifile, :, :] = spec2DObj.slits.slit_img(flexure=0.)
-            _spat_flexure = 0. if spec2DObj.sci_spat_flexure is None else spec2DObj.sci_spat_flexure
-            #_tilt_flexure_shift = _spat_flexure - spec2DObj.tilts.spat_flexure if spec2DObj.tilts.spat_flexure is not None else _spat_flexure
-            tilts_stack[ifile,:,:] = spec2DObj.tilts #.fit2tiltimg(slitmask_stack[ifile, :, :], flexure=_tilt_flexure_shift)
+        for f in spec2d_files:
             # Spec1d
+            # TODO the code should run without a spec1d file, but we need to implement that
             spec1d_file = f.replace('spec2d', 'spec1d')
             if os.path.isfile(spec1d_file):
                 sobjs = specobjs.SpecObjs.from_fitsfile(spec1d_file)
                 this_det = sobjs.DET == self.det
                 specobjs_list.append(sobjs[this_det])
 
-        return dict(specobjs_list=specobjs_list, slits_list=slits_list,
-                    slitmask_stack=slitmask_stack,
-                    sciimg_stack=sciimg_stack, sciivar_stack=sciivar_stack,
-                    skymodel_stack=skymodel_stack, mask_stack=mask_stack,
-                    tilts_stack=tilts_stack, waveimg_stack=waveimg_stack,
+        return dict(specobjs_list=specobjs_list, slits_list=stack.slits_list,
+                    stack=stack,
                     redux_path=redux_path,
-                    detectors=detectors_list,
+                    detectors=stack.detectors,
                     spectrograph=self.spectrograph.spectrograph,
                     pypeline=self.spectrograph.pypeline)
 
@@ -657,7 +634,8 @@ class MultiSlitCoAdd2D(CoAdd2D):
         objid_bri, slitidx_bri, spatid_bri, snr_bar_bri = self.get_brightest_obj(self.stack_dict['specobjs_list'],
                                                                     self.spat_ids)
         msgs.info('Determining offsets using brightest object on slit: {:d} with avg SNR={:5.2f}'.format(spatid_bri,np.mean(snr_bar_bri)))
-        thismask_stack = self.stack_dict['slitmask_stack'] == spatid_bri
+        cutout = self.stack_dict['stack'].cutout(spatid_bri)
+        thismask_stack = cutout['slitmask_stack'] == spatid_bri
         trace_stack_bri = np.zeros((self.nspec, self.nexp))
         # TODO Need to think abbout whether we have multiple tslits_dict for each exposure or a single one
         for iexp in range(self.nexp):
@@ -665,16 +643,18 @@ class MultiSlitCoAdd2D(CoAdd2D):
 #            trace_stack_bri[:,iexp] = (self.stack_dict['tslits_dict_list'][iexp]['slit_left'][:,slitid_bri] +
 #                                       self.stack_dict['tslits_dict_list'][iexp]['slit_righ'][:,slitid_bri])/2.0
         # Determine the wavelength grid that we will use for the current slit/order
-        wave_bins = coadd.get_wave_bins(thismask_stack, self.stack_dict['waveimg_stack'], self.wave_grid)
-        dspat_bins, dspat_stack = coadd.get_spat_bins(thismask_stack, trace_stack_bri)
+        wave_bins = coadd.get_wave_bins(thismask_stack, cutout['waveimg_stack'], self.wave_grid)
+        dspat_bins, dspat_stack = coadd.get_spat_bins(thismask_stack, trace_stack_bri,
+                                                      spat_offset=cutout['spat'].start)
 
-        sci_list = [self.stack_dict['sciimg_stack'] - self.stack_dict['skymodel_stack']]
+        sci_list = [cutout['sciimg_stack'] - cutout['skymodel_stack']]
         var_list = []
 
         msgs.info('Rebinning Images')
         sci_list_rebin, var_list_rebin, norm_rebin_stack, nsmp_rebin_stack = coadd.rebin2d(
-            wave_bins, dspat_bins, self.stack_dict['waveimg_stack'], dspat_stack, thismask_stack,
-            (self.stack_dict['mask_stack'] == 0), sci_list, var_list)
+            wave_bins, dspat_bins, cutout['waveimg_stack'], dspat_stack, thismask_stack,
+            (cutout['mask_stack'] == 0), sci_list, var_list,
+            n_workers=self.par['coadd2d']['n_workers'])
         thismask = np.ones_like(sci_list_rebin[0][0,:,:],dtype=bool)
         nspec_pseudo, nspat_pseudo = thismask.shape
         slit_left = np.full(nspec_pseudo, 0.0)
@@ -927,3 +907,162 @@ class EchelleCoAdd2D(CoAdd2D):
             msgs.error('You must input either offsets or an objid to determine the stack of reference traces')
             return None
 
+
+
+class Spec2DStack:
+    """
+    Stack of the images of one detector in a set of spec2d files that
+    are read on demand.
+
+    The 2d coadds only operate on one slit at a time, such that only
+    the spatial columns spanned by that slit are needed from each
+    image.  The images are memory mapped from the spec2d files, and the
+    cutouts of the images containing a slit are read by
+    :func:`cutout`.  Files whose images cannot be memory mapped (e.g.,
+    compressed files) are copied, one image at a time, to memory-mapped
+    scratch files (see
+    :func:`pypeit.images.combineimage.allocate_stack`).  The slit ID
+    images are also held in a scratch file, using the smallest integer
+    type that holds the slit IDs.
+
+    Args:
+        spec2d_files (:obj:`list`):
+            List of spec2d files.
+        det (:obj:`int`):
+            Detector to read.
+
+    Attributes:
+        shape (:obj:`tuple`):
+            Shape of the stack, (nfiles, nspec, nspat).
+        slits_list (:obj:`list`):
+            The :class:`pypeit.slittrace.SlitTraceSet` of each file.
+        detectors (:obj:`list`):
+            The
+            :class:`pypeit.images.detector_container.DetectorContainer`
+            of each file.
+        spat_flexure (:obj:`list`):
+            The spatial flexure of each file.
+        slitmask (`numpy.memmap`_):
+            Stack of the slit ID images; see
+            :func:`pypeit.slittrace.SlitTraceSet.slit_img`.
+    """
+
+    # Keys of the image stacks and the spec2d extensions with the images
+    extensions = OrderedDict([('sciimg', 'SCIIMG'), ('sciivar', 'IVARMODEL'),
+                              ('skymodel', 'SKYMODEL'), ('mask', 'BPMMASK'), ('tilts', 'TILTS'),
+                              ('waveimg', 'WAVEIMG')])
+
+    def __init__(self, spec2d_files, det):
+        self.files = spec2d_files
+        self.det = det
+        self.slits_list = []
+        self.detectors = []
+        self.spat_flexure = []
+        self.images = OrderedDict([(key, []) for key in self.extensions.keys()])
+
+        prefix = spec2dobj.spec2d_hdu_prefix(det)
+        for f in spec2d_files:
+            with fits.open(f, memmap=True) as hdul:
+                if prefix + 'SCIIMG' not in hdul:
+                    msgs.error('Requested detector {0} is not in this file - {1}'.format(det, f))
+                self.slits_list += [slittrace.SlitTraceSet.from_hdu(hdul[prefix + 'SLITS'])]
+                self.detectors += [detector_container.DetectorContainer.from_hdu(
+                                        hdul[prefix + 'DETECTOR'])]
+                self.spat_flexure += [hdul[prefix + 'SCIIMG'].header.get('SCI_SPAT_FLEXURE')]
+                # The memory maps remain valid after the files are closed
+                for key, ext in self.extensions.items():
+                    self.images[key] += [scratch_image(hdul[prefix + ext].data)]
+        self.shape = (len(spec2d_files),) + self.images['sciimg'][0].shape
+
+        # Build the slit ID images and find the spatial columns spanned by
+        # each slit in any of the images
+        spat_id_max = np.amax([np.amax(slits.spat_id) for slits in self.slits_list])
+        # Smallest signed type that holds both the slit IDs and the -1
+        # of the pixels off all slits
+        self.slitmask = combineimage.allocate_stack(self.shape,
+                                                    np.min_scalar_type(-spat_id_max-1),
+                                                    scratch=True)
+        self._spat = {}
+        for i, slits in enumerate(self.slits_list):
+            slitid_img = slits.slit_img(flexure=self.spat_flexure[i])
+            # Do not hold the full-size images for every file
+            slits.clear_cache()
+            self.slitmask[i] = slitid_img
+            index = slittrace.SlitPixelIndex(slitid_img)
+            for spat_id in index.spat_id:
+                spat = index.bbox(spat_id)[1]
+                if spat_id in self._spat:
+                    spat = slice(min(spat.start, self._spat[spat_id].start),
+                                 max(spat.stop, self._spat[spat_id].stop))
+                self._spat[spat_id] = spat
+
+    @property
+    def nfiles(self):
+        """Number of files in the stack."""
+        return self.shape[0]
+
+    def spat(self, spat_id):
+        """
+        Return the spatial columns spanned by a slit.
+
+        Args:
+            spat_id (:obj:`int`):
+                Slit ID.
+
+        Returns:
+            :obj:`slice`: The columns with pixels in the slit in any of
+            the images; all columns if the slit has no pixels.
+        """
+        return self._spat.get(spat_id, slice(0, self.shape[2]))
+
+    def cutout(self, spat_id):
+        """
+        Read the cutouts of the image stacks containing a slit.
+
+        Args:
+            spat_id (:obj:`int`):
+                Slit ID.
+
+        Returns:
+            :obj:`dict`: The cutouts of the image stacks with shape
+            (nfiles, nspec, ncolumns), keyed by the image name with an
+            appended ``_stack`` (e.g., ``sciimg_stack``), and
+            ``slitmask_stack`` for the slit ID images.  The ``spat``
+            key gives the spatial columns of the detector included in
+            the cutouts.
+        """
+        spat = self.spat(spat_id)
+        cutout = dict(spat=spat, slitmask_stack=np.asarray(self.slitmask[:,:,spat]))
+        shape = (self.nfiles, self.shape[1], spat.stop - spat.start)
+        for key, images in self.images.items():
+            # Filling the stack converts the FITS data to the native byte order
+            cutout[key + '_stack'] = np.empty(shape, dtype=images[0].dtype.newbyteorder('='))
+            for i, img in enumerate(images):
+                cutout[key + '_stack'][i] = img[:,spat]
+        return cutout
+
+
+def scratch_image(img):
+    """
+    Hold an image read from a FITS file in a memory map.
+
+    Images that are not already memory mapped to the FITS file (e.g.,
+    because the file is compressed or the data are scaled) are copied
+    to a scratch file; see
+    :func:`pypeit.images.combineimage.allocate_stack`.
+
+    Args:
+        img (`numpy.ndarray`_):
+            Image data from a FITS HDU.
+
+    Returns:
+        `numpy.ndarray`_: The memory-mapped image.
+    """
+    base = img
+    while base is not None:
+        if isinstance(base, (mmap.mmap, np.memmap)):
+            return img
+        base = getattr(base, 'base', None)
+    _img = combineimage.allocate_stack(img.shape, img.dtype, scratch=True)
+    _img[...] = img
+    return _img
@@ -6,6 +6,8 @@ Coadding module.
 """
 
 import os
+import functools
+from concurrent import futures
 from pkg_resources import resource_filename
 
 from IPython import embed
@@ -613,25 +615,61 @@ def interp_oned(wave_new, wave_old, flux_old, ivar_old, mask_old):
     if np.array_equal(wave_new, wave_old):
         return flux_old, ivar_old, mask_old
 
-    # make the mask array to be float, used for interpolation
-    masks_float = mask_old.astype(float)
+    return interp_oned_stack(wave_new, wave_old, flux_old, ivar_old, mask_old)
+
+
+def interp_oned_stack(wave_new, wave_old, fluxes, ivars, masks):
+    '''
+    Interpolate a stack of spectra sampled on the same wavelength grid onto new wavelengths.
+
+    The results are identical to interpolating the flux, ivar and mask of each spectrum with separate cubic
+    scipy.interpolate.interp1d objects (see interp_oned), but the cubic spline is only set up once for all of them,
+    and it is evaluated at all of the new wavelengths at once.
+
+    Args:
+       wave_new: ndarray, (nspec_new,) or (nspec_new, nimgs)
+            New wavelengths that you want to interpolate onto.
+       wave_old: ndarray, (nspec_old,)
+            Old wavelength grid shared by all the spectra. Wavelengths <= 1.0 are ignored.
+       fluxes: ndarray, (nspec_old,) or (nspec_old, nexp)
+            Old fluxes on the wave_old grid
+       ivars: ndarray, same shape as fluxes
+            Old ivars on the wave_old grid
+       masks: ndarray, bool, same shape as fluxes
+            Old masks on the wave_old grid. True=Good
+
+    Returns:
+        tuple: Interpolated fluxes, ivars and masks (True=Good), with shape wave_new.shape + fluxes.shape[1:]. For
+        example, a single spectrum is interpolated onto each column of a 2d wave_new, whereas a stack of spectra is
+        interpolated onto a 1d wave_new.
+    '''
+    nspec_old = wave_old.size
+    values = np.concatenate([fluxes.reshape(nspec_old, -1), ivars.reshape(nspec_old, -1),
+                             masks.reshape(nspec_old, -1).astype(float)], axis=1)
     wave_mask = wave_old > 1.0 # Deal with the zero wavelengths
-    flux_new = scipy.interpolate.interp1d(wave_old[wave_mask], flux_old[wave_mask], kind='cubic',
-                                    bounds_error=False, fill_value=np.nan)(wave_new)
-    ivar_new = scipy.interpolate.interp1d(wave_old[wave_mask], ivar_old[wave_mask], kind='cubic',
-                                    bounds_error=False, fill_value=np.nan)(wave_new)
-    mask_new_tmp = scipy.interpolate.interp1d(wave_old[wave_mask], masks_float[wave_mask], kind='cubic',
-                                        bounds_error=False, fill_value=np.nan)(wave_new)
+    # Sort the wavelengths in the same way as interp1d
+    srt = np.argsort(wave_old[wave_mask], kind='mergesort')
+    _wave_old = wave_old[wave_mask][srt]
+    spline = scipy.interpolate.make_interp_spline(_wave_old, values[wave_mask][srt], k=3, check_finite=False)
+    values_new = spline(wave_new)
+    values_new[(wave_new < _wave_old[0]) | (wave_new > _wave_old[-1])] = np.nan
+    flux_new, ivar_new, mask_new_tmp = [v.reshape(wave_new.shape + fluxes.shape[1:])
+                                        for v in np.split(values_new, 3, axis=-1)]
     # Don't allow the ivar to be every less than zero
     ivar_new = (ivar_new > 0.0)*ivar_new
     mask_new = (mask_new_tmp > 0.8) & (ivar_new > 0.0) & np.isfinite(flux_new) & np.isfinite(ivar_new)
     return flux_new, ivar_new, mask_new
 
+
 def interp_spec(wave_new, waves, fluxes, ivars, masks):
     """
     Utility routine to interpolate a set of spectra onto a new
     wavelength grid, wave_new
 
+    The spectra are interpolated together with :func:`interp_oned_stack`: exposures that share the same wavelength
+    grid are interpolated with a single spline, and a single spectrum is interpolated onto all the columns of a 2d
+    wave_new at once.
+
     Args:
         wave_new: ndarray, shape (nspec,) or (nspec, nimgs),
              new wavelength grid
@@ -659,9 +697,18 @@ def interp_spec(wave_new, waves, fluxes, ivars, masks):
             fluxes_inter = np.zeros((wave_new.size, nexp))
             ivars_inter  = np.zeros((wave_new.size, nexp))
             masks_inter  = np.zeros((wave_new.size, nexp), dtype=bool)
-            for ii in range(nexp):
-                fluxes_inter[:, ii], ivars_inter[:, ii], masks_inter[:, ii] = interp_oned(
-                    wave_new, waves[:, ii], fluxes[:, ii], ivars[:, ii], masks[:, ii])
+            # Spectra already on the new grid are not interpolated
+            same = np.array([np.array_equal(wave_new, waves[:, ii]) for ii in range(nexp)])
+            if np.any(same):
+                fluxes_inter[:, same], ivars_inter[:, same], masks_inter[:, same] \
+                        = fluxes[:, same], ivars[:, same], masks[:, same]
+            # Exposures with the same wavelength grid are interpolated together
+            wave_grids, grid_index = np.unique(waves, axis=1, return_inverse=True)
+            for igrid in range(wave_grids.shape[1]):
+                indx = (grid_index.ravel() == igrid) & np.invert(same)
+                if np.any(indx):
+                    fluxes_inter[:, indx], ivars_inter[:, indx], masks_inter[:, indx] = interp_oned_stack(
+                        wave_new, wave_grids[:, igrid], fluxes[:, indx], ivars[:, indx], masks[:, indx])
 
         return fluxes_inter, ivars_inter, masks_inter
 
@@ -674,9 +721,15 @@ def interp_spec(wave_new, waves, fluxes, ivars, masks):
         ivars_inter = np.zeros_like(wave_new)
         masks_inter = np.zeros_like(wave_new, dtype=bool)
 
-        for ii in range(nexp):
-            fluxes_inter[:, ii], ivars_inter[:, ii], masks_inter[:, ii] = interp_oned(
-                wave_new[:, ii], waves, fluxes, ivars, masks)
+        # Columns that are the same as the old grid are not interpolated
+        same = np.array([np.array_equal(wave_new[:, ii], waves) for ii in range(nexp)])
+        if np.any(same):
+            fluxes_inter[:, same], ivars_inter[:, same], masks_inter[:, same] \
+                    = fluxes[:, None], ivars[:, None], masks[:, None]
+        if not np.all(same):
+            fluxes_inter[:, np.invert(same)], ivars_inter[:, np.invert(same)], \
+                masks_inter[:, np.invert(same)] = interp_oned_stack(wave_new[:, np.invert(same)], waves,
+                                                                    fluxes, ivars, masks)
 
         return fluxes_inter, ivars_inter, masks_inter
 
@@ -1243,10 +1296,34 @@ def scale_spec(wave, flux, ivar, sn, wave_ref, flux_ref, ivar_ref, mask=None, ma
     return flux_scale, ivar_scale, scale, method_used
 
 
-def compute_stack(wave_grid, waves, fluxes, ivars, masks, weights, min_weight=1e-8):
+def wave_grid_index(wave_grid, waves):
+    """
+    Find the bin of a wavelength grid that contains each wavelength.
+
+    The bins follow the convention of np.histogram: each bin includes its
+    lower edge, and the last bin also includes its upper edge.
+
+    Args:
+        wave_grid: ndarray, (ngrid +1,)
+            Monotonically increasing edges of the wavelength bins; see compute_stack.
+        waves: ndarray
+            Wavelengths to bin.
+
+    Returns:
+        ndarray: Integer array with the same shape as waves with the index of the bin containing each wavelength;
+        wavelengths outside the grid have an index of -1.
+    """
+    ngrid = wave_grid.size - 1
+    wave_index = np.searchsorted(wave_grid, waves, side='right') - 1
+    wave_index[waves == wave_grid[-1]] = ngrid - 1
+    wave_index[wave_index >= ngrid] = -1
+    return wave_index
+
+
+def compute_stack(wave_grid, waves, fluxes, ivars, masks, weights, min_weight=1e-8, wave_index=None):
     '''
     Compute a stacked spectrum from a set of exposures on the specified wave_grid with proper treatment of
-    weights and masking. This code uses np.histogram to combine the data using NGP and does not perform any
+    weights and masking. This code bins the data using NGP (see wave_grid_index) and does not perform any
     interpolations and thus does not correlate errors. It uses wave_grid to determine the set of wavelength bins that
     the data are averaged on. The final spectrum will be on an ouptut wavelength grid which is not the same as wave_grid.
     The ouput wavelength grid is the weighted average of the individual wavelengths used for each exposure that fell into
@@ -1275,6 +1352,11 @@ def compute_stack(wave_grid, waves, fluxes, ivars, masks, weights, min_weight=1e
             Masks for each exposure on the waves grid. True=Good.
         weights: ndarray, (nspec, nexp)
             Weights to be used for combining your spectra. These are computed using sn_weights
+        min_weight: float, default=1e-8
+            Minimum summed weight for a bin of the stack to be considered good.
+        wave_index: ndarray, int, (nspec, nexp), optional
+            Index of the wave_grid bin of each pixel in waves, as returned by wave_grid_index. Passing this avoids
+            re-binning the same wavelengths when the stack is computed repeatedly with different masks.
 
     Returns:
         tuple: Returns the following objects
@@ -1304,30 +1386,39 @@ def compute_stack(wave_grid, waves, fluxes, ivars, masks, weights, min_weight=1e
 
     #mask bad values and extreme values (usually caused by extreme low sensitivity at the edge of detectors)
     ubermask = masks & (weights > 0.0) & (waves > 1.0) & (ivars > 0.0) & (utils.inverse(ivars)<1e10)
-    waves_flat = waves[ubermask].flatten()
-    fluxes_flat = fluxes[ubermask].flatten()
-    ivars_flat = ivars[ubermask].flatten()
+    # Pixels outside the wavelength grid do not contribute
+    if wave_index is None:
+        wave_index = wave_grid_index(wave_grid, waves)
+    ubermask &= wave_index >= 0
+    index_flat = wave_index[ubermask]
+    waves_flat = waves[ubermask]
+    fluxes_flat = fluxes[ubermask]
+    ivars_flat = ivars[ubermask]
     vars_flat = utils.inverse(ivars_flat)
-    weights_flat = weights[ubermask].flatten()
+    weights_flat = weights[ubermask]
 
     # Counts how many pixels in each wavelength bin
-    nused, wave_edges = np.histogram(waves_flat,bins=wave_grid,density=False)
-
-    # Calculate the summed weights for the denominator
-    weights_total, wave_edges = np.histogram(waves_flat,bins=wave_grid,density=False,weights=weights_flat)
+    ngrid = wave_grid.size - 1
+    nused = np.bincount(index_flat, minlength=ngrid)
+
+    # Accumulate the summed weights for the denominator and the weighted
+    # wavelengths, fluxes, and variances in a single pass
+    moments = np.bincount((index_flat[None,:] + ngrid*np.arange(4)[:,None]).ravel(),
+                          weights=np.concatenate([weights_flat, waves_flat*weights_flat,
+                                                  fluxes_flat*weights_flat,
+                                                  vars_flat*weights_flat**2]),
+                          minlength=4*ngrid).reshape(4,ngrid)
+    weights_total, wave_stack_total, flux_stack_total, var_stack_total = moments
 
     # Calculate the stacked wavelength
     ## TODO: JFH Made the minimum weight 1e-8 from 1e-4. I'm not sure what this min_weight is necessary for, or
     # is achieving FW.
-    wave_stack_total, wave_edges = np.histogram(waves_flat,bins=wave_grid,density=False,weights=waves_flat*weights_flat)
     wave_stack = (weights_total > min_weight)*wave_stack_total/(weights_total+(weights_total==0.))
 
     # Calculate the stacked flux
-    flux_stack_total, wave_edges = np.histogram(waves_flat,bins=wave_grid,density=False,weights=fluxes_flat*weights_flat)
     flux_stack = (weights_total > min_weight)*flux_stack_total/(weights_total+(weights_total==0.))
 
     # Calculate the stacked ivar
-    var_stack_total, wave_edges = np.histogram(waves_flat,bins=wave_grid,density=False,weights=vars_flat*weights_flat**2)
     var_stack = (weights_total > min_weight)*var_stack_total/(weights_total+(weights_total==0.))**2
     ivar_stack = utils.inverse(var_stack)
 
@@ -1759,7 +1850,7 @@ def update_errors(fluxes, ivars, masks, fluxes_stack, ivars_stack, masks_stack,
 
 
 def spec_reject_comb(wave_grid, waves, fluxes, ivars, masks, weights, sn_clip=30.0, lower=3.0, upper=3.0,
-                     maxrej=None, maxiter_reject=5, title='', debug=False, verbose=False):
+                     maxrej=None, maxiter_reject=5, title='', debug=False, verbose=False, wave_index=None):
     """
     Routine for executing the iterative combine and rejection of a set of spectra to compute a final stacked spectrum.
 
@@ -1801,6 +1892,11 @@ def spec_reject_comb(wave_grid, waves, fluxes, ivars, masks, weights, sn_clip=30
              Title for QA plot
         debug: bool, default=False,
             Show QA plots useful for debugging.
+        verbose: bool, default=False,
+            Print the number of rejected pixels in each exposure.
+        wave_index: ndarray, int, (nspec, nexp), optional
+            Index of the wave_grid bin of each pixel in waves; see compute_stack. If None, it is computed once and
+            reused for all the rejection iterations.
 
     Returns:
         tuple: Returns the following:
@@ -1832,12 +1928,15 @@ def spec_reject_comb(wave_grid, waves, fluxes, ivars, masks, weights, sn_clip=30
               in one bin versus another depending on the sampling.
 
     """
+    # The wavelengths are binned once; only the masks change between iterations
+    if wave_index is None:
+        wave_index = wave_grid_index(wave_grid, waves)
     thismask = np.copy(masks)
     iter = 0
     qdone = False
     while (not qdone) and (iter < maxiter_reject):
         wave_stack, flux_stack, ivar_stack, mask_stack, nused = compute_stack(
-            wave_grid, waves, fluxes, ivars, thismask, weights)
+            wave_grid, waves, fluxes, ivars, thismask, weights, wave_index=wave_index)
         flux_stack_nat, ivar_stack_nat, mask_stack_nat = interp_spec(
             waves, wave_stack, flux_stack, ivar_stack, mask_stack)
         rejivars, sigma_corrs, outchi, maskchi = update_errors(fluxes, ivars, thismask,
@@ -1863,7 +1962,8 @@ def spec_reject_comb(wave_grid, waves, fluxes, ivars, masks, weights, sn_clip=30
             msgs.info("Rejected {:d} pixels in exposure {:d}/{:d}".format(nrej[iexp], iexp, nexp))
 
     # Compute the final stack using this outmask
-    wave_stack, flux_stack, ivar_stack, mask_stack, nused = compute_stack(wave_grid, waves, fluxes, ivars, outmask, weights)
+    wave_stack, flux_stack, ivar_stack, mask_stack, nused = compute_stack(wave_grid, waves, fluxes, ivars, outmask, weights,
+                                                                          wave_index=wave_index)
 
     # Used only for plotting below
     if debug:
@@ -1889,7 +1989,7 @@ def spec_reject_comb(wave_grid, waves, fluxes, ivars, masks, weights, sn_clip=30
 
 def scale_spec_stack(wave_grid, waves, fluxes, ivars, masks, sn, weights, ref_percentile=70.0, maxiter_scale=5,
                      sigrej_scale=3.0, scale_method='auto', hand_scale=None, sn_min_polyscale=2.0, sn_min_medscale=0.5,
-                     debug=False, show=False):
+                     debug=False, show=False, wave_index=None):
 
     '''
     Routine for optimally combining long or multi-slit spectra or echelle spectra of individual orders. It will
@@ -1967,6 +2067,8 @@ def scale_spec_stack(wave_grid, waves, fluxes, ivars, masks, sn, weights, ref_pe
             Title prefix for spec_reject_comb QA plots
         debug (bool): default=False
             show interactive QA plot
+        wave_index: ndarray, int, (nspec, nexp), optional
+            Index of the wave_grid bin of each pixel in waves; see compute_stack.
 
     Returns:
         tuple: Returns the following:
@@ -2006,7 +2108,8 @@ def scale_spec_stack(wave_grid, waves, fluxes, ivars, masks, sn, weights, ref_pe
     '''
 
     # Compute an initial stack as the reference, this has its own wave grid based on the weighted averages
-    wave_stack, flux_stack, ivar_stack, mask_stack, nused = compute_stack(wave_grid, waves, fluxes, ivars, masks, weights)
+    wave_stack, flux_stack, ivar_stack, mask_stack, nused = compute_stack(wave_grid, waves, fluxes, ivars, masks, weights,
+                                                                          wave_index=wave_index)
 
     # Rescale spectra to line up with our preliminary stack so that we can sensibly reject outliers
     nexp = np.shape(fluxes)[1]
@@ -2135,18 +2238,22 @@ def combspec(waves, fluxes, ivars, masks, sn_smooth_npix,
     wave_grid, _, _ = get_wave_grid(waves, masks = masks, wave_method=wave_method, wave_grid_min=wave_grid_min,
                                     wave_grid_max=wave_grid_max,dwave=dwave, dv=dv, dloglam=dloglam, samp_fact=samp_fact)
 
+    # Bin the wavelengths once for all the stacks
+    wave_index = wave_grid_index(wave_grid, waves)
+
     # Evaluate the sn_weights. This is done once at the beginning
     rms_sn, weights = sn_weights(waves, fluxes, ivars, masks, sn_smooth_npix, const_weights=const_weights, verbose=verbose)
 
     fluxes_scale, ivars_scale, scales, scale_method_used = scale_spec_stack(
         wave_grid, waves, fluxes, ivars, masks, rms_sn, weights, ref_percentile=ref_percentile, maxiter_scale=maxiter_scale,
         sigrej_scale=sigrej_scale, scale_method=scale_method, hand_scale=hand_scale,
-        sn_min_polyscale=sn_min_polyscale, sn_min_medscale=sn_min_medscale, debug=debug_scale, show=show_scale)
+        sn_min_polyscale=sn_min_polyscale, sn_min_medscale=sn_min_medscale, debug=debug_scale, show=show_scale,
+        wave_index=wave_index)
 
     # Rejecting and coadding
     wave_stack, flux_stack, ivar_stack, mask_stack, outmask, nused = spec_reject_comb(
         wave_grid, waves, fluxes_scale, ivars_scale, masks, weights, sn_clip=sn_clip, lower=lower, upper=upper,
-        maxrej=maxrej, maxiter_reject=maxiter_reject, debug=debug, title=title)
+        maxrej=maxrej, maxiter_reject=maxiter_reject, debug=debug, title=title, wave_index=wave_index)
 
     if show:
         coadd_qa(wave_stack, flux_stack, ivar_stack, nused, mask=mask_stack, title='Stacked spectrum', qafile=qafile)
@@ -2286,13 +2393,47 @@ def multi_combspec(waves, fluxes, ivars, masks, sn_smooth_npix=None,
 
     return wave_stack, flux_stack, ivar_stack, mask_stack
 
+def map_orders(func, n_workers, args, order_kwargs=None, **kwargs):
+    """
+    Apply a function to the data of each echelle order.
+
+    Args:
+        func (callable):
+            Function to apply.  Must be picklable if ``n_workers > 1``.
+        n_workers (:obj:`int`):
+            Number of worker processes.  If 1, the orders are
+            processed serially.
+        args (:obj:`list`):
+            Positional arguments of ``func``.  Each element is an
+            iterable with one item per order.
+        order_kwargs (:obj:`dict`, optional):
+            Keyword arguments of ``func`` that differ between orders.
+            Each value is an iterable with one item per order.
+        **kwargs:
+            Keyword arguments passed to ``func`` for all orders.
+
+    Returns:
+        :obj:`list`: The result of ``func`` for each order, in order.
+    """
+    order_args = list(zip(*args))
+    order_kwargs = [{}]*len(order_args) if order_kwargs is None \
+                        else [dict(zip(order_kwargs.keys(), items))
+                              for items in zip(*order_kwargs.values())]
+    if n_workers == 1:
+        return [func(*_args, **_kwargs, **kwargs) for _args, _kwargs in zip(order_args, order_kwargs)]
+    with futures.ProcessPoolExecutor(max_workers=n_workers) as executor:
+        jobs = [executor.submit(func, *_args, **_kwargs, **kwargs)
+                for _args, _kwargs in zip(order_args, order_kwargs)]
+        return [job.result() for job in jobs]
+
+
 def ech_combspec(waves, fluxes, ivars, masks, sensfile, nbest=None, wave_method='log10',
                  dwave=None, dv=None, dloglam=None, samp_fact=1.0, wave_grid_min=None, wave_grid_max=None,
                  ref_percentile=70.0, maxiter_scale=5, niter_order_scale=3, sigrej_scale=3.0, scale_method='auto',
                  hand_scale=None, sn_min_polyscale=2.0, sn_min_medscale=0.5,
                  sn_smooth_npix=None, const_weights=False, maxiter_reject=5, sn_clip=30.0, lower=3.0, upper=3.0,
                  maxrej=None, qafile=None, debug_scale=False, debug=False, show_order_stacks=False, show_order_scale=False,
-                 show_exp=False, show=False, verbose=False):
+                 show_exp=False, show=False, verbose=False, n_workers=1):
     """
     Driver routine for coadding Echelle spectra. Calls combspec which is the main stacking algorithm. It will deliver
     three fits files: spec1d_order_XX.fits (stacked individual orders, one order per extension), spec1d_merge_XX.fits
@@ -2394,6 +2535,10 @@ def ech_combspec(waves, fluxes, ivars, masks, sensfile, nbest=None, wave_method=
             Show interactive QA plots for the rescaling of the spectra so that the overlap regions match from order to order
         show: bool, default=False,
              Show key QA plots or not
+        n_workers (int): default=1
+            Number of worker processes used to scale and stack the individual orders. The inter-order scaling
+            of the full stack and the giant stack are always performed serially. The orders are processed
+            serially if debug_scale (scaling) or debug (stacking) is True.
 
     Returns:
         tuple: Returns the following:
@@ -2448,6 +2593,9 @@ def ech_combspec(waves, fluxes, ivars, masks, sensfile, nbest=None, wave_method=
                                     wave_grid_min=wave_grid_min, wave_grid_max=wave_grid_max,
                                     dwave=dwave, dv=dv, dloglam=dloglam, samp_fact=samp_fact)
 
+    # Bin the wavelengths once for all the stacks
+    wave_index = wave_grid_index(wave_grid, waves)
+
     # Evaluate the sn_weights. This is done once at the beginning
     rms_sn, weights_sn = sn_weights(waves, fluxes, ivars, masks, sn_smooth_npix, const_weights=const_weights, verbose=verbose)
     # Isolate the nbest best orders, and then use the average S/N of these to determine the per exposure relative weights.
@@ -2468,21 +2616,23 @@ def ech_combspec(waves, fluxes, ivars, masks, sensfile, nbest=None, wave_method=
     if debug:
         weights_qa(waves, weights, masks, title='ech_combspec')
 
-    fluxes_scl_interord = np.zeros_like(fluxes)
-    ivars_scl_interord = np.zeros_like(ivars)
-    scales_interord = np.zeros_like(fluxes)
     # First perform inter-order scaling once
-    for iord in range(norder):
-        # TODO Add checking here such that orders with low S/N ratio are instead scaled using scale factors from
-        # higher S/N ratio. The point is it makes no sense to take 0.0/0.0. In the low S/N regime, i.e. DLAs,
-        # GP troughs, we should be rescaling using scale factors from orders with signal. This also applies
-        # to the echelle combine below.
-        fluxes_scl_interord[:, iord], ivars_scl_interord[:,iord], scales_interord[:,iord], scale_method_used = \
-            scale_spec_stack(wave_grid, waves[:, iord, :], fluxes[:, iord, :], ivars[:, iord, :], masks[:, iord, :],
-                             rms_sn[iord, :], weights[:, iord, :], ref_percentile=ref_percentile,
-                             maxiter_scale=maxiter_scale, sigrej_scale=sigrej_scale, scale_method=scale_method,
-                             hand_scale=hand_scale,
-                             sn_min_polyscale=sn_min_polyscale, sn_min_medscale=sn_min_medscale, debug=debug_scale)
+    # TODO Add checking here such that orders with low S/N ratio are instead scaled using scale factors from
+    # higher S/N ratio. The point is it makes no sense to take 0.0/0.0. In the low S/N regime, i.e. DLAs,
+    # GP troughs, we should be rescaling using scale factors from orders with signal. This also applies
+    # to the echelle combine below.
+    order_scales = map_orders(scale_spec_stack, 1 if debug_scale else n_workers,
+                              [[wave_grid]*norder, waves.transpose(1,0,2), fluxes.transpose(1,0,2),
+                               ivars.transpose(1,0,2), masks.transpose(1,0,2), rms_sn,
+                               weights.transpose(1,0,2)],
+                              order_kwargs=dict(wave_index=wave_index.transpose(1,0,2)),
+                              ref_percentile=ref_percentile, maxiter_scale=maxiter_scale,
+                              sigrej_scale=sigrej_scale, scale_method=scale_method, hand_scale=hand_scale,
+                              sn_min_polyscale=sn_min_polyscale, sn_min_medscale=sn_min_medscale,
+                              debug=debug_scale)
+    fluxes_scl_interord = np.stack([o[0] for o in order_scales], axis=1)
+    ivars_scl_interord = np.stack([o[1] for o in order_scales], axis=1)
+    scales_interord = np.stack([o[2] for o in order_scales], axis=1)
 
     # Arrays to store rescaled spectra. Need Fortran like order reshaping to create a (nspec, norder*nexp) stack of spectra.
     # The order of the reshaping in the second dimension is such that blocks norder long for each exposure are stacked
@@ -2495,6 +2645,7 @@ def ech_combspec(waves, fluxes, ivars, masks, sensfile, nbest=None, wave_method=
     masks_2d = np.reshape(masks, shape_2d, order='F')
     scales_2d = np.reshape(scales_interord, shape_2d, order='F')
     weights_2d = np.reshape(weights, shape_2d, order='F')
+    wave_index_2d = np.reshape(wave_index, shape_2d, order='F')
     rms_sn_2d = np.reshape(rms_sn, (norder*nexp), order='F')
     # Iteratively scale and stack the spectra, this takes or the order re-scaling we were doing previously
     fluxes_pre_scale = fluxes_2d.copy()
@@ -2508,7 +2659,7 @@ def ech_combspec(waves, fluxes, ivars, masks, sensfile, nbest=None, wave_method=
             wave_grid, waves_2d, fluxes_pre_scale, ivars_pre_scale, masks_2d, rms_sn_2d, weights_2d, ref_percentile=ref_percentile,
             maxiter_scale=maxiter_scale, sigrej_scale=sigrej_scale, scale_method=scale_method_iter[iter], hand_scale=hand_scale,
             sn_min_polyscale=sn_min_polyscale, sn_min_medscale=sn_min_medscale,
-            show=(show_order_scale & (iter == (niter_order_scale-1))))
+            show=(show_order_scale & (iter == (niter_order_scale-1))), wave_index=wave_index_2d)
         scales_2d *= scales_iter
         fluxes_pre_scale = fluxes_scale_2d.copy()
         ivars_pre_scale = ivars_scale_2d.copy()
@@ -2525,13 +2676,16 @@ def ech_combspec(waves, fluxes, ivars, masks, sensfile, nbest=None, wave_method=
     masks_stack_orders = np.zeros_like(waves_stack_orders, dtype=bool)
     outmasks_orders = np.zeros_like(masks)
     # Now perform stacks order by order
+    order_stacks = map_orders(spec_reject_comb, 1 if debug else n_workers,
+                              [[wave_grid]*norder, waves.transpose(1,0,2), fluxes_scale.transpose(1,0,2),
+                               ivars_scale.transpose(1,0,2), masks.transpose(1,0,2),
+                               weights.transpose(1,0,2)],
+                              order_kwargs=dict(wave_index=wave_index.transpose(1,0,2)),
+                              sn_clip=sn_clip, lower=lower, upper=upper, maxrej=maxrej,
+                              maxiter_reject=maxiter_reject, debug=debug, title='order_stacks')
     for iord in range(norder):
-        # Rejecting and coadding
         waves_stack_orders[:, iord], fluxes_stack_orders[:, iord], ivars_stack_orders[:, iord], \
-        masks_stack_orders[:, iord],  outmasks_orders[:,iord,:], nused_iord = spec_reject_comb(
-            wave_grid, waves[:, iord, :], fluxes_scale[:, iord, :], ivars_scale[:, iord, :], masks[:, iord, :], weights[:, iord, :],
-            sn_clip=sn_clip, lower=lower, upper=upper, maxrej=maxrej, maxiter_reject=maxiter_reject, debug=debug,
-            title='order_stacks')
+        masks_stack_orders[:, iord],  outmasks_orders[:,iord,:], nused_iord = order_stacks[iord]
         if show_order_stacks:
             # TODO This will probably crash since sensfile is not guarnetted to have telluric.
             #if sensfile is not None:
@@ -2546,7 +2700,8 @@ def ech_combspec(waves, fluxes, ivars, masks, sensfile, nbest=None, wave_method=
     # Now compute the giant stack
     wave_giant_stack, flux_giant_stack, ivar_giant_stack, mask_giant_stack, outmask_giant_stack, nused_giant_stack = \
         spec_reject_comb(wave_grid, waves_2d, fluxes_2d, ivars_2d, masks_2d, weights_2d, sn_clip=sn_clip,
-                         lower=lower, upper=upper, maxrej=maxrej, maxiter_reject=maxiter_reject, debug=debug)
+                         lower=lower, upper=upper, maxrej=maxrej, maxiter_reject=maxiter_reject, debug=debug,
+                         wave_index=wave_index_2d)
 
     # Reshape everything now exposure-wise
     waves_2d_exps = waves_2d.reshape((nspec * norder, nexp), order='F')
@@ -2704,7 +2859,7 @@ def get_wave_bins(thismask_stack, waveimg_stack, wave_grid):
     return wave_grid[ind_lower:ind_upper + 1]
 
 
-def get_spat_bins(thismask_stack, trace_stack):
+def get_spat_bins(thismask_stack, trace_stack, spat_offset=0):
     """
 
     Parameters
@@ -2716,6 +2871,10 @@ def get_spat_bins(thismask_stack, trace_stack):
         Array holding the stack of traces for each image in the stack. This is either the trace of the center of the slit
         or the trace of the object in question that we are stacking about.
 
+    spat_offset : int, optional
+        Detector column of the first column of the images, if the image stacks are cutouts of the detector images
+        (see pypeit.coadd2d.Spec2DStack). The traces are in detector columns.
+
     Returns
     -------
     dspat_bins : array of shape (spat_max_int +1 - spat_min_int,)
@@ -2730,7 +2889,7 @@ def get_spat_bins(thismask_stack, trace_stack):
     # Create the slit_cen_stack and determine the minimum and maximum
     # spatial offsets that we need to cover to determine the spatial
     # bins
-    spat_img = np.outer(np.ones(nspec), np.arange(nspat))
+    spat_img = np.outer(np.ones(nspec), np.arange(spat_offset, spat_offset + nspat))
     dspat_stack = np.zeros_like(thismask_stack,dtype=float)
     spat_min = np.inf
     spat_max = -np.inf
@@ -2752,7 +2911,8 @@ def get_spat_bins(thismask_stack, trace_stack):
 
 def compute_coadd2d(ref_trace_stack, sciimg_stack, sciivar_stack, skymodel_stack,
                     inmask_stack, tilts_stack,
-                    thismask_stack, waveimg_stack, wave_grid, weights='uniform'):
+                    thismask_stack, waveimg_stack, wave_grid, weights='uniform', spat_offset=0,
+                    n_workers=1):
     """
     Construct a 2d co-add of a stack of PypeIt spec2d reduction outputs.
 
@@ -2813,6 +2973,13 @@ def compute_coadd2d(ref_trace_stack, sciimg_stack, sciivar_stack, skymodel_stack
         wave_grid (`numpy.ndarray`_, optional):
             Same as `loglam_grid` but in angstroms instead of
             log(angstroms). (TODO: Check units...)
+        spat_offset (:obj:`int`, optional):
+            Detector column of the first column of the image stacks,
+            if they are cutouts of the detector images (see
+            :func:`get_spat_bins`).
+        n_workers (:obj:`int`, optional):
+            Number of threads used to rebin the images in the stack
+            (see :func:`rebin2d`).
 
     Returns:
         tuple: Returns the following (TODO: This needs to be updated):
@@ -2859,7 +3026,7 @@ def compute_coadd2d(ref_trace_stack, sciimg_stack, sciivar_stack, skymodel_stack
 
     # Determine the wavelength grid that we will use for the current slit/order
     wave_bins = get_wave_bins(thismask_stack, waveimg_stack, wave_grid)
-    dspat_bins, dspat_stack = get_spat_bins(thismask_stack, ref_trace_stack)
+    dspat_bins, dspat_stack = get_spat_bins(thismask_stack, ref_trace_stack, spat_offset=spat_offset)
 
     sci_list = [weights_stack, sciimg_stack, sciimg_stack - skymodel_stack, tilts_stack,
                 waveimg_stack, dspat_stack]
@@ -2867,7 +3034,7 @@ def compute_coadd2d(ref_trace_stack, sciimg_stack, sciivar_stack, skymodel_stack
 
     sci_list_rebin, var_list_rebin, norm_rebin_stack, nsmp_rebin_stack \
             = rebin2d(wave_bins, dspat_bins, waveimg_stack, dspat_stack, thismask_stack,
-                      inmask_stack, sci_list, var_list)
+                      inmask_stack, sci_list, var_list, n_workers=n_workers)
     # Now compute the final stack with sigma clipping
     sigrej = 3.0
     maxiters = 10
@@ -2919,11 +3086,13 @@ def compute_coadd2d(ref_trace_stack, sciimg_stack, sciivar_stack, skymodel_stack
 
 
 
-def rebin2d(spec_bins, spat_bins, waveimg_stack, spatimg_stack, thismask_stack, inmask_stack, sci_list, var_list):
+def rebin2d(spec_bins, spat_bins, waveimg_stack, spatimg_stack, thismask_stack, inmask_stack, sci_list, var_list,
+            n_workers=1):
     """
     Rebin a set of images and propagate variance onto a new spectral and spatial grid. This routine effectively
-    "recitifies" images using np.histogram2d which is extremely fast and effectiveluy performs
-    nearest grid point interpolation.
+    "recitifies" images using the binning of np.histogram2d and effectiveluy performs
+    nearest grid point interpolation. The rebinned pixel of each input pixel is only computed once per image
+    (see wave_grid_index), and all of the images are accumulated with np.bincount.
 
     Args:
         spec_bins: float ndarray, shape = (nspec_rebin)
@@ -2946,6 +3115,8 @@ def rebin2d(spec_bins, spat_bins, waveimg_stack, spatimg_stack, thismask_stack,
         var_list: list
             List of  float ndarray variance images (each being an image stack with shape (nimgs, nspec, nspat))
             which are to be rebbinned with proper erorr propagation
+        n_workers: int, optional
+            Number of threads used to rebin the images in the stack concurrently.
 
     Returns:
         tuple: Returns the following:
@@ -2978,6 +3149,7 @@ def rebin2d(spec_bins, spat_bins, waveimg_stack, spatimg_stack, thismask_stack,
     # allocate the output mages
     nspec_rebin = spec_bins.size - 1
     nspat_rebin = spat_bins.size - 1
+    nbins = nspec_rebin*nspat_rebin
     shape_out = (nimgs, nspec_rebin, nspat_rebin)
     nsmp_rebin_stack = np.zeros(shape_out)
     norm_rebin_stack = np.zeros(shape_out)
@@ -2988,37 +3160,45 @@ def rebin2d(spec_bins, spat_bins, waveimg_stack, spatimg_stack, thismask_stack,
     for jj in range(len(var_list)):
         var_list_out.append(np.zeros(shape_out))
 
-    for img in range(nimgs):
-        # This fist image is purely for bookeeping purposes to determine the number of times each pixel
-        # could have been sampled
+    def _rebin(img):
+        # The rebinned pixel of each pixel on the slit is computed once and used for all the images.
+        # Accumulating with np.bincount gives the same result as np.histogram2d.
         thismask = thismask_stack[img, :, :]
-        spec_rebin_this = waveimg_stack[img, :, :][thismask]
-        spat_rebin_this = spatimg_stack[img, :, :][thismask]
+        spec_index = wave_grid_index(spec_bins, waveimg_stack[img, :, :][thismask])
+        spat_index = wave_grid_index(spat_bins, spatimg_stack[img, :, :][thismask])
+        inbin = (spec_index >= 0) & (spat_index >= 0)
+        rebin_index = spec_index*nspat_rebin + spat_index
 
-        nsmp_rebin_stack[img, :, :], spec_edges, spat_edges = np.histogram2d(spec_rebin_this, spat_rebin_this,
-                                                               bins=[spec_bins, spat_bins], density=False)
+        # This fist image is purely for bookeeping purposes to determine the number of times each pixel
+        # could have been sampled
+        nsmp_rebin_stack[img, :, :] = np.bincount(rebin_index[inbin],
+                                                  minlength=nbins).reshape(nspec_rebin, nspat_rebin)
 
-        finmask = thismask & inmask_stack[img,:,:]
-        spec_rebin = waveimg_stack[img, :, :][finmask]
-        spat_rebin = spatimg_stack[img, :, :][finmask]
-        norm_img, spec_edges, spat_edges = np.histogram2d(spec_rebin, spat_rebin,
-                                                          bins=[spec_bins, spat_bins], density=False)
+        finmask = inmask_stack[img, :, :][thismask] & inbin
+        rebin_index = rebin_index[finmask]
+        pixels = np.flatnonzero(thismask)[finmask]
+        norm_img = np.bincount(rebin_index, minlength=nbins).reshape(nspec_rebin, nspat_rebin).astype(float)
         norm_rebin_stack[img, :, :] = norm_img
 
         # Rebin the science images
         for indx, sci in enumerate(sci_list):
-            weigh_sci, spec_edges, spat_edges = np.histogram2d(spec_rebin, spat_rebin,
-                                                               bins=[spec_bins, spat_bins], density=False,
-                                                               weights=sci[img,:,:][finmask])
+            weigh_sci = np.bincount(rebin_index, weights=sci[img, :, :].flat[pixels],
+                                    minlength=nbins).reshape(nspec_rebin, nspat_rebin)
             sci_list_out[indx][img, :, :] = (norm_img > 0.0) * weigh_sci/(norm_img + (norm_img == 0.0))
 
         # Rebin the variance images, note the norm_img**2 factor for correct error propagation
         for indx, var in enumerate(var_list):
-            weigh_var, spec_edges, spat_edges = np.histogram2d(spec_rebin, spat_rebin,
-                                                               bins=[spec_bins, spat_bins], density=False,
-                                                               weights=var[img, :, :][finmask])
+            weigh_var = np.bincount(rebin_index, weights=var[img, :, :].flat[pixels],
+                                    minlength=nbins).reshape(nspec_rebin, nspat_rebin)
             var_list_out[indx][img, :, :] = (norm_img > 0.0)*weigh_var/(norm_img + (norm_img == 0.0))**2
 
+    # Each image fills its own plane of the output stacks
+    if n_workers == 1 or nimgs < 2:
+        for img in range(nimgs):
+            _rebin(img)
+    else:
+        with futures.ThreadPoolExecutor(max_workers=n_workers) as executor:
+            list(executor.map(_rebin, range(nimgs)))
 
     return sci_list_out, var_list_out, norm_rebin_stack.astype(int), nsmp_rebin_stack.astype(int)
 
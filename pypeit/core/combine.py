@@ -1,11 +1,11 @@
 """ Module for image combining
+
+.. include common links, assuming primary doc root is up one directory
+.. include:: ../links.rst
 """
 import numpy as np
 
-from astropy import stats
-
 from pypeit import msgs
-from pypeit import utils
 
 from IPython import embed
 
@@ -76,7 +76,7 @@ def weighted_combine(weights, sci_list, var_list, inmask_stack,
             Rejection threshold for sigma clipping. Code defaults to determining this automatically based
             on the numberr of images provided.
         maxiters:
-            Maximum number of iterations for sigma clipping using astropy.stats.SigmaClip
+            Maximum number of iterations for sigma clipping; see :func:`sigclip_stack`.
 
     Returns:
         tuple: Returns the following:
@@ -129,11 +129,8 @@ def weighted_combine(weights, sci_list, var_list, inmask_stack,
             else:
                 sigrej = 2.0
         # sigma clip if we have enough images
-        # mask_stack > 0 is a masked value. numpy masked arrays are True for masked (bad) values
-        data = np.ma.MaskedArray(sigma_clip_stack, np.invert(inmask_stack))
-        sigclip = stats.SigmaClip(sigma=sigrej, maxiters=maxiters, cenfunc='median', stdfunc=utils.nan_mad_std)
-        data_clipped, lower, upper = sigclip(data, axis=0, masked=True, return_bounds=True)
-        mask_stack = np.invert(data_clipped.mask)  # mask_stack = True are good values
+        mask_stack = sigclip_stack(sigma_clip_stack, inmask_stack, sigrej=sigrej,
+                                   maxiters=maxiters)  # mask_stack = True are good values
     else:
         if sigma_clip and nimgs < 3:
             msgs.warn('Sigma clipping requested, but you cannot sigma clip with less than 3 images. '
@@ -157,6 +154,97 @@ def weighted_combine(weights, sci_list, var_list, inmask_stack,
     return sci_list_out, var_list_out, gpm, nused
 
 
+def stack_median(sorted_stack, ngood):
+    """
+    Compute the median along the first axis of a sorted stack.
+
+    The stack must have been sorted along its first axis with all the
+    masked values set to ``np.inf`` so that the good values of each
+    pixel occupy the first ``ngood`` elements.
+
+    Args:
+        sorted_stack (`numpy.ndarray`_):
+            Sorted stack with shape (nimgs, npix).
+        ngood (`numpy.ndarray`_):
+            Integer array with shape (npix,) with the number of good
+            values for each pixel.
+
+    Returns:
+        `numpy.ndarray`_: Median of each pixel; NaN where there are no
+        good values.
+    """
+    # Indices of the two central values; identical for odd ngood
+    lo = np.clip((ngood - 1)//2, 0, None)
+    hi = np.clip(ngood//2, 0, sorted_stack.shape[0]-1)
+    cols = np.arange(sorted_stack.shape[1])
+    with np.errstate(invalid='ignore'):
+        median = 0.5*(sorted_stack[lo,cols] + sorted_stack[hi,cols])
+    median[ngood == 0] = np.nan
+    return median
+
+
+def sigclip_stack(stack, gpm, sigrej=3.0, maxiters=5):
+    """
+    Iteratively sigma clip an image stack along its first axis.
+
+    At each iteration, the center and width of the distribution of
+    the good values of each pixel are computed using the median and
+    the median absolute deviation scaled to a Gaussian standard
+    deviation (see :func:`pypeit.utils.nan_mad_std`), and values
+    further than ``sigrej`` times the width from the center are
+    rejected.  This reproduces the result of `astropy.stats.SigmaClip`_
+    with ``cenfunc='median'`` and ``stdfunc=pypeit.utils.nan_mad_std`` along
+    ``axis=0``, but operates on plain arrays and only iterates on the
+    pixels that are still changing.  Non-finite values are always
+    rejected.
+
+    Args:
+        stack (`numpy.ndarray`_):
+            Stack to clip with shape (nimgs, ...).
+        gpm (`numpy.ndarray`_):
+            Boolean good-pixel mask (True=Good) for the input stack,
+            with the same shape.
+        sigrej (:obj:`float`, optional):
+            Rejection threshold in units of the standard deviation.
+        maxiters (:obj:`int`, optional):
+            Maximum number of clipping iterations.  If None, iterate
+            until no more values are rejected.
+
+    Returns:
+        `numpy.ndarray`_: Boolean good-pixel mask (True=Good) after
+        clipping, with the same shape as the input stack.
+    """
+    if stack.shape != gpm.shape:
+        msgs.error('Stack and mask must have the same shape.')
+    nimgs = stack.shape[0]
+    data = stack.reshape(nimgs, -1)
+    out_gpm = (gpm & np.isfinite(stack)).reshape(nimgs, -1)
+
+    # Pixels being clipped
+    active = np.arange(data.shape[1])
+    iteration = 0
+    while active.size > 0 and (maxiters is None or iteration < maxiters):
+        iteration += 1
+        _data = data[:,active]
+        _gpm = out_gpm[:,active]
+        ngood = np.sum(_gpm, axis=0)
+        # Center
+        center = stack_median(np.sort(np.where(_gpm, _data, np.inf), axis=0), ngood)
+        # Width
+        absdev = np.where(_gpm, np.absolute(_data - center[None,:]), np.inf)
+        std = stack_median(np.sort(absdev, axis=0), ngood) * 1.482602218505602
+        # Reject
+        with np.errstate(invalid='ignore'):
+            reject = _gpm & ((_data < (center - std*sigrej)[None,:])
+                                | (_data > (center + std*sigrej)[None,:]))
+        changed = np.any(reject, axis=0)
+        out_gpm[:,active] = _gpm & np.logical_not(reject)
+        # Only continue with the pixels that changed
+        active = active[changed]
+
+    return out_gpm.reshape(stack.shape)
+
+
 def img_list_error_check(sci_list, var_list):
     """
     Utility routine for dealing dealing with lists of image stacks for rebin2d and weigthed_combine routines below. This
@@ -248,6 +248,37 @@ def extract_boxcar(sciimg, ivar, mask, waveimg, skyimg, rn2_img, box_radius, spe
     spec.BOX_NPIX = pixtot-pixmsk
 
 
+def extract_boxcar_cutout(cutout, box_radius, spec):
+    """
+    Perform boxcar extraction for a single SpecObj on the cutout of a
+    slit.
+
+    Wrapper for :func:`extract_boxcar` that only operates on the
+    pixels in the cutout of the images containing the slit.  The trace
+    of the object is shifted to the cutout before the extraction and
+    back to the detector afterwards.
+
+    Args:
+        cutout (:class:`pypeit.slittrace.SlitCutout`):
+            Cutout of the images containing the slit.  Must include
+            the ``sciimg``, ``ivar``, ``mask``, ``waveimg``,
+            ``skyimg``, and ``rn2_img`` images; see
+            :func:`extract_boxcar`.  Pixels off the slit must be
+            masked.
+        box_radius (float):
+            Size of boxcar window in floating point pixels in the
+            spatial direction.
+        spec (:class:`pypeit.specobj.SpecObj`):
+            Object to extract; filled in place.
+    """
+    spec.TRACE_SPAT = cutout.to_cutout(spec.TRACE_SPAT)
+    try:
+        extract_boxcar(cutout['sciimg'], cutout['ivar'], cutout['mask'], cutout['waveimg'],
+                       cutout['skyimg'], cutout['rn2_img'], box_radius, spec)
+    finally:
+        spec.TRACE_SPAT = cutout.to_detector(spec.TRACE_SPAT)
+
+
 def findfwhm(model, sig_x):
     """ Calculate the spatial FWHM from an object profile. Utitlit routine for fit_profile
 
@@ -1639,6 +1670,58 @@ def objfind(image, thismask, slit_left, slit_righ, inmask=None, fwhm=3.0, maxdev
     return sobjs, skymask[thismask]
 
 
+def objfind_cutout(cutout, std_trace=None, hand_extract_dict=None, **kwargs):
+    """
+    Find the objects in the cutout of a slit.
+
+    Wrapper for :func:`objfind` that only operates on the pixels in
+    the cutout of the images containing the slit.  The standard trace
+    and the hand-extraction apertures are shifted to the cutout, and
+    the traces of the objects found are shifted back to the detector.
+
+    Args:
+        cutout (:class:`pypeit.slittrace.SlitCutout`):
+            Cutout of the images containing the slit.  Must include
+            the ``image`` image and can include the ``inmask`` image;
+            see :func:`objfind`.
+        std_trace (`numpy.ndarray`_, optional):
+            Standard star trace in detector pixels; see
+            :func:`objfind`.
+        hand_extract_dict (:obj:`dict`, optional):
+            Hand-extraction apertures in detector pixels; see
+            :func:`objfind`.  Apertures outside the cutout are
+            ignored.
+        **kwargs:
+            Passed directly to :func:`objfind`.
+
+    Returns:
+        :obj:`tuple`: The objects found, with their traces in detector
+        pixels, and the sky mask for the pixels in the slit, ordered as
+        ``cutout.indices``; see :func:`objfind`.
+    """
+    if hand_extract_dict is not None:
+        # Only keep the apertures in the cutout so that they can be
+        # used to index the cutout images
+        spat = np.rint(np.asarray(hand_extract_dict['hand_extract_spat'])).astype(int)
+        indx = (spat >= cutout.spat.start) & (spat < cutout.spat.stop)
+        hand_extract_dict = dict([(key, np.asarray(value)[indx])
+                                  for key, value in hand_extract_dict.items()])
+        hand_extract_dict['hand_extract_spat'] \
+                = cutout.to_cutout(hand_extract_dict['hand_extract_spat'])
+    sobjs, skymask = objfind(cutout['image'], cutout.thismask, cutout.left, cutout.right,
+                             inmask=cutout.images.get('inmask'),
+                             std_trace=None if std_trace is None else cutout.to_cutout(std_trace),
+                             hand_extract_dict=hand_extract_dict, **kwargs)
+    for sobj in sobjs:
+        sobj.TRACE_SPAT = cutout.to_detector(sobj.TRACE_SPAT)
+        sobj.SPAT_PIXPOS = cutout.to_detector(sobj.SPAT_PIXPOS)
+        if sobj.hand_extract_flag:
+            sobj.hand_extract_spat = cutout.to_detector(sobj.hand_extract_spat)
+        # The name includes the spatial position
+        sobj.set_name()
+    return sobjs, skymask
+
+
 def remap_orders(xinit, spec_min_max, inverse=False):
 
     """
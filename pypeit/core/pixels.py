@@ -218,3 +218,38 @@ def ximg_and_edgemask(lord_in, rord_in, slitpix, trim_edg=(3,3), xshift=0.):
     return ximg, edgemask
 
 
+
+
+def slit_bounding_boxes(slitmask):
+    """
+    Find the bounding box of every slit in a slit mask image.
+
+    The image is only traversed once, regardless of the number of
+    slits.
+
+    Args:
+        slitmask (`numpy.ndarray`_):
+            Integer image with the ID of the slit that each pixel
+            belongs to; pixels that are not in any slit must be
+            negative.  Shape is (nspec, nspat).
+
+    Returns:
+        tuple: Three `numpy.ndarray`_ objects: the sorted IDs of the
+        slits in the image, and the spectral and spatial ranges of
+        their bounding boxes, both with shape (nslits, 2).  The upper
+        limit of each range is exclusive, such that the box of slit
+        ``i`` is ``slitmask[spec_box[i,0]:spec_box[i,1],
+        spat_box[i,0]:spat_box[i,1]]``.
+    """
+    spec, spat = np.where(slitmask >= 0)
+    ids, indx = np.unique(slitmask[spec, spat], return_inverse=True)
+    # Flag the rows and columns covered by each slit
+    in_spec = np.zeros((ids.size, slitmask.shape[0]), dtype=bool)
+    in_spec[indx, spec] = True
+    in_spat = np.zeros((ids.size, slitmask.shape[1]), dtype=bool)
+    in_spat[indx, spat] = True
+    spec_box = np.column_stack((np.argmax(in_spec, axis=1),
+                                slitmask.shape[0] - np.argmax(in_spec[:,::-1], axis=1)))
+    spat_box = np.column_stack((np.argmax(in_spat, axis=1),
+                                slitmask.shape[1] - np.argmax(in_spat[:,::-1], axis=1)))
+    return ids, spec_box, spat_box
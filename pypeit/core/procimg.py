@@ -3,6 +3,8 @@
 .. include common links, assuming primary doc root is up one directory
 .. include:: ../links.rst
 """
+from concurrent import futures
+
 import numpy as np
 from scipy import signal, ndimage
 from scipy.optimize import curve_fit
@@ -170,6 +172,244 @@ def lacosmic(sciframe, saturation, nonlinear, varframe=None, maxiter=1, grow=1.5
     return crmask.astype(bool)
 
 
+
+def lacosmic_fast(sciframe, saturation, nonlinear, varframe=None, maxiter=1, grow=1.5,
+                  remove_compact_obj=True, sigclip=5.0, sigfrac=0.3, objlim=5.0,
+                  slitmask=None, use_float32=False, n_workers=1, chunk=8192):
+    """
+    Identify cosmic rays using a faster implementation of the L.A.Cosmic
+    algorithm in :func:`lacosmic`.
+
+    The selection follows :func:`lacosmic`, but avoids its full-frame
+    filters:
+
+        - The Laplacian of the 2x subsampled image is computed directly
+          from the differences between each pixel and its neighbors,
+          instead of convolving the subsampled image.
+        - Because the Laplacian S/N image is non-negative, only pixels
+          above the lower clipping threshold can be selected.  The
+          median filters used to remove the large structures and build
+          the fine-structure image are therefore only evaluated at
+          these pixels and at the candidate cosmic rays, respectively.
+        - The candidate growth and the final mask growth use binary
+          dilations.
+
+    Because the image is not changed between iterations in
+    :func:`lacosmic`, all iterations select the same pixels; ``maxiter``
+    is therefore only kept for compatibility.  For finite data, the mask
+    is the same as the one returned by :func:`lacosmic` up to the
+    round-off in the Laplacian.  Unlike :func:`lacosmic`, pixels with a
+    non-finite Laplacian S/N, such as those with zero variance, are
+    never selected, such that the masks can differ near these pixels.
+
+    Args:
+        sciframe (`numpy.ndarray`_):
+            Image to search for cosmic rays.
+        saturation (:obj:`float`):
+            Saturation level of the detector.
+        nonlinear (:obj:`float`):
+            Fraction of the saturation level above which pixels are
+            considered saturated.
+        varframe (`numpy.ndarray`_, optional):
+            Variance image.  If None, the noise is estimated from the
+            median-filtered image.
+        maxiter (:obj:`int`, optional):
+            Not used; see above.
+        grow (:obj:`float`, optional):
+            Radius in pixels by which to grow the cosmic-ray mask.
+        remove_compact_obj (:obj:`bool`, optional):
+            Remove candidates consistent with compact objects using the
+            fine-structure image.
+        sigclip (:obj:`float`, optional):
+            Threshold for identifying a CR
+        sigfrac (:obj:`float`, optional):
+            Fraction of ``sigclip`` used as the threshold for the
+            pixels neighboring a CR.
+        objlim (:obj:`float`, optional):
+            Contrast limit between the Laplacian and fine-structure
+            images for a candidate to be considered a CR.
+        slitmask (`numpy.ndarray`_, optional):
+            Slit ID image; see
+            :func:`pypeit.slittrace.SlitTraceSet.slit_img`.  If
+            provided, only pixels in a slit (``slitmask > -1``) are
+            searched for cosmic rays.
+        use_float32 (:obj:`bool`, optional):
+            Perform the calculations in single precision.
+        n_workers (:obj:`int`, optional):
+            Number of threads used to compute the median filters at the
+            selected pixels.
+        chunk (:obj:`int`, optional):
+            Number of pixels at which the median filters are computed
+            at once; this limits the memory used.
+
+    Returns:
+        `numpy.ndarray`_: Boolean mask of cosmic rays (True=CR)
+    """
+    msgs.info("Detecting cosmic rays with the fast L.A.Cosmic algorithm")
+    dtype = np.float32 if use_float32 else float
+    scicopy = sciframe.astype(dtype)
+    sigcliplow = sigclip * sigfrac
+    insearch = None if slitmask is None else slitmask > -1
+
+    # Determine if there are saturated pixels
+    satpix = sciframe >= saturation*nonlinear
+    if not np.any(satpix):
+        satpix = None
+
+    msgs.info("Computing the Laplacian of the subsampled image")
+    lplus = subsampled_laplacian(scicopy)
+
+    msgs.info("Creating noise model")
+    noise = np.sqrt(np.abs(ndimage.median_filter(scicopy, size=5, mode='mirror'))) \
+                if varframe is None else np.sqrt(varframe.astype(dtype))
+
+    # Laplacian S/N
+    with np.errstate(divide='ignore', invalid='ignore'):
+        s = lplus / (2.0 * noise)  # Note that the 2.0 is from the 2x2 subsampling
+    # Pixels without noise (e.g. zero variance) are never selected
+    s[np.logical_not(np.isfinite(s))] = 0.0
+
+    # Remove the large structures, only where the result can exceed the
+    # lower threshold
+    sp = np.zeros_like(s)
+    search = s > sigcliplow
+    if insearch is not None:
+        search &= insearch
+    indx = np.where(search.ravel())[0]
+    sp.flat[indx] = s.flat[indx] - median_filter_at(s, indx, 5, n_workers=n_workers,
+                                                    chunk=chunk)
+
+    msgs.info("Selecting candidate cosmic rays")
+    candidates = sp > sigclip
+    if satpix is not None:
+        candidates &= np.logical_not(satpix)
+    msgs.info("{0:5d} candidate pixels".format(np.sum(candidates)))
+
+    if remove_compact_obj:
+        msgs.info("Removing suspected compact bright objects")
+        # Fine structure image at the candidate pixels
+        indx = np.where(candidates.ravel())[0]
+        m3 = median_filter_at(scicopy, indx, 3, n_workers=n_workers, chunk=chunk)
+        m37 = median_filter_at(scicopy, indx, 3, size2=7, n_workers=n_workers, chunk=chunk)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            f = ((m3 - m37) / noise.flat[indx]).clip(min=0.01)
+            keep = sp.flat[indx]/f > objlim
+        cosmics = np.zeros_like(candidates)
+        cosmics.flat[indx[keep]] = True
+    else:
+        cosmics = candidates
+    msgs.info("{0:5d} remaining candidate pixels".format(np.sum(cosmics)))
+
+    msgs.info("Finding neighboring pixels affected by cosmic rays")
+    growkernel = np.ones((3,3), dtype=bool)
+    growcosmics = ndimage.binary_dilation(cosmics, structure=growkernel) & (sp > sigclip)
+    crmask = ndimage.binary_dilation(growcosmics, structure=growkernel) & (sp > sigcliplow)
+    if satpix is not None:
+        crmask &= np.logical_not(satpix)
+    msgs.info("{0:5d} pixels detected as cosmics".format(np.sum(crmask)))
+
+    # Additional algorithms (not traditionally implemented by LA cosmic) to remove some false positives.
+    with np.errstate(divide='ignore', invalid='ignore'):
+        filt = ndimage.sobel(scicopy, axis=1, mode='constant')
+        filty = ndimage.sobel(filt/np.sqrt(np.abs(scicopy)), axis=0, mode='constant')
+    filty[np.isnan(filty)] = 0.0
+    sigsmth = ndimage.gaussian_filter(cr_screen(filty), 1.5)
+    crmask &= sigsmth > sigclip
+
+    msgs.info("Growing cosmic ray mask by 1 pixel")
+    d = int(1+grow)
+    i, j = np.mgrid[-d:d+1,-d:d+1]
+    return ndimage.binary_dilation(crmask, structure=i*i+j*j <= grow*grow)
+
+
+def subsampled_laplacian(img):
+    """
+    Compute the positive Laplacian of a 2x subsampled image, rebinned to
+    the original size.
+
+    This is identical to convolving the image returned by
+    :func:`pypeit.utils.subsample` with the Laplacian kernel (using
+    symmetric boundaries), clipping the negative values, and rebinning
+    the result with :func:`pypeit.utils.rebin_evlist`, as done by
+    :func:`lacosmic`.  Each subsampled pixel only differs from its
+    neighbors in one spectral and one spatial direction, such that its
+    Laplacian is the sum of the differences with the adjacent original
+    pixels in those directions.
+
+    Args:
+        img (`numpy.ndarray`_):
+            Image to process.
+
+    Returns:
+        `numpy.ndarray`_: The rebinned positive Laplacian.
+    """
+    _img = np.pad(img, 1, mode='edge')
+    up = img - _img[:-2,1:-1]
+    down = img - _img[2:,1:-1]
+    left = img - _img[1:-1,:-2]
+    right = img - _img[1:-1,2:]
+    return ((up+left).clip(min=0) + (up+right).clip(min=0) + (down+left).clip(min=0)
+                + (down+right).clip(min=0)) / 4
+
+
+def median_filter_at(img, indx, size, size2=None, n_workers=1, chunk=8192):
+    """
+    Compute a median filter of an image at a subset of its pixels.
+
+    The result is identical to selecting the pixels from the output of
+    ``scipy.ndimage.median_filter(img, size=size, mode='mirror')``, or,
+    if ``size2`` is provided, from the result of applying a second
+    median filter of size ``size2`` to that output.  The cost scales
+    with the number of selected pixels instead of the image size.
+
+    Args:
+        img (`numpy.ndarray`_):
+            Image to filter.
+        indx (`numpy.ndarray`_):
+            Flattened indices of the pixels at which to compute the
+            filter.
+        size (:obj:`int`):
+            Odd size of the (square) median filter.
+        size2 (:obj:`int`, optional):
+            Odd size of a second median filter applied to the result
+            of the first.
+        n_workers (:obj:`int`, optional):
+            Number of threads used to process the chunks of pixels.
+        chunk (:obj:`int`, optional):
+            Number of pixels processed at once; this limits the memory
+            used.
+
+    Returns:
+        `numpy.ndarray`_: The filtered values of the selected pixels.
+    """
+    # Mirror the image such that the windows of all pixels are
+    # within the padded image
+    h = size//2 if size2 is None else size//2 + size2//2
+    padded = np.pad(img, h, mode='reflect')
+    offset = np.arange(2*h+1)
+    row, col = np.unravel_index(indx, img.shape)
+
+    def _median(w, n):
+        # Median of the last n elements of each window
+        w = w.reshape(w.shape[:-2] + (n*n,))
+        return np.partition(w, n*n//2, axis=-1)[...,n*n//2]
+
+    def _filter(s):
+        w = padded[row[s,None,None] + offset[None,:,None], col[s,None,None] + offset[None,None,:]]
+        if size2 is None:
+            return _median(w, size)
+        w = np.lib.stride_tricks.sliding_window_view(w, (size,size), axis=(1,2))
+        return _median(_median(w, size), size2)
+
+    chunks = [slice(i, i+chunk) for i in range(0, indx.size, chunk)]
+    if n_workers == 1 or len(chunks) < 2:
+        result = [_filter(s) for s in chunks]
+    else:
+        with futures.ThreadPoolExecutor(max_workers=n_workers) as executor:
+            result = list(executor.map(_filter, chunks))
+    return np.concatenate(result) if len(result) > 0 else np.empty(0, dtype=img.dtype)
+
+
 def cr_screen(a, mask_value=0.0, spatial_axis=1):
     r"""
     Calculate the significance of pixel deviations from the median along
@@ -217,6 +217,30 @@ def global_skysub(image, ivar, tilts, thismask, slit_left, slit_righ, inmask=Non
     return ythis
 
 
+def global_skysub_cutout(cutout, **kwargs):
+    """
+    Perform global sky subtraction on the cutout of a slit.
+
+    Wrapper for :func:`global_skysub` that only operates on the pixels
+    in the cutout of the images containing the slit, which yields the
+    same result as fitting the full images.
+
+    Args:
+        cutout (:class:`pypeit.slittrace.SlitCutout`):
+            Cutout of the images containing the slit.  Must include
+            the ``image``, ``ivar``, and ``tilts`` images and can
+            include the ``inmask`` image; see :func:`global_skysub`.
+        **kwargs:
+            Passed directly to :func:`global_skysub`.
+
+    Returns:
+        `numpy.ndarray`_: The model sky background at the pixels in
+        the slit, ordered as ``cutout.indices``.
+    """
+    return global_skysub(cutout['image'], cutout['ivar'], cutout['tilts'], cutout.thismask,
+                         cutout.left, cutout.right, inmask=cutout.images.get('inmask'), **kwargs)
+
+
 
 # TODO -- This needs JFH docs, desperately
 def skyoptimal(wave, data, ivar, oprof, sortpix, sigrej=3.0, npoly=1, spatial=None, fullbkpt=None):
@@ -906,16 +930,67 @@ def local_skysub_extract(sciimg, sciivar, tilts, waveimg, global_sky, rn2_img,
     return (skyimage[thismask], objimage[thismask], modelivar[thismask], outmask[thismask])
 
 
+def local_skysub_extract_cutout(cutout, sobjs, **kwargs):
+    """
+    Perform local sky subtraction and extraction on the cutout of a
+    slit.
+
+    Wrapper for :func:`local_skysub_extract` that only operates on the
+    pixels in the cutout of the images containing the slit.  The
+    traces of the objects are shifted to the cutout before the
+    extraction and back to the detector afterwards.
+
+    Args:
+        cutout (:class:`pypeit.slittrace.SlitCutout`):
+            Cutout of the images containing the slit.  Must include
+            the ``sciimg``, ``sciivar``, ``tilts``, ``waveimg``,
+            ``global_sky``, and ``rn2_img`` images and can include the
+            ``ingpm`` and ``spat_pix`` images; see
+            :func:`local_skysub_extract`.  The ``spat_pix`` image
+            must be in detector pixels.
+        sobjs (:class:`pypeit.specobjs.SpecObjs`):
+            Objects to extract; modified in place.
+        **kwargs:
+            Passed directly to :func:`local_skysub_extract`.
+
+    Returns:
+        :obj:`tuple`: The four arrays returned by
+        :func:`local_skysub_extract`, ordered as ``cutout.indices``,
+        and the extracted objects.  The latter are returned because
+        ``sobjs`` is a copy when this function is executed by a
+        worker process.
+    """
+    spat_pix = cutout.images.get('spat_pix')
+    for sobj in sobjs:
+        sobj.TRACE_SPAT = cutout.to_cutout(sobj.TRACE_SPAT)
+    skymodel, objmodel, ivarmodel, outmask \
+            = local_skysub_extract(cutout['sciimg'], cutout['sciivar'], cutout['tilts'],
+                                   cutout['waveimg'], cutout['global_sky'], cutout['rn2_img'],
+                                   cutout.thismask, cutout.left, cutout.right, sobjs,
+                                   ingpm=cutout.images.get('ingpm'),
+                                   spat_pix=None if spat_pix is None else cutout.to_cutout(spat_pix),
+                                   **kwargs)
+    for sobj in sobjs:
+        sobj.TRACE_SPAT = cutout.to_detector(sobj.TRACE_SPAT)
+        if sobj.min_spat is not None:
+            sobj.min_spat = cutout.to_detector(sobj.min_spat)
+            sobj.max_spat = cutout.to_detector(sobj.max_spat)
+    return skymodel, objmodel, ivarmodel, outmask, sobjs
+
+
 def ech_local_skysub_extract(sciimg, sciivar, fullmask, tilts, waveimg, global_sky, rn2img,
                              left, right, slitmask, sobjs, order_vec, spat_pix=None,
                              fit_fwhm=False, min_snr=2.0,bsp=0.6, extract_maskwidth=4.0,
                              trim_edg=(3,3), std=False, prof_nsigma=None, niter=4, box_rad_order=7,
                              sigrej=3.5, bkpts_optimal=True, sn_gauss=4.0, model_full_slit=False,
                              model_noise=True, debug_bkpts=False, show_profile=False,
-                             show_resids=False, show_fwhm=False):
+                             show_resids=False, show_fwhm=False, slit_index=None):
     """
     Perform local sky subtraction, profile fitting, and optimal extraction slit by slit
 
+    Each order is processed on its cutout of the images; see
+    :func:`local_skysub_extract_cutout`.
+
     Args:
         sciimg:
         sciivar:
@@ -956,6 +1031,9 @@ def ech_local_skysub_extract(sciimg, sciivar, fullmask, tilts, waveimg, global_s
         show_profile:
         show_resids:
         show_fwhm:
+        slit_index (:class:`pypeit.slittrace.SlitPixelIndex`, optional):
+            Index of the pixels in each order of ``slitmask``.  If
+            None, the index is built from ``slitmask``.
 
     Returns:
         skymodel, objmodel, ivarmodel, outmask, sobjs
@@ -981,7 +1059,9 @@ def ech_local_skysub_extract(sciimg, sciivar, fullmask, tilts, waveimg, global_s
     slit_vec = np.arange(norders)
 
     # Find the spat IDs
-    gdslit_spat = np.unique(slitmask[slitmask >= 0]).astype(int)  # Unique sorts
+    if slit_index is None:
+        slit_index = slittrace.SlitPixelIndex(slitmask)
+    gdslit_spat = slit_index.spat_id.astype(int)  # Sorted
     if gdslit_spat.size != norders:
         msgs.error("You have not dealt with masked orders properly")
 
@@ -1081,17 +1161,22 @@ def ech_local_skysub_extract(sciimg, sciivar, fullmask, tilts, waveimg, global_s
                     spec.FWHM = sobjs[indx_bri].FWHM
 
         thisobj = (sobjs.ECH_ORDERINDX == iord) # indices of objects for this slit
-        thismask = slitmask == gdslit_spat[iord] # pixels for this slit
+        # Cutout of the images with the pixels for this slit
+        cutout = slit_index.cutout(gdslit_spat[iord], left[:,iord], right[:,iord], sciimg=sciimg,
+                                   sciivar=sciivar, tilts=tilts, waveimg=waveimg,
+                                   global_sky=global_sky, rn2_img=rn2img, spat_pix=spat_pix)
         # True  = Good, False = Bad for inmask
-        inmask = (fullmask == 0) & thismask
+        cutout.images['ingpm'] = (cutout.cut(fullmask) == 0) & cutout.thismask
         # Local sky subtraction and extraction
-        skymodel[thismask], objmodel[thismask], ivarmodel[thismask], extractmask[thismask] = local_skysub_extract(
-            sciimg, sciivar, tilts, waveimg, global_sky,rn2img, thismask,
-            left[:,iord], right[:,iord], sobjs[thisobj], spat_pix=spat_pix,
-            ingpm=inmask,std = std, bsp=bsp, extract_maskwidth=extract_maskwidth, trim_edg=trim_edg,
-            prof_nsigma=prof_nsigma, niter=niter, box_rad=box_rad_order[iord], sigrej=sigrej, bkpts_optimal=bkpts_optimal,
-            sn_gauss=sn_gauss, model_full_slit=model_full_slit, model_noise=model_noise, debug_bkpts=debug_bkpts,
-            show_resids=show_resids, show_profile=show_profile)
+        skymodel.flat[cutout.indices], objmodel.flat[cutout.indices], \
+            ivarmodel.flat[cutout.indices], extractmask.flat[cutout.indices], _ \
+                = local_skysub_extract_cutout(cutout, sobjs[thisobj], std=std, bsp=bsp,
+                        extract_maskwidth=extract_maskwidth, trim_edg=trim_edg,
+                        prof_nsigma=prof_nsigma, niter=niter, box_rad=box_rad_order[iord],
+                        sigrej=sigrej, bkpts_optimal=bkpts_optimal, sn_gauss=sn_gauss,
+                        model_full_slit=model_full_slit, model_noise=model_noise,
+                        debug_bkpts=debug_bkpts, show_resids=show_resids,
+                        show_profile=show_profile)
 
         # update the FWHM fitting vector for the brighest object
         indx = (sobjs.ECH_OBJID == uni_objid[ibright]) & (sobjs.ECH_ORDERINDX == iord)
@@ -9,6 +9,9 @@ import scipy
 import matplotlib.pyplot as plt
 import os
 import pickle
+import threading
+from concurrent import futures
+from collections import OrderedDict
 from pypeit.core import load, flux_calib
 from pypeit.core.wavecal import wvutils
 from astropy import table
@@ -28,6 +31,39 @@ from pypeit.spectrographs.util import load_spectrograph
 #  Telluric model functions  #
 ##############################
 
+# Telluric grids read by this process; see read_telluric_grid
+_telluric_grids = OrderedDict()
+max_telluric_grids = 4
+"""
+Maximum number of trimmed telluric grids held in memory by
+:func:`read_telluric_grid`.
+"""
+
+max_conv_cache_size = 2**26
+"""
+Maximum size in bytes of the resolution convolved telluric models
+cached per telluric grid by :func:`conv_telluric_grid`. Set to 0 to
+disable the cache.
+"""
+
+resln_quantum = 3e-3
+"""
+Step in log(resolution) used to quantize the resolution of the
+convolved telluric models; see :func:`conv_telluric_grid`. The models
+are convolved at a resolution that differs by at most 0.15% from the
+requested one, which is well below the precision with which the
+resolution is constrained by the telluric fits. Set to 0 to convolve at
+exactly the requested resolution.
+"""
+
+fft_kernel_size = 64
+"""
+Kernels longer than this are convolved with the telluric models using
+an FFT.
+"""
+
+_conv_cache_lock = threading.Lock()
+
 
 # TODO These codes should probably be in a separate qso_pca module. Also pickle functionality needs to be removed.
 # The prior is not used (that was the reason for pickling), so the components could be stored in fits format.
@@ -127,6 +163,14 @@ def read_telluric_grid(filename, wave_min=None, wave_max=None, pad = 0):
     Reads in the telluric grid from a file, and optionally trims the grid to be in within
     wave_min and wave_max adding a padding if requested.
 
+    The file is memory mapped, such that only the wavelength window
+    requested is read from disk. The trimmed grid is held in memory
+    and reused by later calls for the same file and window (see
+    :data:`max_telluric_grids`) as long as the file does not change.
+    The arrays in the returned dictionary are therefore shared between
+    calls and are read-only. The dictionary also holds the cache of
+    resolution convolved models used by :func:`conv_telluric_grid`.
+
     Args:
         filename (str):
            Telluric grid filename
@@ -134,46 +178,75 @@ def read_telluric_grid(filename, wave_min=None, wave_max=None, pad = 0):
            Minimum wavelength at which the grid is desired
         wave_max (float):
            Maximum wavelength at which the grid is desired.
-        pad:
-           Padding to be added to the grid boundaries if wave_min or wave_max are input
+        pad (int):
+           Padding to be added to the grid boundaries if wave_min or wave_max are input.
+           If None, pad by the number of pixels needed by :func:`eval_telluric` to
+           convolve the model at the boundaries, such that the models evaluated
+           within wave_min and wave_max are the same as for the full grid.
 
     Returns:
         tell_dict (dict):
-            Dictionary containing the telluric grid
+            Dictionary containing the telluric grid. ``ind_lower_grid`` is the
+            index of the first pixel of the trimmed grid in the full grid.
 
     """
 
-    hdul = fits.open(filename)
-    wave_grid_full = 10.0*hdul[1].data
-    model_grid_full = hdul[0].data
-    nspec_full = wave_grid_full.size
-
-    if wave_min is not None:
-        ind_lower = np.argmin(np.abs(wave_grid_full - wave_min)) - pad
-    else:
-        ind_lower = 0
-    if wave_max is not None:
-        ind_upper = np.argmin(np.abs(wave_grid_full - wave_max)) + pad
-    else:
-        ind_upper=nspec_full
-    wave_grid = wave_grid_full[ind_lower:ind_upper]
-    model_grid = model_grid_full[:,:,:,:, ind_lower:ind_upper]
-
-    pg = hdul[0].header['PRES0']+hdul[0].header['DPRES']*np.arange(0,hdul[0].header['NPRES'])
-    tg = hdul[0].header['TEMP0']+hdul[0].header['DTEMP']*np.arange(0,hdul[0].header['NTEMP'])
-    hg = hdul[0].header['HUM0']+hdul[0].header['DHUM']*np.arange(0,hdul[0].header['NHUM'])
-    if hdul[0].header['NAM'] > 1:
-        ag = hdul[0].header['AM0']+hdul[0].header['DAM']*np.arange(0,hdul[0].header['NAM'])
-    else:
-        ag = hdul[0].header['AM0']+1*np.arange(0,1)
-
-    dwave, dloglam, resln_guess, pix_per_sigma = wvutils.get_sampling(wave_grid)
-    tell_pad_pix = int(np.ceil(10.0 * pix_per_sigma))
+    with fits.open(filename, memmap=True) as hdul:
+        wave_grid_full = 10.0*hdul[1].data
+        nspec_full = wave_grid_full.size
+        hdr = hdul[0].header
+
+        # The sampling is always determined from the full grid, so that
+        # the fits do not depend on the trimming
+        dwave, dloglam, resln_guess, pix_per_sigma = wvutils.get_sampling(wave_grid_full)
+        tell_pad_pix = int(np.ceil(10.0 * pix_per_sigma))
+        if pad is None:
+            # One more pixel because the upper bound is exclusive
+            pad = tell_pad_pix + 1
+
+        if wave_min is not None:
+            ind_lower = max(np.argmin(np.abs(wave_grid_full - wave_min)) - pad, 0)
+        else:
+            ind_lower = 0
+        if wave_max is not None:
+            ind_upper = min(np.argmin(np.abs(wave_grid_full - wave_max)) + pad, nspec_full)
+        else:
+            ind_upper=nspec_full
+
+        stat = os.stat(filename)
+        key = (os.path.abspath(filename), int(ind_lower), int(ind_upper))
+        if key in _telluric_grids and _telluric_grids[key][0] == (stat.st_size, stat.st_mtime_ns):
+            _telluric_grids.move_to_end(key)
+            return _telluric_grids[key][1].copy()
+
+        msgs.info('Reading telluric grid {0} between {1:.1f} and {2:.1f} Angstrom'.format(
+                  os.path.basename(filename), wave_grid_full[ind_lower],
+                  wave_grid_full[ind_upper-1]))
+        wave_grid = wave_grid_full[ind_lower:ind_upper].copy()
+        # Only the requested window of the memory-mapped grid is read
+        model_grid = np.array(hdul[0].data[:,:,:,:, ind_lower:ind_upper])
+
+        pg = hdr['PRES0']+hdr['DPRES']*np.arange(0,hdr['NPRES'])
+        tg = hdr['TEMP0']+hdr['DTEMP']*np.arange(0,hdr['NTEMP'])
+        hg = hdr['HUM0']+hdr['DHUM']*np.arange(0,hdr['NHUM'])
+        if hdr['NAM'] > 1:
+            ag = hdr['AM0']+hdr['DAM']*np.arange(0,hdr['NAM'])
+        else:
+            ag = hdr['AM0']+1*np.arange(0,1)
 
     tell_dict = dict(wave_grid=wave_grid, dloglam=dloglam,
                      resln_guess=resln_guess, pix_per_sigma=pix_per_sigma, tell_pad_pix=tell_pad_pix,
-                     pressure_grid=pg, temp_grid=tg, h2o_grid=hg, airmass_grid=ag, tell_grid=model_grid)
-    return tell_dict
+                     pressure_grid=pg, temp_grid=tg, h2o_grid=hg, airmass_grid=ag, tell_grid=model_grid,
+                     ind_lower_grid=int(ind_lower), conv_cache=OrderedDict())
+    for value in tell_dict.values():
+        if isinstance(value, np.ndarray):
+            value.flags.writeable = False
+
+    _telluric_grids[key] = ((stat.st_size, stat.st_mtime_ns), tell_dict)
+    _telluric_grids.move_to_end(key)
+    while len(_telluric_grids) > max_telluric_grids:
+        _telluric_grids.popitem(last=False)
+    return tell_dict.copy()
 
 
 def interp_telluric_grid(theta,tell_dict):
@@ -196,11 +269,31 @@ def interp_telluric_grid(theta,tell_dict):
 
     """
 
+    return tell_dict['tell_grid'][telluric_grid_index(theta, tell_dict)]
+
+
+def telluric_grid_index(theta, tell_dict):
+    """
+    Determine the nearest telluric grid point to a location in the
+    (pressure, temperature, humidity, airmass) parameter space.
+
+    Args:
+        theta (`numpy.ndarray`_):
+           Four dimensional telluric model parameter vector, where:
+               pressure, temperature, humidity, airmass = theta
+        tell_dict (dict):
+            Dictionary containing the telluric grid
+
+    Returns:
+        tuple: The pressure, temperature, humidity, and airmass indices
+        of the nearest grid point.
+
+    """
+
     pg = tell_dict['pressure_grid']
     tg = tell_dict['temp_grid']
     hg = tell_dict['h2o_grid']
     ag = tell_dict['airmass_grid']
-    model_grid = tell_dict['tell_grid']
     press,temp,hum,airmass = theta
     if len(pg) > 1:
         p_ind = int(np.round((press-pg[0])/(pg[1]-pg[0])))
@@ -219,7 +312,7 @@ def interp_telluric_grid(theta,tell_dict):
     else:
         a_ind = 0
 
-    return model_grid[p_ind,t_ind,h_ind,a_ind]
+    return p_ind, t_ind, h_ind, a_ind
 
 def conv_telluric(tell_model, dloglam, res):
     """
@@ -250,9 +343,73 @@ def conv_telluric(tell_model, dloglam, res):
     x = np.hstack([-1*np.flip(np.arange(sig2pix,4,sig2pix)),np.arange(0,4,sig2pix)])
     # g = Gaussian evaluated at x, sig2pix multiplied in to properly normalize the convolution
     g = (1.0/(np.sqrt(2*np.pi)))*np.exp(-0.5*(x)**2)*sig2pix
-    conv_model = scipy.signal.convolve(tell_model,g,mode='same')
+    # Use an FFT for long kernels, where it is much faster than the direct sum
+    method = 'fft' if g.size > fft_kernel_size else 'direct'
+    conv_model = scipy.signal.convolve(tell_model,g,mode='same',method=method)
     return conv_model
 
+
+def conv_telluric_grid(grid_index, tell_dict, ind_lower_pad, ind_upper_pad, res):
+    """
+    Convolve the telluric model at a grid point to the desired
+    resolution, reusing previously convolved models.
+
+    The convolved models are kept in ``tell_dict['conv_cache']``
+    (see :func:`read_telluric_grid`), keyed by the grid point, the
+    wavelength range, and the resolution quantized in steps of
+    :data:`resln_quantum` in log(resolution). The model is always
+    convolved at the quantized resolution, so the result does not
+    depend on the order in which the models are requested. The cached
+    models are limited to :data:`max_conv_cache_size` bytes; the least
+    recently used models are removed first.
+
+    Args:
+        grid_index (tuple):
+            Indices of the grid point; see :func:`telluric_grid_index`.
+        tell_dict (dict):
+            Dictionary containing the telluric grid.
+        ind_lower_pad (int):
+            Lower index into the telluric model wave_grid of the
+            model to convolve.
+        ind_upper_pad (int):
+            Upper index (inclusive) into the telluric model wave_grid
+            of the model to convolve.
+        res (float):
+            Desired resolution expressed as lambda/dlambda.
+
+    Returns:
+        `numpy.ndarray`_: Resolution convolved telluric model between
+        ind_lower_pad and ind_upper_pad. This array is shared with the
+        cache and should not be modified.
+
+    """
+    if resln_quantum > 0:
+        res_key = int(np.round(np.log(res)/resln_quantum))
+        res = np.exp(res_key*resln_quantum)
+    else:
+        res_key = float(res)
+
+    conv_cache = tell_dict.get('conv_cache')
+    if conv_cache is None or max_conv_cache_size == 0:
+        return conv_telluric(tell_dict['tell_grid'][grid_index][ind_lower_pad:ind_upper_pad + 1],
+                             tell_dict['dloglam'], res)
+
+    key = grid_index + (int(ind_lower_pad), int(ind_upper_pad), res_key)
+    with _conv_cache_lock:
+        if key in conv_cache:
+            conv_cache.move_to_end(key)
+            return conv_cache[key]
+
+    tellmodel_conv = conv_telluric(tell_dict['tell_grid'][grid_index][ind_lower_pad:ind_upper_pad + 1],
+                                   tell_dict['dloglam'], res)
+    tellmodel_conv.flags.writeable = False
+    with _conv_cache_lock:
+        conv_cache[key] = tellmodel_conv
+        cache_size = sum(model.nbytes for model in conv_cache.values())
+        while cache_size > max_conv_cache_size and len(conv_cache) > 1:
+            cache_size -= conv_cache.popitem(last=False)[1].nbytes
+    return tellmodel_conv
+
 def shift_telluric(tell_model, loglam, dloglam, shift, stretch):
     """
     Routine to apply a shift to the telluric model. Note that the shift can be sub-pixel, i.e this routine interpolates.
@@ -333,7 +490,6 @@ def eval_telluric(theta_tell, tell_dict, ind_lower=None, ind_upper=None):
     """
 
     ntheta = len(theta_tell)
-    tellmodel_hires = interp_telluric_grid(theta_tell[:4], tell_dict)
 
     ind_lower = 0 if ind_lower is None else ind_lower
     ind_upper = tell_dict['wave_grid'].size - 1 if ind_upper is None else ind_upper
@@ -346,14 +502,16 @@ def eval_telluric(theta_tell, tell_dict, ind_lower=None, ind_upper=None):
     else:
         ind_upper_final = ind_upper - ind_upper_pad
     tell_pad_tuple = (ind_lower - ind_lower_pad, ind_upper_final)
-    tellmodel_conv = conv_telluric(tellmodel_hires[ind_lower_pad:ind_upper_pad + 1], tell_dict['dloglam'], theta_tell[4])
+    tellmodel_conv = conv_telluric_grid(telluric_grid_index(theta_tell[:4], tell_dict), tell_dict,
+                                        ind_lower_pad, ind_upper_pad, theta_tell[4])
 
     if ntheta == 7:
         tellmodel_out = shift_telluric(tellmodel_conv, np.log10(tell_dict['wave_grid'][ind_lower_pad: ind_upper_pad+1]), tell_dict['dloglam'],
                                        theta_tell[5],theta_tell[6])
         return tellmodel_out[tell_pad_tuple[0]:ind_upper_final]
     else:
-        return tellmodel_conv[tell_pad_tuple[0]:ind_upper_final]
+        # Copy because the convolved model is shared with the cache
+        return tellmodel_conv[tell_pad_tuple[0]:ind_upper_final].copy()
 
 
 ############################
@@ -402,7 +560,28 @@ def tellfit_chi2(theta, flux, thismask, arg_dict):
         loss_function = np.sum(np.square(huber_vec * totalmask))
         return loss_function
 
-def tellfit(flux, thismask, arg_dict, **kwargs_opt):
+# Arguments of tellfit_chi2 held by the worker processes; see tellfit
+_tellfit_args = None
+
+
+def _init_tellfit_worker(flux, thismask, arg_dict):
+    """
+    Set the arguments of :func:`tellfit_chi2` used by
+    :func:`_tellfit_chi2_worker` in this process.
+    """
+    global _tellfit_args
+    _tellfit_args = (flux, thismask, arg_dict)
+
+
+def _tellfit_chi2_worker(theta):
+    """
+    Evaluate :func:`tellfit_chi2` with the arguments set by
+    :func:`_init_tellfit_worker`.
+    """
+    return tellfit_chi2(theta, *_tellfit_args)
+
+
+def tellfit(flux, thismask, arg_dict, n_workers=1, **kwargs_opt):
     """
     Routine to perform the object + telluric model fitting for telluric
     corrections. This is a general abstracted routine that performs the
@@ -454,6 +633,13 @@ def tellfit(flux, thismask, arg_dict, **kwargs_opt):
                   object model arguments which is passed to the
                   obj_model_func
 
+        n_workers (int, optional):
+            Number of worker processes used to evaluate the loss
+            function for the population of the differential evolution.
+            The arguments are sent to each process once, such that only
+            the parameter vectors are sent for each evaluation. If
+            larger than 1, the population is updated once per
+            generation (``updating='deferred'``).
         **kwargs_opt (dict):
             Optional arguments for the differential evolution
             optimization
@@ -478,8 +664,22 @@ def tellfit(flux, thismask, arg_dict, **kwargs_opt):
     flux_ivar = arg_dict['ivar'] # Inverse variance of flux or counts
     bounds = arg_dict['bounds']  # bounds for differential evolution optimizaton
     seed = arg_dict['seed']      # Seed for differential evolution optimizaton
-    result = scipy.optimize.differential_evolution(tellfit_chi2, bounds, args=(flux, thismask, arg_dict,), seed=seed,
-                                                   **kwargs_opt)
+    if n_workers > 1:
+        # Do not send the cache of convolved models to the worker processes
+        _arg_dict = dict(arg_dict, tell_dict=dict(arg_dict['tell_dict'], conv_cache=OrderedDict()))
+        # The parent also evaluates the loss function, when polishing the result
+        _init_tellfit_worker(flux, thismask, arg_dict)
+        try:
+            with futures.ProcessPoolExecutor(max_workers=n_workers, initializer=_init_tellfit_worker,
+                                             initargs=(flux, thismask, _arg_dict)) as executor:
+                result = scipy.optimize.differential_evolution(_tellfit_chi2_worker, bounds, seed=seed,
+                                                               **dict(kwargs_opt, workers=executor.map,
+                                                                      updating='deferred'))
+        finally:
+            _init_tellfit_worker(None, None, None)
+    else:
+        result = scipy.optimize.differential_evolution(tellfit_chi2, bounds, args=(flux, thismask, arg_dict,),
+                                                       seed=seed, **kwargs_opt)
 
     theta_obj  = result.x[:-7]
     theta_tell = result.x[-7:]
@@ -503,6 +703,33 @@ def tellfit(flux, thismask, arg_dict, **kwargs_opt):
     return result, tell_model*obj_model, ivartot
 
 
+def fit_order(flux, arg_dict, inmask, **kwargs):
+    """
+    Fit the object + telluric model to a single order/slit.
+
+    Wrapper for :func:`pypeit.utils.robust_optimize` with
+    :func:`tellfit` that can be run in a separate process.
+
+    Args:
+        flux (`numpy.ndarray`_):
+            The flux of the object being fit
+        arg_dict (dict):
+            A dictionary containing the parameters needed to evaluate
+            the telluric model and the object model; see :func:`tellfit`.
+        inmask (`numpy.ndarray`_, boolean):
+            Good pixel mask for the flux, i.e. True=Good
+        **kwargs:
+            Passed directly to :func:`pypeit.utils.robust_optimize`.
+
+    Returns:
+        tuple: The result object returned by the differential evolution
+        optimizer and the mask of the pixels used in the final fit.
+    """
+    result, ymodel, ivartot, outmask = utils.robust_optimize(flux, tellfit, arg_dict, inmask=inmask,
+                                                             **kwargs)
+    return result, outmask
+
+
 # TODO This should be a general reader once we get our act together with the data model.
 #  For echelle:  read in all the orders into a (nspec, nporders) array
 #  FOr longslit: read in the stanard into a (nspec, 1) array
@@ -1108,7 +1335,7 @@ def sensfunc_telluric(wave, counts, counts_ivar, counts_mask, exptime, airmass,
                       polyorder=8, mask_abs_lines=True,
                       delta_coeff_bounds=(-20.0, 20.0), minmax_coeff_bounds=(-5.0, 5.0),
                       sn_clip=30.0, only_orders=None, tol=1e-3, popsize=30, recombination=0.7, polish=True, disp=False,
-                      debug_init=False, debug=False):
+                      n_workers=1, debug_init=False, debug=False):
     """
     Function to compute a sensitivity function and a telluric model from the PypeIt spec1d file of a standard star spectrum
 
@@ -1186,6 +1413,9 @@ def sensfunc_telluric(wave, counts, counts_ivar, counts_mask, exptime, airmass,
         indicating the status of the optimization. See above for a description of the output and how to know
         if things are working well.
 
+    n_workers : int, optional, default=1
+        Number of processes used for the fits. See :class:`Telluric`.
+
     debug_init : bool, optional, default=False
         Show plots to the screen useful for debugging model initialization
 
@@ -1241,7 +1471,7 @@ def sensfunc_telluric(wave, counts, counts_ivar, counts_mask, exptime, airmass,
     TelObj = Telluric(wave, counts, counts_ivar, mask_tot, telgridfile, obj_params,
                       init_sensfunc_model, eval_sensfunc_model,  ech_orders=ech_orders, sn_clip=sn_clip, tol=tol,
                       popsize=popsize, recombination=recombination,
-                      polish=polish, disp=disp, debug=debug)
+                      polish=polish, disp=disp, n_workers=n_workers, debug=debug)
 
     TelObj.run(only_orders=only_orders)
     # Append the sensfunc to the output table for convenience
@@ -1296,7 +1526,7 @@ def create_bal_mask(wave, bal_wv_min_max):
 def qso_telluric(spec1dfile, telgridfile, pca_file, z_qso, telloutfile, outfile, npca=8, bal_wv_min_max=None,
                  delta_zqso=0.1, bounds_norm=(0.1, 3.0), tell_norm_thresh=0.9, sn_clip=30.0, only_orders=None,
                  tol=1e-3, popsize=30, recombination=0.7, pca_lower=1220.0,
-                 pca_upper=3100.0, polish=True, disp=False, debug_init=False, debug=False,
+                 pca_upper=3100.0, polish=True, disp=False, n_workers=1, debug_init=False, debug=False,
                  show=False):
     """
     Telluric correction for a QSO list object.
@@ -1371,6 +1601,9 @@ def qso_telluric(spec1dfile, telgridfile, pca_file, z_qso, telloutfile, outfile,
         indicating the status of the optimization. See above for a description of the output and how to know
         if things are working well.
 
+    n_workers : int, optional, default=1
+        Number of processes used for the fits. See :class:`Telluric`.
+
     debug_init : bool, optional, default=False
         Show plots to the screen useful for debugging model initialization
 
@@ -1406,7 +1639,7 @@ def qso_telluric(spec1dfile, telgridfile, pca_file, z_qso, telloutfile, outfile,
     # parameters lowered for testing
     TelObj = Telluric(wave, flux, ivar, mask_tot, telgridfile, obj_params, init_qso_model, eval_qso_model,
                       sn_clip=sn_clip, tol=tol, popsize=popsize, recombination=recombination,
-                      polish=polish, disp=disp, debug=debug)
+                      polish=polish, disp=disp, n_workers=n_workers, debug=debug)
     TelObj.run(only_orders=only_orders)
     TelObj.save(telloutfile)
 
@@ -1449,7 +1682,7 @@ def qso_telluric(spec1dfile, telgridfile, pca_file, z_qso, telloutfile, outfile,
 def star_telluric(spec1dfile, telgridfile, telloutfile, outfile, star_type=None, star_mag=None, star_ra=None, star_dec=None,
                   func='legendre', model='exp', polyorder=5, mask_abs_lines=True, delta_coeff_bounds=(-20.0, 20.0),
                   minmax_coeff_bounds=(-5.0, 5.0), only_orders=None, sn_clip=30.0, tol=1e-3, popsize=30, recombination=0.7, polish=True,
-                  disp=False, debug_init=False, debug=False, show=False):
+                  disp=False, n_workers=1, debug_init=False, debug=False, show=False):
 
     # Turn on disp for the differential_evolution if debug mode is turned on.
     if debug:
@@ -1496,7 +1729,8 @@ def star_telluric(spec1dfile, telgridfile, telloutfile, outfile, star_type=None,
     # parameters lowered for testing
     TelObj = Telluric(wave, flux, ivar, mask_tot, telgridfile, obj_params,
                       init_star_model, eval_star_model,  sn_clip=sn_clip,
-                      tol=tol, popsize=popsize, recombination=recombination, polish=polish, disp=disp, debug=debug)
+                      tol=tol, popsize=popsize, recombination=recombination, polish=polish, disp=disp,
+                      n_workers=n_workers, debug=debug)
 
     TelObj.run(only_orders=only_orders)
     TelObj.save(telloutfile)
@@ -1538,7 +1772,7 @@ def star_telluric(spec1dfile, telgridfile, telloutfile, outfile, star_type=None,
 def poly_telluric(spec1dfile, telgridfile, telloutfile, outfile, z_obj=0.0, func='legendre', model='exp', polyorder=3,
                   fit_wv_min_max=None, mask_lyman_a=True, delta_coeff_bounds=(-20.0, 20.0),
                   minmax_coeff_bounds=(-5.0, 5.0), only_orders=None, sn_clip=30.0, tol=1e-3, popsize=30, maxiter=3,
-                  recombination=0.7, polish=True, disp=False, debug_init=False, debug=False, show=False):
+                  recombination=0.7, polish=True, disp=False, n_workers=1, debug_init=False, debug=False, show=False):
 
     # Turn on disp for the differential_evolution if debug mode is turned on.
     if debug:
@@ -1582,7 +1816,8 @@ def poly_telluric(spec1dfile, telgridfile, telloutfile, outfile, z_obj=0.0, func
     # parameters lowered for testing
     TelObj = Telluric(wave, flux, ivar, mask_tot, telgridfile, obj_params,
                       init_poly_model, eval_poly_model,  sn_clip=sn_clip, maxiter=maxiter,
-                      tol=tol, popsize=popsize, recombination=recombination, polish=polish, disp=disp, debug=debug)
+                      tol=tol, popsize=popsize, recombination=recombination, polish=polish, disp=disp,
+                      n_workers=n_workers, debug=debug)
 
     TelObj.run(only_orders=only_orders)
     TelObj.save(telloutfile)
@@ -1771,6 +2006,10 @@ class Telluric(object):
             Argument for scipy.optimize.differential_evolution which will  display status messages to the screen
             indicating the status of the optimization. See above for a description of the output and how to know
             if things are working well.
+        n_workers (int): default=1
+            Number of processes used for the fits. If more than one order is fit, the orders are fit concurrently,
+            which gives the same results as fitting them one after the other. A single order is fit by evaluating
+            the population of the differential evolution in the processes; see :func:`tellfit`.
         debug (bool): default=False
             If True, QA plots will be shown to the screen indicating the quality of the fits. Specifically, the residual
             distributions will be shown at each iteration, and the fit will be shown at the end (for each order).
@@ -1783,7 +2022,8 @@ class Telluric(object):
                  sn_clip=30.0, airmass_guess=1.5, resln_guess=None,
                  resln_frac_bounds=(0.5, 1.5), pix_shift_bounds=(-5.0, 5.0), pix_stretch_bounds=(0.9,1.1),
                  maxiter=3, sticky=True, lower=3.0, upper=3.0,
-                 seed=777, tol=1e-3, popsize=30, recombination=0.7, polish=True, disp=False, debug=False):
+                 seed=777, tol=1e-3, popsize=30, recombination=0.7, polish=True, disp=False, n_workers=1,
+                 debug=False):
 
         # Turn on disp for the differential_evolution if debug mode is turned on.
         if debug:
@@ -1817,6 +2057,8 @@ class Telluric(object):
         self.recombination = recombination
         self.polish = polish
         self.disp = disp
+        # The debugging plots are shown one order at a time
+        self.n_workers = 1 if debug else n_workers
         self.debug = debug
 
         # 2) Reshape all spectra to be (nspec, norders)
@@ -1828,8 +2070,11 @@ class Telluric(object):
         rand = np.random.RandomState(seed=self.seed)
         seed_vec = rand.randint(2 ** 32 - 1, size=self.norders)
 
-        # 3) Read the telluric grid and initalize associated parameters
-        self.tell_dict = self.read_telluric_grid()
+        # 3) Read the telluric grid, trimmed to the wavelength range of the data, and initalize associated
+        # parameters
+        wave_good = self.wave_in_arr[self.wave_in_arr > 1.0]
+        self.tell_dict = self.read_telluric_grid(wave_min=wave_good.min(), wave_max=wave_good.max(),
+                                                 pad=None)
         self.wave_grid = self.tell_dict['wave_grid']
         self.ngrid = self.wave_grid.size
         self.resln_guess = wvutils.get_sampling(self.wave_in_arr)[2] if resln_guess is None else resln_guess
@@ -1908,21 +2153,39 @@ class Telluric(object):
         self.tellmodel_list = [None]*self.norders
         self.theta_obj_list = [None]*self.norders
         self.theta_tell_list = [None]*self.norders
-        for counter, iord in enumerate(self.srt_order_tell):
-            if iord not in good_orders:
-                continue
+        fit_orders = [iord for iord in self.srt_order_tell if iord in good_orders]
+        fit_args = [(self.flux_arr[self.ind_lower[iord]:self.ind_upper[iord]+1, iord],
+                     self.arg_dict_list[iord],
+                     self.mask_arr[self.ind_lower[iord]:self.ind_upper[iord]+1, iord])
+                    for iord in fit_orders]
+        fit_kwargs = dict(maxiter=self.maxiter, lower=self.lower, upper=self.upper, sticky=self.sticky,
+                          tol=self.tol, popsize=self.popsize, recombination=self.recombination,
+                          polish=self.polish, disp=self.disp)
+        for counter, iord in enumerate(fit_orders):
             msgs.info('Fitting object + telluric model for order: {:d}, {:d}/{:d}'.format(iord, counter, self.norders) +
                       ' with user supplied function: {:s}'.format(self.init_obj_model.__name__))
-            self.result_list[iord], ymodel, ivartot, self.outmask_list[iord] = utils.robust_optimize(
-                self.flux_arr[self.ind_lower[iord]:self.ind_upper[iord]+1, iord], tellfit, self.arg_dict_list[iord],
-                inmask=self.mask_arr[self.ind_lower[iord]:self.ind_upper[iord]+1, iord],
-                maxiter=self.maxiter, lower=self.lower, upper=self.upper, sticky=self.sticky,
-                tol=self.tol, popsize=self.popsize, recombination=self.recombination, polish=self.polish, disp=self.disp)
+        if self.n_workers > 1 and len(fit_orders) > 1:
+            # Fit the orders concurrently.  Do not send the cache of
+            # convolved models to the worker processes.
+            tell_dict = self.tell_dict.copy()
+            tell_dict['conv_cache'] = OrderedDict()
+            with futures.ProcessPoolExecutor(max_workers=min(self.n_workers, len(fit_orders))) \
+                    as executor:
+                jobs = [executor.submit(fit_order, flux, dict(arg_dict, tell_dict=tell_dict), mask,
+                                        **fit_kwargs)
+                        for flux, arg_dict, mask in fit_args]
+                fits = [job.result() for job in jobs]
+        else:
+            fits = [fit_order(*_args, n_workers=self.n_workers, **fit_kwargs) for _args in fit_args]
+
+        for iord, (self.result_list[iord], self.outmask_list[iord]) in zip(fit_orders, fits):
             self.theta_obj_list[iord] = self.result_list[iord].x[:-7]
             self.theta_tell_list[iord] = self.result_list[iord].x[-7:]
-            self.obj_model_list[iord], modelmask = self.eval_obj_model(self.theta_obj_list[iord], self.obj_dict_list[iord])
+            self.obj_model_list[iord], modelmask = self.eval_obj_model(self.theta_obj_list[iord],
+                                                                       self.obj_dict_list[iord])
             self.tellmodel_list[iord] = eval_telluric(self.theta_tell_list[iord], self.tell_dict,
-                                                      ind_lower=self.ind_lower[iord],ind_upper=self.ind_upper[iord])
+                                                      ind_lower=self.ind_lower[iord],
+                                                      ind_upper=self.ind_upper[iord])
             self.assign_output(iord)
             if self.debug:
                 self.show_fit_qa(iord)
@@ -2038,8 +2301,9 @@ class Telluric(object):
         out_table['CHI2'] = np.zeros(self.norders)
         out_table['SUCCESS'] = np.zeros(self.norders, dtype=bool)
         out_table['NITER'] = np.zeros(self.norders, dtype=int)
-        out_table['IND_LOWER'] = self.ind_lower
-        out_table['IND_UPPER'] = self.ind_upper
+        # Indices into the full telluric grid
+        out_table['IND_LOWER'] = self.ind_lower + self.tell_dict['ind_lower_grid']
+        out_table['IND_UPPER'] = self.ind_upper + self.tell_dict['ind_lower_grid']
         out_table['WAVE_MIN'] = self.wave_grid[self.ind_lower]
         out_table['WAVE_MAX'] = self.wave_grid[self.ind_upper]
 
@@ -2143,11 +2407,16 @@ class Telluric(object):
         """
         Wrapper for utility function read_telluric_grid
         Args:
-            wave_min:
-            wave_max:
-            pad:
+            wave_min (float):
+                Minimum wavelength at which the grid is desired
+            wave_max (float):
+                Maximum wavelength at which the grid is desired
+            pad (int):
+                Padding to be added to the grid boundaries; see
+                :func:`read_telluric_grid`
 
         Returns:
+            dict: Dictionary containing the telluric grid
 
         """
 
@@ -793,9 +793,10 @@ def fit_tilts(trc_tilt_dict, thismask, slit_cen, spat_order=3, spec_order=4, max
     # msgs.info("RMS/FWHM: {}".format(rms_real/fwhm))
 
 
-def fit2tilts(shape, coeff2, func2d, spat_shift=None):
+def fit2tilts(shape, coeff2, func2d, spat_shift=None, spec_range=None, spat_range=None):
     """
-    Evaluate the wavelength tilt model over the full image.
+    Evaluate the wavelength tilt model over the full image, or over a
+    window of the image.
 
     Parameters
     ----------
@@ -809,12 +810,20 @@ def fit2tilts(shape, coeff2, func2d, spat_shift=None):
         Spatial shift to be added to image pixels before evaluation
         If you are accounting for flexure, then you probably wish to
         input -1*flexure_shift into this parameter.
+    spec_range : tuple of ints, optional
+        Range of spectral pixels, (first, last+1), over which to
+        evaluate the model.  If None, use all spectral pixels.
+    spat_range : tuple of ints, optional
+        Range of spatial pixels, (first, last+1), over which to
+        evaluate the model.  If None, use all spatial pixels.
 
     Returns
     -------
     tilts: ndarray, float
         Image indicating how spectral pixel locations move across the
-        image. This output is used in the pipeline.
+        image. This output is used in the pipeline.  The shape is
+        ``shape``, or the shape of the window if spec_range or
+        spat_range are provided.
 
     """
     # Init
@@ -823,8 +832,8 @@ def fit2tilts(shape, coeff2, func2d, spat_shift=None):
     nspec, nspat = shape
     xnspecmin1 = float(nspec - 1)
     xnspatmin1 = float(nspat - 1)
-    spec_vec = np.arange(nspec)
-    spat_vec = np.arange(nspat) - _spat_shift
+    spec_vec = np.arange(nspec) if spec_range is None else np.arange(*spec_range)
+    spat_vec = (np.arange(nspat) if spat_range is None else np.arange(*spat_range)) - _spat_shift
     spat_img, spec_img = np.meshgrid(spat_vec, spec_vec)
     tilts = utils.func_val(coeff2, spec_img / xnspecmin1, func2d, x2=spat_img / xnspatmin1,
                            minx=0.0, maxx=1.0, minx2=0.0, maxx2=1.0)
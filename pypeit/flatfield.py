@@ -719,17 +719,22 @@ class FlatField(object):
         twod_model = np.ones_like(rawflat)
         twod_gpm_out = np.ones_like(rawflat, dtype=np.bool)
 
+        spec_coo = np.zeros_like(rawflat)
+        # Margin in pixels around the initial slit edges that includes
+        # any padding of the slits
+        margin = int(np.ceil(np.sum(np.absolute([self.slits.pad, pad])))) + 1
+
         # #################################################
-        # Model each slit independently
+        # Collapse each slit spatially to fit its spectral function.
+        # These fits only depend on the raw flat and the tilts, so the
+        # data of all slits are collected first and fit together.
+        gdslits, spec_data = [], []
         for slit_idx, slit_spat in enumerate(self.slits.spat_id):
             # Is this a good slit??
             if self.slits.mask[slit_idx] != 0:
                 msgs.info('Skipping bad slit: {}'.format(slit_spat))
                 continue
 
-            msgs.info('Modeling the flat-field response for slit spat_id={}: {}/{}'.format(
-                        slit_spat, slit_idx+1, self.slits.nslits))
-
             # Find the pixels on the initial slit
             onslit_init = slitid_img_init == slit_spat
 
@@ -770,38 +775,25 @@ class FlatField(object):
                                               saturated_slits))
                 continue
 
-            # Demand at least 10 pixels per row (on average) per degree
-            # of the polynomial.
-            # NOTE: This is not used until the 2D fit. Defined here to
-            # be close to the definition of ``onslit``.
-            if npoly is None:
-                # Approximate number of pixels sampling each spatial pixel
-                # for this (original) slit.
-                npercol = np.fmax(np.floor(np.sum(onslit_init)/nspec),1.0)
-                npoly  = np.clip(7, 1, int(np.ceil(npercol/10.)))
-            
-            # TODO: Always calculate the optimized `npoly` and warn the
-            #  user if npoly is provided but higher than the nominal
-            #  calculation?
-
-            # Create an image with the spatial coordinates relative to the left edge of this slit
-            spat_coo_init = self.slits.spatial_coordinate_image(slitidx=slit_idx, full=True, initial=True)
-
             # Find pixels on the padded and trimmed slit coordinates
             onslit_padded = padded_slitid_img == slit_spat
             onslit_trimmed = trimmed_slitid_img == slit_spat
 
-            # ----------------------------------------------------------
-            # Collapse the slit spatially and fit the spectral function
-            # TODO: Put this stuff in a self.spectral_fit method?
+            # Columns that can be covered by this slit, including any
+            # padding; the tilts are only needed for these pixels.
+            spat_range = (max(int(np.floor(np.amin(self.slits.left_init[:,slit_idx]))) - margin, 0),
+                          min(int(np.ceil(np.amax(self.slits.right_init[:,slit_idx]))) + margin + 1,
+                              nspat))
 
             # Create the tilts image for this slit
             # TODO -- JFH Confirm the sign of this shift is correct!
             _flexure = 0. if self.wavetilts.spat_flexure is None else self.wavetilts.spat_flexure
             tilts = tracewave.fit2tilts(rawflat.shape, self.wavetilts['coeffs'][:,:,slit_idx],
-                                        self.wavetilts['func2d'], spat_shift=-1*_flexure)
+                                        self.wavetilts['func2d'], spat_shift=-1*_flexure,
+                                        spat_range=spat_range)
             # Convert the tilt image to an image with the spectral pixel index
-            spec_coo = tilts * (nspec-1)
+            spec_coo[...] = 0.
+            spec_coo[:,slice(*spat_range)] = tilts * (nspec-1)
 
             # Only include the trimmed set of pixels in the flat-field
             # fit along the spectral direction.
@@ -809,7 +801,7 @@ class FlatField(object):
             spec_nfit = np.sum(spec_gpm)
             spec_ntot = np.sum(onslit_init)
             msgs.info('Spectral fit of flatfield for {0}/{1} '.format(spec_nfit, spec_ntot)
-                      + ' pixels in the slit.')
+                      + ' pixels in slit {0}.'.format(slit_spat))
             # Set this to a parameter?
             if spec_nfit/spec_ntot < 0.5:
                 # TODO: Shouldn't this raise an exception or continue to the next slit instead?
@@ -829,21 +821,63 @@ class FlatField(object):
             spec_ivar_data = ivar_log[spec_gpm].ravel()[spec_srt]
             spec_gpm_data = gpm_log[spec_gpm].ravel()[spec_srt]
 
-            # Rejection threshold for spectral fit in log(image)
-            # TODO: Make this a parameter?
-            logrej = 0.5
-
-            # Fit the spectral direction of the blaze.
-            # TODO: Figure out how to deal with the fits going crazy at
-            #  the edges of the chip in spec direction
-            # TODO: Can we add defaults to bspline_profile so that we
-            #  don't have to instantiate invvar and profile_basis
-            spec_bspl, spec_gpm_fit, spec_flat_fit, _, exit_status \
-                    = utils.bspline_profile(spec_coo_data, spec_flat_data, spec_ivar_data,
-                                            np.ones_like(spec_coo_data), ingpm=spec_gpm_data,
-                                            nord=4, upper=logrej, lower=logrej,
-                                            kwargs_bspline={'bkspace': spec_samp_fine},
-                                            kwargs_reject={'groupbadpix': True, 'maxrej': 5})
+            # Keep the tilts of the slit window, instead of one full
+            # image per slit
+            gdslits += [slit_idx]
+            spec_data += [(np.flatnonzero(spec_gpm), spec_srt, spec_coo_data, spec_flat_data,
+                           spec_ivar_data, spec_gpm_data, spat_range, tilts)]
+
+        # Rejection threshold for spectral fit in log(image)
+        # TODO: Make this a parameter?
+        logrej = 0.5
+
+        # Fit the spectral direction of the blaze.
+        # TODO: Figure out how to deal with the fits going crazy at
+        #  the edges of the chip in spec direction
+        # TODO: Can we add defaults to bspline_profile so that we
+        #  don't have to instantiate invvar and profile_basis
+        msgs.info('Fitting the spectral response of {0} slits'.format(len(gdslits)))
+        spec_fits = utils.bspline_profile_batch([d[2] for d in spec_data],
+                                                [d[3] for d in spec_data],
+                                                [d[4] for d in spec_data],
+                                                ingpm=[d[5] for d in spec_data],
+                                                n_workers=self.flatpar['n_workers'],
+                                                nord=4, upper=logrej, lower=logrej,
+                                                kwargs_bspline={'bkspace': spec_samp_fine},
+                                                kwargs_reject={'groupbadpix': True, 'maxrej': 5})
+
+        # Rejection threshold and typical error of the 2D fit; see below.
+        # TODO: Make twod_sig and twod_sigrej parameters?
+        twod_sig = 0.01
+        twod_sigrej = 4.0
+
+        # #################################################
+        # Model each slit independently.  The data for the 2D fits are
+        # collected and fit after all slits have been modeled.
+        twod_data = []
+        for slit_idx, (spec_gpm, spec_srt, spec_coo_data, spec_flat_data, _, spec_gpm_data,
+                       spat_range, tilts), (spec_bspl, spec_gpm_fit, spec_flat_fit, _, exit_status) \
+                in zip(gdslits, spec_data, spec_fits):
+            slit_spat = self.slits.spat_id[slit_idx]
+            msgs.info('Modeling the flat-field response for slit spat_id={}: {}/{}'.format(
+                        slit_spat, slit_idx+1, self.slits.nslits))
+
+            # Find the pixels on the initial slit
+            onslit_init = slitid_img_init == slit_spat
+
+            # Demand at least 10 pixels per row (on average) per degree
+            # of the polynomial.
+            # NOTE: This is not used until the 2D fit. Defined here to
+            # be close to the definition of ``onslit``.
+            if npoly is None:
+                # Approximate number of pixels sampling each spatial pixel
+                # for this (original) slit.
+                npercol = np.fmax(np.floor(np.sum(onslit_init)/nspec),1.0)
+                npoly  = np.clip(7, 1, int(np.ceil(npercol/10.)))
+            
+            # TODO: Always calculate the optimized `npoly` and warn the
+            #  user if npoly is provided but higher than the nominal
+            #  calculation?
 
             if exit_status > 1:
                 # TODO -- MAKE A FUNCTION
@@ -852,6 +886,16 @@ class FlatField(object):
                 self.slits.mask[slit_idx] = self.slits.bitmask.turn_on(self.slits.mask[slit_idx], 'BADFLATCALIB')
                 continue
 
+            # Create an image with the spatial coordinates relative to the left edge of this slit
+            spat_coo_init = self.slits.spatial_coordinate_image(slitidx=slit_idx, full=True, initial=True)
+
+            # Find pixels on the padded slit coordinates
+            onslit_padded = padded_slitid_img == slit_spat
+
+            # Convert the tilt image to an image with the spectral pixel index
+            spec_coo[...] = 0.
+            spec_coo[:,slice(*spat_range)] = tilts * (nspec-1)
+
             # Debugging/checking spectral fit
             if debug:
                 utils.bspline_qa(spec_coo_data, spec_flat_data, spec_bspl, spec_gpm_fit,
@@ -860,7 +904,7 @@ class FlatField(object):
 
             if sticky:
                 # Add rejected pixels to gpm
-                gpm[spec_gpm] = (spec_gpm_fit & spec_gpm_data)[np.argsort(spec_srt)]
+                gpm.flat[spec_gpm] = (spec_gpm_fit & spec_gpm_data)[np.argsort(spec_srt)]
 
             # Construct the model of the flat-field spectral shape
             # including padding on either side of the slit.
@@ -999,8 +1043,8 @@ class FlatField(object):
                 continue
 
             # ----------------------------------------------------------
-            # Fit the 2D residuals of the 1D spectral and spatial fits.
-            msgs.info('Performing 2D illumination + scattered light flat field fit')
+            # Collect the 2D residuals of the 1D spectral and spatial
+            # fits.
 
             # Construct the spectrally and spatially normalized flat
             norm_spec_spat[...] = 1.
@@ -1022,20 +1066,39 @@ class FlatField(object):
             # simply assume that a typical error per pixel. This guess
             # is somewhat aribtrary. We then set the rejection
             # threshold with sigrej_twod
-            # TODO: Make twod_sig and twod_sigrej parameters?
-            twod_sig = 0.01
             twod_ivar_data = twod_gpm_data.astype(float)/(twod_sig**2)
-            twod_sigrej = 4.0
 
             poly_basis = basis.fpoly(2.0*twod_spat_coo_data - 1.0, npoly)
 
-            # Perform the full 2d fit
-            twod_bspl, twod_gpm_fit, twod_flat_fit, _, exit_status \
-                    = utils.bspline_profile(twod_spec_coo_data, twod_flat_data, twod_ivar_data,
-                                            poly_basis, ingpm=twod_gpm_data, nord=4,
-                                            upper=twod_sigrej, lower=twod_sigrej,
-                                            kwargs_bspline={'bkspace': spec_samp_coarse},
-                                            kwargs_reject={'groupbadpix': True, 'maxrej': 10})
+            # Keep the 1D models on the slit to construct the full
+            # flat-field model after the 2D fit
+            twod_data += [(slit_idx, np.flatnonzero(onslit_tweak), np.flatnonzero(twod_gpm),
+                           twod_srt, twod_spec_coo_data, twod_spat_coo_data, twod_flat_data,
+                           twod_ivar_data, twod_gpm_data, poly_basis,
+                           np.fmax(self.msillumflat[onslit_tweak], 0.05),
+                           np.fmax(spec_model[onslit_tweak], 1.0))]
+
+        # No need to continue if we're just doing the spatial illumination
+        if spat_illum_only:
+            return
+
+        # ----------------------------------------------------------
+        # Fit the 2D residuals of all slits
+        msgs.info('Performing 2D illumination + scattered light flat field fit of '
+                  '{0} slits'.format(len(twod_data)))
+        twod_fits = utils.bspline_profile_batch([d[4] for d in twod_data],
+                                                [d[6] for d in twod_data],
+                                                [d[7] for d in twod_data],
+                                                profile_basis=[d[9] for d in twod_data],
+                                                ingpm=[d[8] for d in twod_data],
+                                                n_workers=self.flatpar['n_workers'],
+                                                nord=4, upper=twod_sigrej, lower=twod_sigrej,
+                                                kwargs_bspline={'bkspace': spec_samp_coarse},
+                                                kwargs_reject={'groupbadpix': True, 'maxrej': 10})
+        for (slit_idx, onslit_tweak, twod_gpm, twod_srt, twod_spec_coo_data, twod_spat_coo_data,
+             twod_flat_data, _, twod_gpm_data, _, illum_slit, spec_slit), \
+                (twod_bspl, twod_gpm_fit, twod_flat_fit, _, exit_status) in zip(twod_data, twod_fits):
+            slit_spat = self.slits.spat_id[slit_idx]
             if debug:
                 # TODO: Make a plot that shows the residuals in the 2D
                 # image
@@ -1088,29 +1151,24 @@ class FlatField(object):
                 msgs.warn('Two-dimensional fit to flat-field data failed!  No higher order '
                           'flat-field corrections included in model of slit {0}!'.format(slit_spat))
             else:
-                twod_model[twod_gpm] = twod_flat_fit[np.argsort(twod_srt)]
-                twod_gpm_out[twod_gpm] = twod_gpm_fit[np.argsort(twod_srt)]
-
+                twod_model.flat[twod_gpm] = twod_flat_fit[np.argsort(twod_srt)]
+                twod_gpm_out.flat[twod_gpm] = twod_gpm_fit[np.argsort(twod_srt)]
 
             # Construct the full flat-field model
             # TODO: Why is the 0.05 here for the illumflat compared to the 0.01 above?
-            self.flat_model[onslit_tweak] = twod_model[onslit_tweak] \
-                                        * np.fmax(self.msillumflat[onslit_tweak], 0.05) \
-                                        * np.fmax(spec_model[onslit_tweak], 1.0)
+            self.flat_model.flat[onslit_tweak] = twod_model.flat[onslit_tweak] * illum_slit \
+                                                    * spec_slit
 
             # Construct the pixel flat
             #self.mspixelflat[onslit] = rawflat[onslit]/self.flat_model[onslit]
             #self.mspixelflat[onslit_tweak] = 1.
             #trimmed_slitid_img_anew = self.slits.slit_img(pad=-trim, slitidx=slit_idx)
             #onslit_trimmed_anew = trimmed_slitid_img_anew == slit_spat
-            self.mspixelflat[onslit_tweak] = rawflat[onslit_tweak]/self.flat_model[onslit_tweak]
+            self.mspixelflat.flat[onslit_tweak] = rawflat.flat[onslit_tweak] \
+                                                    / self.flat_model.flat[onslit_tweak]
             # TODO: Add some code here to treat the edges and places where fits
             #  go bad?
 
-        # No need to continue if we're just doing the spatial illumination
-        if spat_illum_only:
-            return
-
         # Set the pixelflat to 1.0 wherever the flat was nonlinear
         self.mspixelflat[rawflat >= nonlinear_counts] = 1.0
         # Set the pixelflat to 1.0 within trim pixels of all the slit edges
@@ -1313,28 +1371,34 @@ class FlatField(object):
         ### STEP 3
         # Redo the scale model, now using the bspline fit
         scale_model = np.ones_like(self.rawflatimg.image)
+        xfit, yfit, inmsk = [], [], []
         for slit_idx in range(0, self.slits.spat_id.size):
-            msgs.info("Generating model relative response image for slit {0:d}".format(slit_idx))
             # Only use the overlapping regions of the slits, where the same wavelength range is covered
             onslit = (slitid_img_trim == self.slits.spat_id[swslt[slit_idx]])
-            onslit_init = (slitid_img_init == self.slits.spat_id[swslt[slit_idx]])
             onslit_gpm = onslit & gpm
             # Fit a low order polynomial
             minw, maxw = mnmx_wv[slit_idx, 0], mnmx_wv[slit_idx, 1]
-            xfit = (waveimg[onslit_gpm] - minw) / (maxw - minw)
-            yfit = np.exp(spec_bspl.value(waveimg[onslit_gpm])[0]) / rawflat[onslit_gpm]
-            srtd = np.argsort(xfit)
+            _xfit = (waveimg[onslit_gpm] - minw) / (maxw - minw)
+            _yfit = np.exp(spec_bspl.value(waveimg[onslit_gpm])[0]) / rawflat[onslit_gpm]
+            srtd = np.argsort(_xfit)
+            xfit += [_xfit[srtd]]
+            yfit += [_yfit[srtd]]
             # Rough outlier rejection
-            inmsk = (yfit > 1/5) & (yfit < 5)
-            slit_bspl, _, _, _, exit_status \
-                = utils.bspline_profile(xfit[srtd], yfit[srtd], np.ones_like(xfit), np.ones_like(xfit),
-                                        nord=4, upper=3, lower=3, ingpm=inmsk[srtd],
-                                        kwargs_bspline={'bkspace': spec_samp_fine},
-                                        kwargs_reject={'groupbadpix': True, 'maxrej': 5})
+            inmsk += [(yfit[-1] > 1/5) & (yfit[-1] < 5)]
+        # Fit all the slits
+        msgs.info("Generating model relative response image for {0:d} slits".format(len(xfit)))
+        fits = utils.bspline_profile_batch(xfit, yfit, [np.ones_like(x) for x in xfit],
+                                           ingpm=inmsk, n_workers=self.flatpar['n_workers'],
+                                           nord=4, upper=3, lower=3,
+                                           kwargs_bspline={'bkspace': spec_samp_fine},
+                                           kwargs_reject={'groupbadpix': True, 'maxrej': 5})
+        for slit_idx, (slit_bspl, _, _, _, exit_status) in enumerate(fits):
             # TODO : Perhaps mask a slit if it fails...
             if exit_status > 1:
                 msgs.warn("b-spline fit of relative scale failed for slit {0:d}".format(slit_idx))
             else:
+                onslit_init = (slitid_img_init == self.slits.spat_id[swslt[slit_idx]])
+                minw, maxw = mnmx_wv[slit_idx, 0], mnmx_wv[slit_idx, 1]
                 scale_model[onslit_init] = slit_bspl.value((waveimg[onslit_init] - minw) / (maxw - minw))[0]
 
         if debug:
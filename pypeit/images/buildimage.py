@@ -126,7 +126,7 @@ def buildimage_fromlist(spectrograph, det, frame_par, file_list,
                         bias=None, bpm=None, dark=None,
                         flatimages=None,
                         sigma_clip=False, sigrej=None, maxiters=5,
-                        ignore_saturation=True, slits=None):
+                        ignore_saturation=True, slits=None, proc_cache=None):
     """
     Build a PypeItImage from a list of files (and instructions)
 
@@ -151,6 +151,9 @@ def buildimage_fromlist(spectrograph, det, frame_par, file_list,
         maxiters (int, optional):
         ignore_saturation (bool, optional):
             Should be True for calibrations and False otherwise
+        proc_cache (:class:`pypeit.images.proccache.ProcImageCache`, optional):
+            Cache of processed raw images.  If None, all the images
+            are processed.
 
     Returns:
         :class:`pypeit.images.pypeitimage.PypeItImage`:  Or one of its children
@@ -161,7 +164,8 @@ def buildimage_fromlist(spectrograph, det, frame_par, file_list,
         msgs.error('Provided ParSet for must be type FrameGroupPar.')
     #process_steps = procimg.set_process_steps(bias, frame_par)
     #
-    combineImage = combineimage.CombineImage(spectrograph, det, frame_par['process'], file_list)
+    combineImage = combineimage.CombineImage(spectrograph, det, frame_par['process'], file_list,
+                                             proc_cache=proc_cache)
     pypeitImage = combineImage.run(bias=bias, bpm=bpm, dark=dark,
                                    flatimages=flatimages,
                                    sigma_clip=sigma_clip,
@@ -7,6 +7,7 @@
 import inspect
 
 import os
+import tempfile
 import numpy as np
 
 
@@ -39,9 +40,14 @@ class CombineImage(object):
             Parameters that dictate the processing of the images.  See
             :class:`pypeit.par.pypeitpar.ProcessImagesPar` for the
             defaults.
+        files (:obj:`list`):
+            List of the raw files to combine.
+        proc_cache (:class:`pypeit.images.proccache.ProcImageCache`, optional):
+            Cache of processed raw images.  If None, all the images
+            are processed.
 
     """
-    def __init__(self, spectrograph, det, par, files):
+    def __init__(self, spectrograph, det, par, files, proc_cache=None):
 
         # Required parameters
         self.spectrograph = spectrograph
@@ -50,6 +56,7 @@ class CombineImage(object):
             msgs.error('Provided ParSet for must be type ProcessImagesPar.')
         self.par = par  # This musts be named this way as it is frequently a child
         self.files = files
+        self.proc_cache = proc_cache
         if self.nfiles == 0:
             msgs.error('Combineimage requires a list of files to instantiate')
 
@@ -88,12 +95,23 @@ class CombineImage(object):
         # Loop on the files
         nimages = len(self.files)
         lampstat = []
+        cache = self.proc_cache
         for kk, ifile in enumerate(self.files):
-            # Load raw image
-            rawImage = rawimage.RawImage(ifile, self.spectrograph, self.det)
-            # Process
-            pypeitImage = rawImage.process(self.par, bias=bias, bpm=bpm, dark=dark,
-                                           flatimages=flatimages, slits=slits)
+            # Previously processed?
+            if cache is not None:
+                cache_key = cache.key(ifile, self.det, self.spectrograph, self.par, bpm=bpm,
+                                      bias=bias, dark=dark, flatimages=flatimages, slits=slits)
+                pypeitImage = cache.get(cache_key)
+            if cache is None or pypeitImage is None:
+                # Load raw image
+                rawImage = rawimage.RawImage(ifile, self.spectrograph, self.det)
+                # Process
+                pypeitImage = rawImage.process(self.par, bias=bias, bpm=bpm, dark=dark,
+                                               flatimages=flatimages, slits=slits)
+                if cache is not None:
+                    cache.put(cache_key, pypeitImage)
+            else:
+                msgs.info('Using cached processed image for {0}'.format(os.path.split(ifile)[1]))
             #embed(header='96 of combineimage')
             # Are we all done?
             if nimages == 1:
@@ -101,13 +119,19 @@ class CombineImage(object):
             elif kk == 0:
                 # Get ready
                 shape = (nimages, pypeitImage.image.shape[0], pypeitImage.image.shape[1])
-                img_stack = np.zeros(shape)
-                ivar_stack= np.zeros(shape)
-                rn2img_stack = np.zeros(shape)
-                crmask_stack = np.zeros(shape, dtype=bool)
+                # Write the stacks to disk if limiting the memory use.
+                # The scratch stacks are stored in single precision;
+                # the combination is always done in double precision.
+                use_scratch = self.par['combine_memory'] is not None
+                stack_dtype = np.float32 if use_scratch else float
+                img_stack = allocate_stack(shape, stack_dtype, scratch=use_scratch)
+                ivar_stack = allocate_stack(shape, stack_dtype, scratch=use_scratch)
+                rn2img_stack = allocate_stack(shape, stack_dtype, scratch=use_scratch)
+                crmask_stack = allocate_stack(shape, bool, scratch=use_scratch)
                 # Mask
                 bitmask = imagebitmask.ImageBitMask()
-                mask_stack = np.zeros(shape, bitmask.minimum_dtype(asuint=True))
+                mask_stack = allocate_stack(shape, bitmask.minimum_dtype(asuint=True),
+                                            scratch=use_scratch)
             # Grab the lamp status
             lampstat += [self.spectrograph.get_lamps_status(pypeitImage.rawheadlist)]
             # Process
@@ -149,26 +173,47 @@ class CombineImage(object):
 
         # Coadd them
         weights = np.ones(nimages)/float(nimages)
-        img_list = [img_stack]
-        var_stack = utils.inverse(ivar_stack)
-        var_list = [var_stack, rn2img_stack]
-        if combine_method == 'weightmean':
-            img_list_out, var_list_out, gpm, nused = combine.weighted_combine(
-                weights, img_list, var_list, (mask_stack == 0),
-                sigma_clip=sigma_clip, sigma_clip_stack=img_stack, sigrej=sigrej, maxiters=maxiters)
-        elif combine_method == 'median':
-            img_list_out = [np.median(img_stack, axis=0)]
-            var_list_out = [np.median(var_stack, axis=0)]
-            var_list_out += [np.median(rn2img_stack, axis=0)]
-            gpm = np.ones_like(img_list_out[0], dtype='bool')
-        else:
+        if combine_method not in ['weightmean', 'median']:
             msgs.error("Bad choice for combine.  Allowed options are 'median', 'weightmean'.")
 
+        def combine_rows(rows):
+            # Combine the stacks over a set of spectral rows
+            _img_stack = np.asarray(img_stack[:,rows,:], dtype=float)
+            var_stack = utils.inverse(np.asarray(ivar_stack[:,rows,:], dtype=float))
+            _rn2img_stack = np.asarray(rn2img_stack[:,rows,:], dtype=float)
+            if combine_method == 'weightmean':
+                img_list_out, var_list_out, _gpm, nused = combine.weighted_combine(
+                    weights, [_img_stack], [var_stack, _rn2img_stack],
+                    (np.asarray(mask_stack[:,rows,:]) == 0), sigma_clip=sigma_clip,
+                    sigma_clip_stack=_img_stack, sigrej=sigrej, maxiters=maxiters)
+            else:
+                img_list_out = [np.median(_img_stack, axis=0)]
+                var_list_out = [np.median(var_stack, axis=0)]
+                var_list_out += [np.median(_rn2img_stack, axis=0)]
+                _gpm = np.ones_like(img_list_out[0], dtype='bool')
+            return img_list_out[0], var_list_out[0], var_list_out[1], _gpm
+
+        if self.par['combine_memory'] is None:
+            # Combine all the rows at once
+            img, var, rn2img, gpm = combine_rows(slice(None))
+        else:
+            # Combine blocks of rows within the memory limit
+            nrows = combine_block_rows(shape, self.par['combine_memory'])
+            msgs.info('Combining {0} images in {1} block(s) of {2} rows'.format(
+                      nimages, int(np.ceil(shape[1]/nrows)), nrows))
+            img = np.zeros(shape[1:], dtype=float)
+            var = np.zeros(shape[1:], dtype=float)
+            rn2img = np.zeros(shape[1:], dtype=float)
+            gpm = np.zeros(shape[1:], dtype=bool)
+            for i in range(0, shape[1], nrows):
+                rows = slice(i, i+nrows)
+                img[rows], var[rows], rn2img[rows], gpm[rows] = combine_rows(rows)
+
         # Build the last one
-        final_pypeitImage = pypeitimage.PypeItImage(img_list_out[0],
-                                                    ivar=utils.inverse(var_list_out[0]),
+        final_pypeitImage = pypeitimage.PypeItImage(img,
+                                                    ivar=utils.inverse(var),
                                                     bpm=pypeitImage.bpm,
-                                                    rn2img=var_list_out[1],
+                                                    rn2img=rn2img,
                                                     crmask=np.logical_not(gpm),
                                                     detector=pypeitImage.detector,
                                                     PYP_SPEC=pypeitImage.PYP_SPEC)
@@ -193,3 +238,53 @@ class CombineImage(object):
         """
         return len(self.files) if isinstance(self.files, (np.ndarray, list)) else 0
 
+
+
+def allocate_stack(shape, dtype, scratch=False):
+    """
+    Allocate a zero-filled image stack.
+
+    Args:
+        shape (:obj:`tuple`):
+            Shape of the stack.
+        dtype (`numpy.dtype`_):
+            Data type of the stack.
+        scratch (:obj:`bool`, optional):
+            Write the stack to a memory-mapped scratch file in the
+            system temporary directory instead of holding it in
+            memory.  The file is deleted when the stack is no longer
+            used.
+
+    Returns:
+        `numpy.ndarray`_, `numpy.memmap`_: The allocated stack.
+    """
+    if not scratch:
+        return np.zeros(shape, dtype=dtype)
+    with tempfile.TemporaryFile() as f:
+        # The mapping remains valid after the file is closed
+        return np.memmap(f, dtype=dtype, mode='w+', shape=shape)
+
+
+def combine_block_rows(shape, max_memory):
+    """
+    Determine the number of spectral rows that can be combined at
+    once.
+
+    The memory used per pixel in the stack includes the copies of the
+    image, variance, read-noise, and mask stacks read from the scratch
+    files and the temporary arrays used by the sigma-clipping and
+    weighted mean in :func:`pypeit.core.combine.weighted_combine`.
+
+    Args:
+        shape (:obj:`tuple`):
+            Shape of the image stack, (nimages, nspec, nspat).
+        max_memory (:obj:`float`):
+            Maximum memory in GB.
+
+    Returns:
+        :obj:`int`: Number of rows to combine at once; always at least
+        1 and no more than nspec.
+    """
+    # Approximately 16 float64 arrays with the size of the stack
+    bytes_per_row = 16 * 8 * shape[0] * shape[2]
+    return int(np.clip(max_memory * 2**30 // bytes_per_row, 1, shape[1]))
@@ -0,0 +1,246 @@
+""" Persistent, on-disk cache of processed raw images
+
+The cache is keyed by the identity of the raw file (path, size, and
+modification time), the detector, the processing parameters, and the
+content of the calibrations used to process the image (bias, dark, bad
+pixel mask, flats, and slits).  It allows the same raw frame to be
+used as, e.g., an arc, tilt, and trace image, or a rerun of the
+reduction, without repeating the processing.
+
+.. include common links, assuming primary doc root is up one directory
+.. include:: ../links.rst
+"""
+import os
+import hashlib
+import pickle
+import tempfile
+
+import numpy as np
+
+from pypeit import msgs
+from pypeit import __version__
+from pypeit import datamodel
+
+from IPython import embed
+
+
+class ProcImageCache(object):
+    """
+    Cache of processed raw images.
+
+    Each processed image is pickled to a file named by its key in
+    :attr:`cache_dir`.  The least-recently used files are removed
+    when the total size of the cache exceeds :attr:`max_size`.
+
+    Args:
+        cache_dir (:obj:`str`):
+            Directory for the cached images.  Created if it does not
+            exist.
+        max_size (:obj:`float`, optional):
+            Maximum size of the cache in GB.
+
+    Attributes:
+        nhit (:obj:`int`):
+            Number of images successfully loaded from the cache.
+        nmiss (:obj:`int`):
+            Number of images not found in the cache.
+    """
+    file_extension = '.pkl'
+
+    process_keys = ['trim', 'apply_gain', 'orient', 'overscan_method', 'overscan_par',
+                    'mask_cr', 'lamaxiter', 'grow', 'rmcompact', 'sigclip', 'sigfrac', 'objlim',
+                    'lamethod', 'lafloat32', 'use_biasimage', 'use_overscan', 'use_darkimage',
+                    'use_pixelflat', 'use_illumflat', 'use_specillum', 'use_pattern',
+                    'spat_flexure_correct']
+    """
+    The parameters in
+    :class:`pypeit.par.pypeitpar.ProcessImagesPar` that affect the
+    processing of the individual raw images.  The parameters that
+    only affect how the processed images are combined do not
+    contribute to the key.
+    """
+
+    def __init__(self, cache_dir, max_size=10.):
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+        if not os.path.isdir(self.cache_dir):
+            os.makedirs(self.cache_dir, exist_ok=True)
+        self.nhit = 0
+        self.nmiss = 0
+
+    @staticmethod
+    def key(ifile, det, spectrograph, par, bpm=None, bias=None, dark=None, flatimages=None,
+            slits=None):
+        """
+        Construct the cache key for a processed raw image.
+
+        Only the parameters in :attr:`process_keys` and the
+        calibrations used given those parameters contribute to the
+        key.
+
+        Args:
+            ifile (:obj:`str`):
+                Raw file.
+            det (:obj:`int`):
+                1-indexed detector number.
+            spectrograph (:class:`pypeit.spectrographs.spectrograph.Spectrograph`):
+                Spectrograph used to take the data.
+            par (:class:`pypeit.par.pypeitpar.ProcessImagesPar`):
+                Processing parameters.
+            bpm, bias, dark, flatimages, slits (optional):
+                Objects passed to
+                :func:`pypeit.images.rawimage.RawImage.process`.
+
+        Returns:
+            :obj:`str`: The hexadecimal key.
+        """
+        stat = os.stat(ifile)
+        h = hashlib.blake2b(digest_size=20)
+        h.update('{0}|{1}|{2}|{3}|{4}|{5}'.format(__version__, os.path.abspath(ifile),
+                 stat.st_size, stat.st_mtime_ns, det,
+                 spectrograph.spectrograph).encode())
+        update_hash(h, [(k, par[k]) for k in ProcImageCache.process_keys])
+        update_hash(h, bpm)
+        update_hash(h, bias if par['use_biasimage'] else None)
+        update_hash(h, dark if par['use_darkimage'] else None)
+        update_hash(h, flatimages if par['use_pixelflat'] or par['use_illumflat']
+                                        or par['use_specillum'] else None)
+        update_hash(h, slits if par['use_illumflat'] or par['spat_flexure_correct'] else None)
+        return h.hexdigest()
+
+    def filename(self, key):
+        """
+        Return the cache file for the provided key.
+        """
+        return os.path.join(self.cache_dir, key + self.file_extension)
+
+    def get(self, key):
+        """
+        Load a processed image from the cache.
+
+        Args:
+            key (:obj:`str`):
+                Cache key; see :func:`key`.
+
+        Returns:
+            :class:`pypeit.images.pypeitimage.PypeItImage`: The cached
+            image, or None if it is not in the cache.
+        """
+        _file = self.filename(key)
+        if not os.path.isfile(_file):
+            self.nmiss += 1
+            return None
+        try:
+            with open(_file, 'rb') as f:
+                pypeitImage = pickle.load(f)
+        except Exception:
+            msgs.warn('Could not read cached image {0}; ignoring it.'.format(_file))
+            self.nmiss += 1
+            return None
+        # Mark as recently used
+        os.utime(_file)
+        self.nhit += 1
+        return pypeitImage
+
+    def put(self, key, pypeitImage):
+        """
+        Add a processed image to the cache and evict the
+        least-recently used images if the cache is too large.
+
+        Args:
+            key (:obj:`str`):
+                Cache key; see :func:`key`.
+            pypeitImage (:class:`pypeit.images.pypeitimage.PypeItImage`):
+                Processed image.
+        """
+        # Write to a temporary file first so that concurrent processes
+        # never read a partial file
+        fd, tmpfile = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump(pypeitImage, f, pickle.HIGHEST_PROTOCOL)
+        os.replace(tmpfile, self.filename(key))
+        self.evict()
+
+    def files(self):
+        """
+        Return the cached files, sorted from the least to the most
+        recently used.
+
+        Returns:
+            :obj:`list`: Tuples with the file name, its size in bytes,
+            and its last-use time.
+        """
+        files = []
+        for f in os.listdir(self.cache_dir):
+            if not f.endswith(self.file_extension):
+                continue
+            _f = os.path.join(self.cache_dir, f)
+            try:
+                stat = os.stat(_f)
+            except FileNotFoundError:
+                # Removed by another process
+                continue
+            files += [(_f, stat.st_size, stat.st_mtime)]
+        return sorted(files, key=lambda x: x[2])
+
+    @property
+    def size(self):
+        """
+        Total size of the cached files in GB.
+        """
+        return np.sum([f[1] for f in self.files()]) / 2**30
+
+    def evict(self):
+        """
+        Remove the least-recently used files until the size of the
+        cache is below :attr:`max_size`.
+        """
+        files = self.files()
+        size = np.sum([f[1] for f in files])
+        max_size = self.max_size * 2**30
+        for f, fsize, _ in files:
+            if size <= max_size:
+                break
+            try:
+                os.remove(f)
+            except FileNotFoundError:
+                pass
+            size -= fsize
+
+    def clear(self):
+        """
+        Remove all the cached files.
+        """
+        for f, _, _ in self.files():
+            os.remove(f)
+
+
+def update_hash(h, obj):
+    """
+    Update a hash with the content of an object.
+
+    Arrays contribute their shape, type, and data, and
+    :class:`pypeit.datamodel.DataContainer` objects contribute all of
+    their datamodel items.  Other objects contribute their string
+    representation.
+
+    Args:
+        h (hashlib hash object):
+            Hash to update.
+        obj (object):
+            Object to add.
+    """
+    if isinstance(obj, np.ndarray) and obj.dtype != object:
+        h.update('{0}{1}'.format(obj.dtype.str, obj.shape).encode())
+        h.update(np.ascontiguousarray(obj).reshape(-1).view(np.uint8))
+    elif isinstance(obj, datamodel.DataContainer):
+        h.update(obj.__class__.__name__.encode())
+        for key in sorted(obj.keys()):
+            h.update(key.encode())
+            update_hash(h, obj[key])
+    elif isinstance(obj, (list, tuple)):
+        for item in obj:
+            update_hash(h, item)
+    else:
+        h.update(repr(obj).encode())
+
@@ -178,11 +178,13 @@ class PypeItImage(datamodel.DataContainer):
     def shape(self):
         return () if self.image is None else self.image.shape
 
-    def build_crmask(self, par, subtract_img=None):
+    def build_crmask(self, par, subtract_img=None, slitmask=None):
         """
         Generate the CR mask frame
 
-        Mainly a wrapper to :func:`pypeit.core.procimg.lacosmic`
+        Mainly a wrapper to :func:`pypeit.core.procimg.lacosmic` or, if
+        ``par['lamethod']`` is ``'fast'``,
+        :func:`pypeit.core.procimg.lacosmic_fast`.
 
         Args:
             par (:class:`pypeit.par.pypeitpar.ProcessImagesPar`):
@@ -191,6 +193,9 @@ class PypeItImage(datamodel.DataContainer):
                 defaults.
             subtract_img (`numpy.ndarray`_, optional):
                 If provided, subtract this from the image prior to CR detection
+            slitmask (`numpy.ndarray`_, optional):
+                Slit ID image.  If provided, the fast method only
+                searches for CRs in the slits.
 
         Returns:
             `numpy.ndarray`_: Copy of self.crmask (boolean)
@@ -199,16 +204,30 @@ class PypeItImage(datamodel.DataContainer):
         var = utils.inverse(self.ivar)
         use_img = self.image if subtract_img is None else self.image - subtract_img
         # Run LA Cosmic to get the cosmic ray mask
-        self.crmask = procimg.lacosmic(use_img,
-                                       self.detector['saturation'],
-                                       self.detector['nonlinear'],
-                                       varframe=var,
-                                       maxiter=par['lamaxiter'],
-                                       grow=par['grow'],
-                                       remove_compact_obj=par['rmcompact'],
-                                       sigclip=par['sigclip'],
-                                       sigfrac=par['sigfrac'],
-                                       objlim=par['objlim'])
+        if par['lamethod'] == 'fast':
+            self.crmask = procimg.lacosmic_fast(use_img,
+                                                self.detector['saturation'],
+                                                self.detector['nonlinear'],
+                                                varframe=var,
+                                                grow=par['grow'],
+                                                remove_compact_obj=par['rmcompact'],
+                                                sigclip=par['sigclip'],
+                                                sigfrac=par['sigfrac'],
+                                                objlim=par['objlim'],
+                                                slitmask=slitmask,
+                                                use_float32=par['lafloat32'],
+                                                n_workers=par['laworkers'])
+        else:
+            self.crmask = procimg.lacosmic(use_img,
+                                           self.detector['saturation'],
+                                           self.detector['nonlinear'],
+                                           varframe=var,
+                                           maxiter=par['lamaxiter'],
+                                           grow=par['grow'],
+                                           remove_compact_obj=par['rmcompact'],
+                                           sigclip=par['sigclip'],
+                                           sigfrac=par['sigfrac'],
+                                           objlim=par['objlim'])
         # Return
         return self.crmask.copy()
 
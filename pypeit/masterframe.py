@@ -5,6 +5,8 @@ Implements the master frame base class.
 .. include:: ../links.rst
 """
 import os
+import copy
+from collections import OrderedDict
 from IPython import embed
 from abc import ABCMeta
 
@@ -19,6 +21,14 @@ from astropy.io import fits
 sep1 = '_'  # Separation between master type and key
 sep2 = '.'  # Separation between master key and extension
 
+# Master frames loaded by this process; see load_master
+_loaded_masters = OrderedDict()
+max_loaded_masters = 64
+"""
+Maximum number of master frames held in memory by
+:func:`load_master`.
+"""
+
 def construct_file_name(master_obj, master_key, master_dir=None):
     """
     Generate a MasterFrame filename
@@ -132,3 +142,55 @@ def build_master_header(master_obj, master_key, master_dir,
     # Return
     return _hdr
 
+
+
+def load_master(master_obj, filename, reader=None):
+    """
+    Load a master frame, reusing a copy previously loaded by this
+    process if the file has not changed.
+
+    Loaded master frames are held in memory keyed by their master type,
+    master key, and directory, so that, e.g., reducing many exposures
+    with the same calibrations reads each master frame from disk only
+    once.  The cached object is refreshed if the size or modification
+    time of the file changes.  A deep copy is always returned so that
+    the caller can modify the object (e.g., the slit mask) without
+    affecting later loads.
+
+    Args:
+        master_obj (object):
+            MasterFrame class to load.  This provides the master_type
+            and, if ``reader`` is None, the ``from_file`` method used
+            to read the file.
+        filename (:obj:`str`):
+            Master frame file.
+        reader (callable, optional):
+            Function that reads the file, called as
+            ``reader(filename)``.  If None, use
+            ``master_obj.from_file``.
+
+    Returns:
+        object: The loaded master frame.
+    """
+    master_key, master_dir = grab_key_mdir(filename, from_filename=True)
+    key = (master_obj.master_type, master_key, os.path.abspath(master_dir))
+    stat = os.stat(filename)
+    if key in _loaded_masters and _loaded_masters[key][0] == (stat.st_size, stat.st_mtime_ns):
+        msgs.info('Reusing loaded {0} from {1}'.format(master_obj.master_type, filename))
+        _loaded_masters.move_to_end(key)
+        return copy.deepcopy(_loaded_masters[key][1])
+
+    obj = master_obj.from_file(filename) if reader is None else reader(filename)
+    _loaded_masters[key] = ((stat.st_size, stat.st_mtime_ns), copy.deepcopy(obj))
+    _loaded_masters.move_to_end(key)
+    while len(_loaded_masters) > max_loaded_masters:
+        _loaded_masters.popitem(last=False)
+    return obj
+
+
+def clear_loaded_masters():
+    """
+    Remove all the master frames held in memory by
+    :func:`load_master`.
+    """
+    _loaded_masters.clear()
@@ -4,6 +4,9 @@ Provides a class that handles the fits metadata required by PypeIt.
 import os
 import io
 import string
+import pickle
+import tempfile
+from concurrent import futures
 
 import numpy as np
 import yaml
@@ -15,6 +18,7 @@ from astropy import table, coordinates, time, units
 
 from pypeit import msgs
 from pypeit import utils
+from pypeit import __version__
 from pypeit.core import framematch
 from pypeit.core import flux_calib
 from pypeit.core import parse
@@ -167,37 +171,75 @@ class PypeItMetaData:
         _files = files if hasattr(files, '__len__') else [files]
 
         # Build lists to fill
-        data = {k:[] for k in self.spectrograph.meta.keys()}
+        meta_keys = list(self.spectrograph.meta.keys())
+        data = {k:[] for k in meta_keys}
         data['directory'] = ['None']*len(_files)
         data['filename'] = ['None']*len(_files)
 
-        # Build the table
-        for idx, ifile in enumerate(_files):
-            # User data (for frame type)
-            if usrdata is None:
-                usr_row = None
-            else:
-                # Check
+        # User data (for frame type)
+        if usrdata is None:
+            usr_rows = [None]*len(_files)
+        else:
+            # Check
+            for idx, ifile in enumerate(_files):
                 if os.path.basename(ifile) != usrdata['filename'][idx]:
                     msgs.error("Input files is not sync'd to usrdata!  Something went wrong in metadata..")
-                usr_row = usrdata[idx]
+            usr_rows = [usrdata[idx] for idx in range(len(_files))]
 
-            # Add the directory and file name to the table
+        # Add the directory and file name to the table
+        for idx, ifile in enumerate(_files):
             data['directory'][idx], data['filename'][idx] = os.path.split(ifile)
 
-            # Read the fits headers
-            headarr = self.spectrograph.get_headarr(ifile, strict=strict)
-
-            # Grab Meta
-            for meta_key in self.spectrograph.meta.keys():
-                value = self.spectrograph.get_meta_value(headarr, meta_key, required=strict, usr_row=usr_row,
-                                        ignore_bad_header=self.par['rdx']['ignore_bad_headers'])
+        # Find the metadata of unchanged files in the cache
+        rows = [None]*len(_files)
+        stats = [None]*len(_files)
+        caches = {}
+        if self.par['rdx']['meta_cache']:
+            for idx, ifile in enumerate(_files):
+                try:
+                    stat = os.stat(ifile)
+                except OSError:
+                    continue
+                stats[idx] = (stat.st_size, stat.st_mtime_ns)
+                directory = os.path.abspath(data['directory'][idx])
+                if directory not in caches:
+                    caches[directory] = load_meta_cache(directory, self.spectrograph, meta_keys)
+                cached = caches[directory].get(data['filename'][idx])
+                # Rows with missing values are read again when strict
+                # so that the required values are checked
+                if cached is not None and cached[0] == stats[idx] \
+                        and not (strict and any([v is None for v in cached[1]])):
+                    rows[idx] = cached[1]
+
+        # Read the fits headers of the remaining files
+        indx = [idx for idx in range(len(_files)) if rows[idx] is None]
+        if len(indx) < len(_files):
+            msgs.info('Using cached metadata for {0} of {1} files'.format(
+                      len(_files)-len(indx), len(_files)))
+        with futures.ThreadPoolExecutor(max_workers=self.par['rdx']['meta_workers']) as pool:
+            _rows = pool.map(lambda idx: self._get_meta_row(_files[idx], strict=strict,
+                                                            usr_row=usr_rows[idx]), indx)
+            for idx, row in zip(indx, _rows):
+                rows[idx] = row
+                msgs.info('Added metadata for {0}'.format(os.path.split(_files[idx])[1]))
+
+        # Update the caches
+        for idx in indx:
+            if stats[idx] is not None:
+                caches[os.path.abspath(data['directory'][idx])][data['filename'][idx]] \
+                        = (stats[idx], rows[idx])
+        for directory in np.unique([os.path.abspath(data['directory'][idx]) for idx in indx
+                                    if stats[idx] is not None]):
+            write_meta_cache(directory, self.spectrograph, meta_keys, caches[directory])
+
+        # Grab Meta
+        for row in rows:
+            for meta_key, value in zip(meta_keys, row):
                 if isinstance(value, str) and '#' in value:
                     value = value.replace('#', '')
                     msgs.warn('Removing troublesome # character from {0}.  Returning {1}.'.format(
                               meta_key, value))
                 data[meta_key].append(value)
-            msgs.info('Added metadata for {0}'.format(os.path.split(ifile)[1]))
 
         # JFH Changed the below to not crash if some files have None in their MJD. This is the desired behavior
         # since if there are empty or corrupt files we still want this to run.
@@ -219,6 +261,31 @@ class PypeItMetaData:
         # Return
         return data
 
+    def _get_meta_row(self, ifile, strict=True, usr_row=None):
+        """
+        Read the metadata of a single file.
+
+        Args:
+            ifile (:obj:`str`):
+                File to read.
+            strict (:obj:`bool`, optional):
+                Fault if the header cannot be read or a required
+                metadata value is missing.
+            usr_row (astropy.table.Row, optional):
+                User data for the file, used to check the required
+                metadata values.
+
+        Returns:
+            :obj:`list`: The metadata values, in the order of
+            :attr:`spectrograph.meta`.
+        """
+        # Read the fits headers
+        headarr = self.spectrograph.get_headarr(ifile, strict=strict)
+        return [self.spectrograph.get_meta_value(headarr, meta_key, required=strict,
+                                    usr_row=usr_row,
+                                    ignore_bad_header=self.par['rdx']['ignore_bad_headers'])
+                    for meta_key in self.spectrograph.meta.keys()]
+
     def get_manual_extract(self, frames, det):
         """
         Parse the manual_extract column for a given frame and detector
@@ -1681,3 +1748,83 @@ def row_match_config(row, config, spectrograph):
             match.append(np.all(config[k] == row[k]))
     # Check
     return np.all(match)
+
+
+def meta_cache_file(directory, spectrograph):
+    """
+    Return the name of the file with the cached metadata for the raw
+    files in a directory.
+
+    Args:
+        directory (:obj:`str`):
+            Raw data directory.
+        spectrograph (:class:`pypeit.spectrographs.spectrograph.Spectrograph`):
+            Spectrograph used to take the data.
+
+    Returns:
+        :obj:`str`: The cache file name.
+    """
+    return os.path.join(directory, '.pypeit_meta_{0}.pkl'.format(spectrograph.spectrograph))
+
+
+def load_meta_cache(directory, spectrograph, meta_keys):
+    """
+    Load the cached metadata for the raw files in a directory.
+
+    Args:
+        directory (:obj:`str`):
+            Raw data directory.
+        spectrograph (:class:`pypeit.spectrographs.spectrograph.Spectrograph`):
+            Spectrograph used to take the data.
+        meta_keys (:obj:`list`):
+            Metadata keys in the order of the cached values.  The
+            cache is ignored if it was written for a different list of
+            keys or a different version of PypeIt.
+
+    Returns:
+        :obj:`dict`: The file size and modification time, and the
+        metadata values, keyed by the file name.  Empty if there is no
+        valid cache.
+    """
+    cache_file = meta_cache_file(directory, spectrograph)
+    if not os.path.isfile(cache_file):
+        return {}
+    try:
+        with open(cache_file, 'rb') as f:
+            cache = pickle.load(f)
+    except Exception:
+        msgs.warn('Could not read metadata cache {0}; ignoring it.'.format(cache_file))
+        return {}
+    if cache.get('version') != __version__ or cache.get('meta_keys') != meta_keys:
+        return {}
+    return cache['rows']
+
+
+def write_meta_cache(directory, spectrograph, meta_keys, rows):
+    """
+    Write the cached metadata for the raw files in a directory.
+
+    A warning is issued if the directory is not writable.
+
+    Args:
+        directory (:obj:`str`):
+            Raw data directory.
+        spectrograph (:class:`pypeit.spectrographs.spectrograph.Spectrograph`):
+            Spectrograph used to take the data.
+        meta_keys (:obj:`list`):
+            Metadata keys in the order of the cached values.
+        rows (:obj:`dict`):
+            The file size and modification time, and the metadata
+            values, keyed by the file name; see
+            :func:`load_meta_cache`.
+    """
+    cache = {'version': __version__, 'meta_keys': meta_keys, 'rows': rows}
+    try:
+        # Write to a temporary file first so that concurrent processes
+        # never read a partial file
+        fd, tmpfile = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump(cache, f, pickle.HIGHEST_PROTOCOL)
+        os.replace(tmpfile, meta_cache_file(directory, spectrograph))
+    except OSError:
+        msgs.warn('Could not write metadata cache in {0}.'.format(directory))
@@ -185,10 +185,10 @@ class ProcessImagesPar(ParSet):
                  combine=None, satpix=None,
                  mask_cr=None,
                  sigrej=None, n_lohi=None, sig_lohi=None, replace=None, lamaxiter=None, grow=None,
-                 rmcompact=None, sigclip=None, sigfrac=None, objlim=None,
-                 use_biasimage=None, use_overscan=None, use_darkimage=None,
+                 rmcompact=None, sigclip=None, sigfrac=None, objlim=None, lamethod=None,
+                 lafloat32=None, laworkers=None, use_biasimage=None, use_overscan=None, use_darkimage=None,
                  use_pixelflat=None, use_illumflat=None, use_specillum=None,
-                 use_pattern=None, spat_flexure_correct=None):
+                 use_pattern=None, spat_flexure_correct=None, combine_memory=None):
 
         # Grab the parameter names and values from the function
         # arguments
@@ -276,6 +276,14 @@ class ProcessImagesPar(ParSet):
         descr['combine'] = 'Method used to combine multiple frames.  Options are: {0}'.format(
                                        ', '.join(options['combine']))
 
+        dtypes['combine_memory'] = [int, float]
+        descr['combine_memory'] = 'Approximate maximum memory in GB used to combine multiple ' \
+                                  'frames.  If set, the processed frames are written in single ' \
+                                  'precision to memory-mapped scratch files in the system ' \
+                                  'temporary directory and combined in blocks of spectral rows ' \
+                                  'that fit within this limit.  If None, all the processed frames ' \
+                                  'are held in memory and combined at once.'
+
         defaults['satpix'] = 'reject'
         options['satpix'] = ProcessImagesPar.valid_saturation_handling()
         dtypes['satpix'] = str
@@ -332,6 +340,23 @@ class ProcessImagesPar(ParSet):
         dtypes['objlim'] = [int, float]
         descr['objlim'] = 'Object detection limit in LA cosmics routine'
 
+        defaults['lamethod'] = 'standard'
+        options['lamethod'] = ProcessImagesPar.valid_lacosmic_methods()
+        dtypes['lamethod'] = str
+        descr['lamethod'] = 'Implementation of the LA cosmics routine.  The \'fast\' method ' \
+                            'only evaluates the median filters at the pixels that can be ' \
+                            'selected and, when the slits are known, only searches the ' \
+                            'pixels in the slits.  Options are: {0}'.format(
+                                       ', '.join(options['lamethod']))
+
+        defaults['lafloat32'] = False
+        dtypes['lafloat32'] = bool
+        descr['lafloat32'] = 'Perform the \'fast\' LA cosmics calculations in single precision.'
+
+        defaults['laworkers'] = 1
+        dtypes['laworkers'] = int
+        descr['laworkers'] = 'Number of threads used by the \'fast\' LA cosmics routine.'
+
         # Instantiate the parameter set
         super(ProcessImagesPar, self).__init__(list(pars.keys()),
                                                values=list(pars.values()),
@@ -349,9 +374,10 @@ class ProcessImagesPar(ParSet):
         parkeys = ['trim', 'apply_gain', 'orient',
                    'use_biasimage', 'use_pattern', 'use_overscan', 'overscan_method', 'overscan_par', 'use_darkimage',
                    'spat_flexure_correct', 'use_illumflat', 'use_specillum', 'use_pixelflat',
-                   'combine', 'satpix', 'sigrej', 'n_lohi', 'mask_cr',
+                   'combine', 'combine_memory', 'satpix', 'sigrej', 'n_lohi', 'mask_cr',
                    'sig_lohi', 'replace', 'lamaxiter', 'grow',
-                   'rmcompact', 'sigclip', 'sigfrac', 'objlim']
+                   'rmcompact', 'sigclip', 'sigfrac', 'objlim', 'lamethod', 'lafloat32',
+                   'laworkers']
 
         badkeys = numpy.array([pk not in parkeys for pk in k])
         if numpy.any(badkeys):
@@ -390,6 +416,13 @@ class ProcessImagesPar(ParSet):
         """
         return [ 'min', 'max', 'mean', 'median', 'weightmean', 'maxnonsat' ]
 
+    @staticmethod
+    def valid_lacosmic_methods():
+        """
+        Return the valid implementations of the LA cosmics routine.
+        """
+        return ['standard', 'fast']
+
     def validate(self):
         """
         Check the parameters are valid for the provided method.
@@ -399,6 +432,10 @@ class ProcessImagesPar(ParSet):
             raise ValueError('n_lohi must be a list of two numbers.')
         if self.data['sig_lohi'] is not None and len(self.data['sig_lohi']) != 2:
             raise ValueError('n_lohi must be a list of two numbers.')
+        if self.data['combine_memory'] is not None and self.data['combine_memory'] <= 0:
+            raise ValueError('combine_memory must be positive.')
+        if self.data['laworkers'] < 1:
+            raise ValueError('laworkers must be at least 1.')
 
         if not self.data['use_overscan']:
             return
@@ -475,7 +512,7 @@ class FlatFieldPar(ParSet):
                  spec_samp_coarse=None, spat_samp=None, tweak_slits=None, tweak_slits_thresh=None,
                  tweak_slits_maxfrac=None, rej_sticky=None, slit_trim=None, slit_illum_pad=None,
                  illum_iter=None, illum_rej=None, twod_fit_npoly=None, saturated_slits=None,
-                 slit_illum_relative=None):
+                 slit_illum_relative=None, n_workers=None):
 
         # Grab the parameter names and values from the function
         # arguments
@@ -592,6 +629,12 @@ class FlatFieldPar(ParSet):
                                    'extracted from the slit; \'continue\' - ignore the ' \
                                    'flat-field correction, but continue with the reduction.'
 
+        defaults['n_workers'] = 1
+        dtypes['n_workers'] = int
+        descr['n_workers'] = 'Number of threads used to fit the slits concurrently; this is used ' \
+                             'for the spectral and 2D fits of the flat-field model and for the ' \
+                             'relative spectral illumination.'
+
         # Instantiate the parameter set
         super(FlatFieldPar, self).__init__(list(pars.keys()),
                                            values=list(pars.values()),
@@ -609,7 +652,8 @@ class FlatFieldPar(ParSet):
         parkeys = ['method', 'pixelflat_file', 'spec_samp_fine', 'spec_samp_coarse',
                    'spat_samp', 'tweak_slits', 'tweak_slits_thresh', 'tweak_slits_maxfrac',
                    'rej_sticky', 'slit_trim', 'slit_illum_pad', 'slit_illum_relative',
-                   'illum_iter', 'illum_rej', 'twod_fit_npoly', 'saturated_slits']
+                   'illum_iter', 'illum_rej', 'twod_fit_npoly', 'saturated_slits',
+                   'n_workers']
 
         badkeys = numpy.array([pk not in parkeys for pk in k])
         if numpy.any(badkeys):
@@ -648,6 +692,9 @@ class FlatFieldPar(ParSet):
         #                     'pixels, number of repeats')
         #if self.data['method'] == 'bspline' and len(self.data['params']) != 1:
         #    raise ValueError('For bspline method, set params = spacing (integer).')
+        if self.data['n_workers'] < 1:
+            raise ValueError('Number of workers must be at least 1.')
+
         if self.data['pixelflat_file'] is None:
             return
 
@@ -833,7 +880,7 @@ class Coadd1DPar(ParSet):
                  sn_smooth_npix=None, wave_method=None, samp_fact=None, ref_percentile=None, maxiter_scale=None,
                  sigrej_scale=None, scale_method=None, sn_min_medscale=None, sn_min_polyscale=None, maxiter_reject=None,
                  lower=None, upper=None, maxrej=None, sn_clip=None, nbest=None, sensfuncfile=None, coaddfile=None,
-                 mag_type=None, filter=None, filter_mag=None, filter_mask=None):
+                 mag_type=None, filter=None, filter_mag=None, filter_mask=None, n_workers=None):
 
         # Grab the parameter names and values from the function
         # arguments
@@ -974,6 +1021,13 @@ class Coadd1DPar(ParSet):
         descr['filter_mask'] = 'List of wavelength regions to mask when doing the scaling (ie. occasional junk pixels).'\
                                'Colon and comma separateed, e.g.   5552:5559,6010:6030'
 
+        defaults['n_workers'] = 1
+        dtypes['n_workers'] = int
+        descr['n_workers'] = 'Number of worker processes used to scale and stack the individual ' \
+                             'orders of an echelle coadd.  The orders are independent until they ' \
+                             'are merged, which is always done serially.  If 1, the orders are ' \
+                             'processed serially.'
+
 
         # JFH These last two are actually arguments and not parameters that are only here because there is no other easy
         # way to parse .coadd1d files except with parsets. I would like to separate arguments from parameters.
@@ -1001,7 +1055,7 @@ class Coadd1DPar(ParSet):
                    'samp_fact', 'ref_percentile', 'maxiter_scale', 'sigrej_scale', 'scale_method',
                    'sn_min_medscale', 'sn_min_polyscale', 'maxiter_reject', 'lower', 'upper',
                    'maxrej', 'sn_clip', 'nbest', 'sensfuncfile', 'coaddfile',
-                   'filter', 'mag_type', 'filter_mag', 'filter_mask']
+                   'filter', 'mag_type', 'filter_mag', 'filter_mask', 'n_workers']
 
         badkeys = numpy.array([pk not in parkeys for pk in k])
         if numpy.any(badkeys):
@@ -1016,7 +1070,8 @@ class Coadd1DPar(ParSet):
         """
         Check the parameters are valid for the provided method.
         """
-        pass
+        if self.data['n_workers'] < 1:
+            raise ValueError('Number of workers must be at least 1.')
 
     @staticmethod
     def valid_ex():
@@ -1033,7 +1088,7 @@ class Coadd2DPar(ParSet):
     For a table with the current keywords, defaults, and descriptions,
     see :ref:`pypeitpar`.
     """
-    def __init__(self, offsets=None, weights=None):
+    def __init__(self, offsets=None, weights=None, n_workers=None):
 
         # Grab the parameter names and values from the function
         # arguments
@@ -1056,6 +1111,10 @@ class Coadd2DPar(ParSet):
         dtypes['weights'] = [str, list]
         descr['weights'] = 'Mode for the weights used to coadd images.  See coadd2d.py for all options.'
 
+        defaults['n_workers'] = 1
+        dtypes['n_workers'] = int
+        descr['n_workers'] = 'Number of threads used to rebin the images of each slit concurrently.'
+
         # Instantiate the parameter set
         super(Coadd2DPar, self).__init__(list(pars.keys()),
                                                  values=list(pars.values()),
@@ -1067,7 +1126,7 @@ class Coadd2DPar(ParSet):
     @classmethod
     def from_dict(cls, cfg):
         k = numpy.array([*cfg.keys()])
-        parkeys = ['offsets', 'weights']
+        parkeys = ['offsets', 'weights', 'n_workers']
 
         badkeys = numpy.array([pk not in parkeys for pk in k])
         if numpy.any(badkeys):
@@ -1082,7 +1141,8 @@ class Coadd2DPar(ParSet):
         """
         Check the parameters are valid for the provided method.
         """
-        pass
+        if self.data['n_workers'] < 1:
+            raise ValueError('Number of workers must be at least 1.')
 
 
 class CubePar(ParSet):
@@ -1474,7 +1534,7 @@ class TelluricPar(ParSet):
 
     def __init__(self, telgridfile=None, sn_clip=None, resln_guess=None, resln_frac_bounds=None, pix_shift_bounds=None, maxiter=None,
                  sticky=None, lower=None, upper=None, seed=None, tol=None, popsize=None, recombination=None, polish=None,
-                 disp=None):
+                 disp=None, n_workers=None):
 
         # Grab the parameter names and values from the function
         # arguments
@@ -1612,6 +1672,13 @@ class TelluricPar(ParSet):
                         'screen indicating the status of the optimization. See documentation for telluric.Telluric ' \
                         'for a description of the output and how to know if things are working well.'
 
+        defaults['n_workers'] = 1
+        dtypes['n_workers'] = int
+        descr['n_workers'] = 'Number of processes used for the telluric fits. Multiple orders are fit ' \
+                             'concurrently, which gives the same results as a single process. For a ' \
+                             'single order, the population of the differential evolution is evaluated ' \
+                             'by the processes and updated once per generation.'
+
         # Instantiate the parameter set
         super(TelluricPar, self).__init__(list(pars.keys()),
                                           values=list(pars.values()),
@@ -1625,7 +1692,7 @@ class TelluricPar(ParSet):
         k = numpy.array([*cfg.keys()])
         parkeys = ['telgridfile', 'sn_clip', 'resln_guess', 'resln_frac_bounds',
                    'pix_shift_bounds', 'maxiter', 'sticky', 'lower', 'upper', 'seed', 'tol',
-                   'popsize', 'recombination', 'polish', 'disp']
+                   'popsize', 'recombination', 'polish', 'disp', 'n_workers']
 
         badkeys = numpy.array([pk not in parkeys for pk in k])
         if numpy.any(badkeys):
@@ -1640,7 +1707,8 @@ class TelluricPar(ParSet):
         """
         Check the parameters are valid for the provided method.
         """
-        pass
+        if self.data['n_workers'] < 1:
+            raise ValueError('Number of workers must be at least 1.')
         # JFH add something in here which checks that the recombination value provided is bewteen 0 and 1, although
         # scipy.optimize.differential_evoluiton probalby checks this.
 
@@ -1897,7 +1965,9 @@ class ReduxPar(ParSet):
     see :ref:`pypeitpar`.
     """
     def __init__(self, spectrograph=None, detnum=None, sortroot=None, calwin=None, scidir=None,
-                 qadir=None, redux_path=None, ignore_bad_headers=None, slitspatnum=None):
+                 qadir=None, redux_path=None, ignore_bad_headers=None, slitspatnum=None,
+                 n_workers=None, scheduler_workers=None, proc_cache_size=None,
+                 meta_workers=None, meta_cache=None):
 
         # Grab the parameter names and values from the function
         # arguments
@@ -1958,6 +2028,44 @@ class ReduxPar(ParSet):
         descr['redux_path'] = 'Path to folder for performing reductions.  Default is the ' \
                               'current working directory.'
 
+        defaults['n_workers'] = 1
+        dtypes['n_workers'] = int
+        descr['n_workers'] = 'Number of worker processes used to reduce the detectors of an ' \
+                             'exposure in parallel.  The default (1) reduces the detectors ' \
+                             'serially.  Parallel reductions are disabled when showing the ' \
+                             'reduction steps.'
+
+        defaults['scheduler_workers'] = 1
+        dtypes['scheduler_workers'] = int
+        descr['scheduler_workers'] = 'Number of worker processes used to concurrently build the ' \
+                                     'calibrations of each calibration group and detector and ' \
+                                     'reduce the standard and science exposures, following ' \
+                                     'their dependencies.  The default (1) reduces everything ' \
+                                     'serially.  If larger than 1, the detectors of each ' \
+                                     'exposure are reduced serially (n_workers is ignored) and ' \
+                                     'the exposures always reuse the master calibrations built ' \
+                                     'during the run.  Existing output files are skipped unless ' \
+                                     'overwriting.'
+
+        defaults['proc_cache_size'] = 0.
+        dtypes['proc_cache_size'] = [int, float]
+        descr['proc_cache_size'] = 'Maximum size in GB of the on-disk cache of processed raw ' \
+                                   'frames, kept in the ProcCache directory of the reduction ' \
+                                   'path.  The least recently used frames are removed when ' \
+                                   'the limit is exceeded.  If 0, no cache is used.'
+
+        defaults['meta_workers'] = 8
+        dtypes['meta_workers'] = int
+        descr['meta_workers'] = 'Number of threads used to read the headers of the raw files ' \
+                                'when building the metadata table.'
+
+        defaults['meta_cache'] = False
+        dtypes['meta_cache'] = bool
+        descr['meta_cache'] = 'Keep the metadata read from the raw file headers in a hidden ' \
+                              'file in each raw data directory, so that only the headers of ' \
+                              'new or changed files are read when the metadata table is ' \
+                              'built again.  The raw data directories must be writable.'
+
         # Instantiate the parameter set
         super(ReduxPar, self).__init__(list(pars.keys()),
                                         values=list(pars.values()),
@@ -1973,7 +2081,8 @@ class ReduxPar(ParSet):
 
         # Basic keywords
         parkeys = [ 'spectrograph', 'detnum', 'sortroot', 'calwin', 'scidir', 'qadir',
-                    'redux_path', 'ignore_bad_headers', 'slitspatnum']
+                    'redux_path', 'ignore_bad_headers', 'slitspatnum', 'n_workers',
+                    'scheduler_workers', 'proc_cache_size', 'meta_workers', 'meta_cache']
 
         badkeys = numpy.array([pk not in parkeys for pk in k])
         if numpy.any(badkeys):
@@ -1993,7 +2102,11 @@ class ReduxPar(ParSet):
         return defs.pypeit_spectrographs
 
     def validate(self):
-        pass
+        if self.data['n_workers'] < 1 or self.data['scheduler_workers'] < 1 \
+                or self.data['meta_workers'] < 1:
+            raise ValueError('Number of workers must be at least 1.')
+        if self.data['proc_cache_size'] < 0:
+            raise ValueError('Size of the processed image cache cannot be negative.')
 
     
 class WavelengthSolutionPar(ParSet):
@@ -3142,7 +3255,7 @@ class SkySubPar(ParSet):
     """
 
     def __init__(self, bspline_spacing=None, sky_sigrej=None, global_sky_std=None, no_poly=None,
-                 user_regions=None, joint_fit=None, load_mask=None):
+                 user_regions=None, joint_fit=None, load_mask=None, n_workers=None):
         # Grab the parameter names and values from the function
         # arguments
         args, _, _, values = inspect.getargvalues(inspect.currentframe())
@@ -3195,6 +3308,15 @@ class SkySubPar(ParSet):
         dtypes['joint_fit'] = bool
         descr['joint_fit'] = 'Perform a simultaneous joint fit to sky regions using all available slits.'
 
+        defaults['n_workers'] = 1
+        dtypes['n_workers'] = int
+        descr['n_workers'] = 'Number of worker processes used to perform the global and local sky ' \
+                             'subtraction of the slits concurrently.  Each worker is only sent the ' \
+                             'cutout of the images that contains its slit.  The slits are always ' \
+                             'processed serially if the fits are shown.  With ``joint_fit``, this ' \
+                             'is also the number of threads used to fit the relative spectral ' \
+                             'illumination of the slits using the sky.'
+
         # Instantiate the parameter set
         super(SkySubPar, self).__init__(list(pars.keys()),
                                         values=list(pars.values()),
@@ -3209,7 +3331,8 @@ class SkySubPar(ParSet):
         k = numpy.array([*cfg.keys()])
 
         # Basic keywords
-        parkeys = ['bspline_spacing', 'sky_sigrej', 'global_sky_std', 'no_poly', 'user_regions', 'load_mask', 'joint_fit']
+        parkeys = ['bspline_spacing', 'sky_sigrej', 'global_sky_std', 'no_poly', 'user_regions', 'load_mask',
+                   'joint_fit', 'n_workers']
 
         badkeys = numpy.array([pk not in parkeys for pk in k])
         if numpy.any(badkeys):
@@ -3221,7 +3344,8 @@ class SkySubPar(ParSet):
         return cls(**kwargs)
 
     def validate(self):
-        pass
+        if self.data['n_workers'] < 1:
+            raise ValueError('Number of workers must be at least 1.')
 
 
 class ExtractionPar(ParSet):
@@ -8,10 +8,14 @@ import time
 import os
 import numpy as np
 import copy
+from concurrent import futures
 from astropy.io import fits
 from pypeit import msgs
 from pypeit import calibrations
+from pypeit import masterframe
+from pypeit import wavecalib
 from pypeit.images import buildimage
+from pypeit.images import proccache
 from pypeit import ginga
 from pypeit import reduce
 from pypeit import spec2dobj
@@ -19,6 +23,7 @@ from pypeit.core import qa
 from pypeit import specobjs
 from pypeit.spectrographs.util import load_spectrograph
 from pypeit import slittrace
+from pypeit import scheduler
 
 from configobj import ConfigObj
 from pypeit.par.util import parse_pypeit_file
@@ -59,6 +64,10 @@ class PypeIt(object):
             Over-ride reduction path in PypeIt file (e.g. Notebook usage)
         calib_only: (:obj:`bool`, optional):
             Only generate the calibration files that you can
+        proc_cache (:obj:`bool`, optional):
+            Use the on-disk cache of processed raw frames; see
+            :class:`pypeit.images.proccache.ProcImageCache`.  Ignored
+            if the size of the cache in the parameter set is 0.
 
     Attributes:
         pypeit_file (:obj:`str`):
@@ -71,7 +80,7 @@ class PypeIt(object):
 #    __metaclass__ = ABCMeta
 
     def __init__(self, pypeit_file, verbosity=2, overwrite=True, reuse_masters=False, logname=None,
-                 show=False, redux_path=None, calib_only=False):
+                 show=False, redux_path=None, calib_only=False, proc_cache=True):
 
         # Load
         cfg_lines, data_files, frametype, usrdata, setups \
@@ -141,6 +150,11 @@ class PypeIt(object):
         # Set paths
         self.calibrations_path = os.path.join(self.par['rdx']['redux_path'], self.par['calibrations']['master_dir'])
 
+        # Cache of processed raw frames
+        self.proc_cache = proccache.ProcImageCache(self.proc_cache_path,
+                                                   max_size=self.par['rdx']['proc_cache_size']) \
+                                if proc_cache and self.par['rdx']['proc_cache_size'] > 0 else None
+
         # Check for calibrations
         if not self.calib_only:
             calibrations.check_for_calibs(self.par, self.fitstbl,
@@ -192,6 +206,11 @@ class PypeIt(object):
         """Return the path to the science directory."""
         return os.path.join(self.par['rdx']['redux_path'], self.par['rdx']['scidir'])
 
+    @property
+    def proc_cache_path(self):
+        """Return the path to the cache of processed raw frames."""
+        return os.path.join(self.par['rdx']['redux_path'], 'ProcCache')
+
     @property
     def qa_path(self):
         """Return the path to the top-level QA directory."""
@@ -287,7 +306,8 @@ class PypeIt(object):
                 self.caliBrate = calibrations.Calibrations.get_instance(
                     self.fitstbl, self.par['calibrations'], self.spectrograph,
                     self.calibrations_path, qadir=self.qa_path, reuse_masters=self.reuse_masters,
-                    show=self.show, slitspat_num=self.par['rdx']['slitspatnum'])
+                    show=self.show, slitspat_num=self.par['rdx']['slitspatnum'],
+                    proc_cache=self.proc_cache)
                 # Do it
                 self.caliBrate.set_config(grp_frames[0], self.det, self.par['calibrations'])
                 self.caliBrate.run_the_steps()
@@ -307,6 +327,24 @@ class PypeIt(object):
                                          'flexure'])
         self.tstart = time.time()
 
+        try:
+            # Use the task scheduler?
+            if self.par['rdx']['scheduler_workers'] > 1:
+                self.reduce_all_scheduled()
+            else:
+                self.reduce_all_serial()
+        finally:
+            # Release the master frames and wavelength images held in memory
+            masterframe.clear_loaded_masters()
+            wavecalib.clear_waveimg_cache()
+        # Finish
+        self.print_end_time()
+
+    def reduce_all_serial(self):
+        """
+        Reduce all the standard and then all the science exposures, one
+        after the other.
+        """
         # Find the standard frames
         is_standard = self.fitstbl.find_frames('standard')
 
@@ -373,8 +411,100 @@ class PypeIt(object):
 
             msgs.info('Finished calibration group {0}'.format(i))
 
-        # Finish
-        self.print_end_time()
+    def build_scheduler(self):
+        """
+        Construct the graph of tasks needed to reduce all the standard
+        and science exposures.
+
+        The graph has one calibration task per calibration group and
+        detector, one task per standard exposure, which depends on the
+        calibrations of its group, and one task per science exposure,
+        which depends on the calibrations of its group and on the
+        reduction of the standard used for its reduction (see
+        :func:`get_std_outfile`).  The standard and science tasks list
+        their spec2d file as output so that they can be skipped if
+        they already exist.
+
+        Returns:
+            :class:`pypeit.scheduler.TaskScheduler`: The task graph.
+        """
+        # Find the standard and science frames
+        is_standard = self.fitstbl.find_frames('standard')
+        is_science = self.fitstbl.find_frames('science')
+        # Frame indices
+        frame_indx = np.arange(len(self.fitstbl))
+        # Find the detectors to reduce
+        detectors = PypeIt.select_detectors(detnum=self.par['rdx']['detnum'],
+                                            slitspatnum=self.par['rdx']['slitspatnum'],
+                                            ndet=self.spectrograph.ndet)
+
+        # The standard used for all the science frames; see
+        # get_std_outfile
+        std_frame = frame_indx[is_standard][0] if np.any(is_standard) else None
+        std_outfile = None if std_frame is None else self.spec_output_file(std_frame)
+
+        tasks = scheduler.TaskScheduler()
+        for frametype, is_type in zip(['standard', 'science'], [is_standard, is_science]):
+            for i in range(self.fitstbl.n_calib_groups):
+                # Find all the exposures of this type in this calibration group
+                in_grp = self.fitstbl.find_calib_group(i)
+                grp_frames = frame_indx[is_type & in_grp]
+                for comb_id in np.unique(self.fitstbl['comb_id'][grp_frames]):
+                    frames = np.where(self.fitstbl['comb_id'] == comb_id)[0]
+                    name = '{0}_{1}'.format(frametype, comb_id)
+                    if name in tasks:
+                        continue
+                    if frametype == 'standard':
+                        bg_frames = np.where(self.fitstbl['bkg_id'] == comb_id)[0]
+                    else:
+                        bg_frames = np.where((self.fitstbl['comb_id']
+                                                == self.fitstbl['bkg_id'][frames][0])
+                                             & (self.fitstbl['comb_id'] >= 0))[0]
+                    # Calibrations for this group; built using the
+                    # first exposure in the group
+                    depends = []
+                    for det in detectors:
+                        calib_name = 'calib_{0}_det{1}'.format(i, det)
+                        if calib_name not in tasks:
+                            tasks.add(calib_name, _calibrate_task, args=(self, frames, det))
+                        depends += [calib_name]
+                    # Science frames need the standard
+                    _std_outfile = None
+                    if frametype == 'science' and std_outfile is not None:
+                        _std_outfile = std_outfile
+                        std_name = 'standard_{0}'.format(self.fitstbl['comb_id'][std_frame])
+                        if std_name in tasks:
+                            depends += [std_name]
+                    tasks.add(name, _reduce_task, args=(self, frames, bg_frames, _std_outfile),
+                              depends=depends,
+                              outputs=[self.spec_output_file(frames[0], twod=True)])
+        return tasks
+
+    def reduce_all_scheduled(self):
+        """
+        Reduce all the standard and science exposures using the task
+        scheduler.
+
+        Independent calibration groups, detectors, and exposures are
+        processed concurrently using :attr:`par['rdx']['scheduler_workers']`
+        processes.  Unless :attr:`overwrite` is True, exposures with
+        existing output files are skipped, as are the calibrations only
+        needed by those exposures.
+        """
+        # Create the output directories here to avoid a race between
+        # the workers
+        os.makedirs(self.calibrations_path, exist_ok=True)
+        os.makedirs(os.path.join(self.qa_path, 'PNGs'), exist_ok=True)
+        os.makedirs(self.science_path, exist_ok=True)
+
+        if self.par['rdx']['n_workers'] > 1:
+            msgs.warn('Reducing the detectors of each exposure serially when using the task '
+                      'scheduler.')
+        if self.show:
+            msgs.warn('Cannot show the reduction steps when using the task scheduler.')
+
+        tasks = self.build_scheduler()
+        tasks.run(n_workers=self.par['rdx']['scheduler_workers'], resume=not self.overwrite)
 
     # This is a static method to allow for use in coadding script 
     @staticmethod
@@ -470,18 +600,26 @@ class PypeIt(object):
             msgs.warn('Not reducing detectors: {0}'.format(' '.join([ str(d) for d in 
                                 set(np.arange(self.spectrograph.ndet))-set(detectors)])))
 
+        # Reduce the detectors in parallel?
+        n_workers = min(self.par['rdx']['n_workers'], len(detectors))
+        if n_workers > 1 and self.show:
+            msgs.warn('Cannot show the reduction steps when reducing detectors in parallel.  '
+                      'Reducing the detectors serially.')
+            n_workers = 1
+
+        if n_workers > 1:
+            for det, spec2DObj, tmp_sobjs in self._reduce_detectors_parallel(
+                    frames, detectors, bg_frames, std_outfile, n_workers):
+                all_spec2d[det] = spec2DObj
+                if tmp_sobjs.nobj > 0:
+                    all_specobjs.add_sobj(tmp_sobjs)
+            return all_spec2d, all_specobjs
+
         # Loop on Detectors
-        # TODO: Attempt to put in a multiprocessing call here?
         for self.det in detectors:
             msgs.info("Working on detector {0}".format(self.det))
-            # Instantiate Calibrations class
-            self.caliBrate = calibrations.Calibrations.get_instance(
-                self.fitstbl, self.par['calibrations'], self.spectrograph,
-                self.calibrations_path, qadir=self.qa_path, reuse_masters=self.reuse_masters,
-                show=self.show, slitspat_num=self.par['rdx']['slitspatnum'])
-            # These need to be separate to accomodate COADD2D
-            self.caliBrate.set_config(frames[0], self.det, self.par['calibrations'])
-            self.caliBrate.run_the_steps()
+            # Calibrate
+            self.calibrate_one(frames, self.det)
             # Extract
             # TODO: pass back the background frame, pass in background
             # files as an argument. extract one takes a file list as an
@@ -498,6 +636,95 @@ class PypeIt(object):
         # Return
         return all_spec2d, all_specobjs
 
+    def calibrate_one(self, frames, det):
+        """
+        Load or generate the calibrations for a single exposure/detector
+        pair.
+
+        The instantiated :class:`pypeit.calibrations.Calibrations`
+        object is kept internally as :attr:`caliBrate`.
+
+        Args:
+            frames (:obj:`list`):
+                List of frames being reduced.  Only the first is used
+                to set the calibration configuration.
+            det (:obj:`int`):
+                Detector number (1-indexed)
+        """
+        # Instantiate Calibrations class
+        self.caliBrate = calibrations.Calibrations.get_instance(
+            self.fitstbl, self.par['calibrations'], self.spectrograph,
+            self.calibrations_path, qadir=self.qa_path, reuse_masters=self.reuse_masters,
+            show=self.show, slitspat_num=self.par['rdx']['slitspatnum'],
+            proc_cache=self.proc_cache)
+        # These need to be separate to accomodate COADD2D
+        self.caliBrate.set_config(frames[0], det, self.par['calibrations'])
+        self.caliBrate.run_the_steps()
+
+    def _reduce_detectors_parallel(self, frames, detectors, bg_frames, std_outfile, n_workers):
+        """
+        Calibrate and reduce the detectors of a single exposure using a
+        pool of worker processes.
+
+        Each worker executes :func:`calibrate_one` and
+        :func:`reduce_one` for a single detector.  The results are
+        returned in the order of the input detectors so that the output
+        is identical to the serial reduction.  Once complete, the
+        internal state (:attr:`det`, :attr:`caliBrate`,
+        :attr:`basename`, etc.) is set to that of the last detector,
+        as would be the case after the serial loop.
+
+        Args:
+            frames (:obj:`list`):
+                List of frames to extract; stacked if more than one
+                is provided
+            detectors (:obj:`list`):
+                Detector numbers (1-indexed) to reduce.
+            bg_frames (:obj:`list`):
+                List of frames to use as the background. Can be
+                empty.
+            std_outfile (:obj:`str`):
+                Filename for the standard star spec1d file.
+            n_workers (:obj:`int`):
+                Number of worker processes.
+
+        Returns:
+            :obj:`list`: One tuple per detector with the detector
+            number, the :class:`pypeit.spec2dobj.Spec2DObj`, and the
+            :class:`pypeit.specobjs.SpecObjs` object with the spectra
+            extracted from that detector.
+        """
+        msgs.info('Reducing {0} detectors using {1} processes'.format(len(detectors), n_workers))
+        # Create the output directories here to avoid a race between
+        # the workers
+        os.makedirs(self.calibrations_path, exist_ok=True)
+        os.makedirs(os.path.join(self.qa_path, 'PNGs'), exist_ok=True)
+
+        # Do not ship the objects from any previous reduction to the
+        # workers
+        worker = copy.copy(self)
+        worker.caliBrate = None
+        worker.redux = None
+
+        with futures.ProcessPoolExecutor(max_workers=n_workers) as executor:
+            # Only the calibrations of the last detector are kept, as
+            # in the serial loop
+            jobs = [executor.submit(_reduce_detector, worker, frames, det, bg_frames, std_outfile,
+                                    return_calib=det == detectors[-1])
+                    for det in detectors]
+            # Collect in detector order
+            results = [job.result() for job in jobs]
+
+        # Reset the internals to match the result of the serial loop
+        self.det = detectors[-1]
+        self.caliBrate = results[-1][2]
+        self.caliBrate.proc_cache = self.proc_cache
+        self.objtype, self.setup, self.obstime, self.basename, self.binning \
+                = self.get_sci_metadata(frames[0], self.det)
+        self.std_redux = 'standard' in self.objtype
+
+        return [(det, spec2DObj, sobjs) for det, (spec2DObj, sobjs, _) in zip(detectors, results)]
+
     def get_sci_metadata(self, frame, det):
         """
         Grab the meta data for a given science frame and specific detector
@@ -620,7 +847,7 @@ class PypeIt(object):
             dark=self.caliBrate.msdark,
             flatimages=self.caliBrate.flatimages,
             slits=self.caliBrate.slits,  # For flexure correction
-            ignore_saturation=False)
+            ignore_saturation=False, proc_cache=self.proc_cache)
 
         # Background Image?
         if len(bg_frames) > 0:
@@ -631,7 +858,7 @@ class PypeIt(object):
                 bpm=self.caliBrate.msbpm, bias=self.caliBrate.msbias,
                 flatimages=self.caliBrate.flatimages,
                 slits=self.caliBrate.slits,  # For flexure correction
-                ignore_saturation=False), frame_par['process'])
+                ignore_saturation=False, proc_cache=self.proc_cache), frame_par['process'])
 
         # Instantiate Reduce object
         # Required for pypeline specific object
@@ -781,3 +1008,94 @@ class PypeIt(object):
         return '<{:s}: pypeit_file={}>'.format(self.__class__.__name__, self.pypeit_file)
 
 
+def _reduce_detector(pypeIt, frames, det, bg_frames, std_outfile, return_calib=False):
+    """
+    Calibrate and reduce a single exposure/detector pair.
+
+    This is the function executed by each worker process in
+    :func:`PypeIt._reduce_detectors_parallel`; it must be defined at
+    the module level so that it can be pickled.
+
+    Args:
+        pypeIt (:class:`PypeIt`):
+            The object performing the reduction.  This is the worker's
+            copy; the parent object is not altered.
+        frames (:obj:`list`):
+            List of frames to extract; stacked if more than one is
+            provided
+        det (:obj:`int`):
+            Detector number (1-indexed)
+        bg_frames (:obj:`list`):
+            List of frames to use as the background. Can be empty.
+        std_outfile (:obj:`str`):
+            Filename for the standard star spec1d file.
+        return_calib (:obj:`bool`, optional):
+            Return the calibrations used for the reduction.
+
+    Returns:
+        tuple: The :class:`pypeit.spec2dobj.Spec2DObj` and
+        :class:`pypeit.specobjs.SpecObjs` objects from
+        :func:`PypeIt.reduce_one` and the
+        :class:`pypeit.calibrations.Calibrations` object used for the
+        reduction; the latter is None unless ``return_calib`` is True.
+    """
+    msgs.info("Working on detector {0}".format(det))
+    pypeIt.det = det
+    pypeIt.calibrate_one(frames, det)
+    spec2DObj, sobjs = pypeIt.reduce_one(frames, det, bg_frames, std_outfile=std_outfile)
+    # Do not send the process cache back to the parent
+    pypeIt.caliBrate.proc_cache = None
+    return spec2DObj, sobjs, (pypeIt.caliBrate if return_calib else None)
+
+
+def _calibrate_task(pypeIt, frames, det):
+    """
+    Build the calibrations for a calibration group and detector.
+
+    Task executed by the scheduler constructed by
+    :func:`PypeIt.build_scheduler`; it must be defined at the module
+    level so that it can be pickled.
+
+    Args:
+        pypeIt (:class:`PypeIt`):
+            The object performing the reduction.
+        frames (:obj:`list`):
+            Frames of an exposure in the calibration group.
+        det (:obj:`int`):
+            Detector number (1-indexed)
+    """
+    pypeIt = copy.copy(pypeIt)
+    pypeIt.show = False
+    pypeIt.det = det
+    pypeIt.calibrate_one(frames, det)
+
+
+def _reduce_task(pypeIt, frames, bg_frames, std_outfile):
+    """
+    Reduce and save a single exposure.
+
+    Task executed by the scheduler constructed by
+    :func:`PypeIt.build_scheduler`; it must be defined at the module
+    level so that it can be pickled.  The calibrations are expected to
+    have been built by :func:`_calibrate_task`, so they are always
+    loaded from the master files.
+
+    Args:
+        pypeIt (:class:`PypeIt`):
+            The object performing the reduction.
+        frames (:obj:`list`):
+            Frames to extract; stacked if more than one is provided
+        bg_frames (:obj:`list`):
+            List of frames to use as the background. Can be empty.
+        std_outfile (:obj:`str`):
+            Filename for the standard star spec1d file.
+    """
+    pypeIt = copy.copy(pypeIt)
+    pypeIt.par = copy.deepcopy(pypeIt.par)
+    pypeIt.par['rdx']['n_workers'] = 1
+    pypeIt.reuse_masters = True
+    pypeIt.show = False
+    if std_outfile is not None and not os.path.isfile(std_outfile):
+        msgs.error('Could not find standard file: {0}'.format(std_outfile))
+    spec2d, sobjs = pypeIt.reduce_exposure(frames, bg_frames=bg_frames, std_outfile=std_outfile)
+    pypeIt.save_exposure(frames[0], spec2d, sobjs, pypeIt.basename)
@@ -7,9 +7,12 @@ Main driver class for skysubtraction and extraction
 
 import os
 import inspect
+import functools
 import numpy as np
 import os
 
+from concurrent import futures
+
 from astropy import stats
 from astropy.io import fits
 from abc import ABCMeta
@@ -196,6 +199,11 @@ class Reduce(object):
         # Slitmask
         self.slitmask = self.slits.slit_img(initial=initial, flexure=self.spat_flexure_shift,
                                            exclude_flag=self.slits.bitmask.exclude_for_reducing)
+        # Index of the pixels in each slit, used instead of comparing
+        # the full slitmask to each slit ID
+        self.slit_index = self.slits.slit_pixel_index(initial=initial, flexure=self.spat_flexure_shift,
+                                                      exclude_flag=self.slits.bitmask.exclude_for_reducing,
+                                                      slitid_img=self.slitmask)
         # Now add the slitmask to the mask (i.e. post CR rejection in proc)
         # NOTE: this uses the par defined by EdgeTraceSet; this will
         # use the tweaked traces if they exist
@@ -262,15 +270,18 @@ class Reduce(object):
             for iobj in range(self.sobjs.nobj):
                 sobj = self.sobjs[iobj]
                 plate_scale = self.get_platescale(sobj)
+                slit_idx = self.slits.spatid_to_zero(sobj.SLITID)
+                cutout = self.slit_index.cutout(sobj.SLITID, self.slits_left[:,slit_idx],
+                                                self.slits_right[:,slit_idx],
+                                                sciimg=self.sciImg.image, ivar=self.sciImg.ivar,
+                                                waveimg=self.waveimg, skyimg=global_sky,
+                                                rn2_img=self.sciImg.rn2img)
                 # True  = Good, False = Bad for inmask
-                thismask = self.slitmask == sobj.SLITID  # pixels for this slit
-                inmask = (self.sciImg.fullmask == 0) & thismask
+                cutout.images['mask'] = (cutout.cut(self.sciImg.fullmask) == 0) & cutout.thismask
                 # Do it
-                extract.extract_boxcar(self.sciImg.image, self.sciImg.ivar,
-                                               inmask, self.waveimg,
-                                               global_sky, self.sciImg.rn2img,
-                                               self.par['reduce']['extraction']['boxcar_radius']/plate_scale,
-                                               sobj)
+                extract.extract_boxcar_cutout(cutout,
+                                              self.par['reduce']['extraction']['boxcar_radius']/plate_scale,
+                                              sobj)
             # Fill up extra bits and pieces
             self.objmodel = np.zeros_like(self.sciImg.image)
             self.ivarmodel = np.copy(self.sciImg.ivar)
@@ -344,8 +355,13 @@ class Reduce(object):
 
         # Wavelengths (on unmasked slits)
         msgs.info("Generating wavelength image")
+        # Reuse the image for exposures with the same calibrations
+        master_keys = self.caliBrate.master_key_dict
+        cache_key = (master_keys['tilt'], master_keys['arc'], self.caliBrate.master_dir) \
+                        if 'tilt' in master_keys and 'arc' in master_keys else None
         self.waveimg = wavecalib.build_waveimg(self.spectrograph, self.tilts, self.slits,
-                                               self.wv_calib, spat_flexure=self.spat_flexure_shift)
+                                               self.wv_calib, spat_flexure=self.spat_flexure_shift,
+                                               cache_key=cache_key)
 
         # First pass object finding
         self.sobjs_obj, self.nobj, skymask_init = \
@@ -527,28 +543,12 @@ class Reduce(object):
         skymask_now = skymask if (skymask is not None) else np.ones_like(self.sciImg.image, dtype=bool)
 
         # Loop on slits
-        for slit_idx in gdslits:
-            slit_spat = self.slits.spat_id[slit_idx]
-            msgs.info("Global sky subtraction for slit: {:d}".format(slit_idx))
-            thismask = self.slitmask == slit_spat
-            inmask = (self.sciImg.fullmask == 0) & thismask & skymask_now
-            # Find sky
-            self.global_sky[thismask] \
-                    = skysub.global_skysub(self.sciImg.image, self.sciImg.ivar, self.tilts,
-                                           thismask, self.slits_left[:,slit_idx],
-                                           self.slits_right[:,slit_idx],
-                                           inmask=inmask, sigrej=sigrej,
-                                           bsp=self.par['reduce']['skysub']['bspline_spacing'],
-                                           no_poly=self.par['reduce']['skysub']['no_poly'],
-                                           pos_mask=(not self.ir_redux), show_fit=show_fit)
-            # Mask if something went wrong
-            if np.sum(self.global_sky[thismask]) == 0.:
-                self.reduce_bpm[slit_idx] = True
+        self.global_skysub_slits(gdslits, skymask_now, sigrej, show_fit=show_fit)
 
         if update_crmask:
             # Find CRs with sky subtraction
             self.sciImg.build_crmask(self.par['scienceframe']['process'],
-                                     subtract_img=self.global_sky)
+                                     subtract_img=self.global_sky, slitmask=self.slitmask)
             # Update the fullmask
             self.sciImg.update_mask_cr(self.sciImg.crmask)
 
@@ -563,6 +563,112 @@ class Reduce(object):
         # Return
         return self.global_sky
 
+    def global_skysub_slits(self, gdslits, skymask, sigrej, show_fit=False):
+        """
+        Fit the global sky of each slit independently.
+
+        Each slit is fit using only the cutout of the images that
+        contains it; see :class:`pypeit.slittrace.SlitCutout`.  The
+        sky model of each slit is inserted into :attr:`global_sky`,
+        and slits for which the fit fails are flagged in
+        :attr:`reduce_bpm`.  If ``par['reduce']['skysub']['n_workers']``
+        is larger than 1, the slits are fit concurrently by a pool of
+        worker processes.
+
+        Args:
+            gdslits (`numpy.ndarray`_):
+                Indices of the slits to fit.
+            skymask (`numpy.ndarray`_):
+                Boolean image selecting the sky pixels (True = sky).
+            sigrej (:obj:`float`):
+                Sigma rejection threshold.
+            show_fit (:obj:`bool`, optional):
+                Show the fit to each slit.  The slits are always fit
+                serially if True.
+        """
+        fit = functools.partial(skysub.global_skysub_cutout, sigrej=sigrej,
+                                bsp=self.par['reduce']['skysub']['bspline_spacing'],
+                                no_poly=self.par['reduce']['skysub']['no_poly'],
+                                pos_mask=(not self.ir_redux), show_fit=show_fit)
+
+        def cutouts():
+            for slit_idx in gdslits:
+                msgs.info("Global sky subtraction for slit: {:d}".format(slit_idx))
+                cutout = self.slit_index.cutout(self.slits.spat_id[slit_idx],
+                                                self.slits_left[:,slit_idx],
+                                                self.slits_right[:,slit_idx],
+                                                image=self.sciImg.image, ivar=self.sciImg.ivar,
+                                                tilts=self.tilts)
+                cutout.images['inmask'] = (cutout.cut(self.sciImg.fullmask) == 0) \
+                                            & cutout.thismask & cutout.cut(skymask)
+                yield cutout
+
+        n_workers = self.skysub_workers(len(gdslits), show=show_fit)
+        if n_workers > 1:
+            msgs.info('Global sky subtraction for {0} slits using {1} '
+                      'processes'.format(len(gdslits), n_workers))
+        for slit_idx, (cutout, sky) in zip(gdslits, self.process_slits(fit, cutouts(), n_workers)):
+            cutout.insert(self.global_sky, sky)
+            # Mask if something went wrong
+            if np.sum(sky) == 0.:
+                self.reduce_bpm[slit_idx] = True
+
+    def skysub_workers(self, nslits, show=False):
+        """
+        Return the number of worker processes to use for the sky
+        subtraction of the slits.
+
+        Args:
+            nslits (:obj:`int`):
+                Number of slits to process.
+            show (:obj:`bool`, optional):
+                The fits will be shown, which requires the slits to
+                be processed serially.
+
+        Returns:
+            :obj:`int`: The number of worker processes; 1 means the
+            slits are processed serially.
+        """
+        n_workers = min(self.par['reduce']['skysub']['n_workers'], nslits)
+        if n_workers > 1 and show:
+            msgs.warn('Cannot show the sky-subtraction fits when processing the slits in parallel.  '
+                      'Processing the slits serially.')
+            n_workers = 1
+        return max(n_workers, 1)
+
+    @staticmethod
+    def process_slits(func, cutouts, n_workers, *args):
+        """
+        Apply a function to the cutouts of a set of slits.
+
+        Args:
+            func (callable):
+                Function to apply.  Called as ``func(cutout, *args)``,
+                where ``args`` are the items of the additional
+                iterables provided for each cutout.  Must be picklable
+                if ``n_workers > 1``.
+            cutouts (iterable):
+                The :class:`pypeit.slittrace.SlitCutout` objects to
+                process.
+            n_workers (:obj:`int`):
+                Number of worker processes.  If 1, the slits are
+                processed serially.
+            *args (iterable):
+                Additional arguments of ``func``, one item per cutout.
+
+        Returns:
+            generator: Yields the cutout and the result of ``func``
+            for each slit, in order.
+        """
+        if n_workers == 1:
+            for _args in zip(cutouts, *args):
+                yield _args[0], func(*_args)
+            return
+        with futures.ProcessPoolExecutor(max_workers=n_workers) as executor:
+            jobs = [(_args[0], executor.submit(func, *_args)) for _args in zip(cutouts, *args)]
+            for cutout, job in jobs:
+                yield cutout, job.result()
+
     def local_skysub_extract(self, global_sky, sobjs,
                              model_noise=True, spat_pix=None,
                              show_profile=False, show_resids=False, show=False):
@@ -867,8 +973,9 @@ class MultiSlitReduce(Reduce):
             slit_spat = self.slits.spat_id[slit_idx]
             qa_title ="Finding objects on slit # {:d}".format(slit_spat)
             msgs.info(qa_title)
-            thismask = self.slitmask == slit_spat
-            inmask = (self.sciImg.fullmask == 0) & thismask
+            cutout = self.slit_index.cutout(slit_spat, self.slits_left[:,slit_idx],
+                                            self.slits_right[:,slit_idx], image=image)
+            cutout.images['inmask'] = (cutout.cut(self.sciImg.fullmask) == 0) & cutout.thismask
             # Find objects
             specobj_dict = {'SLITID': slit_spat,
                             'DET': self.det, 'OBJTYPE': self.objtype,
@@ -878,11 +985,8 @@ class MultiSlitReduce(Reduce):
             # done through objfind where all the relevant information
             # is. This will be a png file(s) per slit.
 
-            sobjs_slit, skymask[thismask] = \
-                    extract.objfind(image, thismask,
-                                self.slits_left[:,slit_idx],
-                                self.slits_right[:,slit_idx],
-                                inmask=inmask, ir_redux=self.ir_redux,
+            sobjs_slit, skymask_slit = \
+                    extract.objfind_cutout(cutout, ir_redux=self.ir_redux,
                                 ncoeff=self.par['reduce']['findobj']['trace_npoly'],
                                 std_trace=std_trace,
                                 sig_thresh=self.par['reduce']['findobj']['sig_thresh'],
@@ -896,6 +1000,7 @@ class MultiSlitReduce(Reduce):
                                 maxdev=self.par['reduce']['findobj']['find_maxdev'],
                                 qa_title=qa_title, nperslit=self.par['reduce']['findobj']['maxnumber'],
                                 debug_all=debug)
+            cutout.insert(skymask, skymask_slit)
             sobjs.add_sobj(sobjs_slit)
 
         # Steps
@@ -950,31 +1055,53 @@ class MultiSlitReduce(Reduce):
         # Could actually create a model anyway here, but probably
         # overkill since nothing is extracted
         self.sobjs = sobjs.copy()  # WHY DO WE CREATE A COPY HERE?
-        # Loop on slits
-        for slit_idx in gdslits:
-            slit_spat = self.slits.spat_id[slit_idx]
-            msgs.info("Local sky subtraction and extraction for slit: {:d}".format(slit_spat))
-            thisobj = self.sobjs.SLITID == slit_spat    # indices of objects for this slit
-            if np.any(thisobj):
-                thismask = self.slitmask == slit_spat   # pixels for this slit
+        kwargs = dict(model_full_slit=self.par['reduce']['extraction']['model_full_slit'],
+                      box_rad=self.par['reduce']['extraction']['boxcar_radius']/self.get_platescale(None),
+                      sigrej=self.par['reduce']['skysub']['sky_sigrej'],
+                      model_noise=model_noise, std=self.std_redux,
+                      bsp=self.par['reduce']['skysub']['bspline_spacing'],
+                      sn_gauss=self.par['reduce']['extraction']['sn_gauss'],
+                      use_2dmodel_mask=self.par['reduce']['extraction']['use_2dmodel_mask'])
+
+        skysub_extract = functools.partial(skysub.local_skysub_extract_cutout,
+                                           show_profile=show_profile, **kwargs)
+
+        # Only process the slits with objects
+        gdslits = [slit_idx for slit_idx in gdslits
+                        if np.any(self.sobjs.SLITID == self.slits.spat_id[slit_idx])]
+
+        def cutouts():
+            for slit_idx in gdslits:
+                slit_spat = self.slits.spat_id[slit_idx]
+                msgs.info("Local sky subtraction and extraction for slit: {:d}".format(slit_spat))
+                cutout = self.slit_index.cutout(slit_spat, self.slits_left[:,slit_idx],
+                                                self.slits_right[:,slit_idx],
+                                                sciimg=self.sciImg.image, sciivar=self.sciImg.ivar,
+                                                tilts=self.tilts, waveimg=self.waveimg,
+                                                global_sky=self.global_sky,
+                                                rn2_img=self.sciImg.rn2img, spat_pix=spat_pix)
                 # True  = Good, False = Bad for inmask
-                ingpm = (self.sciImg.fullmask == 0) & thismask
-                # Local sky subtraction and extraction
-                self.skymodel[thismask], self.objmodel[thismask], self.ivarmodel[thismask], \
-                    self.extractmask[thismask] = skysub.local_skysub_extract(
-                    self.sciImg.image, self.sciImg.ivar, self.tilts, self.waveimg,
-                    self.global_sky, self.sciImg.rn2img,
-                    thismask, self.slits_left[:,slit_idx], self.slits_right[:, slit_idx],
-                    self.sobjs[thisobj], ingpm,
-                    spat_pix=spat_pix,
-                    model_full_slit=self.par['reduce']['extraction']['model_full_slit'],
-                    box_rad=self.par['reduce']['extraction']['boxcar_radius']/self.get_platescale(None),
-                    sigrej=self.par['reduce']['skysub']['sky_sigrej'],
-                    model_noise=model_noise, std=self.std_redux,
-                    bsp=self.par['reduce']['skysub']['bspline_spacing'],
-                    sn_gauss=self.par['reduce']['extraction']['sn_gauss'],
-                    show_profile=show_profile,
-                    use_2dmodel_mask=self.par['reduce']['extraction']['use_2dmodel_mask'])
+                cutout.images['ingpm'] = (cutout.cut(self.sciImg.fullmask) == 0) & cutout.thismask
+                yield cutout
+
+        # Objects for each slit
+        slit_sobjs = [self.sobjs[self.sobjs.SLITID == self.slits.spat_id[slit_idx]]
+                        for slit_idx in gdslits]
+
+        n_workers = self.skysub_workers(len(gdslits), show=show_profile)
+        if n_workers > 1:
+            msgs.info('Local sky subtraction and extraction for {0} slits using {1} '
+                      'processes'.format(len(gdslits), n_workers))
+        for slit_idx, (cutout, result) \
+                in zip(gdslits, self.process_slits(skysub_extract, cutouts(), n_workers,
+                                                       slit_sobjs)):
+            for img, values in zip([self.skymodel, self.objmodel, self.ivarmodel,
+                                    self.extractmask], result[:4]):
+                cutout.insert(img, values)
+            # Replace the objects with those extracted, which are
+            # copies if the slit was processed by a worker process
+            self.sobjs.specobjs[self.sobjs.SLITID == self.slits.spat_id[slit_idx]] \
+                    = result[4].specobjs
 
         # Set the bit for pixels which were masked by the extraction.
         # For extractmask, True = Good, False = Bad
@@ -1150,7 +1277,8 @@ class EchelleReduce(Reduce):
                                                   model_full_slit=model_full_slit,
                                                   model_noise=model_noise,
                                                   show_profile=show_profile,
-                                                  show_resids=show_resids, show_fwhm=show_fwhm)
+                                                  show_resids=show_resids, show_fwhm=show_fwhm,
+                                                  slit_index=self.slit_index)
 
         # Step
         self.steps.append(inspect.stack()[0][3])
@@ -1249,28 +1377,32 @@ class IFUReduce(MultiSlitReduce, Reduce):
             slitid_img_trim = self.slits.slit_img(pad=-trim, initial=True)
             scaleImg = np.ones_like(self.sciImg.image)
             rel_skyillum = self.sciImg.image/self.global_sky
-            # loop through all slits and calculate the relative illumination in all slits
+            # Collect the data of all slits to calculate the relative illumination
+            xfit, yfit, inmsk = [], [], []
             for slit_idx, spatid in enumerate(self.slits.spat_id):
-                msgs.info("Generating model relative response image for slit {0:d} using sky".format(slit_idx))
                 # Only use the overlapping regions of the slits, where the same wavelength range is covered
                 onslit = (slitid_img_trim == spatid)
-                onslit_init = (slitid_img_init == spatid)
                 onslit_gpm = (onslit & inmask)
                 # Fit a low order polynomial
-                xfit = tilt_wave[onslit_gpm]
-                yfit = rel_skyillum[onslit_gpm]
-                srtd = np.argsort(xfit)
+                srtd = np.argsort(tilt_wave[onslit_gpm])
+                xfit += [tilt_wave[onslit_gpm][srtd]]
+                yfit += [rel_skyillum[onslit_gpm][srtd]]
                 # Rough outlier rejection
-                inmsk = (yfit > 1 / 5) & (yfit < 5)
-                slit_bspl, _, _, _, exit_status \
-                    = utils.bspline_profile(xfit[srtd], yfit[srtd], np.ones_like(xfit), np.ones_like(xfit),
-                                            nord=4, upper=3, lower=3, ingpm=inmsk[srtd],
-                                            kwargs_bspline={'bkspace': bkspace},
-                                            kwargs_reject={'groupbadpix': True, 'maxrej': 5})
+                inmsk += [(yfit[-1] > 1 / 5) & (yfit[-1] < 5)]
+            msgs.info("Generating model relative response image for {0:d} slits "
+                      "using sky".format(len(xfit)))
+            fits = utils.bspline_profile_batch(xfit, yfit, [np.ones_like(x) for x in xfit],
+                                               ingpm=inmsk,
+                                               n_workers=self.par['reduce']['skysub']['n_workers'],
+                                               nord=4, upper=3, lower=3,
+                                               kwargs_bspline={'bkspace': bkspace},
+                                               kwargs_reject={'groupbadpix': True, 'maxrej': 5})
+            for slit_idx, (slit_bspl, _, _, _, exit_status) in enumerate(fits):
                 # TODO :: Perhaps mask a slit if it fails...
                 if exit_status > 1:
                     msgs.warn("b-spline fit of relative scale failed for slit {0:d}".format(slit_idx))
                 else:
+                    onslit_init = (slitid_img_init == self.slits.spat_id[slit_idx])
                     scaleImg[onslit_init] = slit_bspl.value(tilt_wave[onslit_init])[0]
 
             # Correct the relative illumination of the science frame
@@ -1292,28 +1424,12 @@ class IFUReduce(MultiSlitReduce, Reduce):
                                        pos_mask=(not self.ir_redux), show_fit=show_fit)
         else:
             # Loop on slits
-            for slit_idx in gdslits:
-                slit_spat = self.slits.spat_id[slit_idx]
-                msgs.info("Global sky subtraction for slit: {:d}".format(slit_idx))
-                thismask = self.slitmask == slit_spat
-                inmask = (self.sciImg.fullmask == 0) & thismask & skymask_now
-                # Find sky
-                self.global_sky[thismask] \
-                        = skysub.global_skysub(self.sciImg.image, self.sciImg.ivar, self.tilts,
-                                               thismask, self.slits_left[:,slit_idx],
-                                               self.slits_right[:,slit_idx],
-                                               inmask=inmask, sigrej=sigrej,
-                                               bsp=self.par['reduce']['skysub']['bspline_spacing'],
-                                               no_poly=self.par['reduce']['skysub']['no_poly'],
-                                               pos_mask=(not self.ir_redux), show_fit=show_fit)
-                # Mask if something went wrong
-                if np.sum(self.global_sky[thismask]) == 0.:
-                    self.reduce_bpm[slit_idx] = True
+            self.global_skysub_slits(gdslits, skymask_now, sigrej, show_fit=show_fit)
 
         if update_crmask:
             # Find CRs with sky subtraction
             self.sciImg.build_crmask(self.par['scienceframe']['process'],
-                                     subtract_img=self.global_sky)
+                                     subtract_img=self.global_sky, slitmask=self.slitmask)
             # Update the fullmask
             self.sciImg.update_mask_cr(self.sciImg.crmask)
 
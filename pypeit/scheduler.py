@@ -0,0 +1,205 @@
+"""
+Implements a simple dependency-aware task scheduler used to run
+independent pieces of a reduction concurrently.
+
+.. include common links, assuming primary doc root is up one directory
+.. include:: ../links.rst
+"""
+import os
+
+from collections import OrderedDict
+from concurrent import futures
+
+from IPython import embed
+
+from pypeit import msgs
+
+
+class Task(object):
+    """
+    A single node in a :class:`TaskScheduler` graph.
+
+    Args:
+        name (:obj:`str`):
+            Unique name for the task.
+        func (callable):
+            Function to execute.  To be run by a worker process, this
+            must be a module-level function and all of its arguments
+            must be picklable.
+        args (:obj:`tuple`, optional):
+            Positional arguments passed to ``func``.
+        kwargs (:obj:`dict`, optional):
+            Keyword arguments passed to ``func``.
+        depends (:obj:`list`, optional):
+            Names of the tasks that must be complete before this one
+            can be executed.
+        outputs (:obj:`list`, optional):
+            Files written by the task.  Used to skip the task when
+            resuming a previous run.
+    """
+    def __init__(self, name, func, args=None, kwargs=None, depends=None, outputs=None):
+        self.name = name
+        self.func = func
+        self.args = () if args is None else tuple(args)
+        self.kwargs = {} if kwargs is None else dict(kwargs)
+        self.depends = [] if depends is None else list(depends)
+        self.outputs = [] if outputs is None else list(outputs)
+
+    def outputs_exist(self):
+        """
+        Check if all the output files of the task exist.
+
+        Returns:
+            :obj:`bool`: True if the task defines output files and they
+            all exist.
+        """
+        return len(self.outputs) > 0 and all([os.path.isfile(f) for f in self.outputs])
+
+    def __call__(self):
+        return self.func(*self.args, **self.kwargs)
+
+    def __repr__(self):
+        return '<{0}: name={1}, depends={2}>'.format(self.__class__.__name__, self.name,
+                                                     self.depends)
+
+
+class TaskScheduler(object):
+    """
+    Execute a directed acyclic graph of tasks, running independent
+    tasks concurrently in a pool of worker processes.
+
+    Tasks are submitted in the order they were added whenever all of
+    their dependencies are complete; with a single worker the tasks are
+    executed serially in that order.
+
+    When resuming, any task whose output files all exist is skipped.
+    Tasks that do not write any output files (e.g., calibration tasks
+    whose products are consumed by other tasks) are skipped if all the
+    tasks that depend on them are skipped.
+    """
+    def __init__(self):
+        self.tasks = OrderedDict()
+
+    def __contains__(self, name):
+        return name in self.tasks
+
+    def __len__(self):
+        return len(self.tasks)
+
+    def add(self, name, func, args=None, kwargs=None, depends=None, outputs=None):
+        """
+        Add a task to the graph.
+
+        See :class:`Task` for the argument descriptions.
+        """
+        if name in self.tasks:
+            msgs.error('Task {0} already exists!'.format(name))
+        self.tasks[name] = Task(name, func, args=args, kwargs=kwargs, depends=depends,
+                                outputs=outputs)
+
+    def order(self):
+        """
+        Return the task names in an order consistent with their
+        dependencies.
+
+        Among tasks that are ready at the same time, the order in which
+        they were added is preserved.
+
+        Returns:
+            :obj:`list`: The ordered list of task names.
+        """
+        for task in self.tasks.values():
+            missing = [d for d in task.depends if d not in self.tasks]
+            if len(missing) > 0:
+                msgs.error('Task {0} depends on undefined task(s): {1}'.format(
+                           task.name, ', '.join(missing)))
+        order = []
+        done = set()
+        while len(order) < len(self.tasks):
+            ready = [name for name, task in self.tasks.items()
+                        if name not in done and all([d in done for d in task.depends])]
+            if len(ready) == 0:
+                msgs.error('Circular dependency between tasks: {0}'.format(
+                           ', '.join([n for n in self.tasks.keys() if n not in done])))
+            order += ready
+            done.update(ready)
+        return order
+
+    def skipped(self):
+        """
+        Find the tasks that do not need to be executed when resuming a
+        previous run.
+
+        Returns:
+            :obj:`set`: The names of the tasks to skip.
+        """
+        order = self.order()
+        dependents = dict([(name, []) for name in order])
+        for task in self.tasks.values():
+            for d in task.depends:
+                dependents[d] += [task.name]
+        skip = set()
+        # Work backwards so that all dependents are considered first
+        for name in order[::-1]:
+            task = self.tasks[name]
+            if len(task.outputs) > 0:
+                if task.outputs_exist():
+                    skip.add(name)
+            elif len(dependents[name]) > 0 and all([d in skip for d in dependents[name]]):
+                skip.add(name)
+        return skip
+
+    def run(self, n_workers=1, resume=False):
+        """
+        Execute the tasks.
+
+        Args:
+            n_workers (:obj:`int`, optional):
+                Number of worker processes.  If 1, the tasks are run
+                serially in the current process.
+            resume (:obj:`bool`, optional):
+                Skip the tasks that have already been completed; see
+                :func:`skipped`.
+
+        Returns:
+            :obj:`dict`: The value returned by each executed task,
+            keyed by the task name.  Skipped tasks are not included.
+        """
+        order = self.order()
+        skip = self.skipped() if resume else set()
+        for name in order:
+            if name in skip:
+                msgs.info('Skipping completed task: {0}'.format(name))
+        todo = [name for name in order if name not in skip]
+
+        results = {}
+        if n_workers == 1:
+            for name in todo:
+                msgs.info('Running task: {0}'.format(name))
+                results[name] = self.tasks[name]()
+            return results
+
+        done = set(skip)
+        running = {}
+        with futures.ProcessPoolExecutor(max_workers=n_workers) as executor:
+            while len(todo) > 0 or len(running) > 0:
+                # Submit all the tasks that are ready
+                for name in [n for n in todo if all([d in done for d in self.tasks[n].depends])]:
+                    msgs.info('Submitting task: {0}'.format(name))
+                    task = self.tasks[name]
+                    running[executor.submit(task.func, *task.args, **task.kwargs)] = name
+                    todo.remove(name)
+                # Wait for at least one to finish
+                finished, _ = futures.wait(running, return_when=futures.FIRST_COMPLETED)
+                for future in finished:
+                    name = running.pop(future)
+                    try:
+                        results[name] = future.result()
+                    except Exception:
+                        for f in running:
+                            f.cancel()
+                        msgs.warn('Task {0} failed!'.format(name))
+                        raise
+                    msgs.info('Finished task: {0}'.format(name))
+                    done.add(name)
+        return results
@@ -42,6 +42,9 @@ def parser(options=None):
     group.add_argument('-d', '--detector', default=None, help='Detector to limit reductions on.  If the output files exist and -o is used, the outputs for the input detector will be replaced.')
     parser.add_argument('-c', '--calib_only', default=False, action='store_true',
                          help='Only run on calibrations')
+    parser.add_argument('--no_proc_cache', default=False, action='store_true',
+                        help='Do not use or update the on-disk cache of processed raw frames, '
+                             'even if rdx.proc_cache_size is set')
 
 #    parser.add_argument('-q', '--quick', default=False, help='Quick reduction',
 #                        action='store_true')
@@ -81,7 +84,8 @@ def main(args):
                            overwrite=args.overwrite,
                            redux_path=args.redux_path,
                            calib_only=args.calib_only,
-                           logname=logname, show=args.show)
+                           logname=logname, show=args.show,
+                           proc_cache=not args.no_proc_cache)
 
     # JFH I don't see why this is an optional argument here. We could allow the user to modify an infinite number of parameters
     # from the command line? Why do we have the PypeIt file then? This detector can be set in the pypeit file.
@@ -5,6 +5,8 @@ Implements the objects used to hold slit edge data.
 .. include:: ../links.rst
 """
 import inspect
+import hashlib
+from collections import OrderedDict
 
 from IPython import embed
 
@@ -47,6 +49,237 @@ class SlitTraceBitMask(BitMask):
 
 
 
+class SlitPixelIndex:
+    """
+    Index of the pixels in each slit of a slit ID image.
+
+    The index provides the pixels of a single slit without comparing
+    the full slit ID image to the slit ID, such that looping over the
+    slits scales with the slit area instead of the image area.
+
+    Args:
+        slitid_img (`numpy.ndarray`_):
+            Image identifying the slit associated with each pixel;
+            see :func:`SlitTraceSet.slit_img`. Pixels not associated
+            with any slit must be negative.
+
+    Attributes:
+        shape (:obj:`tuple`):
+            Shape of the slit ID image.
+        spat_id (`numpy.ndarray`_):
+            Sorted IDs of the slits in the image.
+    """
+    def __init__(self, slitid_img):
+        self.shape = slitid_img.shape
+        flat = slitid_img.ravel()
+        indx = np.where(flat >= 0)[0]
+        # A stable sort keeps the pixels of each slit in row-major order
+        srt = np.argsort(flat[indx], kind='stable')
+        self.spat_id, start = np.unique(flat[indx[srt]], return_index=True)
+        self._indices = dict(zip(self.spat_id, np.split(indx[srt], start[1:])))
+        self._boxes = {}
+
+    def __contains__(self, spat_id):
+        return spat_id in self._indices
+
+    def indices(self, spat_id):
+        """
+        Return the flattened indices of the pixels in a slit.
+
+        The indices are in row-major order, such that, e.g.,
+        ``img.flat[index.indices(spat_id)]`` is identical to
+        ``img[slitid_img == spat_id]``.
+
+        Args:
+            spat_id (:obj:`int`):
+                Slit ID.
+
+        Returns:
+            `numpy.ndarray`_: The flattened pixel indices; empty if
+            the slit is not in the image.
+        """
+        return self._indices.get(spat_id, np.empty(0, dtype=int))
+
+    def mask(self, spat_id):
+        """
+        Return the boolean image selecting the pixels in a slit.
+
+        Args:
+            spat_id (:obj:`int`):
+                Slit ID.
+
+        Returns:
+            `numpy.ndarray`_: Boolean image that is True for the
+            pixels in the slit.
+        """
+        thismask = np.zeros(self.shape, dtype=bool)
+        thismask.flat[self.indices(spat_id)] = True
+        return thismask
+
+    def bbox(self, spat_id):
+        """
+        Return the bounding box of a slit.
+
+        Args:
+            spat_id (:obj:`int`):
+                Slit ID.
+
+        Returns:
+            :obj:`tuple`: The spectral and spatial slices that select
+            the smallest box containing all pixels of the slit; None
+            if the slit is not in the image.
+        """
+        if spat_id not in self._indices:
+            return None
+        if spat_id not in self._boxes:
+            indx = self._indices[spat_id]
+            spat = indx % self.shape[1]
+            self._boxes[spat_id] = (slice(indx[0] // self.shape[1], indx[-1] // self.shape[1] + 1),
+                                    slice(np.amin(spat), np.amax(spat) + 1))
+        return self._boxes[spat_id]
+
+    def cutout(self, spat_id, left, right, **images):
+        """
+        Construct the cutout of a set of images containing a slit.
+
+        Args:
+            spat_id (:obj:`int`):
+                Slit ID.
+            left (`numpy.ndarray`_):
+                Left edge of the slit in detector pixels.
+            right (`numpy.ndarray`_):
+                Right edge of the slit in detector pixels.
+            **images:
+                Detector images to include in the cutout; see
+                :class:`SlitCutout`.
+
+        Returns:
+            :class:`SlitCutout`: The cutout of the images.
+        """
+        return SlitCutout(self.indices(spat_id), self.shape, left, right, **images)
+
+
+class SlitCutout:
+    """
+    Cutout of a set of detector images containing a single slit.
+
+    The cutout includes all spectral rows and the spatial columns
+    spanned by the slit.  The per-slit sky-subtraction and extraction
+    algorithms only use the pixels in the slit, such that they can
+    operate on the cutout instead of the full detector images; see,
+    e.g., :func:`pypeit.core.skysub.global_skysub_cutout`.  The cutout
+    images are views of the detector images, such that constructing
+    the cutout does not copy any data, whereas pickling the cutout
+    (e.g., to send it to a worker process) only copies the data in the
+    cutout.
+
+    Args:
+        indices (`numpy.ndarray`_):
+            Flattened indices of the slit pixels in the detector
+            images, in row-major order; see
+            :func:`SlitPixelIndex.indices`.
+        shape (:obj:`tuple`):
+            Shape of the detector images.
+        left (`numpy.ndarray`_):
+            Left edge of the slit in detector pixels.
+        right (`numpy.ndarray`_):
+            Right edge of the slit in detector pixels.
+        **images:
+            Detector images to include in the cutout, keyed by name.
+            Images that are None are kept as None.
+
+    Attributes:
+        indices (`numpy.ndarray`_):
+            Flattened indices of the slit pixels in the detector
+            images.  The pixels selected by :attr:`thismask` are in
+            the same order.
+        spat (:obj:`slice`):
+            Spatial columns of the detector in the cutout; all columns
+            if the slit has no pixels.
+        thismask (`numpy.ndarray`_):
+            Boolean cutout that selects the slit pixels.
+        left (`numpy.ndarray`_):
+            Left edge of the slit in cutout pixels.
+        right (`numpy.ndarray`_):
+            Right edge of the slit in cutout pixels.
+        images (:obj:`dict`):
+            The cutout images.
+    """
+    def __init__(self, indices, shape, left, right, **images):
+        self.indices = indices
+        spat = indices % shape[1]
+        self.spat = slice(0, shape[1]) if indices.size == 0 \
+                        else slice(np.amin(spat), np.amax(spat) + 1)
+        self.thismask = np.zeros((shape[0], self.spat.stop - self.spat.start), dtype=bool)
+        self.thismask[indices // shape[1], spat - self.spat.start] = True
+        self.left = self.to_cutout(left)
+        self.right = self.to_cutout(right)
+        self.images = dict([(key, self.cut(img)) for key, img in images.items()])
+
+    def __getitem__(self, key):
+        return self.images[key]
+
+    @property
+    def offset(self):
+        """The detector column of the first column in the cutout."""
+        return self.spat.start
+
+    def cut(self, img):
+        """
+        Return the view of a detector image in the cutout.
+
+        Args:
+            img (`numpy.ndarray`_):
+                Detector image.  Can be None.
+
+        Returns:
+            `numpy.ndarray`_: The view of the image in the cutout; None
+            if the image is None.
+        """
+        return None if img is None else img[:,self.spat]
+
+    def to_cutout(self, spat):
+        """
+        Convert spatial positions on the detector to the cutout.
+
+        Args:
+            spat (:obj:`float`, `numpy.ndarray`_):
+                Spatial positions in detector pixels.
+
+        Returns:
+            :obj:`float`, `numpy.ndarray`_: Spatial positions in
+            cutout pixels.
+        """
+        return spat - self.offset
+
+    def to_detector(self, spat):
+        """
+        Convert spatial positions in the cutout to the detector.
+
+        Args:
+            spat (:obj:`float`, `numpy.ndarray`_):
+                Spatial positions in cutout pixels.
+
+        Returns:
+            :obj:`float`, `numpy.ndarray`_: Spatial positions in
+            detector pixels.
+        """
+        return spat + self.offset
+
+    def insert(self, img, values):
+        """
+        Insert values for the slit pixels into a detector image.
+
+        Args:
+            img (`numpy.ndarray`_):
+                Detector image; modified in place.
+            values (`numpy.ndarray`_):
+                Values for the slit pixels, ordered as the pixels
+                selected by :attr:`thismask`.
+        """
+        img.flat[self.indices] = values
+
+
 class SlitTraceSet(datamodel.DataContainer):
     """
     Defines a generic class for holding and manipulating image traces
@@ -228,6 +461,10 @@ class SlitTraceSet(datamodel.DataContainer):
     def _init_internals(self):
         self.left_flexure = None
         self.right_flexure = None
+        # Cached slit pixel spans and pixel indices; see slit_img and
+        # slit_pixel_index
+        self._slit_spans = None
+        self._pixel_index = None
         # Master stuff
         self.master_key = None
         self.master_dir = None
@@ -381,6 +618,11 @@ class SlitTraceSet(datamodel.DataContainer):
         This value can be overridden using the method keyword
         argument.
 
+        The pixel spans of each slit in each spectral row are held by
+        the object, such that calls with the same arguments only fill
+        a new image; the spans are found again if the slit edges,
+        mask, spectral limits, or IDs change.
+
         .. warning::
 
             - The function does not check that pixels end up in
@@ -430,10 +672,6 @@ class SlitTraceSet(datamodel.DataContainer):
         if len(_pad) != 2:
             msgs.error('Padding for both left and right edges should be provided as a 2-tuple!')
 
-        # Pixel coordinates
-        spat = np.arange(self.nspat)
-        spec = np.arange(self.nspec)
-
         left, right, _ = self.select_edges(initial=initial, flexure=flexure)
 
         # Choose the slits to use
@@ -445,21 +683,161 @@ class SlitTraceSet(datamodel.DataContainer):
                 bpm &= np.invert(self.bitmask.flagged(self.mask, flag=exclude_flag))
             slitidx = np.where(np.invert(bpm))[0]
 
-        # TODO: When specific slits are chosen, need to check that the
-        # padding doesn't lead to slit overlap.
+        # Reuse the pixel spans if they were already found for the
+        # same slits
+        _exclude = None if not exclude_flag else tuple(np.atleast_1d(exclude_flag))
+        key = (_pad, tuple(slitidx), initial, flexure if flexure else None, _exclude, use_spatial,
+               self.edges_fingerprint(initial=initial))
+        if self._slit_spans is None:
+            self._slit_spans = OrderedDict()
+        if key in self._slit_spans:
+            self._slit_spans.move_to_end(key)
+            spans = self._slit_spans[key]
+        else:
+            spans = self._find_slit_spans(left, right, slitidx, _pad, use_spatial)
+            self._slit_spans[key] = spans
+            # Only keep a few sets of spans
+            while len(self._slit_spans) > 4:
+                self._slit_spans.popitem(last=False)
 
-        # Find the pixels in each slit, limited by the minimum and
-        # maximum spectral position.
+        # Write the spans of each slit into the flattened image
         slitid_img = np.full((self.nspec,self.nspat), -1, dtype=int)
-        for i in slitidx:
-            slit_id = self.spat_id[i] if use_spatial else i
-            indx = (spat[None,:] > left[:,i,None] - _pad[0]) \
-                        & (spat[None,:] < right[:,i,None] + _pad[1]) \
-                        & (spec > self.specmin[i])[:,None] & (spec < self.specmax[i])[:,None]
-            slitid_img[indx] = slit_id
+        for slit_id, start, npix in spans:
+            slitid_img.flat[np.repeat(start - np.cumsum(npix) + npix, npix)
+                            + np.arange(np.sum(npix))] = slit_id
         # Return
         return slitid_img
 
+    def _find_slit_spans(self, left, right, slitidx, pad, use_spatial):
+        """
+        Find the pixels in each slit for :func:`slit_img`.
+
+        The pixels are limited by the minimum and maximum spectral
+        position of each slit. In each spectral row, the slit covers
+        the pixels with left-pad < spat < right+pad.
+
+        Args:
+            left (`numpy.ndarray`_):
+                Left slit edges.
+            right (`numpy.ndarray`_):
+                Right slit edges.
+            slitidx (`numpy.ndarray`_):
+                Indices of the slits to include.
+            pad (:obj:`tuple`):
+                Padding of the left and right edges.
+            use_spatial (:obj:`bool`):
+                Identify the slits by :attr:`spat_id` instead of their
+                index.
+
+        Returns:
+            :obj:`list`: One tuple per slit with the value used for
+            its pixels, the index of its first pixel in each row of
+            the flattened image, and the number of its pixels in each
+            row.  Rows without any slit pixels are not included.
+        """
+        # TODO: When specific slits are chosen, need to check that the
+        # padding doesn't lead to slit overlap.
+        spec = np.arange(self.nspec)
+        spans = []
+        for i in slitidx:
+            rows = np.where((spec > self.specmin[i]) & (spec < self.specmax[i]))[0]
+            with np.errstate(invalid='ignore'):
+                first = np.floor(left[rows,i] - pad[0]) + 1
+                last = np.ceil(right[rows,i] + pad[1]) - 1
+            good = np.isfinite(first) & np.isfinite(last)
+            _first = np.zeros(rows.size, dtype=int)
+            _last = np.full(rows.size, -1, dtype=int)
+            _first[good] = np.clip(first[good], 0, self.nspat)
+            _last[good] = np.clip(last[good], -1, self.nspat-1)
+            npix = np.clip(_last - _first + 1, 0, None)
+            indx = npix > 0
+            spans += [(self.spat_id[i] if use_spatial else i,
+                       rows[indx]*self.nspat + _first[indx], npix[indx].astype(np.int32))]
+        return spans
+
+    def edges_fingerprint(self, initial=False):
+        """
+        Return a hash of the slit edges selected by
+        :func:`select_edges`, the slit mask, the spectral limits, and
+        the slit IDs.
+
+        The hash is used to detect changes to the slits, e.g., to
+        decide if images built from them can be reused.
+
+        Args:
+            initial (:obj:`bool`, optional):
+                Use the initial definition of the slits. If False,
+                tweaked slits are used, if available.
+
+        Returns:
+            :obj:`str`: Hexadecimal digest of the hash.
+        """
+        left, right = (self.left_tweak, self.right_tweak) \
+                        if self.left_tweak is not None and self.right_tweak is not None \
+                           and not initial else (self.left_init, self.right_init)
+        h = hashlib.sha1()
+        for arr in [left, right, self.mask, self.specmin, self.specmax, self.spat_id]:
+            h.update(np.ascontiguousarray(arr).tobytes())
+        return h.hexdigest()
+
+    def slit_pixel_index(self, pad=None, initial=False, flexure=None, exclude_flag=None,
+                         slitid_img=None):
+        """
+        Return the index of the pixels in each slit.
+
+        The index is built from the slit ID image produced by
+        :func:`slit_img` with the same arguments, and it is held by
+        the object so that later calls with the same arguments reuse
+        it. The index is rebuilt if the slit edges or the slit mask
+        change.
+
+        Args:
+            pad (:obj:`float`, :obj:`int`, :obj:`tuple`, optional):
+                Padding of the slit edges; see :func:`slit_img`.
+            initial (:obj:`bool`, optional):
+                Use the initial edges; see :func:`slit_img`.
+            flexure (:obj:`float`, optional):
+                Spatial flexure shift; see :func:`slit_img`.
+            exclude_flag (:obj:`str`, optional):
+                Bitmask flag to ignore when masking; see
+                :func:`slit_img`.
+            slitid_img (`numpy.ndarray`_, optional):
+                Slit ID image already built by :func:`slit_img` with
+                the same arguments. This is a convenience parameter
+                that avoids building the image again if the index
+                has to be (re)built.
+
+        Returns:
+            :class:`SlitPixelIndex`: The index of the slit pixels.
+        """
+        _pad = self.pad if pad is None else pad
+        _exclude = None if exclude_flag is None else tuple(np.atleast_1d(exclude_flag))
+        key = (_pad, initial, flexure if flexure else None, _exclude,
+               self.edges_fingerprint(initial=initial))
+        if self._pixel_index is None:
+            self._pixel_index = OrderedDict()
+        if key in self._pixel_index:
+            self._pixel_index.move_to_end(key)
+            return self._pixel_index[key]
+
+        if slitid_img is None:
+            slitid_img = self.slit_img(pad=pad, initial=initial, flexure=flexure,
+                                       exclude_flag=exclude_flag)
+        index = SlitPixelIndex(slitid_img)
+        self._pixel_index[key] = index
+        # Only keep a few indices; they are as large as the image
+        while len(self._pixel_index) > 4:
+            self._pixel_index.popitem(last=False)
+        return index
+
+    def clear_cache(self):
+        """
+        Release the slit pixel spans and pixel indices held by the
+        object; see :func:`slit_img` and :func:`slit_pixel_index`.
+        """
+        self._slit_spans = None
+        self._pixel_index = None
+
     def spatial_coordinate_image(self, slitidx=None, full=False, slitid_img=None,
                                  pad=None, initial=False, flexure_shift=None):
         r"""
@@ -533,16 +911,20 @@ class SlitTraceSet(datamodel.DataContainer):
             # TODO: Shouldn't this fault?
             msgs.warn('Slits {0} have negative (or 0) slit width!'.format(bad_slits))
 
-        # Output image
-        coo_img = np.zeros((self.nspec,self.nspat), dtype=float)
         spat = np.arange(self.nspat)
+        if full:
+            i = _slitidx[0]
+            return (spat[None,:] - left[:,i,None])/slitwidth[:,i,None]
+
+        # Output image; the coordinates are only computed for the
+        # pixels in each slit
+        coo_img = np.zeros((self.nspec,self.nspat), dtype=float)
+        index = SlitPixelIndex(slitid_img) if len(_slitidx) > 1 else None
         for i in _slitidx:
-            coo = (spat[None,:] - left[:,i,None])/slitwidth[:,i,None]
-            if not full:
-                indx = slitid_img == self.spat_id[i]
-                coo_img[indx] = coo[indx]
-            else:
-                coo_img = coo
+            pix = np.flatnonzero(slitid_img == self.spat_id[i]) if index is None \
+                    else index.indices(self.spat_id[i])
+            spec_pix, spat_pix = np.divmod(pix, self.nspat)
+            coo_img.flat[pix] = (spat[spat_pix] - left[spec_pix,i])/slitwidth[spec_pix,i]
         return coo_img
 
     def spatial_coordinates(self, initial=False, flexure=None):
@@ -470,6 +470,10 @@ class SpecObjs(object):
 
         First attempts to grab data from the Summary table, then the list
         """
+        # The object is not yet initialised, e.g., while it is being
+        # unpickled
+        if 'specobjs' not in self.__dict__:
+            raise AttributeError(k)
         if len(self.specobjs) == 0:
             raise ValueError("Empty specobjs")
         try:
@@ -8,8 +8,9 @@ from IPython import embed
 import numpy as np
 
 from pypeit import bspline
-from pypeit.tests.tstutils import bspline_ext_required, data_path
-from pypeit.utils import bspline_profile
+from pypeit.core import basis
+from pypeit.tests.tstutils import bspline_ext_required, benchmark_required, data_path
+from pypeit.utils import bspline_profile, bspline_profile_batch
 
 @bspline_ext_required
 def test_model_versions():
@@ -74,6 +75,40 @@ def test_solution_array_versions():
     assert np.allclose(b, _b), 'Differences in beta'
 
 
+@bspline_ext_required
+def test_update_solution_array_versions():
+    # Import only when the test is performed
+    from pypeit.bspline.utilpy import update_solution_arrays as update_py
+    from pypeit.bspline.utilc import solution_arrays as sol_c
+
+    # NOTE: The workspace only updates the arrays for the same input
+    # objects, so the data must be loaded only once
+    d = dict(np.load(data_path('solution_arrays.npz')))
+    ivar = d['ivar'].copy()
+    ivar[::7] = 0.
+
+    # Updating the arrays should match constructing them from scratch
+    a, b = sol_c(d['nn'], d['npoly'], d['nord'], d['ydata'], d['action'], ivar,
+                 d['upper'], d['lower'])
+    workspace = bspline.BsplineWorkspace(max_update=1.)
+    workspace.solution_arrays(d['nn'], d['npoly'], d['nord'], d['ydata'], d['action'], d['ivar'],
+                              d['upper'], d['lower'])
+    _a = workspace.alpha.copy()
+    _b = workspace.beta.copy()
+    pts = np.flatnonzero(ivar != d['ivar'])
+    intv = workspace.interval[pts]
+    indx = intv > -1
+    update_py(d['npoly'], d['nord'], d['ydata'], d['action'], pts[indx], intv[indx],
+              (ivar - d['ivar'])[pts[indx]], _a, _b)
+    assert np.allclose(a, _a), 'Differences in python alpha'
+    assert np.allclose(b, _b), 'Differences in python beta'
+
+    _a, _b = workspace.solution_arrays(d['nn'], d['npoly'], d['nord'], d['ydata'], d['action'],
+                                       ivar, d['upper'], d['lower'])
+    assert workspace.nupdate > 0, 'Arrays should have been updated'
+    assert np.allclose(a, _a), 'Differences in alpha'
+    assert np.allclose(b, _b), 'Differences in beta'
+
 @bspline_ext_required
 def test_cholesky_band_versions():
     # Import only when the test is performed
@@ -239,3 +274,142 @@ def test_profile_twod():
                                   kwargs_reject={'groupbadpix': True, 'maxrej': 10}, quiet=True)
         assert np.allclose(d['twod_flat_fit'], twod_flat_fit), 'Bad 2D bspline result'
 
+
+def fake_sky_fit(nspec=2048, nspat=60, seed=1):
+    # Tilted sky spectrum of a slit with cosmic rays, sorted as in
+    # skysub.global_skysub
+    rng = np.random.default_rng(seed)
+    spat = np.arange(nspat) / (nspat - 1)
+    pix = (np.arange(nspec)[:,None] + 3.*(spat[None,:] - 0.5)).ravel()
+    ximg = np.tile(spat, nspec)
+    sky = 100. + 20.*np.sin(pix/40.) + np.sum([500.*np.exp(-0.5*((pix - c)/1.5)**2)
+                                                for c in rng.uniform(0, nspec, 40)], axis=0)
+    sky *= 1 + 0.05*ximg
+    ivar = 1/sky
+    sky += rng.normal(size=sky.size)/np.sqrt(ivar)
+    sky[rng.choice(sky.size, size=sky.size//200, replace=False)] += 1000.
+    srt = np.argsort(pix)
+    return pix[srt], sky[srt], ivar[srt], basis.flegendre(2.0*ximg[srt] - 1.0, 3)
+
+
+def test_profile_workspace():
+    # Updating the normal equations between rejection iterations should
+    # give the same result as rebuilding them
+    pix, sky, ivar, poly_basis = fake_sky_fit(nspec=300, nspat=40)
+    fits = [bspline_profile(pix, sky, ivar, poly_basis, nord=4, upper=3., lower=3., quiet=True,
+                            kwargs_bspline={'bkspace': 0.6},
+                            kwargs_reject={'groupbadpix': True, 'maxrej': 10},
+                            workspace=bspline.BsplineWorkspace(max_update=max_update))
+                for max_update in [0., 0.25]]
+    assert np.array_equal(fits[0][1], fits[1][1]), 'Different rejected pixels'
+    assert np.allclose(fits[0][2], fits[1][2], rtol=1e-8, atol=0), 'Different fits'
+
+
+@benchmark_required
+def test_profile_workspace_benchmark():
+    pix, sky, ivar, poly_basis = fake_sky_fit()
+    times = []
+    fits = []
+    for max_update in [0., 0.25]:
+        t = time.perf_counter()
+        fits += [bspline_profile(pix, sky, ivar, poly_basis, nord=4, upper=3., lower=3.,
+                                 quiet=True, kwargs_bspline={'bkspace': 0.6},
+                                 kwargs_reject={'groupbadpix': True, 'maxrej': 10},
+                                 workspace=bspline.BsplineWorkspace(max_update=max_update))]
+        times += [time.perf_counter() - t]
+    print('\nGlobal sky fit of {0} pixels with {1} rejected: rebuilt {2:.2f}s; '
+          'updated {3:.2f}s'.format(pix.size, np.sum(np.invert(fits[1][1])), *times))
+    assert np.array_equal(fits[0][1], fits[1][1]), 'Different rejected pixels'
+    assert np.allclose(fits[0][2], fits[1][2], rtol=1e-8, atol=0), 'Different fits'
+
+
+@bspline_ext_required
+def test_threads():
+    from pypeit.bspline.utilc import solution_arrays, bspline_model
+
+    d = np.load(data_path('solution_arrays.npz'))
+    m = np.load(data_path('bspline_model.npz'))
+    nthreads = bspline.get_num_threads()
+    try:
+        bspline.set_num_threads(1)
+        a, b = solution_arrays(d['nn'], d['npoly'], d['nord'], d['ydata'], d['action'],
+                               d['ivar'], d['upper'], d['lower'])
+        mod = bspline_model(m['x'], m['action'], m['lower'], m['upper'], m['coeff'], m['n'],
+                            m['nord'], m['npoly'])
+        bspline.set_num_threads(4)
+        _a, _b = solution_arrays(d['nn'], d['npoly'], d['nord'], d['ydata'], d['action'],
+                                 d['ivar'], d['upper'], d['lower'])
+        _mod = bspline_model(m['x'], m['action'], m['lower'], m['upper'], m['coeff'], m['n'],
+                             m['nord'], m['npoly'])
+    finally:
+        bspline.set_num_threads(nthreads)
+    assert np.allclose(a, _a, rtol=1e-12, atol=0), 'Differences in threaded alpha'
+    assert np.allclose(b, _b, rtol=1e-12, atol=0), 'Differences in threaded beta'
+    assert np.array_equal(mod, _mod), 'Threaded model should be identical'
+
+
+@benchmark_required
+@bspline_ext_required
+def test_threads_benchmark():
+    pix, sky, ivar, poly_basis = fake_sky_fit(nspec=4096, nspat=100)
+    nthreads = bspline.get_num_threads()
+    times = {}
+    fits = {}
+    try:
+        for n in [1, 4]:
+            bspline.set_num_threads(n)
+            t = time.perf_counter()
+            fits[n] = bspline_profile(pix, sky, ivar, poly_basis, nord=4, upper=3., lower=3.,
+                                      quiet=True, kwargs_bspline={'bkspace': 0.6},
+                                      kwargs_reject={'groupbadpix': True, 'maxrej': 10})
+            times[n] = time.perf_counter() - t
+    finally:
+        bspline.set_num_threads(nthreads)
+    print('\nGlobal sky fit of {0} pixels: 1 thread {1:.2f}s; 4 threads {2:.2f}s '
+          '(speedup {3:.1f}x)'.format(pix.size, times[1], times[4], times[1]/times[4]))
+    assert np.allclose(fits[1][2], fits[4][2], rtol=1e-8, atol=0), 'Different fits'
+
+
+def test_profile_batch():
+    # The batched fits should be the same as the individual fits,
+    # regardless of the number of threads
+    data = [fake_sky_fit(nspec=200, nspat=20, seed=seed) for seed in range(4)]
+    kwargs = dict(nord=4, upper=3., lower=3., quiet=True, kwargs_bspline={'bkspace': 0.6},
+                  kwargs_reject={'groupbadpix': True, 'maxrej': 10})
+    fits = [bspline_profile(*d, **kwargs) for d in data]
+    for n_workers in [1, 3]:
+        _fits = bspline_profile_batch(*[list(a) for a in zip(*data)], n_workers=n_workers,
+                                      **kwargs)
+        assert len(_fits) == len(fits), 'Wrong number of fits'
+        for fit, _fit in zip(fits, _fits):
+            assert np.array_equal(fit[0].coeff, _fit[0].coeff), 'Different coefficients'
+            assert np.array_equal(fit[1], _fit[1]), 'Different rejected pixels'
+            assert fit[4] == _fit[4], 'Different exit status'
+
+    # Default profiles are 1D fits
+    _fits = bspline_profile_batch([d[0] for d in data], [d[1] for d in data],
+                                  [d[2] for d in data], **kwargs)
+    fit = bspline_profile(*data[0][:3], np.ones_like(data[0][0]), **kwargs)
+    assert np.array_equal(fit[2], _fits[0][2]), 'Bad 1D fit'
+
+
+@benchmark_required
+@pytest.mark.skipif(os.cpu_count() < 2, reason='requires multiple cores')
+def test_profile_batch_benchmark():
+    # Sky fits of a set of slits, serially and with one thread per core
+    data = [fake_sky_fit(seed=seed) for seed in range(16)]
+    kwargs = dict(nord=4, upper=3., lower=3., quiet=True, kwargs_bspline={'bkspace': 0.6},
+                  kwargs_reject={'groupbadpix': True, 'maxrej': 10})
+    args = [list(a) for a in zip(*data)]
+    n_workers = min(os.cpu_count(), 4)
+    t = time.perf_counter()
+    fits = bspline_profile_batch(*args, **kwargs)
+    t_serial = time.perf_counter() - t
+    t = time.perf_counter()
+    _fits = bspline_profile_batch(*args, n_workers=n_workers, **kwargs)
+    t_threads = time.perf_counter() - t
+    print('\nFitting {0} slits: serial {1:.2f}s; {2} threads {3:.2f}s'.format(
+          len(data), t_serial, n_workers, t_threads))
+    for fit, _fit in zip(fits, _fits):
+        assert np.array_equal(fit[0].coeff, _fit[0].coeff), 'Different coefficients'
+    assert t_threads < t_serial/1.2, 'Fitting in threads should be faster'
@@ -46,3 +46,24 @@ def test_combine(deimos_flat_files):
     assert deimos_flat.image.shape == (4096,2048)
 
 
+
+
+def test_combine_memory():
+    kast_files = [os.path.join(os.path.dirname(__file__), 'files', f)
+                    for f in ['b1.fits.gz', 'b27.fits.gz', 'b1.fits.gz']]
+    par = pypeitpar.FrameGroupPar('pixelflat')
+    par['process']['use_biasimage'] = False
+    par['process']['use_pixelflat'] = False
+    par['process']['use_illumflat'] = False
+    image = buildimage.buildimage_fromlist(kast_blue, 1, par, kast_files, sigma_clip=True)
+    # Use a memory limit that forces the stack to be combined in blocks
+    par['process']['combine_memory'] = 0.001
+    block_image = buildimage.buildimage_fromlist(kast_blue, 1, par, kast_files,
+                                                 sigma_clip=True)
+    # The scratch stacks are single precision
+    assert np.allclose(image.image, block_image.image, rtol=1e-6, atol=0), \
+            'Combined images should be the same'
+    assert np.allclose(image.ivar, block_image.ivar, rtol=1e-6, atol=0), \
+            'Combined ivar should be the same'
+    assert np.array_equal(image.fullmask, block_image.fullmask), \
+            'Combined masks should be identical'
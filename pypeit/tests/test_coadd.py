@@ -2,9 +2,11 @@
 Module to run tests on arcoadd
 """
 import os
+import time
 
 import pytest
 import numpy as np
+import scipy
 
 from astropy import units
 from linetools.spectra.utils import collate
@@ -14,6 +16,7 @@ from pypeit.core import coadd
 from pypeit.spectrographs.util import load_spectrograph
 from pypeit import msgs
 from pypeit import utils
+from pypeit.tests.tstutils import benchmark_required
 from IPython import embed
 
 kast_blue = load_spectrograph('shane_kast_blue')
@@ -339,3 +342,218 @@ def test_sigma_clip():
 
 
 '''
+
+
+def histogram_stack(wave_grid, waves, fluxes, ivars, masks, weights):
+    # Stack computed with np.histogram
+    gpm = masks & (weights > 0.0) & (waves > 1.0) & (ivars > 0.0) & (utils.inverse(ivars) < 1e10)
+    wave, flux, ivar, weight = waves[gpm], fluxes[gpm], ivars[gpm], weights[gpm]
+    nused = np.histogram(wave, bins=wave_grid)[0]
+    weights_total = np.histogram(wave, bins=wave_grid, weights=weight)[0]
+    wave_stack = np.histogram(wave, bins=wave_grid, weights=wave*weight)[0]
+    flux_stack = np.histogram(wave, bins=wave_grid, weights=flux*weight)[0]
+    var_stack = np.histogram(wave, bins=wave_grid, weights=utils.inverse(ivar)*weight**2)[0]
+    return nused, weights_total, wave_stack, flux_stack, var_stack
+
+
+def test_wave_grid_index():
+    wave_grid = np.array([1., 2., 4., 5.])
+    waves = np.array([0.5, 1., 1.5, 2., 3.9, 4., 5., 5.5])
+    assert np.array_equal(coadd.wave_grid_index(wave_grid, waves), [-1, 0, 0, 1, 1, 2, 2, -1]), \
+            'Bins should match np.histogram'
+    assert np.array_equal(np.bincount(coadd.wave_grid_index(wave_grid, waves)[1:-1], minlength=3),
+                          np.histogram(waves, bins=wave_grid)[0]), 'Bad counts'
+
+
+def test_compute_stack():
+    rng = np.random.default_rng(21)
+    nspec, nexp = 2000, 4
+    waves = 4000. + np.arange(nspec)[:,None]*1.3 + rng.uniform(-2, 2, nexp)[None,:]
+    waves[:10,0] = 0.
+    fluxes = rng.normal(1., 0.1, (nspec,nexp))
+    ivars = np.full((nspec,nexp), 100.)
+    masks = rng.random((nspec,nexp)) > 0.05
+    weights = rng.uniform(0.5, 2., (nspec,nexp))
+    wave_grid = coadd.get_wave_grid(waves, masks=masks, wave_method='linear', wave_grid_min=4200.,
+                                    wave_grid_max=6000.)[0]
+
+    nused, weights_total, wave_total, flux_total, var_total \
+            = histogram_stack(wave_grid, waves, fluxes, ivars, masks, weights)
+    gpm = weights_total > 1e-8
+    wave_stack, flux_stack, ivar_stack, mask_stack, _nused \
+            = coadd.compute_stack(wave_grid, waves, fluxes, ivars, masks, weights)
+    assert np.array_equal(_nused, nused), 'Bad counts'
+    assert np.array_equal(mask_stack, gpm & (nused > 0)), 'Bad mask'
+    assert np.allclose(wave_stack[gpm], wave_total[gpm]/weights_total[gpm], rtol=1e-12), \
+            'Bad wavelengths'
+    assert np.allclose(flux_stack[gpm], flux_total[gpm]/weights_total[gpm], rtol=1e-12), \
+            'Bad fluxes'
+    assert np.allclose(ivar_stack[gpm], weights_total[gpm]**2/var_total[gpm], rtol=1e-12), \
+            'Bad inverse variances'
+
+    # Reusing the bin index gives the same stack
+    wave_index = coadd.wave_grid_index(wave_grid, waves)
+    _masks = masks & (rng.random((nspec,nexp)) > 0.1)
+    for _stack, stack in zip(coadd.compute_stack(wave_grid, waves, fluxes, ivars, _masks, weights,
+                                                 wave_index=wave_index),
+                             coadd.compute_stack(wave_grid, waves, fluxes, ivars, _masks, weights)):
+        assert np.array_equal(_stack, stack), 'Reused index should give the same stack'
+
+
+def histogram_rebin2d(spec_bins, spat_bins, waveimg_stack, spatimg_stack, thismask_stack,
+                      inmask_stack, sci_list, var_list):
+    # Rebinned images computed with np.histogram2d
+    sci_list_out, var_list_out, norm_list, nsmp_list = [[] for s in sci_list], \
+                                                       [[] for v in var_list], [], []
+    for img in range(waveimg_stack.shape[0]):
+        thismask = thismask_stack[img]
+        nsmp_list += [np.histogram2d(waveimg_stack[img][thismask], spatimg_stack[img][thismask],
+                                     bins=[spec_bins, spat_bins])[0]]
+        finmask = thismask & inmask_stack[img]
+        spec, spat = waveimg_stack[img][finmask], spatimg_stack[img][finmask]
+        norm = np.histogram2d(spec, spat, bins=[spec_bins, spat_bins])[0]
+        norm_list += [norm]
+        for out, sci in zip(sci_list_out, sci_list):
+            w = np.histogram2d(spec, spat, bins=[spec_bins, spat_bins], weights=sci[img][finmask])[0]
+            out += [(norm > 0.0) * w/(norm + (norm == 0.0))]
+        for out, var in zip(var_list_out, var_list):
+            w = np.histogram2d(spec, spat, bins=[spec_bins, spat_bins], weights=var[img][finmask])[0]
+            out += [(norm > 0.0) * w/(norm + (norm == 0.0))**2]
+    return [np.array(s) for s in sci_list_out], [np.array(v) for v in var_list_out], \
+                np.array(norm_list).astype(int), np.array(nsmp_list).astype(int)
+
+
+def test_rebin2d():
+    rng = np.random.default_rng(22)
+    nimgs, nspec, nspat = 3, 150, 40
+    spat_img = np.tile(np.arange(nspat, dtype=float), (nspec,1))
+    spatimg_stack = np.array([spat_img - 20. + rng.uniform(-3, 3) for i in range(nimgs)])
+    waveimg_stack = 5000. + np.arange(nspec)[None,:,None]*0.9 + 0.01*spatimg_stack \
+                        + rng.uniform(-1, 1, (nimgs,1,1))
+    thismask_stack = np.abs(spatimg_stack) < 15
+    inmask_stack = rng.random((nimgs, nspec, nspat)) > 0.1
+    spec_bins = np.linspace(5010., 5120., 101)
+    spat_bins = np.arange(-15., 15.)
+    # Pixels on the last edges are included in the last bins
+    waveimg_stack[0,50,:] = spec_bins[-1]
+    spatimg_stack[1,:,25] = spat_bins[-1]
+    sci_list = [rng.normal(size=(nimgs, nspec, nspat)), rng.normal(size=(nimgs, nspec, nspat))]
+    var_list = [rng.uniform(1., 2., (nimgs, nspec, nspat))]
+
+    _sci_list, _var_list, _norm, _nsmp \
+            = histogram_rebin2d(spec_bins, spat_bins, waveimg_stack, spatimg_stack,
+                                thismask_stack, inmask_stack, sci_list, var_list)
+    for n_workers in [1, 2]:
+        rebin = coadd.rebin2d(spec_bins, spat_bins, waveimg_stack, spatimg_stack, thismask_stack,
+                              inmask_stack, sci_list, var_list, n_workers=n_workers)
+        for out, _out in zip(rebin[0] + rebin[1] + [rebin[2], rebin[3]],
+                             _sci_list + _var_list + [_norm, _nsmp]):
+            assert np.array_equal(out, _out), 'Rebinned images should match np.histogram2d'
+    assert np.any(_nsmp != _norm), 'Test should include masked pixels'
+
+
+def interp1d_oned(wave_new, wave_old, flux_old, ivar_old, mask_old):
+    # Interpolation with separate interp1d objects
+    if np.array_equal(wave_new, wave_old):
+        return flux_old, ivar_old, mask_old
+    wave_mask = wave_old > 1.0
+    flux_new, ivar_new, mask_new_tmp \
+            = [scipy.interpolate.interp1d(wave_old[wave_mask], y[wave_mask], kind='cubic',
+                                          bounds_error=False, fill_value=np.nan)(wave_new)
+               for y in [flux_old, ivar_old, mask_old.astype(float)]]
+    ivar_new = (ivar_new > 0.0)*ivar_new
+    mask_new = (mask_new_tmp > 0.8) & (ivar_new > 0.0) & np.isfinite(flux_new) \
+                    & np.isfinite(ivar_new)
+    return flux_new, ivar_new, mask_new
+
+
+def fake_exposures(rng, nspec, nexp):
+    # Spectra with different, shared, and zero wavelengths
+    waves = 5000. + np.arange(nspec)[:,None]*0.7 + rng.uniform(-3., 3., nexp)[None,:]
+    waves[:,1] = waves[:,0]
+    waves[:5,2] = 0.
+    fluxes = rng.normal(1., 0.1, (nspec,nexp))
+    ivars = rng.uniform(50., 100., (nspec,nexp))
+    ivars[10:20,3] = 0.
+    masks = rng.random((nspec,nexp)) > 0.05
+    return waves, fluxes, ivars, masks
+
+
+def test_interp_spec():
+    rng = np.random.default_rng(24)
+    nspec, nexp = 500, 6
+    waves, fluxes, ivars, masks = fake_exposures(rng, nspec, nexp)
+    wave_new = 5001. + np.arange(nspec-20)*0.68
+    waves[:wave_new.size,4] = wave_new
+
+    # Stack of spectra onto a single grid
+    _waves = waves[:wave_new.size]
+    _fluxes, _ivars, _masks = fluxes[:wave_new.size], ivars[:wave_new.size], masks[:wave_new.size]
+    inter = coadd.interp_spec(wave_new, _waves, _fluxes, _ivars, _masks)
+    for i in range(nexp):
+        _inter = interp1d_oned(wave_new, _waves[:,i], _fluxes[:,i], _ivars[:,i], _masks[:,i])
+        for out, _out in zip(inter, _inter):
+            assert np.array_equal(out[:,i], _out, equal_nan=True), \
+                    'Interpolated spectra should match interp1d'
+
+    # Single spectrum onto a set of grids
+    inter = coadd.interp_spec(waves, wave_new, fluxes[:wave_new.size,0], ivars[:wave_new.size,0],
+                              masks[:wave_new.size,0])
+    for i in range(nexp):
+        _inter = interp1d_oned(waves[:,i], wave_new, fluxes[:wave_new.size,0],
+                               ivars[:wave_new.size,0], masks[:wave_new.size,0])
+        for out, _out in zip(inter, _inter):
+            assert np.array_equal(out[:,i], _out, equal_nan=True), \
+                    'Interpolated spectra should match interp1d'
+
+    # Single spectrum onto a single grid
+    for out, _out in zip(coadd.interp_spec(wave_new, waves[:,0], fluxes[:,0], ivars[:,0],
+                                           masks[:,0]),
+                         interp1d_oned(wave_new, waves[:,0], fluxes[:,0], ivars[:,0], masks[:,0])):
+        assert np.array_equal(out, _out, equal_nan=True), 'Interpolated spectrum should match'
+
+
+@benchmark_required
+def test_interp_spec_benchmark():
+    # Interpolation of the stacks of a 40-exposure echelle coadd onto the exposures and back
+    rng = np.random.default_rng(25)
+    nspec, nexp, norder = 4096, 40, 20
+    times = np.zeros(2)
+    for iord in range(norder):
+        waves, fluxes, ivars, masks = fake_exposures(rng, nspec, nexp)
+        wave_stack = 5000. + np.arange(nspec)*0.7
+        t = time.perf_counter()
+        for i in range(nexp):
+            interp1d_oned(waves[:,i], wave_stack, fluxes[:,0], ivars[:,0], masks[:,0])
+            interp1d_oned(wave_stack, waves[:,i], fluxes[:,i], ivars[:,i], masks[:,i])
+        times[0] += time.perf_counter() - t
+        t = time.perf_counter()
+        coadd.interp_spec(waves, wave_stack, fluxes[:,0], ivars[:,0], masks[:,0])
+        coadd.interp_spec(wave_stack, waves, fluxes, ivars, masks)
+        times[1] += time.perf_counter() - t
+    print('\nInterpolation of {0} orders with {1} exposures: interp1d {2:.2f}s; '
+          'interp_spec {3:.2f}s'.format(norder, nexp, *times))
+    assert times[1] < times[0], 'Batched interpolation is slower'
+
+
+def test_ech_combspec_workers():
+    # Echelle coadd of fake exposures of the orders in the GNIRS sensitivity function
+    rng = np.random.default_rng(25)
+    sensfile = data_path('sens_cN20170331S0206-HIP62745_GNIRS_2017Mar31T083351.681.fits')
+    nspec, norder, nexp = 400, 6, 3
+    wave_min = np.array([8400., 9200., 10200., 12200., 15300., 20400.])
+    wave_max = np.array([9400., 10600., 12100., 14500., 18100., 24100.])
+    waves = np.zeros((nspec, norder, nexp))
+    for iord in range(norder):
+        waves[:,iord,:] = np.geomspace(wave_min[iord], wave_max[iord], nspec)[:,None] \
+                                * (1. + rng.uniform(-1e-4, 1e-4, nexp))[None,:]
+    fluxes = rng.normal(1., 0.1, waves.shape) * rng.uniform(0.8, 1.2, (1,norder,nexp))
+    ivars = rng.uniform(50., 100., waves.shape)
+    masks = rng.random(waves.shape) > 0.02
+
+    stack, order_stacks = coadd.ech_combspec(waves, fluxes, ivars, masks, sensfile,
+                                             scale_method='median')
+    _stack, _order_stacks = coadd.ech_combspec(waves, fluxes, ivars, masks, sensfile,
+                                               scale_method='median', n_workers=2)
+    for out, _out in zip(stack + order_stacks, _stack + _order_stacks):
+        assert np.array_equal(out, _out), 'Parallel orders should not change the coadd'
@@ -0,0 +1,119 @@
+"""
+Module to run tests on the spec2d image stacks used by the 2d coadds
+"""
+import os
+
+import numpy as np
+
+from pypeit import coadd2d
+from pypeit import io
+from pypeit import spec2dobj
+from pypeit import slittrace
+from pypeit.core import coadd
+from pypeit.tests import tstutils
+
+
+def data_path(filename):
+    data_dir = os.path.join(os.path.dirname(__file__), 'files')
+    return os.path.join(data_dir, filename)
+
+
+def write_spec2d_files(nfiles=3, slit_left=(5., 35., 60.), nspat=90):
+    # Write a set of spec2d files with shifted slits; the last is compressed
+    rng = np.random.default_rng(23)
+    nspec = 120
+    files = []
+    for i in range(nfiles):
+        left = np.tile(np.array(slit_left), (nspec,1))
+        slits = slittrace.SlitTraceSet(left, left+20., 'MultiSlit', nspat=nspat, PYP_SPEC='dummy')
+        sciimg = rng.normal(10., 1., (nspec,nspat))
+        spec2DObj = spec2dobj.Spec2DObj(det=1, sciimg=sciimg, ivarraw=np.ones_like(sciimg),
+                                        skymodel=np.full_like(sciimg, 10.),
+                                        objmodel=np.zeros_like(sciimg),
+                                        ivarmodel=rng.uniform(0.5, 1., (nspec,nspat)),
+                                        waveimg=5000. + np.tile(np.arange(nspec)[:,None], (1,nspat)),
+                                        bpmmask=(rng.random((nspec,nspat)) > 0.95).astype(int),
+                                        detector=tstutils.get_kastb_detector(), slits=slits,
+                                        tilts=np.tile(np.linspace(0., 1., nspec)[:,None], (1,nspat)),
+                                        sci_spat_flexure=1.5*i)
+        allspec2D = spec2dobj.AllSpec2DObj()
+        allspec2D['meta']['ir_redux'] = False
+        allspec2D[1] = spec2DObj
+        ofile = data_path('tst_coadd2d_spec2d_{0}.fits'.format(i))
+        if os.path.isfile(ofile + '.gz'):
+            os.remove(ofile + '.gz')
+        allspec2D.write_to_fits(ofile, overwrite=True)
+        if i == nfiles-1:
+            io.compress_file(ofile, overwrite=True)
+            ofile += '.gz'
+        files += [ofile]
+    return files
+
+
+def test_spec2d_stack_slitmask_dtype():
+    # A slit ID that is a power of two must not overflow the slit ID
+    # images
+    files = write_spec2d_files(nfiles=2, slit_left=(5., 118.), nspat=160)
+    stack = coadd2d.Spec2DStack(files, 1)
+    assert 128 in stack.slits_list[0].spat_id, 'Test requires a slit with ID 128'
+    assert stack.slitmask.dtype == np.int16, 'Slit IDs should use the smallest signed type'
+    slitmask_stack = np.array([spec2dobj.Spec2DObj.from_file(f, 1).slits.slit_img(
+                                    flexure=stack.spat_flexure[i]) for i, f in enumerate(files)])
+    assert np.array_equal(stack.slitmask, slitmask_stack), 'Bad slit ID images'
+
+    # Clean up
+    del stack
+    for f in files:
+        os.remove(f)
+
+
+def test_spec2d_stack():
+    files = write_spec2d_files()
+    stack = coadd2d.Spec2DStack(files, 1)
+    spec2DObjs = [spec2dobj.Spec2DObj.from_file(f, 1) for f in files]
+    slitmask_stack = np.array([s.slits.slit_img(flexure=s.sci_spat_flexure) for s in spec2DObjs])
+    assert stack.shape == slitmask_stack.shape, 'Bad shape'
+    assert stack.slitmask.dtype == np.int8, 'Slit IDs should use a compact type'
+    assert np.array_equal(stack.slitmask, slitmask_stack), 'Bad slit ID images'
+    assert stack.spat_flexure == [s.sci_spat_flexure for s in spec2DObjs], 'Bad flexure'
+    assert isinstance(stack.images['sciimg'][-1], np.memmap), \
+            'Compressed images should be copied to scratch files'
+
+    for spat_id in stack.slits_list[0].spat_id:
+        cutout = stack.cutout(spat_id)
+        spat = cutout['spat']
+        assert spat.stop - spat.start < stack.shape[2], 'Cutout should only include the slit'
+        assert np.array_equal(cutout['sciimg_stack'],
+                              np.array([s.sciimg[:,spat] for s in spec2DObjs])), 'Bad cutout'
+        assert np.array_equal(cutout['mask_stack'],
+                              np.array([s.bpmmask[:,spat] for s in spec2DObjs])), 'Bad mask'
+        assert cutout['sciimg_stack'].dtype.isnative, 'Cutouts should use the native byte order'
+        assert np.sum(cutout['slitmask_stack'] == spat_id) == np.sum(slitmask_stack == spat_id), \
+                'Cutout should include all slit pixels'
+
+    # The coadd of the cutouts is the same as the coadd of the full images
+    spat_id = stack.slits_list[0].spat_id[1]
+    cutout = stack.cutout(spat_id)
+    ref_trace_stack = np.array([s.slits.center[:,1] for s in spec2DObjs]).T
+    wave_grid = np.arange(4990., 5130., 1.)
+    coadd_dict = coadd.compute_coadd2d(ref_trace_stack, cutout['sciimg_stack'],
+                                       cutout['sciivar_stack'], cutout['skymodel_stack'],
+                                       cutout['mask_stack'] == 0, cutout['tilts_stack'],
+                                       cutout['slitmask_stack'] == spat_id,
+                                       cutout['waveimg_stack'], wave_grid,
+                                       spat_offset=cutout['spat'].start)
+    _coadd_dict = coadd.compute_coadd2d(ref_trace_stack, np.array([s.sciimg for s in spec2DObjs]),
+                                        np.array([s.ivarmodel for s in spec2DObjs]),
+                                        np.array([s.skymodel for s in spec2DObjs]),
+                                        np.array([s.bpmmask for s in spec2DObjs]) == 0,
+                                        np.array([s.tilts for s in spec2DObjs]),
+                                        slitmask_stack == spat_id,
+                                        np.array([s.waveimg for s in spec2DObjs]), wave_grid)
+    for key in ['dspat_bins', 'sciimg', 'sciivar', 'imgminsky', 'outmask', 'waveimg', 'dspat']:
+        assert np.array_equal(coadd_dict[key], _coadd_dict[key]), \
+                'Coadd of the cutouts should match the full images'
+
+    # Clean up
+    del stack
+    for f in files:
+        os.remove(f)
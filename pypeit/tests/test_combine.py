@@ -0,0 +1,78 @@
+"""
+Module to run tests on the image combining routines
+"""
+import time
+
+import numpy as np
+
+from astropy import stats
+
+from pypeit import utils
+from pypeit.core import combine
+from pypeit.tests.tstutils import benchmark_required
+
+
+def astropy_sigclip(stack, gpm, sigrej, maxiters):
+    """Sigma clipping as previously done in weighted_combine."""
+    data = np.ma.MaskedArray(stack, np.logical_not(gpm))
+    sigclip = stats.SigmaClip(sigma=sigrej, maxiters=maxiters, cenfunc='median',
+                              stdfunc=utils.nan_mad_std)
+    return np.logical_not(sigclip(data, axis=0, masked=True).mask)
+
+
+def fake_stack(nimgs, shape, seed=1):
+    rng = np.random.default_rng(seed)
+    stack = rng.normal(size=(nimgs,)+shape)
+    # Cosmic rays
+    stack[rng.random(stack.shape) < 0.01] += 100.
+    gpm = rng.random(stack.shape) > 0.05
+    return stack, gpm
+
+
+def test_stack_median():
+    rng = np.random.default_rng(2)
+    stack = rng.normal(size=(6,100))
+    gpm = rng.random(stack.shape) > 0.3
+    gpm[:,0] = False
+    ngood = np.sum(gpm, axis=0)
+    median = combine.stack_median(np.sort(np.where(gpm, stack, np.inf), axis=0), ngood)
+    assert np.isnan(median[0]), 'No good values should give NaN'
+    assert np.allclose(median[1:], np.nanmedian(np.where(gpm, stack, np.nan), axis=0)[1:]), \
+            'Bad median'
+
+
+def test_sigclip_stack():
+    for nimgs, sigrej in zip([3, 4, 7, 12], [1.1, 1.3, 2.0, 2.0]):
+        stack, gpm = fake_stack(nimgs, (50, 40), seed=nimgs)
+        stack[0,0,0] = np.nan
+        clipped = combine.sigclip_stack(stack, gpm, sigrej=sigrej, maxiters=5)
+        assert clipped.shape == stack.shape, 'Bad shape'
+        assert not clipped[0,0,0], 'Non-finite values should be rejected'
+        assert np.array_equal(clipped, astropy_sigclip(stack, gpm, sigrej, 5)), \
+                'Result should match astropy'
+
+
+def test_weighted_combine():
+    stack, gpm = fake_stack(5, (30, 20))
+    weights = np.ones(5)/5.
+    sci, var, outgpm, nused = combine.weighted_combine(weights, [stack], [np.ones_like(stack)],
+                                                       gpm, sigma_clip=True,
+                                                       sigma_clip_stack=stack, sigrej=1.6)
+    mask = astropy_sigclip(stack, gpm, 1.6, 5)
+    assert np.array_equal(nused, np.sum(mask, axis=0)), 'Bad number of used images'
+    assert np.allclose(sci[0], np.sum(stack*mask, axis=0)/np.maximum(np.sum(mask, axis=0), 1)), \
+            'Bad combined image'
+
+
+@benchmark_required
+def test_sigclip_stack_benchmark():
+    stack, gpm = fake_stack(15, (2048, 2048))
+    t = time.perf_counter()
+    mask = astropy_sigclip(stack, gpm, 2.0, 5)
+    t_astropy = time.perf_counter() - t
+    t = time.perf_counter()
+    clipped = combine.sigclip_stack(stack, gpm, sigrej=2.0, maxiters=5)
+    t_stack = time.perf_counter() - t
+    print('\nSigma clipping a {0} stack: astropy {1:.2f}s; sigclip_stack {2:.2f}s'.format(
+          stack.shape, t_astropy, t_stack))
+    assert np.array_equal(mask, clipped), 'Result should match astropy'
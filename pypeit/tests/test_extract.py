@@ -0,0 +1,71 @@
+"""
+Module to run tests on object finding and extraction routines
+"""
+import numpy as np
+
+from pypeit import specobj
+from pypeit.core import extract
+from pypeit.tests.test_skysub import fake_slits_image
+
+
+def test_objfind_cutout():
+    # Finding the objects on the slit cutout should be identical to
+    # finding them on the full image
+    slits, image, ivar, tilts = fake_slits_image()
+    slitid_img = slits.slit_img()
+    index = slits.slit_pixel_index(slitid_img=slitid_img)
+    spat_id = slits.spat_id[0]
+    thismask = slitid_img == spat_id
+    left, right = slits.left_init[:,0], slits.right_init[:,0]
+    kwargs = dict(ncoeff=3, fwhm=3.0, sig_thresh=10., nperslit=5,
+                  specobj_dict={'SLITID': spat_id, 'DET': 1, 'OBJTYPE': 'science',
+                                'PYPELINE': 'MultiSlit'})
+
+    # Remove the sky continuum
+    image = image - 50.
+    sobjs, skymask = extract.objfind(image, thismask, left, right, inmask=thismask, **kwargs)
+    cutout = index.cutout(spat_id, left, right, image=image)
+    cutout.images['inmask'] = cutout.thismask
+    _sobjs, _skymask = extract.objfind_cutout(cutout, **kwargs)
+
+    assert sobjs.nobj == 1, 'Should find the object on this slit'
+    assert np.array_equal(sobjs.NAME, _sobjs.NAME), 'Cutout changed the object names'
+    assert np.allclose(sobjs.TRACE_SPAT, _sobjs.TRACE_SPAT, rtol=1e-10, atol=0), \
+            'Traces not shifted back to the detector'
+    assert np.array_equal(skymask, _skymask), 'Cutout changed the sky mask'
+
+    _skymask_img = np.zeros(image.shape, dtype=bool)
+    cutout.insert(_skymask_img, _skymask)
+    assert np.array_equal(_skymask_img[thismask], skymask), 'Bad insertion of the sky mask'
+
+
+def test_extract_boxcar_cutout():
+    slits, image, ivar, tilts = fake_slits_image()
+    nspec = image.shape[0]
+    slitid_img = slits.slit_img()
+    index = slits.slit_pixel_index(slitid_img=slitid_img)
+    spat_id = slits.spat_id[0]
+    thismask = slitid_img == spat_id
+    left, right = slits.left_init[:,0], slits.right_init[:,0]
+    waveimg = 4000. + 2.*tilts*(nspec-1)*thismask
+    skyimg = np.full(image.shape, 50.)
+    rn2img = np.full(image.shape, 25.)
+
+    def make_sobj():
+        sobj = specobj.SpecObj('MultiSlit', 1, SLITID=spat_id)
+        sobj.TRACE_SPAT = left + 12.
+        sobj.trace_spec = np.arange(nspec)
+        return sobj
+
+    sobj = make_sobj()
+    extract.extract_boxcar(image, ivar, thismask, waveimg, skyimg, rn2img, 5., sobj)
+    _sobj = make_sobj()
+    cutout = index.cutout(spat_id, left, right, sciimg=image, ivar=ivar, waveimg=waveimg,
+                          skyimg=skyimg, rn2_img=rn2img)
+    cutout.images['mask'] = cutout.thismask
+    extract.extract_boxcar_cutout(cutout, 5., _sobj)
+
+    assert np.array_equal(sobj.TRACE_SPAT, _sobj.TRACE_SPAT), 'Trace not restored'
+    for key in ['BOX_COUNTS', 'BOX_COUNTS_IVAR', 'BOX_WAVE', 'BOX_NPIX']:
+        assert np.allclose(sobj[key], _sobj[key], rtol=1e-12, atol=0), \
+                'Cutout changed {0}'.format(key)
@@ -15,6 +15,10 @@ from pypeit import flatfield
 from pypeit import slittrace
 from pypeit.spectrographs.util import load_spectrograph
 from pypeit.images import pypeitimage
+from pypeit.images import detector_container
+from pypeit.par import pypeitpar
+from pypeit.tests.test_detector import def_det
+from pypeit.wavetilts import WaveTilts
 from pypeit import bspline
 
 def data_path(filename):
@@ -117,3 +121,42 @@ def test_flatimages():
 #    # Use the trace image
 #    flatImages = flatField.run()
 #    assert np.isclose(np.median(flatImages.pixelflat), 1.0)
+
+
+def test_fit_workers():
+    # The flat-field model should not depend on the number of threads
+    # used for the fits of the slits
+    nspec, nspat, nslits = 400, 160, 4
+    rng = np.random.default_rng(1)
+    spec = np.arange(nspec, dtype=float)
+    left = np.array([5.3, 42.1, 80.6, 118.2])[None,:] + 0.01*spec[:,None]
+    right = left + np.array([32.2, 33.7, 31.1, 33.5])
+    # Smooth blaze and illumination profile in each slit
+    spat = np.arange(nspat, dtype=float)
+    x = (spat[None,:,None] - left[:,None,:])/(right - left)[:,None,:]
+    illum = np.sum(np.where((x > 0) & (x < 1), 1 - 0.2*(x-0.5)**2 + 0.05*np.sin(7*x), 0.),
+                   axis=-1)
+    image = 1e4*np.exp(-0.5*((spec[:,None]-200)/150)**2)*illum \
+                * (1 + 0.01*rng.normal(size=(nspec,nspat))) + 5
+    rawflatimg = pypeitimage.PypeItImage(image)
+    rawflatimg.detector = detector_container.DetectorContainer(**def_det)
+    spectrograph = load_spectrograph('shane_kast_blue')
+    # Slightly tilted lines of constant wavelength
+    coeffs = np.zeros((3,3,nslits))
+    coeffs[0,0] = coeffs[1,0] = 0.5
+    coeffs[0,1] = 0.002
+
+    models = []
+    for n_workers in [1, 2]:
+        slits = slittrace.SlitTraceSet(left_init=left, right_init=right, pypeline='MultiSlit',
+                                       nspat=nspat, PYP_SPEC='dummy')
+        wavetilts = WaveTilts(coeffs, nslits, slits.spat_id, np.full(nslits, 2),
+                              np.full(nslits, 2), 'legendre2d')
+        flatpar = pypeitpar.FlatFieldPar(tweak_slits=True, n_workers=n_workers)
+        flatField = flatfield.FlatField(rawflatimg, spectrograph, flatpar, slits, wavetilts, None)
+        flatField.fit()
+        models += [(flatField.mspixelflat, flatField.msillumflat, flatField.flat_model)]
+
+    assert np.all(slits.mask == 0), 'All slits should be fit'
+    for model, _model in zip(*models):
+        assert np.array_equal(model, _model), 'Flat-field model changed with the threads'
@@ -2,6 +2,8 @@
 Module to run tests on armasters
 """
 import os
+import shutil
+
 import numpy as np
 import pytest
 
@@ -35,3 +37,25 @@ def test_masterframe_methods():
 
     _master_key2, _master_dir2 = masterframe.grab_key_mdir(filename, from_filename=True)
     assert _master_key2 == master_key
+
+
+def test_load_master():
+    masterframe.clear_loaded_masters()
+    filename = os.path.join(data_root(), 'MasterArc_A_1_99.fits')
+    shutil.copy(os.path.join(data_root(), 'MasterArc_A_01_22.fits'), filename)
+
+    arc = masterframe.load_master(buildimage.ArcImage, filename)
+    assert len(masterframe._loaded_masters) == 1, 'Master should be held in memory'
+    arc.image[...] = 0.
+    _arc = masterframe.load_master(buildimage.ArcImage, filename)
+    assert _arc is not arc, 'Should return a copy'
+    assert np.any(_arc.image != 0.), 'Modifying the loaded object should not change the cache'
+
+    # Changing the file forces a reload
+    arc.to_master_file(filename)
+    _arc = masterframe.load_master(buildimage.ArcImage, filename)
+    assert np.all(_arc.image == 0.), 'Should have reloaded the changed file'
+    assert len(masterframe._loaded_masters) == 1, 'Should replace the cached master'
+
+    masterframe.clear_loaded_masters()
+    os.remove(filename)
@@ -9,6 +9,7 @@ import numpy as np
 from pypeit.par.util import parse_pypeit_file
 from pypeit.pypeitsetup import PypeItSetup
 from pypeit.tests.tstutils import dev_suite_required, data_path
+from pypeit import metadata
 from pypeit.metadata import PypeItMetaData
 from pypeit.spectrographs.util import load_spectrograph
 from pypeit.scripts import setup
@@ -52,6 +53,50 @@ def test_read_combid():
     assert pmd['comb_id'][~indx] == [-1], 'Incorrect combination group ID'
 
     shutil.rmtree(config_dir)
+    assert not os.path.isfile(metadata.meta_cache_file(data_path(''), spectrograph)), \
+            'Metadata should not be cached by default'
+
+
+def test_meta_cache(tmp_path):
+    spectrograph = load_spectrograph('shane_kast_blue')
+    par = spectrograph.default_pypeit_par()
+    par['rdx']['meta_cache'] = True
+    # Work on copies of the raw files so that the cache is written
+    # to the temporary directory
+    files = []
+    for f in sorted(glob.glob(data_path('b*.fits.gz'))):
+        files += [str(tmp_path / os.path.basename(f))]
+        shutil.copy2(f, files[-1])
+    cache_file = metadata.meta_cache_file(str(tmp_path), spectrograph)
+
+    fitstbl = PypeItMetaData(spectrograph, par, files=files, strict=False)
+    assert os.path.isfile(cache_file), 'Cache should have been written'
+    cached = PypeItMetaData(spectrograph, par, files=files, strict=False)
+    for key in fitstbl.keys():
+        if key == 'directory':
+            continue
+        assert np.all(fitstbl[key] == cached[key]), 'Cached metadata is different'
+
+    # Values are taken from the cache unless the file changed
+    meta_keys = list(spectrograph.meta.keys())
+    rows = metadata.load_meta_cache(str(tmp_path), spectrograph, meta_keys)
+    i = meta_keys.index('target')
+    stat, row = rows['b1.fits.gz']
+    rows['b1.fits.gz'] = (stat, row[:i] + ['cached'] + row[i+1:])
+    rows['b27.fits.gz'] = ((0, 0), row[:i] + ['cached'] + row[i+1:])
+    metadata.write_meta_cache(str(tmp_path), spectrograph, meta_keys, rows)
+    cached = PypeItMetaData(spectrograph, par, files=files, strict=False)
+    assert cached['target'][cached['filename'] == 'b1.fits.gz'][0] == 'cached', \
+            'Should use the cached value'
+    assert cached['target'][cached['filename'] == 'b27.fits.gz'][0] != 'cached', \
+            'Should read the changed file'
+
+    # Turn off the cache
+    os.remove(cache_file)
+    par['rdx']['meta_cache'] = False
+    PypeItMetaData(spectrograph, par, files=files, strict=False)
+    assert not os.path.isfile(cache_file), 'Cache should not be written'
+
 
 @dev_suite_required
 def test_lris_red_multi_400():
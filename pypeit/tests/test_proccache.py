@@ -0,0 +1,84 @@
+"""
+Module to test the cache of processed raw images
+"""
+import os
+import shutil
+
+import numpy as np
+
+from pypeit.images import proccache
+from pypeit.images import buildimage
+from pypeit.images import pypeitimage
+from pypeit.par import pypeitpar
+from pypeit.spectrographs.util import load_spectrograph
+
+
+def data_path(filename):
+    data_dir = os.path.join(os.path.dirname(__file__), 'files')
+    return os.path.join(data_dir, filename)
+
+
+def test_key():
+    spectrograph = load_spectrograph('shane_kast_blue')
+    par = pypeitpar.ProcessImagesPar()
+    ifile = data_path('b1.fits.gz')
+    bias = pypeitimage.PypeItImage(image=np.ones((10,10)))
+
+    key = proccache.ProcImageCache.key(ifile, 1, spectrograph, par, bias=bias)
+    assert key == proccache.ProcImageCache.key(ifile, 1, spectrograph, par, bias=bias), \
+            'Key should be reproducible'
+    assert key != proccache.ProcImageCache.key(ifile, 2, spectrograph, par, bias=bias), \
+            'Key should depend on the detector'
+    assert key != proccache.ProcImageCache.key(data_path('b27.fits.gz'), 1, spectrograph, par,
+                                               bias=bias), 'Key should depend on the file'
+    bias.image[0,0] = 2.
+    assert key != proccache.ProcImageCache.key(ifile, 1, spectrograph, par, bias=bias), \
+            'Key should depend on the bias'
+    _par = pypeitpar.ProcessImagesPar(use_biasimage=False)
+    assert proccache.ProcImageCache.key(ifile, 1, spectrograph, _par, bias=bias) \
+            == proccache.ProcImageCache.key(ifile, 1, spectrograph, _par), \
+            'Unused bias should not change the key'
+    key = proccache.ProcImageCache.key(ifile, 1, spectrograph, par, bias=bias)
+    _par = pypeitpar.ProcessImagesPar(combine='median', n_lohi=[1,1], combine_memory=1.)
+    assert key == proccache.ProcImageCache.key(ifile, 1, spectrograph, _par, bias=bias), \
+            'Combination parameters should not change the key'
+    _par = pypeitpar.ProcessImagesPar(use_overscan=False)
+    assert key != proccache.ProcImageCache.key(ifile, 1, spectrograph, _par, bias=bias), \
+            'Key should depend on the processing parameters'
+
+
+def test_evict():
+    cache_dir = data_path('ProcCache')
+    cache = proccache.ProcImageCache(cache_dir)
+    for i in range(4):
+        cache.put('img{0}'.format(i), pypeitimage.PypeItImage(image=np.full((100,100), i,
+                                                                             dtype=float)))
+        # Make sure the times are distinct
+        os.utime(cache.filename('img{0}'.format(i)), (i, i))
+    # Use the oldest file
+    assert cache.get('img0') is not None, 'Image should be in the cache'
+    assert cache.get('img4') is None, 'Image should not be in the cache'
+    assert cache.nhit == 1 and cache.nmiss == 1, 'Bad hit/miss counts'
+    # Only allow for ~2.5 images
+    cache.max_size = 2.5*os.path.getsize(cache.filename('img0'))/2**30
+    cache.evict()
+    files = [os.path.basename(f[0]) for f in cache.files()]
+    assert files == ['img3.pkl', 'img0.pkl'], 'Least recently used images should be removed'
+    shutil.rmtree(cache_dir)
+
+
+def test_buildimage():
+    cache_dir = data_path('ProcCache')
+    spectrograph = load_spectrograph('shane_kast_blue')
+    par = spectrograph.default_pypeit_par()['calibrations']['arcframe']
+    par['process']['use_biasimage'] = False
+    files = [data_path('b1.fits.gz'), data_path('b27.fits.gz'), data_path('b1.fits.gz')]
+
+    cache = proccache.ProcImageCache(cache_dir)
+    arc = buildimage.buildimage_fromlist(spectrograph, 1, par, files, proc_cache=cache)
+    assert cache.nhit == 1 and cache.nmiss == 2, 'Second use of b1 should be from the cache'
+    cached_arc = buildimage.buildimage_fromlist(spectrograph, 1, par, files, proc_cache=cache)
+    assert cache.nhit == 4, 'All images should be from the cache'
+    assert np.array_equal(arc.image, cached_arc.image), 'Cached result is different'
+    assert np.array_equal(arc.fullmask, cached_arc.fullmask), 'Cached mask is different'
+    shutil.rmtree(cache_dir)
@@ -1,10 +1,14 @@
 """
 Module to run tests on core.procimg functions.
 """
+import time
+
 import pytest
 import numpy as np
+from scipy import ndimage
 
 from pypeit.core import procimg
+from pypeit.tests.tstutils import benchmark_required
 
 def test_replace_columns():
     y = np.zeros((10,3), dtype=float)
@@ -29,3 +33,98 @@ def test_replace_columns():
                           np.repeat(np.arange(4),10).reshape(4,10).T), \
                 'Interpolation failed.'
 
+
+def fake_cr_image(shape, ncr, seed=1):
+    """
+    Build a sky-like image with cosmic rays, a compact object, and a
+    saturated pixel.
+    """
+    rng = np.random.default_rng(seed)
+    nspec, nspat = shape
+    img = 100 + 50*np.sin(np.arange(nspat)/30.)[None,:] + rng.normal(0, 10, shape)
+    indx = rng.integers(0, img.size, ncr)
+    img.flat[indx] += rng.uniform(500, 5000, ncr)
+    img[nspec//4:nspec//4+5,nspat//3:nspat//3+5] += 3000.
+    img[nspec//2,nspat//2] = 70000.
+    return img, np.full(shape, 100.)
+
+
+def test_median_filter_at():
+    rng = np.random.default_rng(2)
+    img = rng.normal(size=(40,30))
+    indx = np.arange(img.size)
+    for size, size2 in [(3, None), (5, None), (3, 7)]:
+        med = ndimage.median_filter(img, size=size, mode='mirror')
+        if size2 is not None:
+            med = ndimage.median_filter(med, size=size2, mode='mirror')
+        assert np.array_equal(procimg.median_filter_at(img, indx, size, size2=size2, chunk=97,
+                                                       n_workers=2), med.ravel()), \
+                'Bad median filter'
+
+
+def test_subsampled_laplacian():
+    from pypeit import utils
+    from scipy import signal
+    img = np.random.default_rng(3).normal(size=(37,23))
+    kernel = np.array([[0.0, -1.0, 0.0], [-1.0, 4.0, -1.0], [0.0, -1.0, 0.0]])
+    conved = signal.convolve2d(utils.subsample(img), kernel, mode='same',
+                               boundary='symm').clip(min=0.0)
+    assert np.allclose(procimg.subsampled_laplacian(img),
+                       utils.rebin_evlist(conved, np.array(conved.shape)/2.0)), \
+            'Bad Laplacian'
+
+
+def test_lacosmic_fast():
+    img, var = fake_cr_image((300,200), 100)
+    crmask = procimg.lacosmic(img, 65000., 0.86, varframe=var, sigclip=4.5, objlim=3.0)
+    assert np.array_equal(procimg.lacosmic_fast(img, 65000., 0.86, varframe=var, sigclip=4.5,
+                                                objlim=3.0), crmask), 'Masks should be identical'
+    assert np.array_equal(procimg.lacosmic_fast(img, 65000., 0.86, sigclip=4.5, objlim=3.0),
+                          procimg.lacosmic(img, 65000., 0.86, sigclip=4.5, objlim=3.0)), \
+            'Masks should be identical without a variance image'
+
+    # Only search the slit
+    slitmask = np.full(img.shape, -1, dtype=int)
+    slitmask[:,50:150] = 100
+    _crmask = procimg.lacosmic_fast(img, 65000., 0.86, varframe=var, sigclip=4.5, objlim=3.0,
+                                    slitmask=slitmask)
+    assert np.array_equal(_crmask[:,55:145], crmask[:,55:145]), 'Bad mask within the slit'
+    assert not np.any(_crmask[:,:45]) and not np.any(_crmask[:,155:]), \
+            'No CRs should be found outside the slit'
+
+
+def test_lacosmic_fast_zero_variance():
+    # Zero variance, e.g. from the inverse of a masked ivar, gives a
+    # non-finite Laplacian S/N
+    img, var = fake_cr_image((300,200), 100)
+    zero = np.random.default_rng(4).random(img.shape) < 0.002
+    zero[100:110,:] = True
+    var[zero] = 0.
+    crmask = procimg.lacosmic_fast(img, 65000., 0.86, varframe=var, sigclip=4.5, objlim=3.0)
+    assert not np.any(crmask[zero]), 'Pixels without noise should not be selected'
+    # Away from these pixels, the mask is the same as for lacosmic
+    near = ndimage.binary_dilation(zero, iterations=5)
+    assert np.array_equal(crmask[~near],
+                          procimg.lacosmic(img, 65000., 0.86, varframe=var, sigclip=4.5,
+                                           objlim=3.0)[~near]), 'Masks should be identical'
+
+
+@benchmark_required
+def test_lacosmic_fast_benchmark():
+    img, var = fake_cr_image((4096,2048), 8000)
+    t = time.perf_counter()
+    crmask = procimg.lacosmic(img, 65000., 0.86, varframe=var, sigclip=4.5, objlim=3.0)
+    standard = time.perf_counter() - t
+    times = []
+    for use_float32 in [False, True]:
+        t = time.perf_counter()
+        _crmask = procimg.lacosmic_fast(img, 65000., 0.86, varframe=var, sigclip=4.5,
+                                        objlim=3.0, use_float32=use_float32)
+        times += [time.perf_counter() - t]
+        assert np.sum(_crmask != crmask) <= 1e-3*np.sum(crmask), \
+                'Masks should agree (float32={0})'.format(use_float32)
+    print('\nL.A.Cosmic of a {0}x{1} image with {2} CR pixels: standard {3:.2f}s; '
+          'fast {4:.2f}s; fast float32 {5:.2f}s'.format(*img.shape, np.sum(crmask), standard,
+                                                       *times))
+    assert times[0] < standard, 'Fast implementation is slower'
+
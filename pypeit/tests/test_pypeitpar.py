@@ -23,18 +23,41 @@ def test_framegroup_types():
 def test_processimages():
     pypeitpar.ProcessImagesPar()
 
+def test_processimages_lacosmic():
+    assert pypeitpar.ProcessImagesPar()['lamethod'] == 'standard', \
+            'Default should be the standard LA cosmics'
+    with pytest.raises(ValueError):
+        pypeitpar.ProcessImagesPar(lamethod='slow')
+    with pytest.raises(ValueError):
+        pypeitpar.ProcessImagesPar(laworkers=0)
+
 def test_flatfield():
     pypeitpar.FlatFieldPar()
 
+def test_flatfield_workers():
+    assert pypeitpar.FlatFieldPar()['n_workers'] == 1, 'Default should be serial fits'
+    with pytest.raises(ValueError):
+        pypeitpar.FlatFieldPar(n_workers=0)
+
 def test_flexure():
     pypeitpar.FlexurePar()
 
 def test_coadd1d():
     pypeitpar.Coadd1DPar()
 
+def test_coadd1d_workers():
+    assert pypeitpar.Coadd1DPar()['n_workers'] == 1, 'Default should be a serial coadd'
+    with pytest.raises(ValueError):
+        pypeitpar.Coadd1DPar(n_workers=0)
+
 def test_coadd2d():
     pypeitpar.Coadd2DPar()
 
+def test_coadd2d_workers():
+    assert pypeitpar.Coadd2DPar()['n_workers'] == 1, 'Default should be a serial rebinning'
+    with pytest.raises(ValueError):
+        pypeitpar.Coadd2DPar(n_workers=0)
+
 def test_cube():
     pypeitpar.CubePar()
 
@@ -50,6 +73,11 @@ def test_sensfuncuvis():
 def test_telluric():
     pypeitpar.TelluricPar()
 
+def test_telluric_workers():
+    assert pypeitpar.TelluricPar()['n_workers'] == 1, 'Default should be a serial fit'
+    with pytest.raises(ValueError):
+        pypeitpar.TelluricPar(n_workers=0)
+
 def test_manualextraction():
     pypeitpar.ManualExtractionPar()
 
@@ -60,6 +88,12 @@ def test_spectrographs():
 def test_redux():
     pypeitpar.ReduxPar()
 
+def test_redux_workers():
+    assert pypeitpar.ReduxPar()['n_workers'] == 1, 'Default should be a serial reduction'
+    assert pypeitpar.ReduxPar(n_workers=4)['n_workers'] == 4
+    with pytest.raises(ValueError):
+        pypeitpar.ReduxPar(n_workers=0)
+
 def test_wavelengthsolution():
     pypeitpar.WavelengthSolutionPar()
 
@@ -78,6 +112,11 @@ def test_findobj():
 def test_skysub():
     pypeitpar.SkySubPar()
 
+def test_skysub_workers():
+    assert pypeitpar.SkySubPar()['n_workers'] == 1, 'Default should be a serial sky subtraction'
+    with pytest.raises(ValueError):
+        pypeitpar.SkySubPar(n_workers=0)
+
 def test_extraction():
     pypeitpar.ExtractionPar()
 
@@ -20,6 +20,8 @@ from astropy.io import fits
 from pypeit.scripts import setup
 from pypeit.scripts import run_pypeit
 from pypeit.tests.tstutils import dev_suite_required
+from pypeit import pypeit
+from pypeit import spec2dobj
 from pypeit import specobjs
 
 
@@ -152,3 +154,64 @@ def test_run_pypeit():
     shutil.rmtree(outdir)
     shutil.rmtree(testrawdir)
 
+
+
+@dev_suite_required
+def test_run_pypeit_parallel_detectors():
+    # Reducing the detectors in parallel should give the same output as
+    # reducing them one after the other
+    rawdir = os.path.join(os.environ['PYPEIT_DEV'], 'RAW_DATA', 'keck_lris_blue',
+                          'long_400_3400_d560')
+    assert os.path.isdir(rawdir), 'Incorrect raw directory'
+
+    outdir = os.path.join(os.getenv('PYPEIT_DEV'), 'REDUX_OUT_TEST')
+    # For previously failed tests
+    if os.path.isdir(outdir):
+        shutil.rmtree(outdir)
+
+    # Run the setup
+    sargs = setup.parser(['-r', rawdir, '-s', 'keck_lris_blue', '-c all', '-o',
+                          '--output_path', outdir])
+    setup.main(sargs)
+    configdir = os.path.join(outdir, 'keck_lris_blue_A')
+    pyp_file = os.path.join(configdir, 'keck_lris_blue_A.pypeit')
+    assert os.path.isfile(pyp_file), 'PypeIt file not written.'
+
+    spec2d_files = {}
+    spec1d_files = {}
+    for n_workers in [1, 2]:
+        redux_path = os.path.join(configdir, 'workers{0}'.format(n_workers))
+        pypeIt = pypeit.PypeIt(pyp_file, redux_path=redux_path, overwrite=True)
+        pypeIt.par['rdx']['n_workers'] = n_workers
+        pypeIt.reduce_all()
+        spec2d_files[n_workers] = sorted(glob.glob(os.path.join(pypeIt.science_path,
+                                                                'spec2d_*.fits')))
+        spec1d_files[n_workers] = sorted(glob.glob(os.path.join(pypeIt.science_path,
+                                                                'spec1d_*.fits')))
+    assert len(spec2d_files[1]) > 0, 'No spec2d files written'
+    assert [os.path.basename(f) for f in spec2d_files[1]] \
+                == [os.path.basename(f) for f in spec2d_files[2]], 'Different spec2d files'
+    assert [os.path.basename(f) for f in spec1d_files[1]] \
+                == [os.path.basename(f) for f in spec1d_files[2]], 'Different spec1d files'
+
+    for f1, f2 in zip(spec2d_files[1], spec2d_files[2]):
+        for det in [1, 2]:
+            spec2DObj = spec2dobj.Spec2DObj.from_file(f1, det)
+            _spec2DObj = spec2dobj.Spec2DObj.from_file(f2, det)
+            for key in ['sciimg', 'ivarraw', 'skymodel', 'objmodel', 'ivarmodel', 'waveimg',
+                        'bpmmask']:
+                assert np.array_equal(spec2DObj[key], _spec2DObj[key]), \
+                        'Parallel reduction changed {0} for detector {1}'.format(key, det)
+        # Both use the calibrations of the last detector
+        assert fits.getheader(f1).get('FLATMKEY') == fits.getheader(f2).get('FLATMKEY'), \
+                'Bad master keys in the header'
+    for f1, f2 in zip(spec1d_files[1], spec1d_files[2]):
+        sobjs = specobjs.SpecObjs.from_fitsfile(f1)
+        _sobjs = specobjs.SpecObjs.from_fitsfile(f2)
+        assert np.array_equal(sobjs.NAME, _sobjs.NAME), 'Parallel reduction changed the objects'
+        for sobj, _sobj in zip(sobjs, _sobjs):
+            assert np.array_equal(sobj.OPT_COUNTS, _sobj.OPT_COUNTS), \
+                    'Parallel reduction changed the extraction'
+
+    # Clean-up
+    shutil.rmtree(outdir)
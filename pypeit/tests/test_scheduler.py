@@ -0,0 +1,77 @@
+"""
+Module to test the task scheduler
+"""
+import os
+
+import pytest
+
+from pypeit.pypmsgs import PypeItError
+from pypeit import scheduler
+
+
+def data_path(filename):
+    data_dir = os.path.join(os.path.dirname(__file__), 'files')
+    return os.path.join(data_dir, filename)
+
+
+def square(x):
+    return x*x
+
+
+def write_file(ofile):
+    with open(ofile, 'w') as f:
+        f.write('done')
+    return ofile
+
+
+def test_order():
+    tasks = scheduler.TaskScheduler()
+    tasks.add('sci', square, args=(3,), depends=['calib', 'std'])
+    tasks.add('std', square, args=(2,), depends=['calib'])
+    tasks.add('calib', square, args=(1,))
+    assert tasks.order() == ['calib', 'std', 'sci'], 'Bad order'
+
+    tasks.add('loop', square, args=(1,), depends=['loop'])
+    with pytest.raises(PypeItError):
+        tasks.order()
+
+    tasks = scheduler.TaskScheduler()
+    tasks.add('sci', square, args=(3,), depends=['calib'])
+    with pytest.raises(PypeItError):
+        tasks.order()
+
+    with pytest.raises(PypeItError):
+        tasks.add('sci', square, args=(3,))
+
+
+@pytest.mark.parametrize('n_workers', [1, 2])
+def test_run(n_workers):
+    tasks = scheduler.TaskScheduler()
+    tasks.add('calib', square, args=(1,))
+    for i in range(4):
+        tasks.add('sci_{0}'.format(i), square, args=(i,), depends=['calib'])
+    results = tasks.run(n_workers=n_workers)
+    assert len(results) == 5, 'Missing results'
+    assert [results['sci_{0}'.format(i)] for i in range(4)] == [0, 1, 4, 9], 'Bad results'
+
+
+def test_resume():
+    done_file = data_path('tst_scheduler_done.txt')
+    todo_file = data_path('tst_scheduler_todo.txt')
+    write_file(done_file)
+
+    tasks = scheduler.TaskScheduler()
+    tasks.add('calib_0', square, args=(1,))
+    tasks.add('calib_1', square, args=(1,))
+    tasks.add('sci_0', write_file, args=(done_file,), depends=['calib_0'], outputs=[done_file])
+    tasks.add('sci_1', write_file, args=(todo_file,), depends=['calib_1'], outputs=[todo_file])
+    assert tasks.skipped() == {'calib_0', 'sci_0'}, 'Bad skipped tasks'
+
+    results = tasks.run(resume=True)
+    assert list(results.keys()) == ['calib_1', 'sci_1'], 'Should only run the unfinished tasks'
+    assert os.path.isfile(todo_file), 'Task did not run'
+    assert len(tasks.skipped()) == 4, 'All tasks should now be done'
+
+    # Clean-up
+    os.remove(done_file)
+    os.remove(todo_file)
@@ -4,6 +4,7 @@ Module to run tests on skysub routines
 import pytest
 import numpy as np
 
+from pypeit import specobj, specobjs
 from pypeit.core import skysub
 from pypeit.slittrace import SlitTraceSet
 
@@ -49,4 +50,144 @@ def test_generatemask():
     skymask = skysub.generate_mask("IFU", regs, slits, slits.left_init, slits.right_init)
     assert(np.array_equal(skymask, tstmsk))
 
-test_userregions()
\ No newline at end of file
+test_userregions()
+
+def fake_slits_image(nspec=300, nspat=80):
+    # Two slits with sky lines, a positive object in the first slit and
+    # noise
+    rng = np.random.default_rng(3)
+    spec = np.arange(nspec, dtype=float)
+    left = np.column_stack([np.full(nspec, 4.3), np.full(nspec, 44.6)]) + 0.01*spec[:,None]
+    right = left + np.array([30.2, 28.7])
+    slits = SlitTraceSet(left_init=left, right_init=right, pypeline='MultiSlit', nspat=nspat,
+                         PYP_SPEC='dummy')
+    # Tilted sky lines
+    spat = np.arange(nspat, dtype=float)
+    piximg = spec[:,None] + 0.05*(spat[None,:] - nspat/2)
+    sky = 50. + 400.*np.exp(-0.5*((piximg[...,None] - np.array([60., 150., 240.]))/1.5)**2).sum(axis=-1)
+    obj = 200.*np.exp(-0.5*((spat[None,:] - left[:,0,None] - 12.)/1.8)**2)
+    image = sky + obj
+    ivar = 1/(image + 25.)
+    image += rng.normal(size=image.shape)/np.sqrt(ivar)
+    return slits, image, ivar, piximg/(nspec-1)
+
+
+def test_global_skysub_cutout():
+    # Fitting the slit cutouts should be identical to fitting the full
+    # image
+    slits, image, ivar, tilts = fake_slits_image()
+    slitid_img = slits.slit_img()
+    index = slits.slit_pixel_index(slitid_img=slitid_img)
+    for i, spat_id in enumerate(slits.spat_id):
+        thismask = slitid_img == spat_id
+        sky = skysub.global_skysub(image, ivar, tilts, thismask, slits.left_init[:,i],
+                                   slits.right_init[:,i])
+        cutout = index.cutout(spat_id, slits.left_init[:,i], slits.right_init[:,i],
+                              image=image, ivar=ivar, tilts=tilts)
+        assert cutout.thismask.shape == (image.shape[0], index.bbox(spat_id)[1].stop
+                                         - index.bbox(spat_id)[1].start), 'Bad cutout shape'
+        assert np.shares_memory(cutout['image'], image), 'Cutout should be a view'
+        _sky = skysub.global_skysub_cutout(cutout)
+        assert np.array_equal(sky, _sky), 'Cutout changed the global sky'
+
+
+def test_local_skysub_extract_cutout():
+    slits, image, ivar, tilts = fake_slits_image()
+    nspec = image.shape[0]
+    slitid_img = slits.slit_img()
+    index = slits.slit_pixel_index(slitid_img=slitid_img)
+    spat_id = slits.spat_id[0]
+    thismask = slitid_img == spat_id
+    left, right = slits.left_init[:,0], slits.right_init[:,0]
+    global_sky = np.zeros_like(image)
+    global_sky[thismask] = skysub.global_skysub(image, ivar, tilts, thismask, left, right)
+    waveimg = 4000. + 2.*tilts*(nspec-1)*thismask
+    rn2img = np.full(image.shape, 25.)
+
+    def make_sobjs():
+        sobj = specobj.SpecObj('MultiSlit', 1, SLITID=spat_id)
+        sobj.TRACE_SPAT = left + 12.
+        sobj.trace_spec = np.arange(nspec)
+        sobj.SPAT_PIXPOS = sobj.TRACE_SPAT[nspec//2]
+        sobj.FWHM = 4.
+        sobj.maskwidth = 12.
+        sobj.OBJID = 1
+        return specobjs.SpecObjs([sobj])
+
+    sobjs = make_sobjs()
+    full = skysub.local_skysub_extract(image, ivar, tilts, waveimg, global_sky, rn2img, thismask,
+                                       left, right, sobjs, ingpm=thismask, box_rad=5., niter=2)
+    _sobjs = make_sobjs()
+    cutout = skysub.local_skysub_extract_cutout(
+                    index.cutout(spat_id, left, right, sciimg=image, sciivar=ivar, tilts=tilts,
+                                 waveimg=waveimg, global_sky=global_sky, rn2_img=rn2img,
+                                 ingpm=thismask),
+                    _sobjs, box_rad=5., niter=2)
+    for model, _model in zip(full, cutout[:4]):
+        assert np.allclose(model, _model, rtol=1e-10, atol=0), 'Cutout changed the models'
+    assert np.allclose(sobjs[0].TRACE_SPAT, cutout[4][0].TRACE_SPAT, rtol=1e-12, atol=0), \
+            'Trace not shifted back to the detector'
+    assert np.allclose(sobjs[0].OPT_COUNTS, cutout[4][0].OPT_COUNTS, rtol=1e-10, atol=0), \
+            'Cutout changed the extraction'
+    assert sobjs[0].min_spat == cutout[4][0].min_spat, 'Bad fitted region'
+
+
+def test_ech_local_skysub_extract():
+    # The echelle extraction on the order cutouts should match the
+    # extraction of each order on the full image
+    slits, image, ivar, tilts = fake_slits_image()
+    nspec = image.shape[0]
+    slitid_img = slits.slit_img()
+    index = slits.slit_pixel_index(slitid_img=slitid_img)
+    fullmask = np.zeros(image.shape, dtype=int)
+    global_sky = np.zeros_like(image)
+    for i, spat_id in enumerate(slits.spat_id):
+        thismask = slitid_img == spat_id
+        global_sky[thismask] = skysub.global_skysub(image, ivar, tilts, thismask,
+                                                    slits.left_init[:,i], slits.right_init[:,i])
+    waveimg = 4000. + 2.*tilts*(nspec-1)*(slitid_img > -1)
+    rn2img = np.full(image.shape, 25.)
+
+    def make_sobjs():
+        sobjs = specobjs.SpecObjs()
+        for i, spat_id in enumerate(slits.spat_id):
+            sobj = specobj.SpecObj('Echelle', 1, SLITID=spat_id, ECH_ORDERINDX=i,
+                                   ECH_ORDER=10-i)
+            sobj.ECH_OBJID = 1
+            sobj.TRACE_SPAT = slits.left_init[:,i] + 12.
+            sobj.trace_spec = np.arange(nspec)
+            sobj.SPAT_PIXPOS = sobj.TRACE_SPAT[nspec//2]
+            sobj.FWHM = 4.
+            sobj.maskwidth = 12.
+            sobj.OBJID = 1
+            sobj.ech_snr = 10. - i
+            sobjs.add_sobj(sobj)
+        return sobjs
+
+    kwargs = dict(box_rad_order=np.full(2, 5.), niter=2, min_snr=0.)
+    skymodel, objmodel, ivarmodel, outmask, sobjs \
+            = skysub.ech_local_skysub_extract(image, ivar, fullmask, tilts, waveimg, global_sky,
+                                              rn2img, slits.left_init, slits.right_init,
+                                              slitid_img, make_sobjs(), np.array([10, 9]),
+                                              slit_index=index, **kwargs)
+    _sobjs = make_sobjs()
+    for i, spat_id in enumerate(slits.spat_id):
+        thismask = slitid_img == spat_id
+        _skymodel, _objmodel, _ivarmodel, _outmask \
+                = skysub.local_skysub_extract(image, ivar, tilts, waveimg, global_sky, rn2img,
+                                              thismask, slits.left_init[:,i],
+                                              slits.right_init[:,i], _sobjs[i:i+1],
+                                              ingpm=thismask, box_rad=5., niter=2)
+        assert np.allclose(skymodel[thismask], _skymodel, rtol=1e-10, atol=0), \
+                'Cutout changed the sky model'
+        assert np.allclose(objmodel[thismask], _objmodel, rtol=1e-10, atol=0), \
+                'Cutout changed the object model'
+        assert np.allclose(sobjs[i].OPT_COUNTS, _sobjs[i].OPT_COUNTS, rtol=1e-10, atol=0), \
+                'Cutout changed the extraction'
+        assert np.allclose(sobjs[i].TRACE_SPAT, _sobjs[i].TRACE_SPAT, rtol=1e-12, atol=0), \
+                'Trace not shifted back to the detector'
+    # The index is built if not provided
+    assert np.array_equal(skymodel, skysub.ech_local_skysub_extract(
+                                image, ivar, fullmask, tilts, waveimg, global_sky, rn2img,
+                                slits.left_init, slits.right_init, slitid_img, make_sobjs(),
+                                np.array([10, 9]), **kwargs)[0]), 'Index changed the result'
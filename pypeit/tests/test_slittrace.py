@@ -33,6 +33,123 @@ def test_init():
     center = (left+right)/2
     assert np.all(center == 5), 'Bad center'
 
+def test_slit_pixel_index():
+    left = np.tile(np.array([2., 20., 40.]), (100,1))
+    slits = SlitTraceSet(left_init=left, right_init=left+10, pypeline='MultiSlit', nspat=60,
+                         PYP_SPEC='dummy', specmin=np.array([-1., 10., -1.]))
+    slitid_img = slits.slit_img()
+    index = slits.slit_pixel_index()
+    assert np.array_equal(index.spat_id, slits.spat_id), 'Bad slit IDs'
+    for spat_id in slits.spat_id:
+        assert np.array_equal(index.mask(spat_id), slitid_img == spat_id), 'Bad slit mask'
+        assert np.array_equal(slitid_img.flat[index.indices(spat_id)],
+                              slitid_img[slitid_img == spat_id]), 'Bad pixel order'
+    assert index.bbox(slits.spat_id[1]) == (slice(11,100), slice(21,30)), 'Bad bounding box'
+    assert index.indices(-5).size == 0, 'Slit should not be in the index'
+
+    # The index is reused until the edges change
+    assert slits.slit_pixel_index() is index, 'Index should be reused'
+    assert slits.slit_pixel_index(flexure=1.) is not index, 'Flexure should change the index'
+    slits.init_tweaked()
+    slits.left_tweak[:,0] += 1
+    _index = slits.slit_pixel_index()
+    assert _index is not index, 'Index should be rebuilt'
+    assert _index.bbox(slits.spat_id[0])[1] == slice(4,12), 'Bad tweaked bounding box'
+
+
+def test_edges_fingerprint():
+    left = np.tile(np.array([2., 20., 40.]), (100,1))
+    slits = SlitTraceSet(left_init=left, right_init=left+10, pypeline='MultiSlit', nspat=60,
+                         PYP_SPEC='dummy')
+    fingerprint = slits.edges_fingerprint()
+    assert slits.edges_fingerprint() == fingerprint, 'Fingerprint should not change'
+    slits.init_tweaked()
+    assert slits.edges_fingerprint() == fingerprint, 'Tweaked edges are the same'
+    slits.left_tweak[:,0] += 1
+    assert slits.edges_fingerprint() != fingerprint, 'Tweaked edges should change the fingerprint'
+    assert slits.edges_fingerprint(initial=True) == fingerprint, 'Initial edges are unchanged'
+    slits.mask[1] = 1
+    assert slits.edges_fingerprint(initial=True) != fingerprint, \
+            'Slit mask should change the fingerprint'
+
+
+def test_slit_cutout():
+    left = np.tile(np.array([2., 20., 40.]), (100,1))
+    slits = SlitTraceSet(left_init=left, right_init=left+10, pypeline='MultiSlit', nspat=60,
+                         PYP_SPEC='dummy', specmin=np.array([-1., 10., -1.]))
+    slitid_img = slits.slit_img()
+    index = slits.slit_pixel_index()
+    img = np.arange(slitid_img.size, dtype=float).reshape(slitid_img.shape)
+    cutout = index.cutout(slits.spat_id[1], left[:,1], left[:,1]+10, img=img, none=None)
+    assert cutout.spat == slice(21,30), 'Bad cutout columns'
+    assert np.array_equal(cutout.left, left[:,1]-21), 'Bad cutout edge'
+    assert cutout['none'] is None, 'None images should be kept'
+    assert np.shares_memory(cutout['img'], img), 'Cutout should be a view'
+    assert np.array_equal(cutout['img'][cutout.thismask], img[slitid_img == slits.spat_id[1]]), \
+            'Bad pixel order'
+    _img = np.zeros_like(img)
+    cutout.insert(_img, cutout['img'][cutout.thismask])
+    assert np.array_equal(_img != 0, slitid_img == slits.spat_id[1]), 'Bad insertion'
+    assert cutout.to_detector(cutout.to_cutout(25.)) == 25., 'Bad coordinate conversion'
+
+    # Slits without pixels include the full image
+    assert index.cutout(-5, left[:,0], left[:,0]+10, img=img)['img'].shape == img.shape, \
+            'Empty slits should include all columns'
+
+
+def brute_slit_img(slits, pad=0, flexure=None):
+    # Compare every pixel to the edges of every slit
+    left, right, _ = slits.select_edges(flexure=flexure)
+    _pad = pad if isinstance(pad, tuple) else (pad,pad)
+    spat = np.arange(slits.nspat)
+    spec = np.arange(slits.nspec)
+    slitid_img = np.full((slits.nspec,slits.nspat), -1, dtype=int)
+    for i in range(slits.nslits):
+        indx = (spat[None,:] > left[:,i,None] - _pad[0]) \
+                    & (spat[None,:] < right[:,i,None] + _pad[1]) \
+                    & (spec > slits.specmin[i])[:,None] & (spec < slits.specmax[i])[:,None]
+        slitid_img[indx] = slits.spat_id[i]
+    return slitid_img
+
+
+def test_slit_img():
+    nspec = 200
+    spec = np.arange(nspec)
+    # Curved slits with fractional edges, including edges off the detector
+    left = np.column_stack([-3.5 + 0.02*spec, 15.0 + 3*np.sin(spec/30.), 40.0 + 0.01*spec])
+    right = left + np.array([10.2, 12.0, 25.0])
+    slits = SlitTraceSet(left_init=left, right_init=right, pypeline='MultiSlit', nspat=60,
+                         PYP_SPEC='dummy', specmin=np.array([-1., 10.5, -1.]),
+                         specmax=np.array([nspec, 180., nspec]))
+    for pad, flexure in [(0, None), (2, None), ((1,-2), None), (-1.5, 0.7), (0, -3.2)]:
+        assert np.array_equal(slits.slit_img(pad=pad, flexure=flexure),
+                              brute_slit_img(slits, pad=pad, flexure=flexure)), \
+                'Bad slit image for pad={0}, flexure={1}'.format(pad, flexure)
+
+    # Each call returns a new image built from the held pixel spans
+    slitid_img = slits.slit_img()
+    slitid_img[:] = -1
+    assert np.array_equal(slits.slit_img(), brute_slit_img(slits)), 'Held spans were modified'
+
+    # Changing the edges rebuilds the image
+    slits.init_tweaked()
+    slits.right_tweak[:,2] -= 5
+    assert np.array_equal(slits.slit_img(), brute_slit_img(slits)), 'Image should be rebuilt'
+
+    # Spatial coordinates are only computed within the slits
+    slitid_img = slits.slit_img()
+    coo = slits.spatial_coordinate_image(slitid_img=slitid_img)
+    _left, _right, _ = slits.select_edges()
+    spat = np.arange(slits.nspat)
+    for i in range(slits.nslits):
+        indx = slitid_img == slits.spat_id[i]
+        _coo = (spat[None,:] - _left[:,i,None])/(_right-_left)[:,i,None]
+        assert np.array_equal(coo[indx], _coo[indx]), 'Bad spatial coordinates'
+        assert np.array_equal(slits.spatial_coordinate_image(slitidx=i, slitid_img=slitid_img)[indx],
+                              _coo[indx]), 'Bad single-slit spatial coordinates'
+    assert np.all(coo[slitid_img < 0] == 0), 'Coordinates should be 0 outside the slits'
+
+
 def test_io():
 
     slits = SlitTraceSet(np.full((1000,3), 2, dtype=float), np.full((1000,3), 8, dtype=float),
@@ -2,6 +2,7 @@
 Module to run tests on SpecObjs
 """
 import os
+import pickle
 
 import numpy as np
 import pytest
@@ -64,6 +65,16 @@ def test_add_rm(sobj1, sobj2, sobj3):
     sobjs2.add_sobj(sobjs1)
 
 
+def test_pickle(sobj1, sobj2):
+    # SpecObjs are sent to and from worker processes
+    sobj1.TRACE_SPAT = np.arange(10.)
+    sobjs = pickle.loads(pickle.dumps(specobjs.SpecObjs([sobj1,sobj2])))
+    assert sobjs.nobj == 2
+    assert np.array_equal(sobjs.SLITID, [0,1])
+    assert np.array_equal(sobjs[0].TRACE_SPAT, np.arange(10.))
+    assert pickle.loads(pickle.dumps(specobjs.SpecObjs())).nobj == 0
+
+
 def test_set(sobj1, sobj2, sobj3):
     sobjs = specobjs.SpecObjs([sobj1,sobj2,sobj3])
     # All
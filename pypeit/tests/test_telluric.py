@@ -0,0 +1,218 @@
+"""
+Module to run tests on the telluric model grid and its evaluation
+"""
+import os
+
+import numpy as np
+
+from astropy.io import fits
+
+from pypeit.core import telluric
+
+
+def write_telluric_grid(ofile, nspec=6000, seed=8):
+    # Write a small telluric grid with absorption lines that scale with
+    # the grid parameters
+    rng = np.random.default_rng(seed)
+    wave = 10**(np.log10(900.) + np.arange(nspec)*4e-6)
+    lines = rng.uniform(wave[0], wave[-1], 60)
+    depth = rng.uniform(0.1, 1., lines.size)
+    profile = np.sum(depth[:,None]*np.exp(-0.5*((wave[None,:]-lines[:,None])/0.004)**2),
+                     axis=0)
+    hdr = fits.Header()
+    npres, ntemp, nhum, nam = 2, 2, 3, 2
+    for key, start, step, n in [('PRES', 600., 20., npres), ('TEMP', 270., 10., ntemp),
+                                ('HUM', 10., 30., nhum), ('AM', 1., 0.5, nam)]:
+        hdr[key+'0'], hdr['D'+key], hdr['N'+key] = start, step, n
+    scale = (np.arange(npres)[:,None,None,None] + np.arange(ntemp)[None,:,None,None]
+             + np.arange(nhum)[None,None,:,None] + np.arange(nam)[None,None,None,:] + 1.)/4.
+    model = np.exp(-scale[...,None]*profile[None,None,None,None,:])
+    fits.HDUList([fits.PrimaryHDU(data=model, header=hdr),
+                  fits.ImageHDU(data=wave)]).writeto(ofile, overwrite=True)
+
+
+def fake_order(tell_dict, theta_tell, nspec=400, wave_min=9100., wave_max=9240., noise=1.,
+               seed=11):
+    # A smooth continuum with telluric absorption
+    rng = np.random.default_rng(seed)
+    wave = np.linspace(wave_min, wave_max, nspec)
+    tellmodel = telluric.eval_telluric(theta_tell, tell_dict)
+    flux = (100. + 0.02*(wave - wave[0])) \
+                * np.interp(wave, tell_dict['wave_grid'][:tellmodel.size], tellmodel)
+    return wave, flux + noise*rng.normal(size=nspec), np.full(nspec, 1/noise**2)
+
+
+def test_eval_telluric(tmp_path):
+    ofile = str(tmp_path / 'tell_grid.fits')
+    write_telluric_grid(ofile)
+    tell_dict = telluric.read_telluric_grid(ofile, wave_min=9100., wave_max=9400.)
+    # Evaluate without the cache of convolved models
+    _tell_dict = tell_dict.copy()
+    _tell_dict['conv_cache'] = None
+
+    # Continuous parameters of a differential evolution population
+    # converging to the best fit
+    rng = np.random.default_rng(9)
+    nwave = tell_dict['wave_grid'].size
+    ind_lower, ind_upper = nwave//4, 3*nwave//4
+    best = np.array([610., 275., 40., 1.25, 5000., 0., 1.])
+    spread = np.array([20., 10., 60., 0.5, 2500., 1., 0.02])
+    for i in range(200):
+        theta = best + 0.5**(i//20)*spread*rng.uniform(-0.5, 0.5, best.size)
+        for _theta in [theta[:5], theta]:
+            tell_model = telluric.eval_telluric(_theta, tell_dict, ind_lower=ind_lower,
+                                                ind_upper=ind_upper)
+            assert np.array_equal(tell_model,
+                                  telluric.eval_telluric(_theta, _tell_dict, ind_lower=ind_lower,
+                                                         ind_upper=ind_upper)), \
+                    'Cached models should match the direct evaluation'
+    assert len(tell_dict['conv_cache']) < 120, 'Convolved models should be reused'
+
+
+def test_resln_quantum(tmp_path, monkeypatch):
+    ofile = str(tmp_path / 'tell_grid.fits')
+    write_telluric_grid(ofile)
+    tell_dict = telluric.read_telluric_grid(ofile)
+    wave, flux, ivar = fake_order(tell_dict, np.array([610., 275., 40., 1.2, 5300.]), noise=0.2)
+    obj_params = dict(z_obj=0., mask_lyman_a=False, airmass=1.2, delta_coeff_bounds=(-20., 20.),
+                      minmax_coeff_bounds=(-5., 5.), polyorder_vec=np.full(1, 1), exptime=1.,
+                      func='legendre', model='exp', sigrej=3.0, debug=False)
+
+    # Count the convolutions
+    nconv = [0]
+    conv_telluric = telluric.conv_telluric
+    def _conv_telluric(*args):
+        nconv[0] += 1
+        return conv_telluric(*args)
+    monkeypatch.setattr(telluric, 'conv_telluric', _conv_telluric)
+
+    # Fit with and without quantizing the resolution
+    fits = []
+    for resln_quantum in [0., telluric.resln_quantum]:
+        monkeypatch.setattr(telluric, 'resln_quantum', resln_quantum)
+        nconv[0] = 0
+        tell = telluric.Telluric(wave[:,None], flux[:,None], ivar[:,None],
+                                 np.ones((wave.size,1), dtype=bool), ofile, obj_params,
+                                 telluric.init_poly_model, telluric.eval_poly_model,
+                                 resln_guess=5000., popsize=15)
+        tell.run()
+        fits += [(tell.out_table[0], nconv[0])]
+    (exact, nexact), (quant, nquant) = fits
+
+    assert nquant < 0.6*nexact, 'Quantizing the resolution should reuse the convolved models'
+    assert np.isclose(quant['TELL_RESLN'], exact['TELL_RESLN'], rtol=1e-3), \
+            'Quantizing the resolution changed the fitted resolution'
+    assert np.allclose(quant['TELLURIC']*quant['OBJ_MODEL'],
+                       exact['TELLURIC']*exact['OBJ_MODEL'], rtol=1e-4), \
+            'Quantizing the resolution changed the best-fit model'
+    assert np.isclose(quant['CHI2'], exact['CHI2'], rtol=1e-3), \
+            'Quantizing the resolution changed the chi-square of the fit'
+
+
+def test_read_telluric_grid(tmp_path):
+    ofile = str(tmp_path / 'tell_grid.fits')
+    write_telluric_grid(ofile)
+    full = telluric.read_telluric_grid(ofile)
+    assert full['ind_lower_grid'] == 0, 'Full grid should not be offset'
+
+    # Without padding, the grid is only trimmed to the window requested
+    wave_min, wave_max = 9100., 9400.
+    tell_dict = telluric.read_telluric_grid(ofile, wave_min=wave_min, wave_max=wave_max)
+    ind_lower = np.argmin(np.abs(full['wave_grid'] - wave_min))
+    ind_upper = np.argmin(np.abs(full['wave_grid'] - wave_max))
+    assert tell_dict['ind_lower_grid'] == ind_lower, 'Bad offset of the trimmed grid'
+    assert np.array_equal(tell_dict['wave_grid'], full['wave_grid'][ind_lower:ind_upper]), \
+            'Bad trimmed wavelengths'
+    assert np.array_equal(tell_dict['tell_grid'], full['tell_grid'][...,ind_lower:ind_upper]), \
+            'Bad trimmed grid'
+    for key in ['dloglam', 'resln_guess', 'pix_per_sigma', 'tell_pad_pix']:
+        assert tell_dict[key] == full[key], 'Sampling should not depend on the trimming'
+
+    # Padded for the convolution, the models in the window are the same as
+    # for the full grid
+    tell_dict = telluric.read_telluric_grid(ofile, wave_min=wave_min, wave_max=wave_max, pad=None)
+    offset = tell_dict['ind_lower_grid']
+    assert offset == ind_lower - full['tell_pad_pix'] - 1, 'Bad padding'
+    _ind_lower = np.searchsorted(tell_dict['wave_grid'], wave_min)
+    _ind_upper = np.searchsorted(tell_dict['wave_grid'], wave_max) - 1
+    rng = np.random.default_rng(10)
+    for i in range(10):
+        theta = np.array([rng.uniform(600., 620.), rng.uniform(270., 280.), rng.uniform(10., 70.),
+                          rng.uniform(1., 1.5), rng.uniform(3000., 7000.),
+                          rng.uniform(-0.5, 0.5), rng.uniform(0.99, 1.01)])
+        assert np.allclose(telluric.eval_telluric(theta, tell_dict, ind_lower=_ind_lower,
+                                                  ind_upper=_ind_upper),
+                           telluric.eval_telluric(theta, full, ind_lower=_ind_lower + offset,
+                                                  ind_upper=_ind_upper + offset),
+                           rtol=1e-12, atol=1e-14), \
+                'Trimming changed the telluric model'
+
+    # The trimmed grid is reused
+    assert telluric.read_telluric_grid(ofile, wave_min=wave_min, wave_max=wave_max,
+                                       pad=None)['tell_grid'] is tell_dict['tell_grid'], \
+            'Trimmed grid should be reused'
+
+
+def test_fit_orders_in_processes(tmp_path):
+    ofile = str(tmp_path / 'tell_grid.fits')
+    write_telluric_grid(ofile)
+    tell_dict = telluric.read_telluric_grid(ofile)
+    # Two orders of a smooth continuum with telluric absorption
+    nspec = 400
+    wave = np.column_stack([np.linspace(9100., 9240., nspec), np.linspace(9260., 9400., nspec)])
+    rng = np.random.default_rng(11)
+    flux = np.zeros_like(wave)
+    tellmodel = telluric.eval_telluric(np.array([610., 275., 40., 1.2, 5000.]), tell_dict)
+    for iord in range(wave.shape[1]):
+        flux[:,iord] = (100. + 0.02*(wave[:,iord] - wave[0,iord])) \
+                            * np.interp(wave[:,iord], tell_dict['wave_grid'][:tellmodel.size], tellmodel)
+    ivar = np.full_like(flux, 1.)
+    flux += rng.normal(size=flux.shape)
+    mask = np.ones_like(flux, dtype=bool)
+    obj_params = dict(z_obj=0., mask_lyman_a=False, airmass=1.2, delta_coeff_bounds=(-20., 20.),
+                      minmax_coeff_bounds=(-5., 5.), polyorder_vec=np.full(2, 1), exptime=1.,
+                      func='legendre', model='exp', sigrej=3.0, debug=False)
+
+    out_tables = []
+    for n_workers in [1, 2]:
+        tell = telluric.Telluric(wave, flux, ivar, mask, ofile, obj_params,
+                                 telluric.init_poly_model, telluric.eval_poly_model, maxiter=1,
+                                 popsize=5, tol=0.1, polish=False, n_workers=n_workers)
+        tell.run()
+        out_tables += [tell.out_table]
+    for key in ['TELL_THETA', 'OBJ_THETA', 'TELLURIC', 'OBJ_MODEL', 'CHI2']:
+        assert np.array_equal(out_tables[0][key], out_tables[1][key]), \
+                'Fitting the orders in separate processes changed {0}'.format(key)
+
+
+def test_fit_population_in_processes(tmp_path):
+    ofile = str(tmp_path / 'tell_grid.fits')
+    write_telluric_grid(ofile)
+    tell_dict = telluric.read_telluric_grid(ofile)
+    wave, flux, ivar = fake_order(tell_dict, np.array([610., 275., 40., 1.2, 5000.]))
+    mask = np.ones(wave.size, dtype=bool)
+    obj_params = dict(z_obj=0., mask_lyman_a=False, airmass=1.2, delta_coeff_bounds=(-20., 20.),
+                      minmax_coeff_bounds=(-5., 5.), polyorder_vec=np.full(1, 1), exptime=1.,
+                      func='legendre', model='exp', sigrej=3.0, debug=False)
+
+    # A single order, with the population evaluated by two processes
+    tell = telluric.Telluric(wave[:,None], flux[:,None], ivar[:,None], mask[:,None], ofile,
+                             obj_params, telluric.init_poly_model, telluric.eval_poly_model,
+                             maxiter=2, popsize=5, tol=0.1, n_workers=2)
+    tell.run()
+
+    # The same fit in a single process
+    ind = slice(tell.ind_lower[0], tell.ind_upper[0]+1)
+    result, outmask = telluric.fit_order(tell.flux_arr[ind,0], tell.arg_dict_list[0],
+                                         tell.mask_arr[ind,0], n_workers=1,
+                                         updating='deferred', maxiter=2, lower=tell.lower,
+                                         upper=tell.upper, sticky=tell.sticky, tol=tell.tol,
+                                         popsize=tell.popsize,
+                                         recombination=tell.recombination, polish=tell.polish,
+                                         disp=tell.disp)
+    assert np.array_equal(tell.result_list[0].x, result.x), \
+            'Evaluating the population in separate processes changed the fit'
+    assert tell.result_list[0].fun == result.fun, \
+            'Evaluating the population in separate processes changed the chi-square'
+    assert np.array_equal(tell.outmask_list[0], outmask), \
+            'Evaluating the population in separate processes changed the mask'
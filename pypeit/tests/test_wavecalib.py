@@ -0,0 +1,96 @@
+"""
+Module to run tests on building the wavelength image
+"""
+import numpy as np
+
+from pypeit import wavecalib
+from pypeit import slittrace
+from pypeit import utils
+
+
+def fake_wv_calib(slits, rng):
+    # Slits with different functional forms and orders
+    wv_calib = dict(par=dict(echelle=False))
+    for i, slit_spat in enumerate(slits.spat_id):
+        func, nfit = [('legendre', 4), ('legendre', 4), ('chebyshev', 3), ('polynomial', 3),
+                      ('legendre', 5)][i % 5]
+        fitc = rng.standard_normal(nfit)
+        fitc[0] += 5000.
+        wv_calib[str(slit_spat)] = dict(fitc=fitc, function=func, fmin=0., fmax=1.+0.1*i)
+    return wv_calib
+
+
+def brute_waveimg(tilts, slits, wv_calib, spat_flexure=None):
+    # Evaluate each slit separately
+    slitmask = slits.slit_img(flexure=spat_flexure)
+    image = np.zeros_like(tilts)
+    for slit_spat in slits.spat_id[slits.mask == 0]:
+        thismask = slitmask == slit_spat
+        iwv_calib = wv_calib[str(slit_spat)]
+        image[thismask] = utils.func_val(iwv_calib['fitc'], tilts[thismask],
+                                         iwv_calib['function'], minx=iwv_calib['fmin'],
+                                         maxx=iwv_calib['fmax'])
+    return image
+
+
+def test_build_waveimg():
+    rng = np.random.default_rng(19)
+    nspec, nspat, nslits = 300, 200, 9
+    left = np.tile(np.arange(nslits)*20. + 3., (nspec,1))
+    slits = slittrace.SlitTraceSet(left_init=left, right_init=left+15., pypeline='MultiSlit',
+                                   nspat=nspat, PYP_SPEC='dummy')
+    tilts = np.tile(np.linspace(0., 1., nspec)[:,None], (1,nspat))
+    wv_calib = fake_wv_calib(slits, rng)
+
+    for flexure in [None, 1.3]:
+        waveimg = wavecalib.build_waveimg(None, tilts, slits, wv_calib, spat_flexure=flexure)
+        assert np.array_equal(waveimg, brute_waveimg(tilts, slits, wv_calib,
+                                                     spat_flexure=flexure)), \
+                'Vectorized evaluation should match func_val'
+
+    # Evaluate in chunks
+    slitmask = slits.slit_img()
+    indx = np.where(slitmask.ravel() >= 0)[0]
+    slit = np.searchsorted(slits.spat_id, slitmask.flat[indx])
+    fits = [wv_calib[str(slit_spat)] for slit_spat in slits.spat_id]
+    assert np.array_equal(wavecalib.eval_wave_solutions(fits, tilts.flat[indx], slit, chunk=7),
+                          wavecalib.eval_wave_solutions(fits, tilts.flat[indx], slit)), \
+            'Chunks should not change the result'
+
+
+def test_waveimg_cache():
+    rng = np.random.default_rng(20)
+    nspec, nspat = 100, 60
+    left = np.tile(np.array([2., 20., 40.]), (nspec,1))
+    slits = slittrace.SlitTraceSet(left_init=left, right_init=left+10., pypeline='MultiSlit',
+                                   nspat=nspat, PYP_SPEC='dummy')
+    tilts = np.tile(np.linspace(0., 1., nspec)[:,None], (1,nspat))
+    wv_calib = fake_wv_calib(slits, rng)
+    cache_key = ('A_1_01', 'A_1_01', 'Masters')
+
+    wavecalib.clear_waveimg_cache()
+    waveimg = wavecalib.build_waveimg(None, tilts, slits, wv_calib, cache_key=cache_key)
+    # Altering the solution shows when the held image is reused
+    wv_calib[str(slits.spat_id[0])]['fitc'][0] += 10.
+    _waveimg = wavecalib.build_waveimg(None, tilts, slits, wv_calib, spat_flexure=0.001,
+                                       cache_key=cache_key)
+    assert np.array_equal(_waveimg, waveimg), 'Image should be reused'
+    _waveimg[:] = 0.
+    assert np.array_equal(wavecalib.build_waveimg(None, tilts, slits, wv_calib,
+                                                  cache_key=cache_key), waveimg), \
+            'Held image was modified'
+
+    # Different flexure, slits, or calibrations rebuild the image
+    assert not np.array_equal(wavecalib.build_waveimg(None, tilts, slits, wv_calib,
+                                                      spat_flexure=0.5, cache_key=cache_key),
+                              waveimg), 'Flexure should rebuild the image'
+    assert not np.array_equal(wavecalib.build_waveimg(None, tilts, slits, wv_calib,
+                                                      cache_key=('A_1_01', 'A_2_01', 'Masters')),
+                              waveimg), 'New calibrations should rebuild the image'
+    slits.mask[1] = slits.bitmask.turn_on(slits.mask[1], 'BADWVCALIB')
+    _waveimg = wavecalib.build_waveimg(None, tilts, slits, wv_calib, cache_key=cache_key)
+    assert np.all(_waveimg[slits.slit_img(initial=True) == slits.spat_id[1]] == 0), \
+            'Masked slits should rebuild the image'
+    wavecalib.clear_waveimg_cache()
+    assert np.array_equal(wavecalib.build_waveimg(None, tilts, slits, wv_calib),
+                          brute_waveimg(tilts, slits, wv_calib)), 'Bad rebuilt image'
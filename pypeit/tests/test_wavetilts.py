@@ -3,12 +3,14 @@ Module to run tests on WaveTilts and BuildWaveTilts classes
 Requires files in Development suite and an Environmental variable
 """
 import os
+import time
 
 import pytest
 import numpy as np
 
 
-from pypeit.tests.tstutils import dev_suite_required, load_kast_blue_masters, cooked_required
+from pypeit.tests.tstutils import dev_suite_required, load_kast_blue_masters, cooked_required, \
+    benchmark_required
 from pypeit import wavetilts
 from pypeit import slittrace
 from pypeit.core import tracewave, pixels
@@ -53,6 +55,50 @@ def test_wavetilts():
     os.remove(outfile)
 
 
+def fake_multislit_tilts(nslit, shape):
+    """
+    Build a WaveTilts object and a slit mask with many narrow slits.
+    """
+    nspec, nspat = shape
+    rng = np.random.default_rng(8)
+    coeffs = np.zeros((6,4,nslit))
+    coeffs[0,0,:] = 0.5
+    coeffs[1,0,:] = 0.5
+    coeffs[:,:,:] += 0.01*rng.standard_normal((6,4,nslit))
+    spat_id = (np.arange(nslit)+0.5)*nspat/nslit
+    wvtilts = wavetilts.WaveTilts(coeffs=coeffs, nslit=nslit, spat_order=np.full(nslit, 3),
+                                  spec_order=np.full(nslit, 5), spat_id=spat_id.astype(int),
+                                  func2d='legendre2d')
+    # Slits are separated by a gap and only cover part of the spectral range
+    slitmask = np.full(shape, -1, dtype=int)
+    width = nspat//nslit
+    for i in range(nslit):
+        slitmask[i % 5:nspec - i % 7, i*width+2:(i+1)*width-2] = wvtilts.spat_id[i]
+    return wvtilts, slitmask
+
+
+def full_frame_tilts(wvtilts, slitmask, flexure=0.):
+    # Evaluate the tilts over the full image for every slit
+    final_tilts = np.zeros(slitmask.shape, dtype=float)
+    for slit_idx, slit_spat in enumerate(wvtilts.spat_id):
+        coeff_out = wvtilts.coeffs[:wvtilts.spec_order[slit_idx]+1,:wvtilts.spat_order[slit_idx]+1,slit_idx]
+        _tilts = tracewave.fit2tilts(slitmask.shape, coeff_out, wvtilts.func2d, spat_shift=-1*flexure)
+        thismask = slitmask == slit_spat
+        final_tilts[thismask] = _tilts[thismask]
+    return final_tilts
+
+
+def test_fit2tiltimg():
+    wvtilts, slitmask = fake_multislit_tilts(10, (200, 150))
+    ids, spec_box, spat_box = pixels.slit_bounding_boxes(slitmask)
+    assert np.array_equal(ids, wvtilts.spat_id), 'Bad slit IDs'
+    assert np.array_equal(spec_box[1], [1, 199]), 'Bad spectral range'
+    assert np.array_equal(spat_box[1], [17, 28]), 'Bad spatial range'
+    assert np.array_equal(wvtilts.fit2tiltimg(slitmask, flexure=1.5),
+                          full_frame_tilts(wvtilts, slitmask, flexure=1.5)), \
+            'Windowed evaluation should match the full-frame evaluation'
+
+
 @cooked_required
 def test_instantiate_from_master(master_dir):
     master_file = os.path.join(os.getenv('PYPEIT_DEV'), 'Cooked', 'shane_kast_blue',
@@ -134,3 +180,17 @@ def test_run(master_dir):
     waveTilts = buildwaveTilts.run(doqa=False)
     assert isinstance(waveTilts.fit2tiltimg(slits.slit_img()), np.ndarray)
 
+
+
+@benchmark_required
+def test_fit2tiltimg_benchmark():
+    wvtilts, slitmask = fake_multislit_tilts(120, (4096, 2048))
+    t = time.perf_counter()
+    full_tilts = full_frame_tilts(wvtilts, slitmask)
+    t_full = time.perf_counter() - t
+    t = time.perf_counter()
+    tilts = wvtilts.fit2tiltimg(slitmask)
+    t_window = time.perf_counter() - t
+    print('\nTilt image for 120 slits: full frame {0:.2f}s; slit windows {1:.2f}s'.format(
+          t_full, t_window))
+    assert np.array_equal(tilts, full_tilts), 'Result should match full-frame evaluation'
@@ -41,6 +41,10 @@ except:
 else:
     bspline_ext = True
 bspline_ext_required = pytest.mark.skipif(not bspline_ext, reason='Could not import C extension')
+
+# Benchmarks are only run on request
+benchmark_required = pytest.mark.skipif(os.getenv('PYPEIT_BENCHMARK') is None,
+                                        reason='benchmarks not requested')
 # ----------------------------------------------------------------------
 
 
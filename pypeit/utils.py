@@ -9,6 +9,7 @@ import pickle
 import warnings
 import itertools
 from collections import deque
+from concurrent import futures
 from bisect import insort, bisect_left
 
 from IPython import embed
@@ -608,7 +609,7 @@ def bspline_fit(x,y,order=3,knots=None,everyn=20,xmin=None,xmax=None,w=None,bksp
 # and make them explicit
 def bspline_profile(xdata, ydata, invvar, profile_basis, ingpm=None, upper=5, lower=5, maxiter=25,
                     nord=4, bkpt=None, fullbkpt=None, relative=None, kwargs_bspline={},
-                    kwargs_reject={}, quiet=False):
+                    kwargs_reject={}, quiet=False, workspace=None):
     """
     Fit a B-spline in the least squares sense with rejection to the
     provided data and model profiles.
@@ -656,6 +657,10 @@ def bspline_profile(xdata, ydata, invvar, profile_basis, ingpm=None, upper=5, lo
         Keyword arguments passed to :func:`pypeit.core.pydl.djs_reject`
     quiet : :obj:`bool`, optional
         Suppress output to the screen
+    workspace : :class:`pypeit.bspline.BsplineWorkspace`, optional
+        Workspace used to reuse the action matrix and the normal
+        equations across the rejection iterations.  If None, a new
+        workspace with the default parameters is used.
 
     Returns
     -------
@@ -743,10 +748,10 @@ def bspline_profile(xdata, ydata, invvar, profile_basis, ingpm=None, upper=5, lo
         # TODO: Why isn't maskwork returned?
         return sset, outmask, yfit, reduced_chi, 4
 
-    # This was checked in detail against IDL for identical inputs
-    # KBW: Tried a few things and this was about as fast as you can get.
-    outer = np.outer(np.ones(nord, dtype=float), profile_basis.flatten('F')).T
-    action_multiple = outer.reshape((nx, npoly * nord), order='F')
+    # The action matrix is only rebuilt when breakpoints are dropped,
+    # and the normal equations are only updated for the rejected data
+    if workspace is None:
+        workspace = bspline.BsplineWorkspace()
     #--------------------
     # Iterate spline fit
     iiter = 0
@@ -771,18 +776,12 @@ def bspline_profile(xdata, ydata, invvar, profile_basis, ingpm=None, upper=5, lo
 
             # we'll do the fit right here..............
             if error != 0:
-                bf1, laction, uaction = sset.action(xdata)
-                if np.any(bf1 == -2) or bf1.size !=nx*nord:
-                    msgs.error("BSPLINE_ACTION failed!")
-                action = np.copy(action_multiple)
-                for ipoly in range(npoly):
-                    action[:, np.arange(nord)*npoly + ipoly] *= bf1
-                del bf1 # Clear the memory
+                action, laction, uaction = workspace.profile_action(sset, xdata, profile_basis)
+                if np.any(np.invert(np.isfinite(action))):
+                    msgs.error('Infinities in action matrix.  B-spline fit faults.')
 
-            if np.any(np.invert(np.isfinite(action))):
-                msgs.error('Infinities in action matrix.  B-spline fit faults.')
-
-            error, yfit = sset.workit(xdata, ydata, invvar*maskwork, action, laction, uaction)
+            error, yfit = sset.workit(xdata, ydata, invvar*maskwork, action, laction, uaction,
+                                      workspace=workspace)
 
         iiter += 1
 
@@ -847,6 +846,63 @@ def bspline_profile(xdata, ydata, invvar, profile_basis, ingpm=None, upper=5, lo
     return sset, outmask, yfit, reduced_chi, exit_status
 
 
+def bspline_profile_batch(xdata, ydata, invvar, profile_basis=None, ingpm=None, n_workers=1,
+                          **kwargs):
+    """
+    Perform a set of independent B-spline fits with the same settings.
+
+    The fits are not combined into a single solve; each fit is
+    performed separately by :func:`bspline_profile`.  If
+    ``n_workers > 1``, the fits are performed concurrently by a pool
+    of threads.  Only the compiled B-spline kernels (the construction
+    and Cholesky decomposition of the normal equations and the model
+    evaluation) and some of the numpy operations release the GIL;
+    for a typical sky fit, they take about half of the execution
+    time, which limits the speed-up.  The results are identical to
+    performing the fits serially.
+
+    Args:
+        xdata (:obj:`list`):
+            Independent variable of each fit; see
+            :func:`bspline_profile`.
+        ydata (:obj:`list`):
+            Dependent variable of each fit.
+        invvar (:obj:`list`):
+            Inverse variance of each fit.
+        profile_basis (:obj:`list`, optional):
+            Model profiles of each fit.  If None, the fits use a
+            single, constant profile; i.e., they are 1D B-spline fits.
+        ingpm (:obj:`list`, optional):
+            Input good-pixel mask of each fit.  If None, all data
+            with positive inverse variance are fit.
+        n_workers (:obj:`int`, optional):
+            Number of threads used to perform the fits.
+        **kwargs:
+            Additional keyword arguments passed to
+            :func:`bspline_profile` for all fits.
+
+    Returns:
+        :obj:`list`: The tuple returned by :func:`bspline_profile` for
+        each fit.
+    """
+    nfit = len(xdata)
+    if len(ydata) != nfit or len(invvar) != nfit:
+        msgs.error('Must provide the same number of x, y, and inverse-variance vectors.')
+    if profile_basis is None:
+        profile_basis = [np.ones_like(x) for x in xdata]
+    if ingpm is None:
+        ingpm = [None]*nfit
+
+    def fit(args):
+        return bspline_profile(*args[:4], ingpm=args[4], **kwargs)
+
+    args = zip(xdata, ydata, invvar, profile_basis, ingpm)
+    if n_workers == 1 or nfit < 2:
+        return [fit(a) for a in args]
+    with futures.ThreadPoolExecutor(max_workers=min(n_workers, nfit)) as pool:
+        return list(pool.map(fit, args))
+
+
 def bspline_qa(xdata, ydata, sset, gpm, yfit, xlabel=None, ylabel=None, title=None, show=True):
     """
     Construct a QA plot of the bspline fit.
@@ -6,6 +6,7 @@ Module for guiding 1D Wavelength Calibration
 import os
 import copy
 import inspect
+from collections import OrderedDict
 
 from IPython import embed
 
@@ -23,6 +24,19 @@ from pypeit.core.gui.identify import Identify
 from pypeit import utils
 from pypeit import datamodel
 
+# Wavelength images built by this process; see build_waveimg
+_waveimg_cache = OrderedDict()
+max_cached_waveimgs = 8
+"""
+Maximum number of wavelength images held in memory by
+:func:`build_waveimg`.
+"""
+waveimg_flexure_precision = 2
+"""
+Number of decimal places to which the spatial flexure is rounded when
+reusing a wavelength image built by :func:`build_waveimg`.
+"""
+
 #class WaveCalib(datamodel.DataContainer):
 #    # Peg the version of this class to that of PypeItImage
 #    version = '1.0.0'
@@ -513,14 +527,82 @@ class WaveCalib(object):
 
 
 
+def eval_wave_solutions(fits, x, slit, chunk=2**18):
+    """
+    Evaluate the 1D wavelength solutions of many slits in one pass.
+
+    The pixels of all slits using the same functional form and number
+    of coefficients are evaluated together by gathering the
+    coefficients and normalization of each pixel's slit, instead of
+    calling :func:`pypeit.utils.func_val` once per slit.  Functional
+    forms without a vectorized evaluation fall back to
+    :func:`pypeit.utils.func_val`.
+
+    Args:
+        fits (:obj:`list`):
+            The wavelength solution (dictionary with the ``fitc``,
+            ``function``, ``fmin``, and ``fmax`` keys) of each slit.
+        x (`numpy.ndarray`_):
+            Coordinates (i.e., tilts) of the pixels to evaluate.
+        slit (`numpy.ndarray`_):
+            Index in ``fits`` of the slit with each pixel in ``x``.
+        chunk (:obj:`int`, optional):
+            Number of pixels evaluated at once; this limits the
+            memory used by the gathered coefficients.
+
+    Returns:
+        `numpy.ndarray`_: The wavelengths of the pixels in ``x``.
+    """
+    wave = np.zeros(x.size, dtype=float)
+    groups = np.array(['{0}{1}'.format(f['function'], len(f['fitc'])) for f in fits])
+    for group in np.unique(groups):
+        members = np.where(groups == group)[0]
+        func = fits[members[0]]['function']
+        if func not in ['polynomial', 'legendre', 'chebyshev'] \
+                or any(fits[i]['fmin'] is None or fits[i]['fmax'] is None for i in members):
+            for i in members:
+                indx = slit == i
+                wave[indx] = utils.func_val(fits[i]['fitc'], x[indx], func,
+                                            minx=fits[i]['fmin'], maxx=fits[i]['fmax'])
+            continue
+
+        # Coefficients and normalization of each slit
+        coeff = np.zeros((len(fits[members[0]]['fitc']), len(fits)), dtype=float)
+        xmin = np.zeros(len(fits), dtype=float)
+        xmax = np.ones(len(fits), dtype=float)
+        for i in members:
+            coeff[:,i] = fits[i]['fitc']
+            xmin[i], xmax[i] = fits[i]['fmin'], fits[i]['fmax']
+        indx = np.where(np.isin(slit, members))[0]
+        for s in range(0, indx.size, chunk):
+            _indx = indx[s:s+chunk]
+            _slit = slit[_indx]
+            if func == 'polynomial':
+                wave[_indx] = np.polynomial.polynomial.polyval(x[_indx], coeff[:,_slit],
+                                                               tensor=False)
+                continue
+            xv = 2.0 * (x[_indx]-xmin[_slit])/(xmax[_slit]-xmin[_slit]) - 1.0
+            wave[_indx] = np.polynomial.legendre.legval(xv, coeff[:,_slit], tensor=False) \
+                            if func == 'legendre' \
+                            else np.polynomial.chebyshev.chebval(xv, coeff[:,_slit], tensor=False)
+    return wave
+
+
 # TODO -- Move this as a method on a WaveCalib DataContainer
-def build_waveimg(spectrograph, tilts, slits, wv_calib, spat_flexure=None):
+def build_waveimg(spectrograph, tilts, slits, wv_calib, spat_flexure=None, cache_key=None):
     """
     Main algorithm to build the wavelength image
 
     Only applied to good slits, which means any non-flagged or flagged
      in the exclude_for_reducing list
 
+    The wavelength solutions of all slits are evaluated in one pass;
+    see :func:`eval_wave_solutions`.  If ``cache_key`` is provided, the
+    image is held in memory and reused by later calls with the same
+    key, spatial flexure (see :attr:`waveimg_flexure_precision`), slit
+    edges, and good slits, e.g., for all the exposures reduced with
+    the same calibrations.
+
     Args:
         spectrograph (:obj:`pypeit.spectrographs.spectrograph.Spectrograph`):
             Spectrograph object
@@ -529,6 +611,10 @@ def build_waveimg(spectrograph, tilts, slits, wv_calib, spat_flexure=None):
         slits (:class:`pypeit.slittrace.SlitTraceSet`):
         wv_calib (dict):
         spat_flexure (float, optional):
+        cache_key (:obj:`tuple`, optional):
+            Identifies the tilts and wavelength calibrations used to
+            build the image, e.g., their master keys and directory.
+            If None, the image is not cached.
 
     Returns:
         `numpy.ndarray`_: The wavelength image.
@@ -538,9 +624,19 @@ def build_waveimg(spectrograph, tilts, slits, wv_calib, spat_flexure=None):
     bpm = slits.mask.astype(bool)
     bpm &= np.invert(slits.bitmask.flagged(slits.mask, flag=slits.bitmask.exclude_for_reducing))
     ok_slits = np.invert(bpm)
+
+    if cache_key is not None:
+        flex = 0. if spat_flexure is None else spat_flexure
+        key = tuple(cache_key) + (round(flex, waveimg_flexure_precision), tilts.shape,
+                                  slits.edges_fingerprint(), tuple(slits.spat_id[ok_slits]))
+        if key in _waveimg_cache:
+            msgs.info('Reusing wavelength image')
+            _waveimg_cache.move_to_end(key)
+            return _waveimg_cache[key].copy()
+
     #
     image = np.zeros_like(tilts)
-    slitmask = slits.slit_img(flexure=spat_flexure, exclude_flag=slits.bitmask.exclude_for_reducing)
+    slit_index = slits.slit_pixel_index(flexure=spat_flexure, exclude_flag=slits.bitmask.exclude_for_reducing)
 
     par = wv_calib['par']
     slit_spat_pos = slits.spatial_coordinates(flexure=spat_flexure)
@@ -551,32 +647,46 @@ def build_waveimg(spectrograph, tilts, slits, wv_calib, spat_flexure=None):
         if len(wv_calib['fit2d']['orders']) != np.sum(ok_slits):
             msgs.error('wv_calib and ok_slits do not line up. Something is very wrong!')
 
-    # Unpack some 2-d fit parameters if this is echelle
-    for slit_spat in slits.spat_id[ok_slits]:
-        thismask = (slitmask == slit_spat)
-        if not np.any(thismask):
-            msgs.error("Something failed in wavelengths or masking..")
-        if par['echelle']:
-            # TODO: Put this in `SlitTraceSet`?
-            order, indx = spectrograph.slit2order(slit_spat_pos[slits.spatid_to_zero(slit_spat)])
-            # evaluate solution
-            image[thismask] = utils.func_val(wv_calib['fit2d']['coeffs'],
-                                             tilts[thismask],
-                                             wv_calib['fit2d']['func2d'],
-                                             x2=np.ones_like(tilts[thismask])*order,
-                                             minx=wv_calib['fit2d']['min_spec'],
-                                             maxx=wv_calib['fit2d']['max_spec'],
-                                             minx2=wv_calib['fit2d']['min_order'],
-                                             maxx2=wv_calib['fit2d']['max_order'])
-            image[thismask] /= order
-        else:
-            #iwv_calib = wv_calib[str(slit)]
-            iwv_calib = wv_calib[str(slit_spat)]
-            image[thismask] = utils.func_val(iwv_calib['fitc'], tilts[thismask],
-                                             iwv_calib['function'],
-                                             minx=iwv_calib['fmin'],
-                                             maxx=iwv_calib['fmax'])
+    # Flattened indices of the pixels in all slits, and the slit with
+    # each pixel
+    ok_spat_id = slits.spat_id[ok_slits]
+    thisindx = [slit_index.indices(slit_spat) for slit_spat in ok_spat_id]
+    npix = np.array([indx.size for indx in thisindx])
+    if np.any(npix == 0):
+        msgs.error("Something failed in wavelengths or masking..")
+    thisindx = np.concatenate(thisindx) if len(thisindx) > 0 else np.empty(0, dtype=int)
+    slit = np.repeat(np.arange(ok_spat_id.size), npix)
+
+    if par['echelle']:
+        # TODO: Put this in `SlitTraceSet`?
+        order = np.array([spectrograph.slit2order(slit_spat_pos[slits.spatid_to_zero(slit_spat)])[0]
+                          for slit_spat in ok_spat_id])[slit]
+        # evaluate solution
+        image.flat[thisindx] = utils.func_val(wv_calib['fit2d']['coeffs'], tilts.flat[thisindx],
+                                              wv_calib['fit2d']['func2d'], x2=order,
+                                              minx=wv_calib['fit2d']['min_spec'],
+                                              maxx=wv_calib['fit2d']['max_spec'],
+                                              minx2=wv_calib['fit2d']['min_order'],
+                                              maxx2=wv_calib['fit2d']['max_order'])
+        image.flat[thisindx] /= order
+    else:
+        image.flat[thisindx] = eval_wave_solutions([wv_calib[str(slit_spat)]
+                                                        for slit_spat in ok_spat_id],
+                                                   tilts.flat[thisindx], slit)
+
+    if cache_key is not None:
+        _waveimg_cache[key] = image.copy()
+        while len(_waveimg_cache) > max_cached_waveimgs:
+            _waveimg_cache.popitem(last=False)
     # Return
     return image
 
 
+def clear_waveimg_cache():
+    """
+    Remove all the wavelength images held in memory by
+    :func:`build_waveimg`.
+    """
+    _waveimg_cache.clear()
+
+
@@ -18,6 +18,7 @@ from pypeit import datamodel
 from pypeit import ginga
 from pypeit.core import arc
 from pypeit.core import tracewave
+from pypeit.core import pixels
 
 from IPython import embed
 
@@ -111,16 +112,18 @@ class WaveTilts(datamodel.DataContainer):
         _flexure = 0. if flexure is None else flexure
 
         final_tilts = np.zeros_like(slitmask).astype(float)
-        gdslit_spat = np.unique(slitmask[slitmask >= 0]).astype(int)
+        gdslit_spat, spec_box, spat_box = pixels.slit_bounding_boxes(slitmask)
         # Loop
-        for slit_spat in gdslit_spat:
+        for slit_spat, spec_range, spat_range in zip(gdslit_spat, spec_box, spat_box):
             slit_idx = self.spatid_to_zero(slit_spat)
-            # Calculate
+            # Calculate only within the bounding box of the slit
             coeff_out = self.coeffs[:self.spec_order[slit_idx]+1,:self.spat_order[slit_idx]+1,slit_idx]
-            _tilts = tracewave.fit2tilts(final_tilts.shape, coeff_out, self.func2d, spat_shift=-1*_flexure)
+            _tilts = tracewave.fit2tilts(final_tilts.shape, coeff_out, self.func2d, spat_shift=-1*_flexure,
+                                         spec_range=spec_range, spat_range=spat_range)
             # Fill
-            thismask_science = slitmask == slit_spat
-            final_tilts[thismask_science] = _tilts[thismask_science]
+            box = (slice(*spec_range), slice(*spat_range))
+            thismask_science = slitmask[box] == slit_spat
+            final_tilts[box][thismask_science] = _tilts[thismask_science]
         # Return
         return final_tilts
 